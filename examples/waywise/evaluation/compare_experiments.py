@@ -0,0 +1,28 @@
+from pathlib import Path
+
+import pandas as pd
+from examples.waywise.config import settings
+
+from fragmenter.evaluation.report import write_comparison
+from fragmenter.utils.logging import setup_logging
+
+# gpt-4o-mini list prices in USD per million tokens
+PROMPT_PRICE = 0.15
+COMPLETION_PRICE = 0.60
+
+
+def main():
+    setup_logging(logs_dir=settings.absolute_logs_dir)
+    ragas_dir = Path(__file__).parent / "ragas_data"
+    report = write_comparison(
+        experiments_dir=ragas_dir / "experiments",
+        output_path=ragas_dir / "experiment_comparison.csv",
+        prompt_price=PROMPT_PRICE,
+        completion_price=COMPLETION_PRICE,
+    )
+    with pd.option_context("display.width", 200, "display.max_columns", None):
+        print(report.round(3))
+
+
+if __name__ == "__main__":
+    main()
@@ -14,11 +14,16 @@ from ragas.llms import llm_factory
 
 from fragmenter.evaluation.data_loader import prepare_ragas_dataset
 from fragmenter.evaluation.evaluator import create_evaluation_task
+from fragmenter.evaluation.runner import EvaluationRunner
 from fragmenter.rag.inference import load_index
+from fragmenter.rag.utils import index_version
 from fragmenter.utils.logging import setup_logging
 
 load_dotenv()
 
+# Requests (RAG queries and metric calls) in flight across the whole run
+MAX_CONCURRENCY = int(os.environ.get("EVAL_MAX_CONCURRENCY", "4"))
+
 
 async def main():
     # 1. Setup
@@ -53,11 +58,21 @@ async def main():
             llm = llm_factory("gpt-4o-mini", client=client)
             embeddings = OpenAIEmbeddings(model="text-embedding-3-small", client=client)
 
+            # RAG responses are cached per index version, so re-scoring the
+            # same index (e.g. with another judge model) makes no RAG calls
+            runner = EvaluationRunner(
+                index,
+                max_concurrency=MAX_CONCURRENCY,
+                cache_dir=Path(__file__).parent / "ragas_data" / "responses",
+                index_version=index_version(settings.absolute_storage_dir),
+            )
+
             # Create evaluation task with dependencies
-            evaluate_row = create_evaluation_task(index, llm, embeddings)
+            evaluate_row = create_evaluation_task(index, llm, embeddings, runner)
 
             # Run experiment
             results = await evaluate_row.arun(dataset)
+            runner.log_summary()
             logger.info("Batch evaluation completed. Closing client...")
 
             # Add delay for graceful shutdown
@@ -1,13 +1,23 @@
 """Unified CLI entry point for Fragmenter.
 
 This module provides a single command-line interface with subcommands for all
-RAG system operations: initialization, scraping, indexing, querying, and inspection.
+RAG system operations: initialization, scraping, indexing, querying, retrieval,
+serving, inspection, tuning, and benchmarking.
 """
 
 from pathlib import Path
 
 import typer
 
+from fragmenter.scraping.crawler import (
+    DEFAULT_CONCURRENCY,
+    DEFAULT_PER_HOST,
+    DEFAULT_RATE,
+)
+from fragmenter.scraping.frontier import DEFAULT_MAX_DEPTH
+
+_LOGS_DIR = "fragmenter.logs_dir"
+
 # Create main app
 app = typer.Typer(
     name="fragmenter",
@@ -16,6 +26,68 @@ app = typer.Typer(
 )
 
 
+def _remember_logs_dir(ctx: typer.Context, value: Path | None) -> Path | None:
+    """Keep the subcommand's parsed --logs-dir, to write --profile output there."""
+    ctx.find_root().meta[_LOGS_DIR] = value
+    return value
+
+
+@app.callback()
+def main_options(
+    ctx: typer.Context,
+    profile: bool = typer.Option(
+        False,
+        "--profile",
+        help="Profile the command; writes a flamegraph profile and a "
+        "hot-function summary to the command's --logs-dir (default: ./logs).",
+    ),
+    profiler: str = typer.Option(
+        "sample",
+        "--profiler",
+        help="sample (all threads, low overhead, folded stacks for "
+        "flamegraphs) or cprofile (deterministic, main thread, .prof).",
+    ),
+    profile_memory: bool = typer.Option(
+        False,
+        "--profile-memory",
+        help="With --profile: also trace allocations (tracemalloc snapshot, "
+        "peak and top allocation sites). Slows the command down.",
+    ),
+    profile_top: int = typer.Option(
+        30,
+        "--profile-top",
+        help="Number of functions and allocation sites in the summary.",
+    ),
+    profile_dir: Path | None = typer.Option(
+        None,
+        "--profile-dir",
+        help="Write profiles here instead of the command's --logs-dir.",
+        file_okay=False,
+        dir_okay=True,
+        resolve_path=True,
+    ),
+) -> None:
+    """Options for all subcommands: profiling."""
+    if not profile:
+        return
+
+    from fragmenter.utils.profiling import Profile
+
+    try:
+        session = Profile(profiler=profiler, memory=profile_memory)
+    except ValueError as e:
+        raise typer.BadParameter(str(e), param_hint="--profiler")
+    session.start()
+
+    def write_profile() -> None:
+        session.stop()
+        output_dir = profile_dir or ctx.meta.get(_LOGS_DIR) or Path.cwd() / "logs"
+        session.write(output_dir, ctx.invoked_subcommand or "fragmenter", profile_top)
+
+    # Runs after the subcommand, also when it fails or exits early
+    ctx.call_on_close(write_profile)
+
+
 @app.command()
 def init(
     force: bool = typer.Option(
@@ -48,10 +120,59 @@ def scrape(
         "-f",
         help="Output format: markdown or html",
     ),
+    concurrency: int = typer.Option(
+        DEFAULT_CONCURRENCY,
+        "--concurrency",
+        "-c",
+        help="Maximum requests in flight over all hosts",
+    ),
+    per_host: int = typer.Option(
+        DEFAULT_PER_HOST,
+        "--per-host",
+        help="Maximum requests in flight per host",
+    ),
+    rate: float = typer.Option(
+        DEFAULT_RATE,
+        "--rate",
+        help="Maximum requests per second per host (0: no limit)",
+    ),
+    workers: int = typer.Option(
+        None,
+        "--workers",
+        help="Processes for page parsing (default: CPU count, max 8)",
+    ),
+    max_depth: int = typer.Option(
+        DEFAULT_MAX_DEPTH,
+        "--max-depth",
+        help="Links to follow from the base page and sitemap pages "
+        "(0: those pages only)",
+    ),
+    max_pages: int = typer.Option(
+        None,
+        "--max-pages",
+        help="Stop after fetching this many pages (default: no limit)",
+    ),
+    sitemaps: bool = typer.Option(
+        True,
+        "--sitemaps/--no-sitemaps",
+        help="Seed the crawl with the pages listed in the site's sitemaps",
+    ),
+    robots: bool = typer.Option(
+        True,
+        "--robots/--no-robots",
+        help="Obey robots.txt Disallow rules and Crawl-delay",
+    ),
+    state_file: Path | None = typer.Option(
+        None,
+        "--state-file",
+        help="Crawl state for incremental re-scrapes "
+        "(default: .crawl-state in the output directory)",
+    ),
     logs_dir: Path | None = typer.Option(
         None,
         "--logs-dir",
         "-l",
+        callback=_remember_logs_dir,
         help="Directory for logs (optional)",
         file_okay=False,
         dir_okay=True,
@@ -65,9 +186,20 @@ def scrape(
 ) -> None:
     """Scrape content from websites and save as markdown or HTML files.
 
+    The crawl starts at the base URL and the pages in the site's sitemaps,
+    then follows links under the base URL up to --max-depth, obeying
+    robots.txt. Pages are fetched concurrently, with per-host limits on
+    requests in flight (--per-host) and requests per second (--rate).
+
+    Re-running into the same output directory only downloads pages that
+    changed (conditional requests) and only rewrites files whose content
+    changed.
+
     Example:
         fragmenter scrape https://docs.example.com --output-dir ./data/docs
         fragmenter scrape https://example.com -o ./data --format html
+        fragmenter scrape https://docs.example.com -o ./data -c 32 --rate 5
+        fragmenter scrape https://docs.example.com -o ./data --max-pages 200
     """
     from fragmenter.tools.scrape import main as scrape_main
 
@@ -75,6 +207,15 @@ def scrape(
         url=url,
         output_dir=output_dir,
         format=format,
+        concurrency=concurrency,
+        per_host=per_host,
+        rate=rate,
+        workers=workers,
+        max_depth=max_depth,
+        max_pages=max_pages,
+        sitemaps=sitemaps,
+        robots=robots,
+        state_file=state_file,
         logs_dir=logs_dir,
         debug=debug,
     )
@@ -105,6 +246,7 @@ def rebuild_index(
         None,
         "--logs-dir",
         "-l",
+        callback=_remember_logs_dir,
         help="Directory for logs (optional)",
         file_okay=False,
         dir_okay=True,
@@ -148,6 +290,97 @@ def rebuild_index(
         "--num-workers",
         help="Number of parallel workers for ingestion pipeline.",
     ),
+    sharded: bool = typer.Option(
+        False,
+        "--sharded",
+        help="Store one collection per repository (detected automatically "
+        "once a storage directory is sharded).",
+    ),
+    shard: list[str] = typer.Option(
+        None,
+        "--shard",
+        help="Only rebuild this shard (repository name or 'unscoped'); "
+        "repeatable. Implies --sharded.",
+    ),
+    dedup: str = typer.Option(
+        None,
+        "--dedup",
+        help="Near-duplicate chunks: off, report (log only), skip (store one "
+        "copy) or alias (store one copy listing the others' paths).",
+    ),
+    dedup_threshold: float = typer.Option(
+        None,
+        "--dedup-threshold",
+        help="Similarity (0-1) from which chunks count as near-duplicates "
+        "(default: 0.9).",
+    ),
+    strip_boilerplate: bool = typer.Option(
+        None,
+        "--strip-boilerplate/--no-strip-boilerplate",
+        help="Exclude license headers and other blocks repeated across files "
+        "from embeddings (stored text is unchanged).",
+    ),
+    boilerplate_min_share: float = typer.Option(
+        None,
+        "--boilerplate-min-share",
+        help="Share of files (0-1) a block must appear in to count as "
+        "boilerplate (default: 0.05).",
+    ),
+    vector_store: str = typer.Option(
+        None,
+        "--vector-store",
+        help="Vector store for a new index: chroma (HNSW) or flat (exact, "
+        "memory-mapped). Default: keep the existing backend, else chroma.",
+    ),
+    flat_dtype: str = typer.Option(
+        None,
+        "--flat-dtype",
+        help="Vector dtype for a new flat store: float32, float16 or int8.",
+    ),
+    flat_dimensions: int = typer.Option(
+        None,
+        "--flat-dimensions",
+        help="Keep only the leading N embedding dimensions in a new flat "
+        "store (Matryoshka models only).",
+    ),
+    flat_binary: bool = typer.Option(
+        None,
+        "--flat-binary/--no-flat-binary",
+        help="Shortlist by binary sketch and rescore (new flat stores).",
+    ),
+    hnsw_space: str = typer.Option(
+        None,
+        "--hnsw-space",
+        help="HNSW distance for new collections: l2, cosine or ip.",
+    ),
+    hnsw_m: int = typer.Option(
+        None,
+        "--hnsw-m",
+        help="HNSW max neighbors per node for new collections (Chroma: 16).",
+    ),
+    hnsw_construction_ef: int = typer.Option(
+        None,
+        "--hnsw-construction-ef",
+        help="HNSW ef_construction for new collections (Chroma: 100).",
+    ),
+    hnsw_search_ef: int = typer.Option(
+        None,
+        "--hnsw-search-ef",
+        help="HNSW ef_search (Chroma: 100); also updates existing collections.",
+    ),
+    metrics_file: Path | None = typer.Option(
+        None,
+        "--metrics-file",
+        help="Also write the per-stage build timings as a Prometheus textfile "
+        "(e.g. for the node_exporter textfile collector).",
+        dir_okay=False,
+        resolve_path=True,
+    ),
+    progress: bool = typer.Option(
+        True,
+        "--progress/--no-progress",
+        help="Show live per-stage progress with throughput and ETA.",
+    ),
 ) -> None:
     """Build or update the RAG index with automatic change detection.
 
@@ -157,6 +390,13 @@ def rebuild_index(
     Example:
            fragmenter rebuild-index --data-dir ./data --storage-dir ./vector_store
            fragmenter rebuild-index -d ./data -s ./index --debug
+           fragmenter rebuild-index -d ./data -s ./index --sharded
+           fragmenter rebuild-index -d ./data -s ./index --shard myrepo
+           fragmenter rebuild-index -d ./data -s ./index --hnsw-space cosine
+           fragmenter rebuild-index -d ./data -s ./index --vector-store flat
+           fragmenter rebuild-index -d ./data -s ./index --dedup skip
+           fragmenter rebuild-index -d ./data -s ./index --strip-boilerplate
+           fragmenter rebuild-index -d ./data -s ./index --metrics-file build.prom
     """
     from fragmenter.tools.rebuild_index import main as rebuild_main
 
@@ -171,6 +411,22 @@ def rebuild_index(
         min_chunk_size_config=min_chunk_size_config,
         enable_extractors=enable_extractors,
         num_workers=num_workers,
+        sharded=sharded,
+        shard=shard,
+        dedup=dedup,
+        dedup_threshold=dedup_threshold,
+        strip_boilerplate=strip_boilerplate,
+        boilerplate_min_share=boilerplate_min_share,
+        vector_store=vector_store,
+        flat_dtype=flat_dtype,
+        flat_dimensions=flat_dimensions,
+        flat_binary=flat_binary,
+        hnsw_space=hnsw_space,
+        hnsw_m=hnsw_m,
+        hnsw_construction_ef=hnsw_construction_ef,
+        hnsw_search_ef=hnsw_search_ef,
+        metrics_file=metrics_file,
+        progress=progress,
     )
 
 
@@ -191,14 +447,27 @@ def query(
         exists=True,
         dir_okay=False,
     ),
+    batch: Path = typer.Option(
+        None,
+        "--batch",
+        help='JSONL file with one {"query": ...} object per line '
+        "(requires --output for the results JSONL)",
+        exists=True,
+        dir_okay=False,
+    ),
+    concurrency: int = typer.Option(
+        4,
+        "--concurrency",
+        help="Maximum number of concurrent queries in --batch mode",
+    ),
     # Paths
     storage_dir: Path = typer.Option(
         ...,
         "--storage-dir",
         "-s",
-        help="Index storage directory",
+        help="Index storage directory or .fragidx snapshot",
         exists=True,
-        file_okay=False,
+        file_okay=True,
         dir_okay=True,
     ),
     # Output
@@ -213,11 +482,29 @@ def query(
         "--output-dir",
         help="Output directory for saved files",
     ),
+    where: list[str] = typer.Option(
+        None,
+        "--where",
+        "-w",
+        help="Metadata filter key=value, repeatable "
+        "(repository, file_type, path, kind=code|docs)",
+    ),
     code_only: bool = typer.Option(
         False,
         "--code-only",
         help="Extract and save only code blocks from response",
     ),
+    stream: bool = typer.Option(
+        False,
+        "--stream",
+        help="Print (and save) tokens as they are generated (not with --batch)",
+    ),
+    timings: bool = typer.Option(
+        False,
+        "--timings",
+        help="Report the time per query stage, time to first token and "
+        "retrieved context size",
+    ),
     language: str = typer.Option(
         None,
         "--language",
@@ -260,6 +547,11 @@ def query(
         "--embed-model",
         help="Embedding model name",
     ),
+    search_ef: int = typer.Option(
+        None,
+        "--search-ef",
+        help="HNSW ef_search for queries (higher: better recall, slower)",
+    ),
     # Other
     ollama_base_url: str = typer.Option(
         None,
@@ -270,6 +562,7 @@ def query(
         None,
         "--logs-dir",
         "-l",
+        callback=_remember_logs_dir,
         help="Directory for logs (optional)",
         file_okay=False,
         dir_okay=True,
@@ -292,16 +585,25 @@ def query(
            fragmenter query --storage-dir ./index --query "How does the system work?"
            fragmenter query -s ./index -q "Explain the code" -o response.md
            fragmenter query -s ./index --file question.txt --code-only --language cpp
+           fragmenter query -s ./index -q "Write a parser" --stream -o parser.md
+           fragmenter query -s ./index --batch prompts.jsonl -o results.jsonl
+           fragmenter query -s ./index -q "..." -w repository=myrepo -w kind=code
+           fragmenter query -s ./index -q "Why is this slow?" --timings
     """
     from fragmenter.tools.query_index import main as query_main
 
     query_main(
         query=query_text,
         file=file,
+        batch=batch,
+        concurrency=concurrency,
         storage_dir=storage_dir,
         output=output,
         output_dir=output_dir,
+        where=where,
         code_only=code_only,
+        stream=stream,
+        timings=timings,
         language=language,
         llm_provider=llm_provider,
         llm_model=llm_model,
@@ -310,6 +612,7 @@ def query(
         llm_timeout=llm_timeout,
         embed_provider=embed_provider,
         embed_model=embed_model,
+        search_ef=search_ef,
         ollama_base_url=ollama_base_url,
         logs_dir=logs_dir,
         env_file=env_file,
@@ -317,45 +620,824 @@ def query(
     )
 
 
-@app.command("inspect-index")
-def inspect_index(
+@app.command()
+def retrieve(
+    query_text: str = typer.Option(
+        None,
+        "--query",
+        "-q",
+        help="Query to search for (use this OR --file, not both)",
+    ),
+    file: Path = typer.Option(
+        None,
+        "--file",
+        "-f",
+        help="File containing the query",
+        exists=True,
+        dir_okay=False,
+    ),
     storage_dir: Path = typer.Option(
-        "vector_store",
+        ...,
         "--storage-dir",
         "-s",
-        help="Directory containing the index",
+        help="Index storage directory or .fragidx snapshot",
         exists=True,
+        file_okay=True,
+        dir_okay=True,
+    ),
+    top_k: int = typer.Option(
+        5,
+        "--top-k",
+        "-k",
+        help="Number of chunks to return",
+    ),
+    where: list[str] = typer.Option(
+        None,
+        "--where",
+        "-w",
+        help="Metadata filter key=value, repeatable "
+        "(repository, file_type, path, kind=code|docs)",
+    ),
+    output: Path = typer.Option(
+        None,
+        "--output",
+        "-o",
+        help="Write JSON to this file instead of stdout",
+    ),
+    embed_provider: str = typer.Option(
+        None,
+        "--embed-provider",
+        help="Embedding provider: openai, huggingface, ollama",
+    ),
+    embed_model: str = typer.Option(
+        None,
+        "--embed-model",
+        help="Embedding model name",
+    ),
+    search_ef: int = typer.Option(
+        None,
+        "--search-ef",
+        help="HNSW ef_search for queries (higher: better recall, slower)",
+    ),
+    ollama_base_url: str = typer.Option(
+        None,
+        "--ollama-url",
+        help="Ollama base URL (default: http://localhost:11434)",
+    ),
+    logs_dir: Path | None = typer.Option(
+        None,
+        "--logs-dir",
+        "-l",
+        callback=_remember_logs_dir,
+        help="Directory for logs (optional)",
         file_okay=False,
         dir_okay=True,
         resolve_path=True,
     ),
+    env_file: Path | None = typer.Option(
+        None,
+        "--env-file",
+        help="Path to .env file (default: search parent directories)",
+    ),
+    debug: bool = typer.Option(
+        False,
+        "--debug",
+        help="Enable debug logging",
+    ),
+) -> None:
+    """Retrieve ranked chunks with scores and metadata, without LLM synthesis.
+
+    Prints JSON with the top-k chunks (text, score, metadata, character span)
+    to stdout, or saves it with --output. Only the embedding model is used.
+
+    Example:
+           fragmenter retrieve -s ./vector_store -q "How does X work?"
+           fragmenter retrieve -s ./vector_store -q "parser" -k 20 -o ctx.json
+           fragmenter retrieve -s ./vector_store -q "parser" -w path=src/rag
+    """
+    from fragmenter.tools.retrieve import main as retrieve_main
+
+    retrieve_main(
+        query=query_text,
+        file=file,
+        storage_dir=storage_dir,
+        top_k=top_k,
+        where=where,
+        output=output,
+        embed_provider=embed_provider,
+        embed_model=embed_model,
+        search_ef=search_ef,
+        ollama_base_url=ollama_base_url,
+        logs_dir=logs_dir,
+        env_file=env_file,
+        debug=debug,
+    )
+
+
+@app.command()
+def serve(
+    storage_dir: Path = typer.Option(
+        ...,
+        "--storage-dir",
+        "-s",
+        help="Index storage directory or .fragidx snapshot",
+        exists=True,
+        file_okay=True,
+        dir_okay=True,
+    ),
+    host: str = typer.Option(
+        "127.0.0.1",
+        "--host",
+        help="Interface to bind to",
+    ),
+    port: int = typer.Option(
+        8000,
+        "--port",
+        "-p",
+        help="Port to listen on",
+    ),
+    top_k: int = typer.Option(
+        5,
+        "--top-k",
+        help="Default number of chunks to retrieve per request",
+    ),
+    # LLM configuration
+    llm_provider: str = typer.Option(
+        None,
+        "--llm-provider",
+        help="LLM provider: openai, ollama, anthropic, huggingface",
+    ),
+    llm_model: str = typer.Option(
+        None,
+        "--llm-model",
+        help="LLM model name",
+    ),
+    llm_temperature: float = typer.Option(
+        None,
+        "--temperature",
+        help="LLM temperature (0.0-1.0)",
+    ),
+    llm_max_tokens: int = typer.Option(
+        None,
+        "--max-tokens",
+        help="Maximum response tokens",
+    ),
+    llm_timeout: float = typer.Option(
+        None,
+        "--timeout",
+        help="LLM request timeout in seconds (default: 600)",
+    ),
+    # Embedding configuration
+    embed_provider: str = typer.Option(
+        None,
+        "--embed-provider",
+        help="Embedding provider: openai, huggingface, ollama",
+    ),
+    embed_model: str = typer.Option(
+        None,
+        "--embed-model",
+        help="Embedding model name",
+    ),
+    search_ef: int = typer.Option(
+        None,
+        "--search-ef",
+        help="HNSW ef_search for queries (higher: better recall, slower)",
+    ),
+    # Other
+    ollama_base_url: str = typer.Option(
+        None,
+        "--ollama-url",
+        help="Ollama base URL (default: http://localhost:11434)",
+    ),
     logs_dir: Path | None = typer.Option(
         None,
         "--logs-dir",
         "-l",
+        callback=_remember_logs_dir,
         help="Directory for logs (optional)",
         file_okay=False,
         dir_okay=True,
         resolve_path=True,
     ),
+    env_file: Path | None = typer.Option(
+        None,
+        "--env-file",
+        help="Path to .env file (default: search parent directories)",
+    ),
     debug: bool = typer.Option(
         False,
         "--debug",
         help="Enable debug logging",
     ),
 ) -> None:
-    """Inspect the RAG index and display statistics.
+    """Serve the RAG index over HTTP, keeping it loaded between queries.
 
-    Shows document counts, chunk statistics, node types, source directories,
-    and example file paths.
+    Endpoints: GET /health, POST /retrieve, POST /query (set "stream": true
+    for newline-delimited JSON token streaming).
 
     Example:
-           fragmenter inspect-index
-           fragmenter inspect-index --storage-dir ./custom_index --debug
+           fragmenter serve --storage-dir ./vector_store
+           fragmenter serve -s ./vector_store --host 0.0.0.0 --port 9000
     """
-    from fragmenter.tools.inspect_index import main as inspect_main
+    from fragmenter.tools.serve import main as serve_main
+
+    serve_main(
+        storage_dir=storage_dir,
+        host=host,
+        port=port,
+        top_k=top_k,
+        llm_provider=llm_provider,
+        llm_model=llm_model,
+        llm_temperature=llm_temperature,
+        llm_max_tokens=llm_max_tokens,
+        llm_timeout=llm_timeout,
+        embed_provider=embed_provider,
+        embed_model=embed_model,
+        search_ef=search_ef,
+        ollama_base_url=ollama_base_url,
+        logs_dir=logs_dir,
+        env_file=env_file,
+        debug=debug,
+    )
 
-    inspect_main(storage_dir=storage_dir, logs_dir=logs_dir, debug=debug)
+
+@app.command("inspect-index")
+def inspect_index(
+    storage_dir: Path = typer.Option(
+        "vector_store",
+        "--storage-dir",
+        "-s",
+        help="Directory containing the index",
+        exists=True,
+        file_okay=False,
+        dir_okay=True,
+        resolve_path=True,
+    ),
+    full: bool = typer.Option(
+        False,
+        "--full",
+        help="Recompute the statistics from the stored chunks",
+    ),
+    logs_dir: Path | None = typer.Option(
+        None,
+        "--logs-dir",
+        "-l",
+        callback=_remember_logs_dir,
+        help="Directory for logs (optional)",
+        file_okay=False,
+        dir_okay=True,
+        resolve_path=True,
+    ),
+    debug: bool = typer.Option(
+        False,
+        "--debug",
+        help="Enable debug logging",
+    ),
+) -> None:
+    """Inspect the RAG index and display statistics.
+
+    Shows document counts, chunk statistics, content types, source
+    directories, and example file paths. The statistics are read from the
+    manifest that rebuild-index maintains; --full rescans the stored chunks.
+
+    Example:
+           fragmenter inspect-index
+           fragmenter inspect-index --storage-dir ./custom_index --debug
+           fragmenter inspect-index --full
+    """
+    from fragmenter.tools.inspect_index import main as inspect_main
+
+    inspect_main(storage_dir=storage_dir, full=full, logs_dir=logs_dir, debug=debug)
+
+
+@app.command("tune-index")
+def tune_index(
+    storage_dir: Path = typer.Option(
+        ...,
+        "--storage-dir",
+        "-s",
+        help="Index storage directory",
+        exists=True,
+        file_okay=False,
+        dir_okay=True,
+        resolve_path=True,
+    ),
+    shard: str = typer.Option(
+        None,
+        "--shard",
+        help="Shard to tune (repository name or 'unscoped'; sharded indexes)",
+    ),
+    m: list[int] = typer.Option(
+        None,
+        "--m",
+        help="max_neighbors values to try (repeatable, default: 16 32)",
+    ),
+    construction_ef: list[int] = typer.Option(
+        None,
+        "--construction-ef",
+        help="ef_construction values to try (repeatable, default: 100 200)",
+    ),
+    search_ef: list[int] = typer.Option(
+        None,
+        "--search-ef",
+        help="ef_search values to try (repeatable, default: 10 25 50 100 200)",
+    ),
+    top_k: int = typer.Option(
+        10,
+        "--top-k",
+        "-k",
+        help="k used for recall@k and the timed queries",
+    ),
+    num_queries: int = typer.Option(
+        200,
+        "--queries",
+        help="Number of stored vectors used as queries",
+    ),
+    target_recall: float = typer.Option(
+        0.95,
+        "--target-recall",
+        help="Pick the fastest setting with at least this recall",
+    ),
+    apply: bool = typer.Option(
+        False,
+        "--apply",
+        help="Rebuild the collection with the chosen setting (no re-embedding)",
+    ),
+    logs_dir: Path | None = typer.Option(
+        None,
+        "--logs-dir",
+        "-l",
+        callback=_remember_logs_dir,
+        help="Directory for logs (optional)",
+        file_okay=False,
+        dir_okay=True,
+        resolve_path=True,
+    ),
+    debug: bool = typer.Option(
+        False,
+        "--debug",
+        help="Enable debug logging",
+    ),
+) -> None:
+    """Tune HNSW parameters for recall and latency on the real collection.
+
+    Copies the stored embeddings into temporary collections for a grid of
+    M / construction_ef / search_ef values and reports recall@k against
+    exact search plus p50/p99 query latency. With --apply, the collection is
+    rebuilt with the fastest setting meeting --target-recall, reusing the
+    stored embeddings.
+
+    Example:
+           fragmenter tune-index -s ./vector_store
+           fragmenter tune-index -s ./vector_store --m 32 --search-ef 64 --apply
+    """
+    from fragmenter.tools.tune_index import main as tune_main
+
+    tune_main(
+        storage_dir=storage_dir,
+        shard=shard,
+        m=m,
+        construction_ef=construction_ef,
+        search_ef=search_ef,
+        top_k=top_k,
+        num_queries=num_queries,
+        target_recall=target_recall,
+        apply=apply,
+        logs_dir=logs_dir,
+        debug=debug,
+    )
+
+
+@app.command()
+def benchmark(
+    files: list[int] = typer.Option(
+        None,
+        "--files",
+        "-n",
+        help="Corpus sizes in files (repeatable, default: 1000)",
+    ),
+    work_dir: Path | None = typer.Option(
+        None,
+        "--work-dir",
+        "-w",
+        help="Keep corpora and indexes here (default: temporary directory)",
+        file_okay=False,
+        dir_okay=True,
+        resolve_path=True,
+    ),
+    top_k: int = typer.Option(
+        10,
+        "--top-k",
+        "-k",
+        help="k used for recall@k",
+    ),
+    num_queries: int = typer.Option(
+        200,
+        "--queries",
+        help="Number of timed queries per corpus",
+    ),
+    num_workers: int = typer.Option(
+        2,
+        "--workers",
+        help="Ingestion workers",
+    ),
+    backend: str = typer.Option(
+        "chroma",
+        "--backend",
+        help="Vector store backend: chroma or flat",
+    ),
+    seed: int = typer.Option(
+        0,
+        "--seed",
+        help="Seed for corpus generation and query sampling",
+    ),
+    min_recall: float | None = typer.Option(
+        None,
+        "--min-recall",
+        help="Fail when recall@k of any corpus is lower",
+    ),
+    max_p95_ms: float | None = typer.Option(
+        None,
+        "--max-p95-ms",
+        help="Fail when p95 query latency of any corpus is higher",
+    ),
+    output: Path | None = typer.Option(
+        None,
+        "--output",
+        "-o",
+        help="Write the results as JSON",
+        dir_okay=False,
+        resolve_path=True,
+    ),
+    logs_dir: Path | None = typer.Option(
+        None,
+        "--logs-dir",
+        "-l",
+        callback=_remember_logs_dir,
+        help="Directory for logs (optional)",
+        file_okay=False,
+        dir_okay=True,
+        resolve_path=True,
+    ),
+    debug: bool = typer.Option(
+        False,
+        "--debug",
+        help="Enable debug logging",
+    ),
+) -> None:
+    """Benchmark index builds and retrieval offline on synthetic corpora.
+
+    Generates code and documentation corpora of the given sizes, indexes
+    them with a deterministic hashing embedder (no API keys or network) and
+    reports build throughput, recall@k, MRR and p50/p95/p99 query latency.
+    With --min-recall or --max-p95-ms, exits with status 1 on a regression.
+
+    Example:
+           fragmenter benchmark
+           fragmenter benchmark -n 1000 -n 10000 -n 100000 -o bench.json
+           fragmenter benchmark --min-recall 0.9 --backend flat
+    """
+    from fragmenter.tools.benchmark import main as benchmark_main
+
+    benchmark_main(
+        files=files,
+        work_dir=work_dir,
+        top_k=top_k,
+        num_queries=num_queries,
+        num_workers=num_workers,
+        backend=backend,
+        seed=seed,
+        min_recall=min_recall,
+        max_p95_ms=max_p95_ms,
+        output=output,
+        logs_dir=logs_dir,
+        debug=debug,
+    )
+
+
+@app.command("benchmark-ingestion")
+def benchmark_ingestion(
+    parsers: list[str] = typer.Option(
+        None,
+        "--parser",
+        "-p",
+        help="Workloads to run (repeatable, default: cpp yaml markdown pdf)",
+    ),
+    scale: float = typer.Option(
+        1.0,
+        "--scale",
+        help="Multiplier for the number of files per workload",
+    ),
+    work_dir: Path | None = typer.Option(
+        None,
+        "--work-dir",
+        "-w",
+        help="Keep the generated inputs here (default: temporary directory)",
+        file_okay=False,
+        dir_okay=True,
+        resolve_path=True,
+    ),
+    seed: int = typer.Option(
+        0,
+        "--seed",
+        help="Seed for the generated inputs",
+    ),
+    baseline: Path | None = typer.Option(
+        None,
+        "--baseline",
+        "-b",
+        help="Earlier --output JSON; fail on slower or larger-memory parsers",
+        exists=True,
+        dir_okay=False,
+        resolve_path=True,
+    ),
+    tolerance: float = typer.Option(
+        0.2,
+        "--tolerance",
+        help="Allowed relative MB/s drop or peak memory growth vs. --baseline",
+    ),
+    output: Path | None = typer.Option(
+        None,
+        "--output",
+        "-o",
+        help="Write the results as JSON",
+        dir_okay=False,
+        resolve_path=True,
+    ),
+    logs_dir: Path | None = typer.Option(
+        None,
+        "--logs-dir",
+        "-l",
+        callback=_remember_logs_dir,
+        help="Directory for logs (optional)",
+        file_okay=False,
+        dir_okay=True,
+        resolve_path=True,
+    ),
+    debug: bool = typer.Option(
+        False,
+        "--debug",
+        help="Enable debug logging",
+    ),
+) -> None:
+    """Benchmark loading and chunking throughput per parser type.
+
+    Generates large C++ files, many small YAML files, long Markdown pages
+    and multi-page PDFs, then reports files/s, MB/s and chunks/s of
+    TypedDocumentReader.load_data, the files/s of load_documents and peak
+    memory. With --baseline, exits with status 1 when a parser got slower or
+    needs more memory than --tolerance allows.
+
+    Example:
+           fragmenter benchmark-ingestion -o parsers.json
+           fragmenter benchmark-ingestion -p cpp -p pdf --scale 0.5
+           fragmenter benchmark-ingestion --baseline parsers.json
+    """
+    from fragmenter.tools.benchmark_ingestion import main as benchmark_main
+
+    benchmark_main(
+        parsers=parsers,
+        scale=scale,
+        work_dir=work_dir,
+        seed=seed,
+        baseline=baseline,
+        tolerance=tolerance,
+        output=output,
+        logs_dir=logs_dir,
+        debug=debug,
+    )
+
+
+@app.command("compression-report")
+def compression_report(
+    storage_dir: Path = typer.Option(
+        ...,
+        "--storage-dir",
+        "-s",
+        help="Index storage directory",
+        exists=True,
+        file_okay=False,
+        dir_okay=True,
+        resolve_path=True,
+    ),
+    dimensions: list[int] = typer.Option(
+        None,
+        "--dimensions",
+        help="Truncation sizes to try (repeatable, default: full 1024 512 256)",
+    ),
+    dtype: list[str] = typer.Option(
+        None,
+        "--dtype",
+        help="Storage dtypes to try (repeatable, default: float32 float16 int8)",
+    ),
+    top_k: int = typer.Option(
+        10,
+        "--top-k",
+        "-k",
+        help="k used for recall@k",
+    ),
+    num_queries: int = typer.Option(
+        200,
+        "--queries",
+        help="Number of stored vectors held out as queries",
+    ),
+    target_recall: float = typer.Option(
+        0.95,
+        "--target-recall",
+        help="Recommend the smallest variant with at least this recall",
+    ),
+    logs_dir: Path | None = typer.Option(
+        None,
+        "--logs-dir",
+        "-l",
+        callback=_remember_logs_dir,
+        help="Directory for logs (optional)",
+        file_okay=False,
+        dir_okay=True,
+        resolve_path=True,
+    ),
+    debug: bool = typer.Option(
+        False,
+        "--debug",
+        help="Enable debug logging",
+    ),
+) -> None:
+    """Report recall vs. size for compressed variants of an index.
+
+    Evaluates dimension truncation (Matryoshka models only), float16/int8
+    quantization and the binary prefilter with rescoring on the stored
+    embeddings, against exact full-precision search. The recommended
+    variant is applied by rebuilding with the printed flat store options.
+
+    Example:
+           fragmenter compression-report -s ./vector_store
+           fragmenter compression-report -s ./vector_store --dimensions 512 --dtype int8
+    """
+    from fragmenter.tools.compression_report import main as report_main
+
+    report_main(
+        storage_dir=storage_dir,
+        dimensions=dimensions,
+        dtype=dtype,
+        top_k=top_k,
+        num_queries=num_queries,
+        target_recall=target_recall,
+        logs_dir=logs_dir,
+        debug=debug,
+    )
+
+
+@app.command("export-index")
+def export_index(
+    storage_dir: Path = typer.Option(
+        ...,
+        "--storage-dir",
+        "-s",
+        help="Index storage directory",
+        exists=True,
+        file_okay=False,
+        dir_okay=True,
+        resolve_path=True,
+    ),
+    output: Path = typer.Option(
+        ...,
+        "--output",
+        "-o",
+        help="Snapshot file to write (*.fragidx)",
+        dir_okay=False,
+        resolve_path=True,
+    ),
+    dtype: str = typer.Option(
+        None,
+        "--dtype",
+        help="Vector storage dtype: float32, float16, int8 (default: as indexed)",
+    ),
+    embed_provider: str = typer.Option(
+        None,
+        "--embed-provider",
+        help="Embedding provider recorded in the snapshot (default: from .env)",
+    ),
+    embed_model: str = typer.Option(
+        None,
+        "--embed-model",
+        help="Embedding model recorded in the snapshot (default: from .env)",
+    ),
+    logs_dir: Path | None = typer.Option(
+        None,
+        "--logs-dir",
+        "-l",
+        callback=_remember_logs_dir,
+        help="Directory for logs (optional)",
+        file_okay=False,
+        dir_okay=True,
+        resolve_path=True,
+    ),
+    env_file: Path = typer.Option(
+        None,
+        "--env-file",
+        help="Path to .env file (default: search parent directories)",
+    ),
+    debug: bool = typer.Option(
+        False,
+        "--debug",
+        help="Enable debug logging",
+    ),
+) -> None:
+    """Pack an index into a single .fragidx snapshot file.
+
+    The snapshot holds the vectors, compressed text and metadata, node ids,
+    the docstore and the embedding model fingerprint. Serve it directly with
+    `query`, `retrieve` or `serve -s index.fragidx`, or unpack it with
+    `import-index`.
+
+    Example:
+           fragmenter export-index -s ./vector_store -o index.fragidx
+           fragmenter export-index -s ./vector_store -o index.fragidx --dtype float16
+    """
+    from fragmenter.tools.export_index import main as export_main
+
+    export_main(
+        storage_dir=storage_dir,
+        output=output,
+        dtype=dtype,
+        embed_provider=embed_provider,
+        embed_model=embed_model,
+        logs_dir=logs_dir,
+        env_file=env_file,
+        debug=debug,
+    )
+
+
+@app.command("import-index")
+def import_index(
+    snapshot: Path = typer.Argument(
+        ...,
+        help="Snapshot file (*.fragidx)",
+        exists=True,
+        file_okay=True,
+        dir_okay=False,
+        resolve_path=True,
+    ),
+    storage_dir: Path = typer.Option(
+        ...,
+        "--storage-dir",
+        "-s",
+        help="New (empty) index storage directory",
+        file_okay=False,
+        dir_okay=True,
+        resolve_path=True,
+    ),
+    vector_store: str = typer.Option(
+        "flat",
+        "--vector-store",
+        help="Backend to import into: flat or chroma",
+    ),
+    verify: bool = typer.Option(
+        True,
+        "--verify/--no-verify",
+        help="Check section checksums before importing",
+    ),
+    logs_dir: Path | None = typer.Option(
+        None,
+        "--logs-dir",
+        "-l",
+        callback=_remember_logs_dir,
+        help="Directory for logs (optional)",
+        file_okay=False,
+        dir_okay=True,
+        resolve_path=True,
+    ),
+    env_file: Path = typer.Option(
+        None,
+        "--env-file",
+        help="Path to .env file (default: search parent directories)",
+    ),
+    debug: bool = typer.Option(
+        False,
+        "--debug",
+        help="Enable debug logging",
+    ),
+) -> None:
+    """Create a storage directory from a .fragidx snapshot.
+
+    Vectors are bulk-loaded as stored; nothing is re-embedded. The docstore
+    is restored, so later `rebuild-index` runs stay incremental.
+
+    Example:
+           fragmenter import-index index.fragidx -s ./vector_store
+           fragmenter import-index index.fragidx -s ./vector_store --vector-store chroma
+    """
+    from fragmenter.tools.import_index import main as import_main
+
+    import_main(
+        snapshot=snapshot,
+        storage_dir=storage_dir,
+        vector_store=vector_store,
+        verify=verify,
+        logs_dir=logs_dir,
+        env_file=env_file,
+        debug=debug,
+    )
 
 
 @app.command("collect-extensions")
@@ -377,6 +1459,7 @@ def collect_extensions(
         None,
         "--logs-dir",
         "-l",
+        callback=_remember_logs_dir,
         help="Directory for logs (optional)",
         file_okay=False,
         dir_okay=True,
@@ -1,6 +1,7 @@
 """Base configuration for the fragmenter RAG tool."""
 
 import os
+from typing import Any
 
 from pydantic_settings import BaseSettings, SettingsConfigDict
 
@@ -31,6 +32,29 @@ class RAGSettings(BaseSettings):
     EMBED_PROVIDER: str = "openai"
     EMBED_MODEL: str = "text-embedding-3-small"
 
+    # Vector store backend: chroma (HNSW) or flat (exact, memory-mapped NumPy).
+    # Unset keeps the backend of an existing index, or chroma for a new one.
+    VECTOR_STORE: str | None = None
+    # Flat store compression, fixed when the store is created
+    FLAT_STORE_DTYPE: str = "float32"  # float32, float16 or int8
+    FLAT_STORE_DIMENSIONS: int | None = None  # Matryoshka truncation
+    FLAT_STORE_BINARY: bool = False  # Binary prefilter + rescoring
+
+    # Vector index (Chroma HNSW) configuration; unset keeps Chroma's defaults
+    HNSW_SPACE: str | None = None  # Distance function: l2, cosine or ip
+    HNSW_M: int | None = None  # Max neighbors per graph node (Chroma: 16)
+    HNSW_CONSTRUCTION_EF: int | None = None  # Build-time candidate list (100)
+    HNSW_SEARCH_EF: int | None = None  # Query-time candidate list (100)
+
+    # Near-duplicate chunks: off, report, skip or alias (see rag/dedup.py)
+    DEDUP_POLICY: str = "off"
+    DEDUP_THRESHOLD: float = 0.9  # Estimated Jaccard similarity of shingles
+
+    # Exclude license headers and other boilerplate repeated across files
+    # from embeddings (see rag/boilerplate.py); stored text is unchanged
+    BOILERPLATE_STRIP: bool = False
+    BOILERPLATE_MIN_SHARE: float = 0.05  # Share of files a block must appear in
+
     # Metadata Configuration
     RELATIVE_PATHS: bool = True
     INCLUDE_FILE_CATEGORIZATION: bool = True
@@ -41,7 +65,56 @@ class RAGSettings(BaseSettings):
         extra="allow",  # Allow subclasses to add fields
     )
 
-    def configure_llm_settings(self):
+    def apply_overrides(self, **overrides: Any) -> "RAGSettings":
+        """Apply CLI overrides on top of the environment-derived settings.
+
+        ``None`` values are ignored so that unset CLI options keep the value
+        from the environment, the ``.env`` file or the defaults.
+
+        Example:
+            settings = RAGSettings().apply_overrides(LLM_MODEL="gpt-4o")
+        """
+        for key, value in overrides.items():
+            if value is not None:
+                setattr(self, key, value)
+        return self
+
+    def hnsw_config(self) -> dict[str, Any]:
+        """Return the Chroma HNSW configuration for the HNSW_* settings.
+
+        Keys use Chroma's collection configuration names; unset settings are
+        omitted so Chroma (or the existing collection) decides.
+        """
+        config = {
+            "space": self.HNSW_SPACE,
+            "max_neighbors": self.HNSW_M,
+            "ef_construction": self.HNSW_CONSTRUCTION_EF,
+            "ef_search": self.HNSW_SEARCH_EF,
+        }
+        return {key: value for key, value in config.items() if value is not None}
+
+    def flat_config(self) -> dict[str, Any]:
+        """Return the FlatVectorStore compression for the FLAT_STORE_* settings."""
+        return {
+            "dtype": self.FLAT_STORE_DTYPE,
+            "dimensions": self.FLAT_STORE_DIMENSIONS,
+            "binary": self.FLAT_STORE_BINARY,
+        }
+
+    def dedup_config(self) -> dict[str, Any]:
+        """Return the near-duplicate handling for the DEDUP_* settings."""
+        return {"policy": self.DEDUP_POLICY, "threshold": self.DEDUP_THRESHOLD}
+
+    def boilerplate_config(self) -> dict[str, Any] | None:
+        """Return the boilerplate detection for the BOILERPLATE_* settings.
+
+        None when stripping is disabled.
+        """
+        if not self.BOILERPLATE_STRIP:
+            return None
+        return {"min_share": self.BOILERPLATE_MIN_SHARE}
+
+    def configure_llm_settings(self) -> None:
         """Configure LlamaIndex global Settings based on environment variables.
 
         This method should be called before using any LlamaIndex functionality
@@ -109,7 +182,16 @@ class RAGSettings(BaseSettings):
                 token=os.getenv("HUGGINGFACEHUB_API_TOKEN"),
             )
 
-        # Configure Embeddings
+        self.configure_embed_settings()
+
+    def configure_embed_settings(self) -> None:
+        """Configure only the LlamaIndex global embedding model.
+
+        Sufficient for retrieval-only use, which never calls the LLM and
+        therefore does not need the LLM provider extra or API key.
+        """
+        from llama_index.core import Settings as LlamaSettings
+
         if self.EMBED_PROVIDER == "openai":
             try:
                 from llama_index.embeddings.openai import OpenAIEmbedding
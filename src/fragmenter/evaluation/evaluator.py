@@ -12,7 +12,7 @@ from ragas.metrics.collections import (
 )
 from tenacity import AsyncRetrying, stop_after_attempt, wait_exponential
 
-from fragmenter.rag.inference import query_index
+from fragmenter.evaluation.runner import EvaluationRunner
 
 
 class ExperimentResult(BaseModel):
@@ -22,18 +22,39 @@ class ExperimentResult(BaseModel):
     context_precision: float
     response: str
     retrieved_contexts: list[str]
+    # Cost of the RAG query (see EvaluationRunner); None when it failed
+    retrieval_s: float | None = None
+    synthesis_s: float | None = None
+    ttft_s: float | None = None
+    prompt_tokens: int | None = None
+    completion_tokens: int | None = None
+    context_bytes: int | None = None
+
+
+COST_FIELDS = (
+    "retrieval_s",
+    "synthesis_s",
+    "ttft_s",
+    "prompt_tokens",
+    "completion_tokens",
+    "context_bytes",
+)
 
 
-async def get_rag_response(index: Any, query: str) -> Any:
-    """
-    Run the blocking RAG query in a thread executor to avoid blocking the event loop.
+def create_evaluation_task(
+    index: Any, llm: Any, embeddings: Any, runner: EvaluationRunner | None = None
+):
     """
-    loop = asyncio.get_running_loop()
-    # Run the synchronous query_index function in a separate thread
-    return await loop.run_in_executor(None, query_index, index, query)
+    Build the Ragas experiment scoring one dataset row.
 
+    RAG queries and metric calls of all rows share the runner's concurrency
+    limit; pass a runner with a cache directory to reuse RAG responses
+    across runs. Without one, a runner with default limits and no cache is
+    used.
+    """
+    if runner is None:
+        runner = EvaluationRunner(index)
 
-def create_evaluation_task(index: Any, llm: Any, embeddings: Any):
     # Initialize metrics once
     metric_faithfulness = Faithfulness(llm=llm)
     metric_relevancy = AnswerRelevancy(llm=llm, embeddings=embeddings)
@@ -47,11 +68,10 @@ def create_evaluation_task(index: Any, llm: Any, embeddings: Any):
 
         # 1. Query RAG System
         try:
-            response_obj = await get_rag_response(index, user_input)
-            response_text = response_obj.response
-            retrieved_contexts = [
-                node.node.get_content() for node in response_obj.source_nodes
-            ]
+            rag = await runner.rag_response(user_input)
+            response_text = rag["response"]
+            retrieved_contexts = rag["retrieved_contexts"]
+            costs = {field: rag.get(field) for field in COST_FIELDS}
         except Exception as e:
             logger.error(f"RAG query failed for '{user_input}': {e}")
             # Return empty/zero result on failure
@@ -80,23 +100,31 @@ def create_evaluation_task(index: Any, llm: Any, embeddings: Any):
                         recall_score,
                         precision_score,
                     ) = await asyncio.gather(
-                        metric_faithfulness.ascore(
-                            user_input=user_input,
-                            response=response_text,
-                            retrieved_contexts=retrieved_contexts,
+                        runner.limited(
+                            metric_faithfulness.ascore(
+                                user_input=user_input,
+                                response=response_text,
+                                retrieved_contexts=retrieved_contexts,
+                            )
                         ),
-                        metric_relevancy.ascore(
-                            user_input=user_input, response=response_text
+                        runner.limited(
+                            metric_relevancy.ascore(
+                                user_input=user_input, response=response_text
+                            )
                         ),
-                        metric_recall.ascore(
-                            user_input=user_input,
-                            retrieved_contexts=retrieved_contexts,
-                            reference=reference,
+                        runner.limited(
+                            metric_recall.ascore(
+                                user_input=user_input,
+                                retrieved_contexts=retrieved_contexts,
+                                reference=reference,
+                            )
                         ),
-                        metric_precision.ascore(
-                            user_input=user_input,
-                            retrieved_contexts=retrieved_contexts,
-                            reference=reference,
+                        runner.limited(
+                            metric_precision.ascore(
+                                user_input=user_input,
+                                retrieved_contexts=retrieved_contexts,
+                                reference=reference,
+                            )
                         ),
                     )
         except Exception as e:
@@ -121,6 +149,7 @@ def create_evaluation_task(index: Any, llm: Any, embeddings: Any):
                 context_precision=0.0,
                 response=response_text,
                 retrieved_contexts=retrieved_contexts,
+                **costs,
             )
 
         # Ensure metrics are not None for type checker
@@ -136,6 +165,7 @@ def create_evaluation_task(index: Any, llm: Any, embeddings: Any):
             context_precision=precision_score.value,
             response=response_text,
             retrieved_contexts=retrieved_contexts,
+            **costs,
         )
 
     return evaluate_row
@@ -1,82 +1,263 @@
+"""Structural analysis plots of an index: chunk sizes and embedding space.
+
+The embedding plot scales to large indexes by never reducing all vectors:
+
+1. Metadata (ids, lengths, file type, repository) is read for every chunk
+   with a paged scan; embeddings are not.
+2. A stratified sample of at most ``max_points`` chunks is drawn, so small
+   file types and repositories stay visible.
+3. Only the sampled embeddings are fetched, PCA-reduced to
+   ``pca_components`` dimensions and then projected to 2-D with UMAP (or
+   with PCA alone, which needs no extra dependency).
+4. The 2-D coordinates are cached under ``<output_dir>/.embedding_cache``,
+   keyed by the index version and the reduction settings, so re-plotting an
+   unchanged index skips steps 3 and the projection entirely.
+"""
+
+import hashlib
+import json
 from pathlib import Path
-from typing import Any
 
-import matplotlib.pyplot as plt
 import numpy as np
 import pandas as pd
-from llama_index.core import Settings, StorageContext, load_index_from_storage
 from loguru import logger
-from umap import UMAP
 
-from fragmenter.rag.utils import MockEmbedding
+from fragmenter.rag.scan import iter_collection, open_collections
+from fragmenter.rag.utils import index_version
+
+DEFAULT_MAX_POINTS = 20000
+DEFAULT_PCA_COMPONENTS = 50
+REDUCERS = ("umap", "pca")
+STRATIFY_BY = ["file_type", "repository"]
+CACHE_DIR = ".embedding_cache"
+
+# Ids per get() when fetching the embeddings of sampled chunks
+_FETCH_BATCH_SIZE = 1000
+
+
+def load_index_frame(storage_dir: Path) -> pd.DataFrame:
+    """Read per-chunk lengths and paths of an index page by page.
 
+    Works on Chroma (also sharded) and flat storage directories. Only one
+    page of raw records is held at a time and no embeddings are read.
 
-def analyze_index_structure(storage_dir: Path, output_dir: Path) -> None:
+    Returns:
+        DataFrame with ``id``, ``shard``, ``length``, ``file_path``,
+        ``file_type`` and ``repository``, one row per chunk
+
+    Raises:
+        ValueError: If the index is missing or empty
     """
-    Loads a vector index and generates structural analysis plots.
+    frames = []
+    for shard, collection in open_collections(storage_dir).items():
+        for page in iter_collection(collection):
+            metadatas = page["metadatas"]
+            frames.append(
+                pd.DataFrame(
+                    {
+                        "id": page["ids"],
+                        "shard": shard,
+                        "length": page["lengths"],
+                        "file_path": [
+                            m.get("relative_path") or m.get("file_path", "unknown")
+                            for m in metadatas
+                        ],
+                        "file_type": [
+                            m.get("file_type") or "unknown" for m in metadatas
+                        ],
+                        "repository": [
+                            m.get("repository") or "unknown" for m in metadatas
+                        ],
+                    }
+                )
+            )
+
+    if not frames:
+        raise ValueError(f"Index in {storage_dir} is empty")
+    return pd.concat(frames, ignore_index=True)
+
+
+def fetch_embeddings(storage_dir: Path, frame: pd.DataFrame) -> np.ndarray:
+    """Fetch the embeddings of the chunks in ``frame``, in row order."""
+    collections = open_collections(storage_dir)
+    rows: dict[str, np.ndarray] = {}
+    for shard, ids in frame.groupby("shard")["id"]:
+        ids = ids.tolist()
+        for start in range(0, len(ids), _FETCH_BATCH_SIZE):
+            page = collections[shard].get(
+                ids=ids[start : start + _FETCH_BATCH_SIZE], include=["embeddings"]
+            )
+            embeddings = np.asarray(page["embeddings"], dtype=np.float32)
+            rows.update(zip(page["ids"], embeddings, strict=True))
+    return np.stack([rows[i] for i in frame["id"]])
+
+
+def stratified_sample(
+    frame: pd.DataFrame,
+    max_points: int = DEFAULT_MAX_POINTS,
+    by: list[str] | None = None,
+    seed: int = 42,
+) -> np.ndarray:
+    """Row positions of a sample of at most about ``max_points`` chunks.
+
+    Every group (by default file type x repository) keeps its share of the
+    index, but at least one chunk, so rare groups still appear in the plot.
+
+    Returns:
+        Sorted row positions into ``frame``
+    """
+    if len(frame) <= max_points:
+        return np.arange(len(frame))
+
+    rng = np.random.default_rng(seed)
+    fraction = max_points / len(frame)
+    positions = []
+    for _, group in frame.groupby(by or STRATIFY_BY, sort=True).indices.items():
+        quota = min(len(group), max(1, round(len(group) * fraction)))
+        positions.append(rng.choice(group, size=quota, replace=False))
+    return np.sort(np.concatenate(positions))
+
+
+def pca_reduce(matrix: np.ndarray, n_components: int) -> np.ndarray:
+    """Project rows onto their first ``n_components`` principal components."""
+    centered = matrix - matrix.mean(axis=0)
+    n_components = min(n_components, *centered.shape)
+    _, _, components = np.linalg.svd(centered, full_matrices=False)
+    return centered @ components[:n_components].T
+
+
+def reduce_embeddings(
+    matrix: np.ndarray,
+    reducer: str = "umap",
+    pca_components: int = DEFAULT_PCA_COMPONENTS,
+    seed: int = 42,
+) -> np.ndarray:
+    """Reduce embeddings to 2-D coordinates.
 
     Args:
-        storage_dir: Path to the persisted vector store.
-        output_dir: Path where plots will be saved.
+        matrix: Embeddings, one row per chunk
+        reducer: ``umap`` (PCA pre-reduction, then UMAP) or ``pca``
+        pca_components: Dimensions kept before UMAP
+        seed: Random seed for UMAP
+
+    Returns:
+        Array of shape (rows, 2)
     """
-    # Configure settings to avoid OpenAI requirement for loading
-    Settings.embed_model = MockEmbedding()
-    Settings.llm = None
+    if reducer not in REDUCERS:
+        raise ValueError(f"Unknown reducer '{reducer}', expected one of: {REDUCERS}")
+    if reducer == "pca":
+        return pca_reduce(matrix, 2)
 
-    logger.info(f"Loading index from {storage_dir}...")
     try:
-        storage_context = StorageContext.from_defaults(persist_dir=str(storage_dir))
-        index = load_index_from_storage(storage_context)
-    except Exception as e:
-        logger.error(f"Error loading index: {e}")
-        return
+        from umap import UMAP
+    except ImportError:
+        raise ImportError(
+            "UMAP plots require umap-learn (in the dev dependency group). "
+            "Install with: uv sync --group dev, or use reducer='pca'"
+        )
+    if matrix.shape[1] > pca_components:
+        matrix = pca_reduce(matrix, pca_components)
+    return UMAP(n_components=2, random_state=seed, low_memory=True).fit_transform(
+        matrix
+    )
 
-    logger.info("Index loaded. Extracting nodes...")
 
-    docstore = index.docstore
-    nodes = docstore.docs.values()
+def embedding_coordinates(
+    storage_dir: Path,
+    frame: pd.DataFrame,
+    cache_dir: Path | None = None,
+    max_points: int = DEFAULT_MAX_POINTS,
+    reducer: str = "umap",
+    pca_components: int = DEFAULT_PCA_COMPONENTS,
+    seed: int = 42,
+) -> pd.DataFrame:
+    """2-D coordinates of a stratified sample of chunks, cached per index version.
 
-    # Try to get embeddings from vector store if not in nodes
-    vector_store = index.vector_store
-    logger.info(f"Vector store type: {type(vector_store)}")
+    Args:
+        storage_dir: Index storage directory
+        frame: Chunks of the index (see :func:`load_index_frame`)
+        cache_dir: Directory for cached coordinates (None disables caching)
+        max_points: Sample size
+        reducer: ``umap`` or ``pca``
+        pca_components: Dimensions kept before UMAP
+        seed: Seed for sampling and UMAP
 
-    # For SimpleVectorStore, embeddings are in data.embedding_dict
-    embedding_dict = {}
-    if hasattr(vector_store, "data") and hasattr(vector_store.data, "embedding_dict"):
-        embedding_dict = vector_store.data.embedding_dict
-        logger.info(f"Found {len(embedding_dict)} embeddings in vector store.")
+    Returns:
+        The sampled rows of ``frame`` with ``x`` and ``y`` columns
+    """
+    settings = {
+        "index": index_version(storage_dir),
+        "max_points": max_points,
+        "reducer": reducer,
+        "pca_components": pca_components,
+        "seed": seed,
+    }
+    key = hashlib.sha1(json.dumps(settings, sort_keys=True).encode()).hexdigest()
+    cache_name = f"coords-{key[:16]}.npz"
 
-    data: list[dict[str, Any]] = []
-    embeddings = []
+    if cache_dir is not None and (cache_dir / cache_name).exists():
+        logger.info(f"Using cached coordinates: {cache_dir / cache_name}")
+        cached = np.load(cache_dir / cache_name)
+        sample = frame.set_index("id").loc[cached["ids"]].reset_index()
+        sample["x"], sample["y"] = cached["coords"][:, 0], cached["coords"][:, 1]
+        return sample
 
-    for node in nodes:
-        # Skip if not a BaseNode (e.g. if it's a Document)
-        if not hasattr(node, "get_content"):
-            continue
+    sample = frame.iloc[stratified_sample(frame, max_points, seed=seed)].copy()
+    logger.info(
+        f"Reducing {len(sample)} of {len(frame)} embeddings with {reducer.upper()}..."
+    )
+    coords = reduce_embeddings(
+        fetch_embeddings(storage_dir, sample),
+        reducer=reducer,
+        pca_components=pca_components,
+        seed=seed,
+    )
+    sample["x"], sample["y"] = coords[:, 0], coords[:, 1]
 
-        content = node.get_content()
-        metadata = node.metadata or {}
-        file_path = metadata.get("file_path", "unknown")
-        file_type = Path(file_path).suffix if file_path != "unknown" else "unknown"
+    if cache_dir is not None:
+        cache_dir.mkdir(parents=True, exist_ok=True)
+        for stale in cache_dir.glob("coords-*.npz"):
+            stale.unlink()
+        np.savez(
+            cache_dir / cache_name, ids=sample["id"].to_numpy(dtype=str), coords=coords
+        )
+    return sample
 
-        # Check for embedding in node or vector store
-        emb = node.embedding
-        if emb is None and node.node_id in embedding_dict:
-            emb = embedding_dict[node.node_id]
 
-        node_data = {
-            "id": node.node_id,
-            "length": len(content),
-            "file_path": file_path,
-            "file_type": file_type,
-            "has_embedding": emb is not None,
-        }
-        data.append(node_data)
+def analyze_index_structure(
+    storage_dir: Path,
+    output_dir: Path,
+    max_points: int = DEFAULT_MAX_POINTS,
+    reducer: str = "umap",
+    pca_components: int = DEFAULT_PCA_COMPONENTS,
+    use_cache: bool = True,
+) -> None:
+    """
+    Loads a vector index and generates structural analysis plots.
 
-        if emb:
-            embeddings.append(emb)
+    Args:
+        storage_dir: Path to the persisted vector store.
+        output_dir: Path where plots will be saved.
+        max_points: Chunks sampled for the embedding plot.
+        reducer: ``umap`` or ``pca`` for the 2-D projection.
+        pca_components: Dimensions kept before UMAP.
+        use_cache: Reuse coordinates cached for the same index version.
+    """
+    try:
+        import matplotlib.pyplot as plt
+    except ImportError:
+        raise ImportError(
+            "Index analysis plots require matplotlib (in the dev dependency "
+            "group). Install with: uv sync --group dev"
+        )
+
+    logger.info(f"Reading index from {storage_dir}...")
+    try:
+        df = load_index_frame(storage_dir)
+    except Exception as e:
+        logger.error(f"Error loading index: {e}")
+        return
 
-    df = pd.DataFrame(data)
     logger.info(f"Extracted {len(df)} nodes.")
 
     # Create plots directory
@@ -95,38 +276,37 @@ def analyze_index_structure(storage_dir: Path, output_dir: Path) -> None:
 
     logger.info(f"Chunk size stats:\n{df['length'].describe()}")
 
-    # 2. Embedding Visualization (UMAP)
-    if embeddings:
-        logger.info(f"Reducing {len(embeddings)} embeddings with UMAP...")
-        reducer = UMAP(random_state=42)
-        embedding_matrix = np.array(embeddings)
-
-        # Check if we have enough data for UMAP
-        if len(embeddings) > 5:
-            try:
-                reduced_embeddings = reducer.fit_transform(embedding_matrix)
-
-                # Add reduced coords to dataframe (only for nodes with embeddings)
-                df_with_emb = df[df["has_embedding"]].copy()
-                df_with_emb["x"] = reduced_embeddings[:, 0]
-                df_with_emb["y"] = reduced_embeddings[:, 1]
-
-                plt.figure(figsize=(12, 8))
-
-                # Color by file type
-                file_types = df_with_emb["file_type"].unique()
-                for ft in file_types:
-                    subset = df_with_emb[df_with_emb["file_type"] == ft]
-                    plt.scatter(subset["x"], subset["y"], label=ft, alpha=0.6, s=10)
-
-                plt.title("Embedding Space (UMAP)")
-                plt.legend()
-                plt.savefig(output_dir / "embedding_clusters.png")
-                plt.close()
-                logger.info(f"Embedding plot saved to {output_dir}")
-            except Exception as e:
-                logger.error(f"Error during UMAP reduction: {e}")
-        else:
-            logger.warning("Not enough embeddings for UMAP.")
-    else:
-        logger.warning("No embeddings found in nodes.")
+    # 2. Embedding Visualization
+    if len(df) <= 5:
+        logger.warning("Not enough embeddings for an embedding plot.")
+        return
+
+    try:
+        df_with_emb = embedding_coordinates(
+            storage_dir,
+            df,
+            cache_dir=output_dir / CACHE_DIR if use_cache else None,
+            max_points=max_points,
+            reducer=reducer,
+            pca_components=pca_components,
+        )
+    except Exception as e:
+        logger.error(f"Error during {reducer.upper()} reduction: {e}")
+        return
+
+    plt.figure(figsize=(12, 8))
+
+    # Color by file type
+    file_types = df_with_emb["file_type"].unique()
+    for ft in file_types:
+        subset = df_with_emb[df_with_emb["file_type"] == ft]
+        plt.scatter(subset["x"], subset["y"], label=ft, alpha=0.6, s=10)
+
+    title = f"Embedding Space ({reducer.upper()})"
+    if len(df_with_emb) < len(df):
+        title += f", stratified sample of {len(df_with_emb):,}/{len(df):,}"
+    plt.title(title)
+    plt.legend()
+    plt.savefig(output_dir / "embedding_clusters.png")
+    plt.close()
+    logger.info(f"Embedding plot saved to {output_dir}")
@@ -0,0 +1,107 @@
+"""Side-by-side comparison of evaluation experiments.
+
+Ragas saves every experiment run as one CSV (one row per question) in an
+``experiments`` directory. :func:`compare_experiments` reduces each run to
+one row: mean quality scores next to latency percentiles, token usage and
+retrieved context size, so a faster or cheaper configuration can be weighed
+against what it costs in quality.
+
+Runs from before latency and token accounting have empty cost columns.
+"""
+
+from pathlib import Path
+
+import pandas as pd
+from loguru import logger
+
+QUALITY_METRICS = [
+    "faithfulness",
+    "answer_relevancy",
+    "context_recall",
+    "context_precision",
+]
+COST_COLUMNS = [
+    "retrieval_s",
+    "synthesis_s",
+    "ttft_s",
+    "prompt_tokens",
+    "completion_tokens",
+    "context_bytes",
+]
+
+
+def load_experiments(experiments_dir: Path) -> pd.DataFrame:
+    """Rows of every experiment CSV, with the run name in ``experiment``."""
+    frames = []
+    for path in sorted(Path(experiments_dir).glob("*.csv")):
+        try:
+            frame = pd.read_csv(path)
+        except pd.errors.EmptyDataError:
+            logger.warning(f"Skipping empty experiment: {path.name}")
+            continue
+        frames.append(frame.assign(experiment=path.stem))
+
+    if not frames:
+        raise FileNotFoundError(f"No experiment results in {experiments_dir}")
+
+    frame = pd.concat(frames, ignore_index=True)
+    for column in COST_COLUMNS:
+        if column not in frame:
+            frame[column] = float("nan")
+    return frame
+
+
+def compare_experiments(
+    frame: pd.DataFrame,
+    prompt_price: float | None = None,
+    completion_price: float | None = None,
+) -> pd.DataFrame:
+    """One row per experiment: quality, latency and cost side by side.
+
+    Args:
+        frame: Experiment rows from :func:`load_experiments`
+        prompt_price: Optional price per million prompt tokens
+        completion_price: Optional price per million completion tokens;
+            with both prices a ``cost_per_query`` column is added
+
+    Returns:
+        Experiments sorted by mean quality (best first)
+    """
+    frame = frame.assign(latency_s=frame["retrieval_s"] + frame["synthesis_s"])
+    grouped = frame.groupby("experiment")
+
+    report = grouped[QUALITY_METRICS].mean()
+    report.insert(0, "rows", grouped.size())
+    report["quality"] = report[QUALITY_METRICS].mean(axis=1)
+    report["retrieval_p50_s"] = grouped["retrieval_s"].median()
+    report["synthesis_p50_s"] = grouped["synthesis_s"].median()
+    report["ttft_p50_s"] = grouped["ttft_s"].median()
+    report["latency_p50_s"] = grouped["latency_s"].median()
+    report["latency_p95_s"] = grouped["latency_s"].quantile(0.95)
+    report["prompt_tokens"] = grouped["prompt_tokens"].mean()
+    report["completion_tokens"] = grouped["completion_tokens"].mean()
+    report["context_kb"] = grouped["context_bytes"].mean() / 1024
+
+    if prompt_price is not None and completion_price is not None:
+        report["cost_per_query"] = (
+            report["prompt_tokens"] * prompt_price
+            + report["completion_tokens"] * completion_price
+        ) / 1_000_000
+
+    return report.sort_values("quality", ascending=False)
+
+
+def write_comparison(
+    experiments_dir: Path,
+    output_path: Path,
+    prompt_price: float | None = None,
+    completion_price: float | None = None,
+) -> pd.DataFrame:
+    """Compare all experiments in a directory and save the table as CSV."""
+    report = compare_experiments(
+        load_experiments(experiments_dir), prompt_price, completion_price
+    )
+    output_path.parent.mkdir(parents=True, exist_ok=True)
+    report.round(4).to_csv(output_path)
+    logger.success(f"Compared {len(report)} experiments: {output_path}")
+    return report
@@ -0,0 +1,270 @@
+"""Concurrency limits and response caching for RAG evaluation runs.
+
+An evaluation row makes one RAG query and then several LLM-judged metric
+calls. :class:`EvaluationRunner` puts all of them behind one semaphore, so
+``max_concurrency`` bounds the requests in flight across the whole run
+rather than per row.
+
+RAG answers and retrieved contexts are cached on disk, keyed by the index
+version, the query and the model settings. Re-scoring a dataset with new
+metrics or another judge model then makes no RAG calls; rebuilding the
+index or changing the LLM, embedding model or retrieval options misses the
+cache.
+
+Every RAG response also records what it cost: retrieval and synthesis
+latency, time to the first streamed token, prompt and completion tokens of
+the LLM calls (from the provider's usage data, else counted with the
+default tokenizer) and the bytes of retrieved context sent to the LLM.
+"""
+
+import asyncio
+import hashlib
+import json
+import os
+import time
+from collections.abc import Awaitable
+from contextvars import ContextVar
+from datetime import UTC, datetime
+from pathlib import Path
+from typing import Any, TypeVar
+
+from llama_index.core import Settings
+from llama_index.core.callbacks.schema import EventPayload
+from llama_index.core.callbacks.token_counting import get_llm_token_counts
+from llama_index.core.indices.base import BaseIndex
+from llama_index.core.instrumentation import get_dispatcher
+from llama_index.core.instrumentation.event_handlers import BaseEventHandler
+from llama_index.core.instrumentation.events.llm import (
+    LLMChatEndEvent,
+    LLMCompletionEndEvent,
+)
+from llama_index.core.schema import QueryBundle
+from llama_index.core.utilities.token_counting import TokenCounter
+from loguru import logger
+
+from fragmenter.rag.filters import where_kwargs
+
+DEFAULT_MAX_CONCURRENCY = 4
+
+T = TypeVar("T")
+
+# Token usage of the RAG query running in the current task; asyncio tasks
+# copy the context, so concurrent rows never see each other's LLM calls
+_usage: ContextVar[dict[str, Any] | None] = ContextVar("_usage", default=None)
+
+
+class TokenUsageHandler(BaseEventHandler):  # type: ignore[misc, unused-ignore]
+    """Adds the tokens of finished LLM calls to the current query's usage."""
+
+    @classmethod
+    def class_name(cls) -> str:
+        return "TokenUsageHandler"
+
+    def handle(self, event: Any, **kwargs: Any) -> None:
+        usage = _usage.get()
+        if usage is None or event.response is None:
+            return
+        if isinstance(event, LLMCompletionEndEvent):
+            payload = {
+                EventPayload.PROMPT: event.prompt,
+                EventPayload.COMPLETION: event.response,
+            }
+        elif isinstance(event, LLMChatEndEvent):
+            payload = {
+                EventPayload.MESSAGES: event.messages,
+                EventPayload.RESPONSE: event.response,
+            }
+        else:
+            return
+        # Wrapping LLM methods (e.g. async around sync streaming) report the
+        # same response once per layer
+        if id(event.response) in usage["seen"]:
+            return
+        usage["seen"].add(id(event.response))
+        counts = get_llm_token_counts(usage["counter"], payload)
+        usage["prompt_tokens"] += counts.prompt_token_count
+        usage["completion_tokens"] += counts.completion_token_count
+
+
+_handler: TokenUsageHandler | None = None
+
+
+def _track_token_usage() -> None:
+    """Register the token usage handler once on the root dispatcher."""
+    global _handler
+    if _handler is None:
+        _handler = TokenUsageHandler()
+        get_dispatcher().add_event_handler(_handler)
+
+
+def model_settings(**query_options: Any) -> dict[str, Any]:
+    """Settings that change RAG answers: models and retrieval options."""
+    # The private fields, since the public getters resolve unset models to
+    # the OpenAI defaults, instantiating them or raising without an API key
+    llm = Settings._llm
+    embed_model = Settings._embed_model
+    return {
+        "llm": type(llm).__name__ if llm else None,
+        "llm_model": getattr(getattr(llm, "metadata", None), "model_name", None),
+        "temperature": getattr(llm, "temperature", None),
+        "embed_model": getattr(embed_model, "model_name", None),
+        **query_options,
+    }
+
+
+class ResponseCache:
+    """On-disk cache of RAG responses, one JSON file per key."""
+
+    def __init__(self, cache_dir: str | Path) -> None:
+        self.cache_dir = Path(cache_dir)
+
+    @staticmethod
+    def key(index_version: str, query: str, settings: dict[str, Any]) -> str:
+        """Cache key of a query against an index version with some settings."""
+        identity = {"index": index_version, "query": query, "settings": settings}
+        return hashlib.sha256(
+            json.dumps(identity, sort_keys=True, default=str).encode("utf-8")
+        ).hexdigest()
+
+    def _path(self, key: str) -> Path:
+        return self.cache_dir / f"{key}.json"
+
+    def get(self, key: str) -> dict[str, Any] | None:
+        """Cached entry, or None."""
+        path = self._path(key)
+        if not path.exists():
+            return None
+        try:
+            entry: dict[str, Any] = json.loads(path.read_text(encoding="utf-8"))
+        except json.JSONDecodeError:
+            logger.warning(f"Ignoring corrupt cache entry: {path}")
+            return None
+        return entry
+
+    def put(self, key: str, entry: dict[str, Any]) -> None:
+        """Store an entry; concurrent writers never leave a partial file."""
+        self.cache_dir.mkdir(parents=True, exist_ok=True)
+        path = self._path(key)
+        tmp = path.with_suffix(f".{os.getpid()}.tmp")
+        tmp.write_text(json.dumps(entry, indent=2), encoding="utf-8")
+        tmp.replace(path)
+
+
+class EvaluationRunner:
+    """Runs the RAG queries and metric calls of an evaluation.
+
+    Args:
+        index: The RAG index to query
+        max_concurrency: Requests (RAG queries and metric calls) in flight
+        cache_dir: Directory for cached RAG responses (None disables caching)
+        index_version: Version of the index for the cache key, e.g.
+            :func:`fragmenter.rag.utils.index_version` of its storage
+            directory; required for caching
+        where: Optional Chroma ``where`` clause restricting retrieval
+    """
+
+    def __init__(
+        self,
+        index: BaseIndex,
+        max_concurrency: int = DEFAULT_MAX_CONCURRENCY,
+        cache_dir: str | Path | None = None,
+        index_version: str | None = None,
+        where: dict[str, Any] | None = None,
+    ) -> None:
+        if cache_dir is not None and index_version is None:
+            raise ValueError("Caching RAG responses requires the index version")
+        self.index = index
+        self.semaphore = asyncio.Semaphore(max(1, max_concurrency))
+        self.cache = ResponseCache(cache_dir) if cache_dir is not None else None
+        self.index_version = index_version
+        self.where = where
+        self.query_engine = index.as_query_engine(streaming=True, **where_kwargs(where))
+        self.counts = {"rag_calls": 0, "cache_hits": 0, "metric_calls": 0}
+
+    async def limited(self, awaitable: Awaitable[T]) -> T:
+        """Await a metric call within the concurrency limit."""
+        async with self.semaphore:
+            self.counts["metric_calls"] += 1
+            return await awaitable
+
+    async def rag_response(self, query: str) -> dict[str, Any]:
+        """Answer and retrieved contexts for a query, from the cache if possible.
+
+        Cached responses keep the latency and token counts of the run that
+        produced them.
+
+        Returns:
+            Dict with ``response``, ``retrieved_contexts``, ``cached`` and
+            the metrics of :meth:`_query`
+        """
+        cache = self.cache
+        key = None
+        if cache is not None and self.index_version is not None:
+            key = ResponseCache.key(
+                self.index_version, query, model_settings(where=self.where)
+            )
+            entry = cache.get(key)
+            if entry is not None:
+                self.counts["cache_hits"] += 1
+                return {**entry, "cached": True}
+
+        async with self.semaphore:
+            self.counts["rag_calls"] += 1
+            entry = await self._query(query)
+
+        entry["created_at"] = datetime.now(UTC).isoformat(timespec="seconds")
+        if cache is not None and key is not None:
+            cache.put(key, entry)
+        return {**entry, "cached": False}
+
+    async def _query(self, query: str) -> dict[str, Any]:
+        """Retrieve and synthesize separately, timing and counting both."""
+        _track_token_usage()
+        usage = {
+            "prompt_tokens": 0,
+            "completion_tokens": 0,
+            "seen": set(),
+            "counter": TokenCounter(),
+        }
+        reset = _usage.set(usage)
+        try:
+            query_bundle = QueryBundle(query)
+            start = time.perf_counter()
+            nodes = await self.query_engine.aretrieve(query_bundle)
+            retrieved = time.perf_counter()
+            response = await self.query_engine.asynthesize(query_bundle, nodes)
+
+            ttft = None
+            if hasattr(response, "async_response_gen"):
+                tokens = []
+                async for token in response.async_response_gen():
+                    if ttft is None:
+                        ttft = time.perf_counter() - start
+                    tokens.append(token)
+                text = "".join(tokens)
+            else:
+                text = str(response)
+            synthesized = time.perf_counter()
+        finally:
+            _usage.reset(reset)
+
+        contexts = [node.node.get_content() for node in nodes]
+        return {
+            "query": query,
+            "response": text,
+            "retrieved_contexts": contexts,
+            "retrieval_s": round(retrieved - start, 4),
+            "synthesis_s": round(synthesized - retrieved, 4),
+            "ttft_s": round(ttft, 4) if ttft is not None else None,
+            "prompt_tokens": usage["prompt_tokens"],
+            "completion_tokens": usage["completion_tokens"],
+            "context_bytes": sum(len(c.encode("utf-8")) for c in contexts),
+        }
+
+    def log_summary(self) -> None:
+        """Log how many calls the run made and saved."""
+        logger.info(
+            f"Evaluation calls: {self.counts['rag_calls']} RAG queries "
+            f"({self.counts['cache_hits']} cached), "
+            f"{self.counts['metric_calls']} metric calls"
+        )
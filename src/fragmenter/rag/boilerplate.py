@@ -0,0 +1,212 @@
+"""Corpus-level boilerplate detection (license headers, repeated banners).
+
+Most source files start with the same multi-line license header, which the
+parsers keep in each file's first chunk. Embedding it thousands of times
+costs tokens and makes those chunks look alike to the retriever.
+
+Detection works on the whole corpus before embedding. Every window of
+``WINDOW_LINES`` consecutive non-blank lines (whitespace-normalized) is
+counted once per file; windows found in at least ``min_share`` of the files
+(and at least ``MIN_FILES``) are boilerplate. The lines they cover are
+marked on each chunk as character spans in the ``boilerplate`` metadata
+key, which is kept out of the embedding and LLM metadata text.
+
+:class:`BoilerplateStrippedEmbedding` replaces the embedding model in the
+ingestion pipeline and embeds the chunk text without those spans. The
+stored text is unchanged, so retrieved chunks and LLM context still show
+the header.
+"""
+
+import math
+import re
+from collections import Counter
+from collections.abc import Sequence
+from typing import Any
+
+from llama_index.core.base.embeddings.base import BaseEmbedding
+from llama_index.core.schema import BaseNode, MetadataMode, TextNode, TransformComponent
+from loguru import logger
+
+# Metadata key holding "start-end;start-end" character spans of boilerplate
+BOILERPLATE_KEY = "boilerplate"
+
+DEFAULT_MIN_SHARE = 0.05
+MIN_FILES = 5
+WINDOW_LINES = 3
+# Windows with less text (e.g. closing braces) are too generic to count
+MIN_WINDOW_CHARS = 40
+
+# Rough chars-per-token ratio of BPE tokenizers on code and English text
+CHARS_PER_TOKEN = 4
+
+_SPAN = re.compile(r"(\d+)-(\d+)")
+
+
+def _file_key(node: TextNode) -> str:
+    return str(
+        node.metadata.get("relative_path")
+        or node.metadata.get("file_path")
+        or node.metadata.get("file_name")
+        or node.node_id
+    )
+
+
+def _lines(text: str) -> list[tuple[int, int, str]]:
+    """(start, end, normalized text) of every line."""
+    lines, offset = [], 0
+    for line in text.splitlines(keepends=True):
+        lines.append((offset, offset + len(line), " ".join(line.split())))
+        offset += len(line)
+    return lines
+
+
+def _windows(lines: list[tuple[int, int, str]]) -> list[tuple[str, int, int]]:
+    """Windows of consecutive non-blank lines: (key, first line, last line)."""
+    content = [i for i, (_, _, norm) in enumerate(lines) if norm]
+    windows = []
+    for w in range(len(content) - WINDOW_LINES + 1):
+        members = content[w : w + WINDOW_LINES]
+        key = "\n".join(lines[i][2] for i in members)
+        if len(key) >= MIN_WINDOW_CHARS:
+            windows.append((key, members[0], members[-1]))
+    return windows
+
+
+def detect_boilerplate(
+    nodes: Sequence[TextNode], min_share: float = DEFAULT_MIN_SHARE
+) -> set[str]:
+    """Line windows that repeat across enough files to be boilerplate."""
+    per_file: dict[str, set[str]] = {}
+    for node in nodes:
+        keys = per_file.setdefault(_file_key(node), set())
+        keys.update(key for key, _, _ in _windows(_lines(node.text)))
+
+    min_files = max(MIN_FILES, math.ceil(min_share * len(per_file)))
+    counts = Counter(key for keys in per_file.values() for key in keys)
+    return {key for key, count in counts.items() if count >= min_files}
+
+
+def boilerplate_spans(text: str, windows: set[str]) -> list[tuple[int, int]]:
+    """Character spans of ``text`` covered by boilerplate windows.
+
+    Blank lines between covered lines are included, so a header becomes a
+    single span.
+    """
+    lines = _lines(text)
+    covered = [False] * len(lines)
+    for key, first, last in _windows(lines):
+        if key in windows:
+            covered[first : last + 1] = [True] * (last - first + 1)
+
+    spans: list[tuple[int, int]] = []
+    gap_end = None
+    for i, (start, end, norm) in enumerate(lines):
+        if covered[i]:
+            if spans and gap_end == start:
+                spans[-1] = (spans[-1][0], end)
+            else:
+                spans.append((start, end))
+            gap_end = end
+        elif not norm and gap_end == start:
+            # Blank line right after a covered line; may bridge to the next
+            gap_end = end
+    return spans
+
+
+def parse_spans(value: Any) -> list[tuple[int, int]]:
+    """Spans from the ``boilerplate`` metadata value."""
+    return [(int(a), int(b)) for a, b in _SPAN.findall(str(value or ""))]
+
+
+def boilerplate_chars(metadata: dict[str, Any]) -> int:
+    """Characters of a chunk that are excluded from its embedding."""
+    return sum(end - start for start, end in parse_spans(metadata.get(BOILERPLATE_KEY)))
+
+
+def strip_spans(text: str, spans: list[tuple[int, int]]) -> str:
+    """``text`` without the given spans."""
+    parts, offset = [], 0
+    for start, end in spans:
+        parts.append(text[offset:start])
+        offset = end
+    parts.append(text[offset:])
+    return "".join(parts)
+
+
+def mark_boilerplate(
+    nodes: Sequence[TextNode], min_share: float = DEFAULT_MIN_SHARE
+) -> dict[str, Any]:
+    """Detect corpus boilerplate and mark it on the nodes.
+
+    Args:
+        nodes: All chunks of the corpus (marked in place)
+        min_share: Minimum share of files a window must appear in
+
+    Returns:
+        Summary with the number of boilerplate windows, marked chunks and
+        the characters (and estimated tokens) excluded from embedding
+    """
+    windows = detect_boilerplate(nodes, min_share)
+    report = {"windows": len(windows), "chunks": 0, "chars": 0, "tokens": 0}
+    for node in nodes:
+        node.metadata.pop(BOILERPLATE_KEY, None)
+        spans = boilerplate_spans(node.text, windows) if windows else []
+        if not spans:
+            continue
+        node.metadata[BOILERPLATE_KEY] = ";".join(f"{a}-{b}" for a, b in spans)
+        for excluded in (
+            node.excluded_embed_metadata_keys,
+            node.excluded_llm_metadata_keys,
+        ):
+            if BOILERPLATE_KEY not in excluded:
+                excluded.append(BOILERPLATE_KEY)
+        report["chunks"] += 1
+        report["chars"] += sum(end - start for start, end in spans)
+
+    report["tokens"] = report["chars"] // CHARS_PER_TOKEN
+    logger.info(
+        f"Boilerplate: {report['windows']} repeated line windows in "
+        f"{report['chunks']} chunks, {report['chars']:,} characters "
+        f"(~{report['tokens']:,} tokens) excluded from embeddings"
+    )
+    return report
+
+
+def embed_text(node: BaseNode) -> str:
+    """The text embedded for a node: its content without boilerplate spans."""
+    spans = parse_spans(node.metadata.get(BOILERPLATE_KEY))
+    if not spans:
+        return str(node.get_content(metadata_mode=MetadataMode.EMBED))
+
+    text = strip_spans(node.text, spans).strip()
+    metadata_str = node.get_metadata_str(mode=MetadataMode.EMBED).strip()
+    if not metadata_str:
+        # Nothing else to embed for a chunk that is all boilerplate
+        return text or node.text
+    return str(
+        node.text_template.format(content=text, metadata_str=metadata_str).strip()
+    )
+
+
+class BoilerplateStrippedEmbedding(TransformComponent):  # type: ignore[misc, unused-ignore]
+    """Pipeline transformation embedding nodes without their boilerplate."""
+
+    embed_model: BaseEmbedding
+
+    def __call__(self, nodes: Sequence[BaseNode], **kwargs: Any) -> Sequence[BaseNode]:
+        embeddings = self.embed_model.get_text_embedding_batch(
+            [embed_text(node) for node in nodes], **kwargs
+        )
+        for node, embedding in zip(nodes, embeddings, strict=True):
+            node.embedding = embedding
+        return nodes
+
+    async def acall(
+        self, nodes: Sequence[BaseNode], **kwargs: Any
+    ) -> Sequence[BaseNode]:
+        embeddings = await self.embed_model.aget_text_embedding_batch(
+            [embed_text(node) for node in nodes], **kwargs
+        )
+        for node, embedding in zip(nodes, embeddings, strict=True):
+            node.embedding = embedding
+        return nodes
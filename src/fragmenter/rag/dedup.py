@@ -0,0 +1,253 @@
+"""Near-duplicate chunk detection with MinHash and locality-sensitive hashing.
+
+Data directories often contain forks and vendored copies of the same code,
+and overlapping splitter windows repeat text between neighbouring chunks.
+Each copy is embedded and stored separately and then crowds the top-k.
+
+Every chunk is reduced to a MinHash signature over its token shingles. LSH
+banding groups signatures that probably share most shingles, the candidate
+pairs are confirmed by their estimated Jaccard similarity, and connected
+chunks form a cluster with one canonical chunk (the first by file path and
+position, so rebuilds keep the same one). Policies:
+
+    off     No detection
+    report  Detect and log; store every chunk
+    skip    Store only the canonical chunk of each cluster
+    alias   Like skip, and list the paths of the dropped copies in the
+            canonical chunk's ``aliases`` metadata
+
+Detection runs per collection inside
+:func:`~fragmenter.rag.ingestion.ingest_nodes`, so shards of a sharded index
+stay independent. The summary ends up in the statistics manifest under
+``dedup``.
+"""
+
+import re
+import zlib
+from typing import Any
+
+import numpy as np
+from llama_index.core.schema import TextNode
+from loguru import logger
+
+DEDUP_POLICIES = ("off", "report", "skip", "alias")
+DEFAULT_THRESHOLD = 0.9
+
+NUM_PERM = 128
+SHINGLE_SIZE = 5  # Tokens per shingle
+
+# Metadata key listing the paths of the dropped copies (alias policy)
+ALIASES_KEY = "aliases"
+
+SAMPLE_SIZE = 10
+
+_MERSENNE_PRIME = np.uint64((1 << 61) - 1)
+_MAX_HASH = np.uint64((1 << 32) - 1)
+_TOKEN = re.compile(r"\S+")
+
+
+def _permutations(num_perm: int, seed: int = 1) -> tuple[np.ndarray, np.ndarray]:
+    rng = np.random.default_rng(seed)
+    a = rng.integers(1, int(_MERSENNE_PRIME), size=num_perm, dtype=np.uint64)
+    b = rng.integers(0, int(_MERSENNE_PRIME), size=num_perm, dtype=np.uint64)
+    return a, b
+
+
+def _shingle_hashes(text: str) -> np.ndarray:
+    """32-bit hashes of the distinct token shingles of a text."""
+    tokens = _TOKEN.findall(text)
+    if len(tokens) <= SHINGLE_SIZE:
+        shingles = {" ".join(tokens)}
+    else:
+        shingles = {
+            " ".join(tokens[i : i + SHINGLE_SIZE])
+            for i in range(len(tokens) - SHINGLE_SIZE + 1)
+        }
+    return np.fromiter(
+        (zlib.crc32(s.encode("utf-8")) for s in shingles), np.uint64, len(shingles)
+    )
+
+
+def minhash_signatures(texts: list[str], num_perm: int = NUM_PERM) -> np.ndarray:
+    """MinHash signature of every text.
+
+    Returns:
+        uint64 array of shape (len(texts), num_perm); the fraction of equal
+        positions of two rows estimates the Jaccard similarity of their
+        shingle sets
+    """
+    a, b = _permutations(num_perm)
+    signatures = np.empty((len(texts), num_perm), dtype=np.uint64)
+    with np.errstate(over="ignore"):
+        for i, text in enumerate(texts):
+            hashes = _shingle_hashes(text)[:, None]
+            signatures[i] = (((hashes * a + b) % _MERSENNE_PRIME) & _MAX_HASH).min(
+                axis=0
+            )
+    return signatures
+
+
+def lsh_bands(threshold: float, num_perm: int = NUM_PERM) -> tuple[int, int]:
+    """Bands and rows per band whose LSH threshold is closest below ``threshold``.
+
+    A pair with Jaccard similarity s becomes a candidate with probability
+    ``1 - (1 - s**rows) ** bands``, which rises steeply around
+    ``(1 / bands) ** (1 / rows)``. Staying below the requested threshold
+    favours recall; candidates are confirmed against the signatures anyway.
+    """
+    best = (num_perm, 1)
+    for rows in range(1, num_perm + 1):
+        if num_perm % rows:
+            continue
+        bands = num_perm // rows
+        if (1 / bands) ** (1 / rows) <= threshold:
+            best = (bands, rows)
+    return best
+
+
+def near_duplicate_pairs(
+    signatures: np.ndarray, threshold: float = DEFAULT_THRESHOLD
+) -> list[tuple[int, int]]:
+    """Row pairs whose estimated Jaccard similarity reaches ``threshold``."""
+    bands, rows = lsh_bands(threshold, signatures.shape[1])
+    candidates: set[tuple[int, int]] = set()
+    for band in range(bands):
+        buckets: dict[bytes, list[int]] = {}
+        for i, key in enumerate(signatures[:, band * rows : (band + 1) * rows]):
+            buckets.setdefault(key.tobytes(), []).append(i)
+        for members in buckets.values():
+            candidates.update(
+                (first, other)
+                for first in members
+                for other in members[1:]
+                if first < other
+            )
+    return sorted(
+        (i, j)
+        for i, j in candidates
+        if np.mean(signatures[i] == signatures[j]) >= threshold
+    )
+
+
+def _clusters(pairs: list[tuple[int, int]], count: int) -> dict[int, list[int]]:
+    """Connected components of the pairs, by root, with at least two members."""
+    parent = list(range(count))
+
+    def find(i: int) -> int:
+        while parent[i] != i:
+            parent[i] = parent[parent[i]]
+            i = parent[i]
+        return i
+
+    for i, j in pairs:
+        parent[find(i)] = find(j)
+
+    groups: dict[int, list[int]] = {}
+    for i in range(count):
+        groups.setdefault(find(i), []).append(i)
+    return {root: members for root, members in groups.items() if len(members) > 1}
+
+
+def _location(node: TextNode) -> str:
+    return str(
+        node.metadata.get("relative_path")
+        or node.metadata.get("file_path")
+        or node.metadata.get("file_name")
+        or node.node_id
+    )
+
+
+def _canonical_key(node: TextNode) -> tuple[str, int, str]:
+    return (_location(node), node.start_char_idx or 0, node.node_id)
+
+
+def empty_report(
+    policy: str = "off", threshold: float = DEFAULT_THRESHOLD
+) -> dict[str, Any]:
+    """Summary of a run that found no duplicates."""
+    return {
+        "policy": policy,
+        "threshold": threshold,
+        "chunks": 0,
+        "duplicates": 0,
+        "clusters": 0,
+        "duplicate_chars": 0,
+        "removed": 0,
+        "samples": [],
+    }
+
+
+def dedup_nodes(
+    nodes: list[TextNode],
+    policy: str = "report",
+    threshold: float = DEFAULT_THRESHOLD,
+) -> tuple[list[TextNode], dict[str, Any]]:
+    """Detect near-duplicate chunks and apply the dedup policy.
+
+    Args:
+        nodes: Chunks of one collection
+        policy: One of ``DEDUP_POLICIES``
+        threshold: Minimum estimated Jaccard similarity of shingle sets
+
+    Returns:
+        The nodes to store (input order) and a summary with the number of
+        duplicate chunks (copies beyond the canonical one), clusters, their
+        characters, the chunks removed and a few sample pairs
+    """
+    if policy not in DEDUP_POLICIES:
+        raise ValueError(
+            f"Unknown dedup policy '{policy}', expected one of: {DEDUP_POLICIES}"
+        )
+    report = empty_report(policy, threshold)
+    report["chunks"] = len(nodes)
+    if policy == "off" or len(nodes) < 2:
+        return nodes, report
+
+    signatures = minhash_signatures([node.text for node in nodes])
+    clusters = _clusters(near_duplicate_pairs(signatures, threshold), len(nodes))
+
+    dropped: set[int] = set()
+    for members in clusters.values():
+        members.sort(key=lambda i: _canonical_key(nodes[i]))
+        canonical, copies = nodes[members[0]], members[1:]
+        dropped.update(copies)
+        report["duplicate_chars"] += sum(len(nodes[i].text) for i in copies)
+        if len(report["samples"]) < SAMPLE_SIZE:
+            report["samples"].append(
+                {"file": _location(nodes[copies[0]]), "canonical": _location(canonical)}
+            )
+        if policy == "alias":
+            paths = sorted({_location(nodes[i]) for i in copies})
+            canonical.metadata[ALIASES_KEY] = ", ".join(paths)
+            for excluded in (
+                canonical.excluded_embed_metadata_keys,
+                canonical.excluded_llm_metadata_keys,
+            ):
+                if ALIASES_KEY not in excluded:
+                    excluded.append(ALIASES_KEY)
+
+    report["clusters"] = len(clusters)
+    report["duplicates"] = len(dropped)
+    logger.info(
+        f"Dedup ({policy}): {len(dropped)} of {len(nodes)} chunks are near-duplicates "
+        f"in {len(clusters)} clusters (threshold {threshold})"
+    )
+    if policy == "report":
+        return nodes, report
+
+    report["removed"] = len(dropped)
+    return [node for i, node in enumerate(nodes) if i not in dropped], report
+
+
+def merge_reports(parts: list[dict[str, Any]]) -> dict[str, Any]:
+    """Combine the summaries of disjoint collections (e.g. shards)."""
+    policies = {part["policy"] for part in parts}
+    merged = empty_report(
+        policies.pop() if len(policies) == 1 else "mixed",
+        max((part["threshold"] for part in parts), default=DEFAULT_THRESHOLD),
+    )
+    for part in parts:
+        for key in ("chunks", "duplicates", "clusters", "duplicate_chars", "removed"):
+            merged[key] += part[key]
+        merged["samples"] = (merged["samples"] + part["samples"])[:SAMPLE_SIZE]
+    return merged
@@ -0,0 +1,170 @@
+"""Metadata filters pushed down into the Chroma vector search.
+
+Every node carries the file metadata produced by
+:func:`fragmenter.rag.metadata.create_metadata_extractor`. This module turns
+``key=value`` clauses given on the command line into a Chroma ``where`` clause
+so that filtering happens inside the vector search and top-k slots are never
+spent on out-of-scope chunks.
+
+Supported keys (comma-separated values are OR-ed, different keys are AND-ed):
+
+    repository=<name>      Git repository name (``repository`` metadata)
+    file_type=<ext>        File extension, with or without the leading dot
+    path=<dir>             Directory prefix, relative to the repository root
+    kind=code|docs         Code files (``is_code``) or documentation
+                           (``is_documentation``)
+
+Chroma has no prefix operator for metadata, so ingestion stores every prefix
+of a file's directory in a field per depth (``dir_1=src``,
+``dir_2=src/rag``, ...) and ``path`` becomes an equality test on one of them.
+"""
+
+from typing import Any
+
+from loguru import logger
+
+from fragmenter.rag.metadata import PATH_PREFIX_FIELD
+
+WHERE_KEYS = ("repository", "file_type", "path", "kind")
+KIND_FIELDS = {"code": "is_code", "docs": "is_documentation"}
+
+
+def parse_where(clauses: list[str]) -> dict[str, list[str]]:
+    """Parse ``key=value`` clauses into a mapping of key to accepted values.
+
+    Args:
+        clauses: Clauses as given to ``--where``, e.g. ``["repository=foo"]``
+
+    Returns:
+        Mapping of filter key to the list of accepted values
+
+    Raises:
+        ValueError: If a clause is malformed or uses an unknown key
+    """
+    parsed: dict[str, list[str]] = {}
+    for clause in clauses:
+        key, sep, raw_value = clause.partition("=")
+        key = key.strip()
+        values = [v.strip() for v in raw_value.split(",") if v.strip()]
+        if not sep or not values:
+            raise ValueError(f"Invalid filter '{clause}', expected key=value")
+        if key not in WHERE_KEYS:
+            raise ValueError(
+                f"Unknown filter key '{key}', expected one of: {', '.join(WHERE_KEYS)}"
+            )
+        if key == "file_type":
+            values = [
+                v.lower() if v.startswith(".") else f".{v.lower()}" for v in values
+            ]
+        elif key == "path":
+            values = [v.strip("/").removeprefix("./") for v in values]
+        elif key == "kind":
+            unknown = set(values) - KIND_FIELDS.keys()
+            if unknown:
+                raise ValueError(
+                    f"Unknown kind '{sorted(unknown)[0]}', expected code or docs"
+                )
+        parsed.setdefault(key, []).extend(values)
+    return parsed
+
+
+def _match(field: str, values: list[Any]) -> dict[str, Any]:
+    if len(values) == 1:
+        return {field: {"$eq": values[0]}}
+    return {field: {"$in": values}}
+
+
+def _combine(conditions: list[dict[str, Any]]) -> dict[str, Any] | None:
+    if not conditions:
+        return None
+    if len(conditions) == 1:
+        return conditions[0]
+    return {"$and": conditions}
+
+
+def path_condition(prefixes: list[str]) -> dict[str, Any]:
+    """Clause matching files below any of the given directory prefixes.
+
+    A prefix with ``n`` parts is compared with the ``dir_<n>`` metadata field
+    (see :func:`fragmenter.rag.metadata.path_prefix_metadata`), so matching
+    is a plain ``$eq``/``$in`` and siblings like ``srcs`` never match ``src``.
+    """
+    by_field: dict[str, list[str]] = {}
+    for prefix in dict.fromkeys(prefixes):
+        field = f"{PATH_PREFIX_FIELD}{len(prefix.split('/'))}"
+        by_field.setdefault(field, []).append(prefix)
+    matches = [_match(field, values) for field, values in by_field.items()]
+    return matches[0] if len(matches) == 1 else {"$or": matches}
+
+
+def _any_match(collections: list[Any], where: dict[str, Any] | None) -> bool:
+    return any(
+        collection.get(where=where, limit=1, include=[])["ids"]
+        for collection in collections
+    )
+
+
+def build_where(
+    clauses: list[str], collections: list[Any] | None = None
+) -> dict[str, Any] | None:
+    """Translate ``--where`` clauses into a Chroma ``where`` clause.
+
+    Args:
+        clauses: ``key=value`` clauses (see module docstring)
+        collections: Chroma collections; if given, ``path`` prefixes matching
+            no indexed file are reported
+
+    Returns:
+        Chroma ``where`` dict, or None when no clauses were given
+
+    Raises:
+        ValueError: If a clause is invalid or a path prefix matches nothing
+    """
+    parsed = parse_where(clauses)
+    conditions: list[dict[str, Any]] = []
+
+    if "repository" in parsed:
+        conditions.append(_match("repository", parsed["repository"]))
+    if "file_type" in parsed:
+        conditions.append(_match("file_type", parsed["file_type"]))
+    if "kind" in parsed:
+        kinds: list[dict[str, Any]] = [
+            {KIND_FIELDS[k]: {"$eq": True}} for k in dict.fromkeys(parsed["kind"])
+        ]
+        conditions.append(kinds[0] if len(kinds) == 1 else {"$or": kinds})
+
+    prefixes = [p for p in parsed.get("path", []) if p not in ("", ".")]
+    if prefixes:
+        conditions.append(path_condition(prefixes))
+        # One-record lookups, so an unmatched prefix is an error, not no results
+        if collections and not _any_match(collections, _combine(conditions)):
+            if not _any_match(collections, {f"{PATH_PREFIX_FIELD}0": {"$eq": "."}}):
+                raise ValueError(
+                    "The index has no directory prefix metadata; "
+                    "rebuild it to filter by path"
+                )
+            raise ValueError(
+                f"No indexed directories match path prefix: {', '.join(prefixes)}"
+            )
+
+    where = _combine(conditions)
+    if where is not None:
+        logger.info(f"Filtering retrieval with: {where}")
+    return where
+
+
+def get_collections(index: Any) -> list[Any]:
+    """Return the Chroma collections backing an index (one per shard)."""
+    if hasattr(index, "collections"):
+        return list(index.collections)
+    collection = getattr(getattr(index, "vector_store", None), "client", None)
+    return [collection] if collection is not None else []
+
+
+def where_kwargs(where: dict[str, Any] | None) -> dict[str, Any]:
+    """Retriever kwargs passing a Chroma ``where`` clause to the vector store.
+
+    Spread into ``index.as_retriever(...)`` or ``index.as_query_engine(...)``;
+    empty when there is no clause so the default retrieval path is unchanged.
+    """
+    return {"vector_store_kwargs": {"where": where}} if where else {}
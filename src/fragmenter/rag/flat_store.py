@@ -0,0 +1,753 @@
+"""In-process exact vector store backed by a memory-mapped NumPy matrix.
+
+For small and medium indexes (up to a few hundred thousand chunks) exact
+search over a dense matrix is fast enough and avoids Chroma's SQLite and
+HNSW startup cost. The store lives in ``<persist_dir>/flat_store``:
+
+    manifest.json   Format version, dimension, compression and row count
+    vectors.npy     Unit-normalized embeddings (float32, float16 or int8), one
+                    row per node, opened with ``mmap_mode="r"``
+    scales.npy      Per-dimension scales (int8 only)
+    bits.npy        Packed sign bits (binary prefilter only)
+    ids.json        Node ids and ref_doc_ids, in row order
+    records.jsonl   Text and node metadata, one JSON line per row
+    offsets.npy     Byte offset of each line in ``records.jsonl``
+
+Loading only maps the matrix and reads the id sidecar, so startup does no
+parsing proportional to the text. Queries compute cosine similarities with
+a blocked matmul and select the top-k with ``argpartition``; only the
+returned rows are read from ``records.jsonl``.
+
+Vectors can be compressed when the store is created (see
+:mod:`fragmenter.rag.quantization`): truncated to their leading dimensions,
+stored as float16 or int8, and given a binary sketch that shortlists
+candidates by Hamming distance before rescoring. Query embeddings are
+truncated to match, so the embedding model itself is unchanged.
+
+Writes (adds and deletes from the ingestion pipeline) stay in memory until
+:meth:`FlatVectorStore.persist`: added rows are appended as float32 and
+deleted rows are tombstoned, so neither touches the stored matrix. Persist
+compacts the live rows once, keeping the stored encodings as they are and
+encoding only the added rows, and replaces the whole directory at once.
+
+Filtering accepts LlamaIndex ``MetadataFilters`` and the Chroma ``where``
+clauses produced by :mod:`fragmenter.rag.filters`. The store also provides
+Chroma-style ``count()`` and ``get()`` so that code written against a Chroma
+collection (path prefix resolution, index inspection) works unchanged.
+"""
+
+import json
+import shutil
+from collections.abc import Callable, Iterable, Sequence
+from pathlib import Path
+from typing import Any
+
+import numpy as np
+from llama_index.core.bridge.pydantic import PrivateAttr
+from llama_index.core.schema import BaseNode, MetadataMode
+from llama_index.core.vector_stores.types import (
+    BasePydanticVectorStore,
+    MetadataFilters,
+    VectorStoreQuery,
+    VectorStoreQueryResult,
+)
+from llama_index.core.vector_stores.utils import (
+    build_metadata_filter_fn,
+    metadata_dict_to_node,
+    node_to_metadata_dict,
+)
+from loguru import logger
+
+from fragmenter.rag.quantization import (
+    BINARY_RESCORE_FACTOR,
+    STORAGE_DTYPES,
+    dequantize_int8,
+    encode,
+    hamming_distances,
+    normalize,
+    pack_bits,
+    truncate,
+)
+
+FLAT_STORE_DIR = "flat_store"
+FLAT_STORE_VERSION = 1
+
+# Rows multiplied per matmul block; bounds the float32 copy of float16 data
+SEARCH_BLOCK_SIZE = 65536
+
+
+def is_flat_store(persist_dir: str | Path) -> bool:
+    """Return True if ``persist_dir`` holds a flat vector store."""
+    return (Path(persist_dir) / FLAT_STORE_DIR / "manifest.json").exists()
+
+
+_COMPARISONS: dict[str, Callable[[Any, Any], bool]] = {
+    "$eq": lambda value, target: value == target,
+    "$ne": lambda value, target: value != target,
+    "$gt": lambda value, target: value is not None and value > target,
+    "$gte": lambda value, target: value is not None and value >= target,
+    "$lt": lambda value, target: value is not None and value < target,
+    "$lte": lambda value, target: value is not None and value <= target,
+    "$in": lambda value, target: value in target,
+    "$nin": lambda value, target: value not in target,
+}
+
+
+def matches_where(metadata: dict[str, Any], where: dict[str, Any]) -> bool:
+    """Evaluate a Chroma ``where`` clause against one metadata dict.
+
+    Supports ``$and``/``$or`` and the comparison operators ``$eq``, ``$ne``,
+    ``$gt``, ``$gte``, ``$lt``, ``$lte``, ``$in`` and ``$nin``; a bare value
+    is an equality test.
+
+    Raises:
+        ValueError: If the clause uses an unsupported operator
+    """
+    for key, condition in where.items():
+        if key == "$and":
+            if not all(matches_where(metadata, clause) for clause in condition):
+                return False
+        elif key == "$or":
+            if not any(matches_where(metadata, clause) for clause in condition):
+                return False
+        elif isinstance(condition, dict):
+            value = metadata.get(key)
+            for operator, target in condition.items():
+                if operator not in _COMPARISONS:
+                    raise ValueError(f"Unsupported where operator '{operator}'")
+                if not _COMPARISONS[operator](value, target):
+                    return False
+        elif metadata.get(key) != condition:
+            return False
+    return True
+
+
+class RecordFile:
+    """Row records in a JSONL file, read by byte offset.
+
+    Args:
+        path: The ``records.jsonl`` file
+        offsets: Byte offset of every line, plus the file size
+    """
+
+    def __init__(self, path: Path, offsets: np.ndarray) -> None:
+        self.path = path
+        self.offsets = offsets
+
+    def read(self, positions: list[int]) -> list[dict[str, Any]]:
+        """Read the records of the given rows."""
+        rows = []
+        with open(self.path, "rb") as f:
+            for i in positions:
+                f.seek(int(self.offsets[i]))
+                rows.append(
+                    json.loads(f.read(int(self.offsets[i + 1] - self.offsets[i])))
+                )
+        return rows
+
+    def metadatas(self) -> list[dict[str, Any]]:
+        """Metadata of every row, in row order."""
+        with open(self.path, encoding="utf-8") as f:
+            return [json.loads(line)["metadata"] for line in f]
+
+
+class FlatVectorStore(BasePydanticVectorStore):  # type: ignore[misc, unused-ignore]
+    """Exact cosine-similarity vector store over a memory-mapped matrix.
+
+    Args:
+        persist_dir: Directory holding the store files (``flat_store``)
+        dtype: Storage dtype, ``float32``, ``float16`` or ``int8``
+        dimensions: Keep only the leading dimensions of each embedding
+            (Matryoshka truncation); None keeps all
+        binary: Also store sign bits and shortlist candidates by Hamming
+            distance before rescoring
+
+    The compression settings apply when the store is created; an existing
+    store keeps the settings it was written with.
+
+    Rows are numbered across the stored matrix and the rows added since the
+    last persist (which follow it). Node ids and ref_doc_ids are indexed to
+    their live rows, so upserts and deletes cost the number of rows they
+    touch rather than the size of the store.
+    """
+
+    stores_text: bool = True
+    flat_metadata: bool = False
+
+    persist_dir: str
+    dtype: str = "float32"
+    dimensions: int | None = None
+    binary: bool = False
+
+    _vectors: np.ndarray = PrivateAttr()
+    _scales: np.ndarray | None = PrivateAttr(default=None)
+    _bits: np.ndarray | None = PrivateAttr(default=None)
+    _ids: list[str] = PrivateAttr()
+    _ref_doc_ids: list[str] = PrivateAttr()
+    _records: Any = PrivateAttr(default=None)
+    _metadatas: list[dict[str, Any]] | None = PrivateAttr(default=None)
+    _added: list[np.ndarray] = PrivateAttr(default_factory=list)
+    _added_rows: list[dict[str, Any]] = PrivateAttr(default_factory=list)
+    _deleted: set[int] = PrivateAttr(default_factory=set)
+    _positions: dict[str, int] = PrivateAttr(default_factory=dict)
+    _doc_rows: dict[str, list[int]] = PrivateAttr(default_factory=dict)
+    _dirty: bool = PrivateAttr(default=False)
+    _read_only: bool = PrivateAttr(default=False)
+
+    def __init__(
+        self,
+        persist_dir: str | Path,
+        dtype: str = "float32",
+        dimensions: int | None = None,
+        binary: bool = False,
+        **kwargs: Any,
+    ) -> None:
+        if dtype not in STORAGE_DTYPES:
+            raise ValueError(
+                f"Unknown flat store dtype '{dtype}', expected one of: "
+                f"{', '.join(STORAGE_DTYPES)}"
+            )
+        if dimensions is not None and dimensions < 1:
+            raise ValueError(f"Invalid number of dimensions: {dimensions}")
+        # The base class __init__ only declares the base class fields; without
+        # llama_index installed (as in the pre-commit hook) it is untyped
+        super().__init__(  # type: ignore[call-arg, unused-ignore]
+            persist_dir=str(persist_dir),
+            dtype=dtype,
+            dimensions=dimensions,
+            binary=binary,
+            **kwargs,
+        )
+        self._load()
+
+    @classmethod
+    def class_name(cls) -> str:
+        return "FlatVectorStore"
+
+    @property
+    def client(self) -> "FlatVectorStore":
+        """The store itself, which offers the Chroma-style ``get``/``count``."""
+        return self
+
+    @property
+    def _path(self) -> Path:
+        return Path(self.persist_dir)
+
+    def _load(self) -> None:
+        manifest_path = self._path / "manifest.json"
+        if not manifest_path.exists():
+            self.attach(np.zeros((0, 0), dtype=np.float32), [], [], records=None)
+            return
+
+        manifest = json.loads(manifest_path.read_text(encoding="utf-8"))
+        if manifest.get("version") != FLAT_STORE_VERSION:
+            raise ValueError(
+                f"Unsupported flat store version {manifest.get('version')} "
+                f"in {self._path}"
+            )
+        stored = {
+            "dtype": manifest["dtype"],
+            "dimensions": manifest.get("dimensions"),
+            "binary": manifest.get("binary", False),
+        }
+        if stored != {key: getattr(self, key) for key in stored}:
+            logger.debug(f"Flat store was written with {stored}")
+        self.dtype = stored["dtype"]
+        self.dimensions = stored["dimensions"]
+        self.binary = stored["binary"]
+
+        sidecar = json.loads((self._path / "ids.json").read_text(encoding="utf-8"))
+        self.attach(
+            vectors=np.load(self._path / "vectors.npy", mmap_mode="r"),
+            ids=sidecar["ids"],
+            ref_doc_ids=sidecar["ref_doc_ids"],
+            records=RecordFile(
+                self._path / "records.jsonl",
+                np.load(self._path / "offsets.npy", mmap_mode="r"),
+            ),
+            scales=(
+                np.load(self._path / "scales.npy") if self.dtype == "int8" else None
+            ),
+            bits=(
+                np.load(self._path / "bits.npy", mmap_mode="r") if self.binary else None
+            ),
+        )
+
+    def attach(
+        self,
+        vectors: np.ndarray,
+        ids: list[str],
+        ref_doc_ids: list[str],
+        records: Any,
+        scales: np.ndarray | None = None,
+        bits: np.ndarray | None = None,
+        read_only: bool = False,
+    ) -> None:
+        """Serve from opened (usually memory-mapped) arrays.
+
+        Used for the store's own files and for index snapshots
+        (:mod:`fragmenter.rag.snapshot`). Pending changes are discarded.
+
+        Args:
+            vectors: Encoded vectors in the store's dtype
+            ids: Node id of every row
+            ref_doc_ids: Source document id of every row
+            records: Object with ``read(positions)`` and ``metadatas()``
+                returning the row records (``text`` and ``metadata``)
+            scales: Per-dimension scales (int8 only)
+            bits: Packed sign bits (binary prefilter only)
+            read_only: Reject modifications
+        """
+        if len(ids) != vectors.shape[0]:
+            raise ValueError(f"Flat store at {self._path} is inconsistent")
+        self._vectors, self._scales, self._bits = vectors, scales, bits
+        self._ids, self._ref_doc_ids = list(ids), list(ref_doc_ids)
+        self._records = records
+        self._metadatas = None
+        self._added, self._added_rows, self._deleted = [], [], set()
+        self._positions = {node_id: row for row, node_id in enumerate(self._ids)}
+        self._doc_rows = {}
+        for row, ref_doc_id in enumerate(self._ref_doc_ids):
+            self._doc_rows.setdefault(ref_doc_id, []).append(row)
+        self._dirty = False
+        self._read_only = read_only
+
+    # ------------------------------------------------------------------
+    # Row access
+    # ------------------------------------------------------------------
+
+    @property
+    def _stored(self) -> int:
+        """Number of rows in the stored matrix (live or tombstoned)."""
+        return int(self._vectors.shape[0])
+
+    @property
+    def _dim(self) -> int:
+        if self._vectors.size:
+            return int(self._vectors.shape[1])
+        return int(self._added[0].shape[1]) if self._added else 0
+
+    def _added_vectors(self) -> np.ndarray:
+        """Float32 vectors of the rows added since the last persist."""
+        if len(self._added) > 1:
+            self._added = [np.concatenate(self._added)]
+        if not self._added:
+            return np.zeros((0, self._dim), dtype=np.float32)
+        return self._added[0]
+
+    def _read_rows(self, positions: list[int]) -> list[dict[str, Any]]:
+        stored = [i for i in positions if i < self._stored]
+        found = dict(zip(stored, self._records.read(stored))) if stored else {}
+        return [
+            found[i] if i < self._stored else self._added_rows[i - self._stored]
+            for i in positions
+        ]
+
+    def _all_metadatas(self) -> list[dict[str, Any]]:
+        """Metadata of every row; the stored part is read once and cached."""
+        if self._metadatas is None:
+            self._metadatas = (
+                self._records.metadatas() if self._records is not None else []
+            )
+        if not self._added_rows:
+            return self._metadatas
+        return self._metadatas + [row["metadata"] for row in self._added_rows]
+
+    def _float_vectors(self, positions: list[int]) -> np.ndarray:
+        """Decoded float32 vectors for the given rows."""
+        rows = np.asarray(positions, dtype=np.int64)
+        vectors = np.empty((len(rows), self._dim), dtype=np.float32)
+        stored = rows < self._stored
+        if stored.any():
+            codes = self._vectors[rows[stored]]
+            vectors[stored] = (
+                dequantize_int8(codes, self._scales)
+                if self._scales is not None
+                else codes
+            )
+        if not stored.all():
+            vectors[~stored] = self._added_vectors()[rows[~stored] - self._stored]
+        return vectors
+
+    def _to_node(self, row: dict[str, Any]) -> BaseNode:
+        return metadata_dict_to_node(row["metadata"], text=row["text"])
+
+    def _live(self) -> np.ndarray:
+        """Boolean mask of the rows that are not tombstoned."""
+        mask = np.ones(len(self._ids), dtype=bool)
+        mask[list(self._deleted)] = False
+        return mask
+
+    def _mask(
+        self,
+        filters: MetadataFilters | None = None,
+        where: dict[str, Any] | None = None,
+        node_ids: list[str] | None = None,
+    ) -> np.ndarray | None:
+        """Boolean mask of the live rows passing the filters.
+
+        None if every row qualifies (no filters and no tombstones).
+        """
+        if (
+            not (filters and filters.filters)
+            and not where
+            and node_ids is None
+            and not self._deleted
+        ):
+            return None
+
+        mask = self._live()
+        if node_ids is not None:
+            rows = [self._positions[i] for i in node_ids if i in self._positions]
+            wanted = np.zeros(len(self._ids), dtype=bool)
+            wanted[rows] = True
+            mask &= wanted
+        if where or (filters and filters.filters):
+            metadatas = self._all_metadatas()
+            if where:
+                mask &= np.fromiter(
+                    (matches_where(m, where) for m in metadatas), bool, len(metadatas)
+                )
+            if filters and filters.filters:
+                keep = build_metadata_filter_fn(lambda i: metadatas[int(i)], filters)
+                mask &= np.fromiter(
+                    (keep(str(i)) for i in range(len(metadatas))), bool, len(metadatas)
+                )
+        return mask
+
+    # ------------------------------------------------------------------
+    # Vector store API
+    # ------------------------------------------------------------------
+
+    def _check_writable(self) -> None:
+        if self._read_only:
+            raise ValueError(f"Flat store at {self._path} is read-only")
+
+    def _tombstone(self, rows: Iterable[int]) -> None:
+        """Mark live rows deleted; persist drops them from the files."""
+        for row in rows:
+            if row in self._deleted:
+                continue
+            self._deleted.add(row)
+            node_id, ref_doc_id = self._ids[row], self._ref_doc_ids[row]
+            if self._positions.get(node_id) == row:
+                del self._positions[node_id]
+            doc_rows = self._doc_rows.get(ref_doc_id)
+            if doc_rows is not None:
+                doc_rows.remove(row)
+                if not doc_rows:
+                    del self._doc_rows[ref_doc_id]
+            self._dirty = True
+
+    def add(self, nodes: Sequence[BaseNode], **add_kwargs: Any) -> list[str]:
+        """Add nodes with embeddings, replacing nodes with the same id."""
+        if not nodes:
+            return []
+        self._check_writable()
+
+        embeddings = truncate(
+            np.asarray([node.get_embedding() for node in nodes], dtype=np.float32),
+            self.dimensions,
+        )
+        if self._dim and embeddings.shape[1] != self._dim:
+            raise ValueError(
+                f"Embedding dimension {embeddings.shape[1]} does not match "
+                f"the store ({self._dim})"
+            )
+
+        for node in nodes:
+            if node.node_id in self._positions:
+                self._tombstone([self._positions[node.node_id]])
+            row = len(self._ids)
+            ref_doc_id = node.ref_doc_id or "None"
+            self._ids.append(node.node_id)
+            self._ref_doc_ids.append(ref_doc_id)
+            self._positions[node.node_id] = row
+            self._doc_rows.setdefault(ref_doc_id, []).append(row)
+            self._added_rows.append(
+                {
+                    "text": node.get_content(metadata_mode=MetadataMode.NONE),
+                    "metadata": node_to_metadata_dict(
+                        node, remove_text=True, flat_metadata=self.flat_metadata
+                    ),
+                }
+            )
+        self._added.append(embeddings)
+        self._dirty = True
+        return [node.node_id for node in nodes]
+
+    def delete(self, ref_doc_id: str, **delete_kwargs: Any) -> None:
+        """Delete all nodes that belong to ``ref_doc_id``."""
+        if ref_doc_id in self._doc_rows:
+            self._check_writable()
+            self._tombstone(self._doc_rows.pop(ref_doc_id))
+
+    def delete_nodes(
+        self,
+        node_ids: list[str] | None = None,
+        filters: MetadataFilters | None = None,
+        **delete_kwargs: Any,
+    ) -> None:
+        """Delete nodes by id and/or metadata filters."""
+        if node_ids is None and not (filters and filters.filters):
+            return
+        self._check_writable()
+        mask = self._mask(filters=filters, node_ids=node_ids)
+        if mask is not None:
+            self._tombstone(np.flatnonzero(mask).tolist())
+
+    def clear(self) -> None:
+        """Remove all nodes."""
+        self._check_writable()
+        self.attach(np.zeros((0, 0), dtype=np.float32), [], [], records=None)
+        self._dirty = True
+
+    def get_nodes(
+        self,
+        node_ids: list[str] | None = None,
+        filters: MetadataFilters | None = None,
+    ) -> list[BaseNode]:
+        """Get nodes by id and/or metadata filters."""
+        mask = self._mask(filters=filters, node_ids=node_ids)
+        rows = np.arange(len(self._ids)) if mask is None else np.flatnonzero(mask)
+        return [self._to_node(row) for row in self._read_rows(rows.tolist())]
+
+    def _query_vector(self, embedding: list[float]) -> np.ndarray:
+        vector = np.asarray(embedding, dtype=np.float32)
+        dim = self._dim
+        if self.dimensions is not None and vector.shape[0] > dim:
+            vector = vector[:dim]
+        if vector.shape[0] != dim:
+            raise ValueError(
+                f"Query dimension {vector.shape[0]} does not match the store ({dim})"
+            )
+        return normalize(vector)
+
+    def _stored_scores(
+        self, query: np.ndarray, rows: np.ndarray | None = None
+    ) -> np.ndarray:
+        """Cosine similarity of the query with the stored (encoded) rows."""
+        vectors = self._vectors if rows is None else self._vectors[rows]
+        if not vectors.shape[0]:
+            return np.zeros(0, dtype=np.float32)
+        if self._scales is not None:
+            # Fold the int8 scales into the query instead of dequantizing
+            query = query * self._scales
+        if vectors.dtype == np.float32:
+            return np.asarray(vectors @ query)
+        scores = np.empty(vectors.shape[0], dtype=np.float32)
+        for start in range(0, vectors.shape[0], SEARCH_BLOCK_SIZE):
+            block = vectors[start : start + SEARCH_BLOCK_SIZE]
+            scores[start : start + len(block)] = block.astype(np.float32) @ query
+        return scores
+
+    def _scores(self, query: np.ndarray, rows: np.ndarray | None = None) -> np.ndarray:
+        """Cosine similarity of the query with all rows (or the given rows)."""
+        added = self._added_vectors()
+        if rows is None:
+            scores = self._stored_scores(query)
+            return np.concatenate([scores, added @ query]) if len(added) else scores
+        scores = np.empty(len(rows), dtype=np.float32)
+        stored = rows < self._stored
+        scores[stored] = self._stored_scores(query, rows[stored])
+        scores[~stored] = added[rows[~stored] - self._stored] @ query
+        return scores
+
+    def _sign_bits(self) -> np.ndarray:
+        """Packed sign bits of all rows, stored and added."""
+        added = pack_bits(self._added_vectors())
+        if self._bits is None:
+            return added
+        return np.concatenate([self._bits, added]) if len(added) else self._bits
+
+    def _shortlist(
+        self, query: np.ndarray, mask: np.ndarray | None, k: int
+    ) -> np.ndarray:
+        """Rows closest to the query by Hamming distance of the sign bits."""
+        distances = hamming_distances(self._sign_bits(), pack_bits(query))
+        if mask is not None:
+            distances = np.where(mask, distances, np.iinfo(np.int32).max)
+        size = min(k * BINARY_RESCORE_FACTOR, len(distances))
+        return np.argpartition(distances, size - 1)[:size]
+
+    def query(self, query: VectorStoreQuery, **kwargs: Any) -> VectorStoreQueryResult:
+        """Top-k by cosine similarity.
+
+        Exact over the stored vectors, or over a Hamming-distance shortlist of
+        ``BINARY_RESCORE_FACTOR * k`` rows when the binary prefilter is on.
+        Accepts ``query.filters`` (MetadataFilters), ``query.node_ids`` and a
+        Chroma-style ``where`` clause as keyword argument.
+        """
+        if query.query_embedding is None or not self.count():
+            return VectorStoreQueryResult(nodes=[], similarities=[], ids=[])
+
+        vector = self._query_vector(query.query_embedding)
+
+        # VectorStoreIndex passes node_ids=[] when it has no index struct
+        mask = self._mask(
+            filters=query.filters,
+            where=kwargs.get("where"),
+            node_ids=query.node_ids or None,
+        )
+        candidates = len(self._ids) if mask is None else int(mask.sum())
+        k = min(query.similarity_top_k, candidates)
+        if k == 0:
+            return VectorStoreQueryResult(nodes=[], similarities=[], ids=[])
+
+        rows: np.ndarray | None
+        if self.binary:
+            rows = self._shortlist(vector, mask, k)
+            if mask is not None:
+                rows = rows[mask[rows]]
+        else:
+            rows = np.flatnonzero(mask) if mask is not None else None
+        scores = self._scores(vector, rows)
+
+        top = np.argpartition(-scores, k - 1)[:k]
+        top = top[np.argsort(-scores[top])]
+        positions = top if rows is None else rows[top]
+        records = self._read_rows(positions.tolist())
+        return VectorStoreQueryResult(
+            nodes=[self._to_node(record) for record in records],
+            similarities=[float(scores[i]) for i in top],
+            ids=[self._ids[i] for i in positions],
+        )
+
+    def persist(self, persist_path: str | None = None, fs: Any = None) -> None:
+        """Compact pending changes into ``persist_dir`` and reopen it."""
+        if not self._dirty:
+            return
+        self._write(self._path)
+        self._load()
+
+    def save_to(self, persist_dir: str | Path) -> None:
+        """Write a complete copy of the store (e.g. of a snapshot) elsewhere."""
+        self._write(Path(persist_dir))
+
+    def _encode_live(
+        self, stored: np.ndarray, added: np.ndarray
+    ) -> dict[str, np.ndarray]:
+        """Encoded arrays of the given stored rows followed by added vectors.
+
+        Stored rows keep their encoding. Added int8 rows are quantized with
+        the stored scales; only dimensions where they exceed the stored range
+        get a wider scale, and just those stored codes are rescaled.
+        """
+        arrays: dict[str, np.ndarray]
+        if not len(stored) and not len(added):
+            arrays = {"vectors": np.zeros((0, self._dim), dtype=self.dtype)}
+            if self.dtype == "int8":
+                arrays["scales"] = np.ones(self._dim, dtype=np.float32)
+        elif not len(stored):
+            arrays = encode(added, self.dtype)
+        elif self._scales is not None:
+            codes = np.asarray(self._vectors[stored])
+            scales = self._scales
+            if len(added):
+                scales = np.maximum(scales, np.abs(added).max(axis=0) / 127.0)
+                if (scales > self._scales).any():
+                    codes = np.rint(codes * (self._scales / scales)).astype(np.int8)
+            new_codes = np.clip(np.rint(added / scales), -127, 127).astype(np.int8)
+            arrays = {
+                "vectors": np.concatenate([codes, new_codes]),
+                "scales": scales.astype(np.float32),
+            }
+        else:
+            arrays = {
+                "vectors": np.concatenate(
+                    [self._vectors[stored], added.astype(self.dtype)]
+                )
+            }
+        if self.binary:
+            bits = pack_bits(added)
+            if self._bits is not None and len(stored):
+                bits = np.concatenate([self._bits[stored], bits])
+            arrays["bits"] = bits
+        return arrays
+
+    def _write(self, target: Path) -> None:
+        """Write the live rows as store files.
+
+        The files are written to a sibling directory that then replaces
+        ``target``, so readers never see a partially written store.
+        """
+        live = np.flatnonzero(self._live())
+        stored = live[live < self._stored]
+        added = self._added_vectors()[live[live >= self._stored] - self._stored]
+        arrays = self._encode_live(stored, added)
+        ids = [self._ids[i] for i in live]
+        ref_doc_ids = [self._ref_doc_ids[i] for i in live]
+
+        staging = target.with_name(target.name + ".tmp")
+        shutil.rmtree(staging, ignore_errors=True)
+        staging.mkdir(parents=True)
+
+        offsets = [0]
+        with open(staging / "records.jsonl", "wb") as f:
+            for row in self._read_rows(live.tolist()):
+                line = (json.dumps(row, ensure_ascii=False) + "\n").encode("utf-8")
+                f.write(line)
+                offsets.append(offsets[-1] + len(line))
+        np.save(staging / "offsets.npy", np.asarray(offsets, dtype=np.int64))
+        for name, array in arrays.items():
+            np.save(staging / f"{name}.npy", np.ascontiguousarray(array))
+        (staging / "ids.json").write_text(
+            json.dumps({"ids": ids, "ref_doc_ids": ref_doc_ids}),
+            encoding="utf-8",
+        )
+        vectors = arrays["vectors"]
+        manifest = {
+            "version": FLAT_STORE_VERSION,
+            "dim": int(vectors.shape[1]) if vectors.size else 0,
+            "dtype": self.dtype,
+            "dimensions": self.dimensions,
+            "binary": self.binary,
+            "count": len(ids),
+        }
+        (staging / "manifest.json").write_text(
+            json.dumps(manifest, indent=2), encoding="utf-8"
+        )
+
+        backup = target.with_name(target.name + ".old")
+        shutil.rmtree(backup, ignore_errors=True)
+        if target.exists():
+            target.rename(backup)
+        staging.rename(target)
+        shutil.rmtree(backup, ignore_errors=True)
+        logger.info(f"Wrote {len(ids)} vectors to flat store: {target}")
+
+    # ------------------------------------------------------------------
+    # Chroma collection compatibility
+    # ------------------------------------------------------------------
+
+    def count(self) -> int:
+        """Number of stored vectors."""
+        return len(self._ids) - len(self._deleted)
+
+    def get(
+        self,
+        ids: list[str] | None = None,
+        where: dict[str, Any] | None = None,
+        limit: int | None = None,
+        offset: int = 0,
+        include: list[str] | None = None,
+    ) -> dict[str, Any]:
+        """Read records in row order, like ``chromadb.Collection.get``."""
+        include = include if include is not None else ["documents", "metadatas"]
+        mask = self._mask(where=where, node_ids=ids)
+        rows = np.arange(len(self._ids)) if mask is None else np.flatnonzero(mask)
+        end = None if limit is None else offset + limit
+        positions: list[int] = rows[offset:end].tolist()
+
+        result: dict[str, Any] = {"ids": [self._ids[i] for i in positions]}
+        for key in ("documents", "metadatas", "embeddings"):
+            result[key] = None
+        if "documents" in include or "metadatas" in include:
+            records = self._read_rows(positions)
+            if "documents" in include:
+                result["documents"] = [row["text"] for row in records]
+            if "metadatas" in include:
+                result["metadatas"] = [row["metadata"] for row in records]
+        if "embeddings" in include:
+            result["embeddings"] = self._float_vectors(positions)
+        return result
@@ -1,27 +1,64 @@
+import asyncio
+import json
 import re
+import time
+from collections.abc import AsyncIterator, Callable, Generator, Iterator
+from contextlib import AbstractContextManager, contextmanager, nullcontext
 from pathlib import Path
+from typing import Any, cast
 
-from llama_index.core import VectorStoreIndex
+from llama_index.core import Settings, VectorStoreIndex
+from llama_index.core.base.response.schema import (
+    RESPONSE_TYPE,
+    Response,
+    StreamingResponse,
+)
 from llama_index.core.indices.base import BaseIndex
+from llama_index.core.postprocessor.types import BaseNodePostprocessor
+from llama_index.core.query_engine import RetrieverQueryEngine
+from llama_index.core.schema import MetadataMode, NodeWithScore, QueryBundle
+from llama_index.core.utilities.token_counting import TokenCounter
 from loguru import logger
 
-from fragmenter.rag.vector_stores import create_chroma_vector_store
+from fragmenter.rag.filters import where_kwargs
+from fragmenter.rag.sharding import is_sharded, load_sharded_index
+from fragmenter.rag.snapshot import is_snapshot, open_snapshot
+from fragmenter.rag.vector_stores import create_vector_store
 
+# Number of chunks retrieved per query when callers do not specify top_k
+DEFAULT_TOP_K = 5
 
-def load_index(persist_dir: str) -> BaseIndex:
-    """Load the index from Chroma vector store.
+
+def load_index(persist_dir: str, hnsw: dict[str, Any] | None = None) -> BaseIndex:
+    """Load the index from its vector store.
+
+    Storage directories built with ``--sharded`` are detected automatically
+    and loaded as a :class:`~fragmenter.rag.sharding.ShardedIndex`; the
+    vector store backend (Chroma or flat) is detected from the directory.
+    A ``.fragidx`` snapshot file is served read-only straight from the file.
 
     Args:
-        persist_dir: Directory containing the Chroma vector store
+        persist_dir: Directory containing the vector store, or a snapshot
+        hnsw: Optional HNSW configuration (Chroma only); only ``ef_search``
+            can change on an existing collection
 
     Returns:
         VectorStoreIndex loaded from persistent storage
     """
-    logger.info(f"Loading index from Chroma storage: {persist_dir}")
+    if is_sharded(persist_dir):
+        return load_sharded_index(persist_dir, hnsw=hnsw)
+
+    if is_snapshot(persist_dir):
+        logger.info(f"Serving index snapshot: {persist_dir}")
+        index = VectorStoreIndex.from_vector_store(open_snapshot(persist_dir))
+        logger.success("Loaded index from snapshot")
+        return index
 
-    # Load Chroma vector store
-    vector_store, storage_context = create_chroma_vector_store(
-        persist_path=Path(persist_dir)
+    logger.info(f"Loading index from storage: {persist_dir}")
+
+    # Load the vector store the directory was built with
+    vector_store, storage_context = create_vector_store(
+        persist_path=Path(persist_dir), hnsw=hnsw
     )
 
     # Reconstruct index from vector store
@@ -29,16 +66,171 @@ def load_index(persist_dir: str) -> BaseIndex:
         vector_store=vector_store, storage_context=storage_context
     )
 
-    logger.success("Loaded index from Chroma storage")
+    logger.success("Loaded index from storage")
     return index
 
 
-def query_index(index: BaseIndex, query_text: str):
-    """Query the database."""
+class QueryTimings:
+    """Wall time per stage of one query, to show where its latency goes.
+
+    The stages, in the order they run:
+
+        settings     LLM and embedding provider initialisation
+        load_index   Opening the vector store
+        embed        Embedding the query
+        search       Vector search
+        postprocess  Node post-processors of the query engine
+        synthesis    LLM answer generation (``ttft_s``: until the first token)
+        output       Writing or printing the answer
+
+    The library functions fill in the stages from ``embed`` to ``output``;
+    callers time the others with :meth:`stage`. ``context_tokens`` is the
+    size of the retrieved context sent to the LLM.
+    """
+
+    STAGES = (
+        "settings",
+        "load_index",
+        "embed",
+        "search",
+        "postprocess",
+        "synthesis",
+        "output",
+    )
+
+    def __init__(self) -> None:
+        self.stages: dict[str, float] = {}
+        self.ttft_s: float | None = None
+        self.context_tokens: int | None = None
+        self._start = time.perf_counter()
+
+    def add(self, name: str, seconds: float) -> None:
+        """Add time to a stage."""
+        self.stages[name] = self.stages.get(name, 0.0) + seconds
+
+    @contextmanager
+    def stage(self, name: str) -> Iterator[None]:
+        """Time a block as (part of) a stage."""
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.add(name, time.perf_counter() - start)
+
+    def to_dict(self) -> dict[str, Any]:
+        """Stage times, total since creation, TTFT and context size."""
+        return {
+            "stages": {
+                name: round(self.stages[name], 4)
+                for name in self.STAGES
+                if name in self.stages
+            },
+            "seconds": round(time.perf_counter() - self._start, 4),
+            "ttft_s": round(self.ttft_s, 4) if self.ttft_s is not None else None,
+            "context_tokens": self.context_tokens,
+        }
+
+    def log_summary(self) -> None:
+        """Log each stage's time and share of the total."""
+        report = self.to_dict()
+        total = report["seconds"] or 1.0
+        for name, seconds in report["stages"].items():
+            logger.info(f"Query stage {name}: {seconds:.3f}s ({seconds / total:.0%})")
+        logger.info(
+            f"Query total: {report['seconds']:.3f}s, TTFT: {report['ttft_s']}s, "
+            f"context: {report['context_tokens']} tokens"
+        )
+
+
+def _timed(timings: QueryTimings | None, name: str) -> AbstractContextManager[None]:
+    return timings.stage(name) if timings is not None else nullcontext()
+
+
+def _timed_query(
+    index: BaseIndex,
+    query_text: str,
+    where: dict[str, Any] | None,
+    streaming: bool,
+    timings: QueryTimings,
+    node_postprocessors: list[BaseNodePostprocessor] | None = None,
+) -> Response | StreamingResponse:
+    """Run the query engine's steps one at a time, timing each.
+
+    Synthesis always streams, so the time to the first token is known; for
+    ``streaming`` callers the returned ``response_gen`` records the end of
+    synthesis when it is exhausted, otherwise the tokens are joined into a
+    plain ``Response``. ``node_postprocessors`` are applied in the
+    ``postprocess`` stage, as the query engine would.
+    """
+    node_postprocessors = node_postprocessors or []
+    retriever = index.as_retriever(**where_kwargs(where))
+    query_engine = RetrieverQueryEngine.from_args(
+        retriever, node_postprocessors=node_postprocessors, streaming=True
+    )
+
+    with timings.stage("embed"):
+        # Retrievers only embed queries without an embedding
+        embedding = Settings.embed_model.get_query_embedding(query_text)
+        query_bundle = QueryBundle(query_text, embedding=embedding)
+    with timings.stage("search"):
+        nodes = retriever.retrieve(query_bundle)
+    with timings.stage("postprocess"):
+        for postprocessor in node_postprocessors:
+            nodes = postprocessor.postprocess_nodes(nodes, query_bundle)
+    timings.context_tokens = TokenCounter().get_string_tokens(
+        "\n\n".join(n.node.get_content(metadata_mode=MetadataMode.LLM) for n in nodes)
+    )
+
+    start = time.perf_counter()
+    response = query_engine.synthesize(query_bundle, nodes)
+    assert isinstance(response, StreamingResponse)
+
+    def timed_tokens(tokens: Iterator[str]) -> Generator[str, None, None]:
+        # Only the time spent waiting for tokens counts, not the consumer's
+        elapsed = time.perf_counter() - start
+        try:
+            while True:
+                resumed = time.perf_counter()
+                try:
+                    token = next(tokens)
+                except StopIteration:
+                    return
+                finally:
+                    elapsed += time.perf_counter() - resumed
+                if timings.ttft_s is None:
+                    timings.ttft_s = elapsed
+                yield token
+        finally:
+            timings.add("synthesis", elapsed)
+
+    assert response.response_gen is not None
+    tokens = timed_tokens(response.response_gen)
+    if streaming:
+        response.response_gen = tokens
+        return response
+    text = "".join(tokens)
+    return Response(text, source_nodes=response.source_nodes)
+
+
+def query_index(
+    index: BaseIndex,
+    query_text: str,
+    where: dict[str, Any] | None = None,
+    timings: QueryTimings | None = None,
+) -> RESPONSE_TYPE:
+    """Query the database, optionally restricted by a Chroma ``where`` clause.
+
+    With ``timings``, the query's stages are recorded into it (see
+    :class:`QueryTimings`).
+    """
     query_preview = query_text if len(query_text) <= 100 else query_text[:100] + "..."
     logger.info(f"Querying database with: {query_preview}")
-    query_engine = index.as_query_engine()
-    response = query_engine.query(query_text)
+    response: RESPONSE_TYPE
+    if timings is not None:
+        response = _timed_query(index, query_text, where, False, timings)
+    else:
+        query_engine = index.as_query_engine(**where_kwargs(where))
+        response = query_engine.query(query_text)
     response_str = str(response)
     response_preview = (
         response_str if len(response_str) <= 200 else response_str[:200] + "..."
@@ -47,6 +239,56 @@ def query_index(index: BaseIndex, query_text: str):
     return response
 
 
+def serialize_source_node(node_with_score: NodeWithScore, rank: int) -> dict[str, Any]:
+    """Convert a retrieved node into a JSON-serializable dictionary.
+
+    Args:
+        node_with_score: Node returned by a retriever or query engine
+        rank: 1-based position of the node in the result list
+
+    Returns:
+        Dictionary with rank, id, score, text, metadata and character span
+    """
+    node = node_with_score.node
+    return {
+        "rank": rank,
+        "node_id": node.node_id,
+        "score": node_with_score.score,
+        "text": node.get_content(),
+        "metadata": node.metadata,
+        "start_char_idx": getattr(node, "start_char_idx", None),
+        "end_char_idx": getattr(node, "end_char_idx", None),
+    }
+
+
+def retrieve(
+    index: BaseIndex,
+    query_text: str,
+    top_k: int = DEFAULT_TOP_K,
+    where: dict[str, Any] | None = None,
+) -> list[dict[str, Any]]:
+    """Retrieve the top-k chunks for a query without LLM synthesis.
+
+    Only the query is embedded; no LLM call is made, so this is suitable for
+    callers that feed the context to their own models.
+
+    Args:
+        index: The RAG index to search
+        query_text: The query to embed and search for
+        top_k: Number of chunks to return (default: 5)
+        where: Optional Chroma ``where`` clause (see :mod:`fragmenter.rag.filters`)
+
+    Returns:
+        Ranked list of serialized nodes (see :func:`serialize_source_node`)
+    """
+    query_preview = query_text if len(query_text) <= 100 else query_text[:100] + "..."
+    logger.info(f"Retrieving top {top_k} chunks for: {query_preview}")
+    retriever = index.as_retriever(similarity_top_k=top_k, **where_kwargs(where))
+    results = retriever.retrieve(query_text)
+    logger.info(f"Retrieved {len(results)} chunks")
+    return [serialize_source_node(n, rank) for rank, n in enumerate(results, start=1)]
+
+
 def extract_code_blocks(text: str, language: str | None = None) -> list[str]:
     """Extract code blocks from markdown text.
 
@@ -68,12 +310,172 @@ def extract_code_blocks(text: str, language: str | None = None) -> list[str]:
     return matches
 
 
+def stream_query(
+    index: BaseIndex,
+    query_text: str,
+    where: dict[str, Any] | None = None,
+    timings: QueryTimings | None = None,
+) -> StreamingResponse:
+    """Query the database with a streaming query engine.
+
+    Returns as soon as retrieval is done; the answer is generated lazily while
+    iterating over ``response.response_gen``.
+
+    Args:
+        index: The RAG index to query
+        query_text: The query/question to ask
+        where: Optional Chroma ``where`` clause restricting retrieval
+        timings: Optional :class:`QueryTimings` to record the stages into;
+            synthesis is complete once ``response_gen`` is exhausted
+
+    Returns:
+        StreamingResponse with ``response_gen`` and ``source_nodes``
+    """
+    query_preview = query_text if len(query_text) <= 100 else query_text[:100] + "..."
+    logger.info(f"Streaming query: {query_preview}")
+    if timings is not None:
+        return cast(
+            StreamingResponse, _timed_query(index, query_text, where, True, timings)
+        )
+    query_engine = index.as_query_engine(streaming=True, **where_kwargs(where))
+    return cast(StreamingResponse, query_engine.query(query_text))
+
+
+class StreamingCodeExtractor:
+    """Incrementally extract fenced code blocks from streamed markdown.
+
+    Mirrors :func:`extract_code_blocks` for text that arrives in arbitrary
+    pieces: :meth:`feed` returns the code that became available, with blocks
+    separated by a blank line as in the joined non-streaming output. Text that
+    might be the start of a fence is held back until it can be classified.
+    A block still open when the stream ends is kept, since truncated
+    generations usually end inside a code block.
+    """
+
+    FENCE = "```"
+
+    def __init__(self, language: str | None = None):
+        """Initialize the extractor.
+
+        Args:
+            language: Optional language filter (e.g., 'python', 'cpp')
+        """
+        lang_pattern = re.escape(language) if language else r"(?:\w+)?"
+        self._opening = re.compile(rf"```{lang_pattern}\n")
+        self._buffer = ""
+        self._in_block = False
+        self.blocks_found = 0
+
+    def feed(self, text: str) -> str:
+        """Consume streamed text and return newly extracted code."""
+        self._buffer += text
+        out: list[str] = []
+
+        while True:
+            if self._in_block:
+                end = self._buffer.find(self.FENCE)
+                if end == -1:
+                    # Hold back a possible partial closing fence
+                    keep = len(self.FENCE) - 1
+                    out.append(self._buffer[:-keep])
+                    self._buffer = self._buffer[-keep:]
+                    break
+                out.append(self._buffer[:end])
+                self._buffer = self._buffer[end + len(self.FENCE) :]
+                self._in_block = False
+            else:
+                match = self._opening.search(self._buffer)
+                if match is None:
+                    # Keep an unterminated fence line, or a partial fence
+                    start = self._buffer.rfind(self.FENCE)
+                    if start != -1 and "\n" not in self._buffer[start:]:
+                        self._buffer = self._buffer[start:]
+                    else:
+                        self._buffer = self._buffer[-(len(self.FENCE) - 1) :]
+                    break
+                if self.blocks_found:
+                    out.append("\n\n")
+                self.blocks_found += 1
+                self._buffer = self._buffer[match.end() :]
+                self._in_block = True
+
+        return "".join(out)
+
+    def close(self) -> str:
+        """Flush code held back at the end of the stream."""
+        remaining = self._buffer if self._in_block else ""
+        self._buffer = ""
+        self._in_block = False
+        return remaining
+
+
+def stream_and_save(
+    index: BaseIndex,
+    query_text: str,
+    output_file: Path,
+    code_only: bool = False,
+    language: str | None = None,
+    on_token: Callable[[str], None] | None = None,
+    where: dict[str, Any] | None = None,
+    timings: QueryTimings | None = None,
+) -> str:
+    """Stream a RAG response into a file as it is generated.
+
+    Streaming counterpart of :func:`query_and_save`. With ``code_only`` the
+    code blocks are extracted incrementally; if the finished response
+    contains no code block, the full response is written instead.
+
+    Args:
+        index: The RAG index to query
+        query_text: The query/question to ask
+        output_file: Path where to save the response
+        code_only: If True, write only code blocks from the response
+        language: Optional language filter for code extraction (e.g., 'cpp')
+        on_token: Optional callback invoked with every generated token
+        where: Optional Chroma ``where`` clause restricting retrieval
+        timings: Optional :class:`QueryTimings` to record the stages into;
+            the callback and file writes count as ``output``
+
+    Returns:
+        The full response text
+    """
+    response = stream_query(index, query_text, where=where, timings=timings)
+    extractor = StreamingCodeExtractor(language=language) if code_only else None
+    tokens: list[str] = []
+
+    output_file.parent.mkdir(parents=True, exist_ok=True)
+    with open(output_file, "w", encoding="utf-8") as f:
+        for token in response.response_gen:
+            tokens.append(token)
+            with _timed(timings, "output"):
+                if on_token is not None:
+                    on_token(token)
+                f.write(extractor.feed(token) if extractor else token)
+                f.flush()
+
+        response_text = "".join(tokens)
+        if extractor:
+            f.write(extractor.close())
+            if extractor.blocks_found:
+                logger.info(f"Extracted {extractor.blocks_found} code block(s)")
+            else:
+                logger.warning("No code blocks found, saving full response")
+                f.seek(0)
+                f.truncate()
+                f.write(response_text)
+
+    logger.success(f"Saved response to: {output_file}")
+    return response_text
+
+
 def query_and_save(
     index: BaseIndex,
     query_text: str,
     output_file: Path,
     code_only: bool = False,
     language: str | None = None,
+    where: dict[str, Any] | None = None,
+    timings: QueryTimings | None = None,
 ) -> str:
     """Query RAG and save response to file.
 
@@ -83,20 +485,14 @@ def query_and_save(
         output_file: Path where to save the response
         code_only: If True, extract and save only code blocks from response
         language: Optional language filter for code extraction (e.g., 'cpp', 'python')
+        where: Optional Chroma ``where`` clause restricting retrieval
+        timings: Optional :class:`QueryTimings` to record the stages into
 
     Returns:
         The response text
     """
-    query_preview = query_text if len(query_text) <= 100 else query_text[:100] + "..."
-    logger.info(f"Querying database with: {query_preview}")
-    query_engine = index.as_query_engine()
-    response = query_engine.query(query_text)
-
+    response = query_index(index, query_text, where=where, timings=timings)
     response_text = str(response)
-    response_preview = (
-        response_text if len(response_text) <= 200 else response_text[:200] + "..."
-    )
-    logger.info(f"Response: {response_preview}")
 
     # Prepare content to save
     if code_only:
@@ -111,8 +507,101 @@ def query_and_save(
         content = response_text
 
     # Save to file
-    output_file.parent.mkdir(parents=True, exist_ok=True)
-    output_file.write_text(content, encoding="utf-8")
+    with _timed(timings, "output"):
+        output_file.parent.mkdir(parents=True, exist_ok=True)
+        output_file.write_text(content, encoding="utf-8")
     logger.success(f"Saved response to: {output_file}")
 
     return response_text
+
+
+def load_batch_queries(batch_file: Path) -> list[dict[str, Any]]:
+    """Load queries from a JSONL file.
+
+    Each non-empty line must be a JSON object with a ``query`` string. An
+    optional ``id`` identifies the query in the results; it defaults to the
+    1-based line number. Any other fields are passed through unchanged.
+
+    Args:
+        batch_file: Path to the JSONL input file
+
+    Returns:
+        List of query records with ``id`` and ``query`` set
+
+    Raises:
+        ValueError: If a line is not valid JSON or has no query
+    """
+    queries = []
+    with open(batch_file, encoding="utf-8") as f:
+        for line_no, line in enumerate(f, start=1):
+            if not line.strip():
+                continue
+            try:
+                record = json.loads(line)
+            except json.JSONDecodeError as e:
+                raise ValueError(f"{batch_file}:{line_no}: invalid JSON: {e}") from e
+            if not isinstance(record, dict) or not isinstance(record.get("query"), str):
+                raise ValueError(f"{batch_file}:{line_no}: missing 'query' string")
+            record.setdefault("id", line_no)
+            queries.append(record)
+
+    logger.info(f"Loaded {len(queries)} queries from {batch_file}")
+    return queries
+
+
+async def abatch_query(
+    index: BaseIndex,
+    queries: list[dict[str, Any]],
+    concurrency: int = 4,
+    code_only: bool = False,
+    language: str | None = None,
+    where: dict[str, Any] | None = None,
+) -> AsyncIterator[dict[str, Any]]:
+    """Run many queries against one loaded index with bounded concurrency.
+
+    Queries run through the async query engine so LLM calls overlap, while a
+    semaphore caps the number of in-flight requests. Results are yielded in
+    completion order, not input order.
+
+    Args:
+        index: The RAG index to query
+        queries: Query records as returned by :func:`load_batch_queries`
+        concurrency: Maximum number of queries in flight (default: 4)
+        code_only: If True, add the extracted code blocks to each result
+        language: Optional language filter for code extraction
+        where: Optional Chroma ``where`` clause restricting retrieval
+
+    Yields:
+        One result dict per query with ``id``, ``query``, ``response``,
+        ``elapsed_s``, ``error`` and (with code_only) ``code_blocks``
+    """
+    query_engine = index.as_query_engine(**where_kwargs(where))
+    semaphore = asyncio.Semaphore(max(1, concurrency))
+
+    async def run_one(record: dict[str, Any]) -> dict[str, Any]:
+        async with semaphore:
+            start = time.perf_counter()
+            result = {**record, "response": None, "error": None}
+            try:
+                response = await query_engine.aquery(record["query"])
+                result["response"] = str(response)
+            except Exception as e:
+                logger.error(f"Query {record['id']} failed: {e}")
+                result["error"] = str(e)
+            result["elapsed_s"] = round(time.perf_counter() - start, 4)
+
+        if code_only:
+            result["code_blocks"] = (
+                extract_code_blocks(result["response"], language=language)
+                if result["response"]
+                else []
+            )
+        return result
+
+    tasks = [asyncio.create_task(run_one(record)) for record in queries]
+    try:
+        for next_done in asyncio.as_completed(tasks):
+            yield await next_done
+    finally:
+        for task in tasks:
+            task.cancel()
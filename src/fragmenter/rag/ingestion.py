@@ -5,8 +5,10 @@ vector store indexes. It composes functionality from the specialized modules:
 - parsers: File-type-specific document readers
 - metadata: Metadata extraction and git repository detection
 - extractors: Optional LLM-based metadata enrichment
-- vector_stores: Chroma vector store initialization
+- vector_stores: Vector store initialization (Chroma or flat)
 - pipeline: Ingestion pipeline configuration
+- dedup: Optional near-duplicate chunk detection
+- boilerplate: Optional license header/boilerplate exclusion from embeddings
 
 Example:
     >>> from fragmenter.rag.ingestion import build_index
@@ -17,15 +19,22 @@ Example:
     ... )
 """
 
+import time
 from pathlib import Path
+from typing import Any
 
-from llama_index.core import Settings, VectorStoreIndex
+from llama_index.core import Settings, StorageContext, VectorStoreIndex
 from llama_index.core.indices.base import BaseIndex
-from llama_index.core.schema import TextNode
+from llama_index.core.ingestion import IngestionPipeline
+from llama_index.core.schema import BaseNode, TextNode
+from llama_index.core.vector_stores.types import BasePydanticVectorStore
 from loguru import logger
 
+from fragmenter.rag.boilerplate import BOILERPLATE_KEY, mark_boilerplate
+from fragmenter.rag.dedup import dedup_nodes
 from fragmenter.rag.extractors import get_metadata_extractors
-from fragmenter.rag.metadata import create_metadata_extractor
+from fragmenter.rag.instrumentation import BuildReport
+from fragmenter.rag.metadata import create_metadata_extractor, exclude_path_prefixes
 from fragmenter.rag.parsers import (
     MIN_CHUNK_SIZE_CODE,
     MIN_CHUNK_SIZE_CONFIG,
@@ -33,7 +42,8 @@ from fragmenter.rag.parsers import (
     TypedDocumentReader,
 )
 from fragmenter.rag.pipeline import create_ingestion_pipeline
-from fragmenter.rag.vector_stores import create_chroma_vector_store
+from fragmenter.rag.stats import collect_stats, save_stats
+from fragmenter.rag.vector_stores import create_vector_store
 
 
 def load_documents(
@@ -42,6 +52,7 @@ def load_documents(
     min_chunk_size_code: int = MIN_CHUNK_SIZE_CODE,
     min_chunk_size_docs: int = MIN_CHUNK_SIZE_DOCS,
     min_chunk_size_config: int = MIN_CHUNK_SIZE_CONFIG,
+    report: BuildReport | None = None,
 ) -> list[TextNode]:
     """Load documents from directory with file-type-specific parsing.
 
@@ -56,6 +67,7 @@ def load_documents(
         min_chunk_size_code: Minimum characters for code chunks (default: 250)
         min_chunk_size_docs: Minimum characters for doc chunks (default: 150)
         min_chunk_size_config: Minimum characters for config chunks (default: 75)
+        report: Build report to record the walk, metadata and parse stages in
 
     Returns:
         List of TextNodes with enhanced metadata and proper chunking
@@ -113,32 +125,50 @@ def load_documents(
         ".gitmodules",
     }
 
-    # Manually walk the directory and load files
-    nodes = []
-    for file_path in input_dir.rglob("*"):
-        # Skip directories
-        if file_path.is_dir():
-            continue
-
-        # Skip excluded patterns
-        if any(pattern in str(file_path) for pattern in exclude_patterns):
-            continue
-
-        # Check if file should be processed
-        should_process = (
-            file_path.suffix in file_extensions or file_path.name in special_files
-        )
+    report = report or BuildReport()
+
+    # Walk the directory first, so the later stages know their totals
+    with report.stage("walk", unit="files") as stage:
+        paths = []
+        for file_path in input_dir.rglob("*"):
+            # Skip directories
+            if file_path.is_dir():
+                continue
+
+            # Skip excluded patterns
+            if any(pattern in str(file_path) for pattern in exclude_patterns):
+                continue
 
-        if should_process:
-            # Extract metadata
-            extra_info = metadata_extractor(str(file_path))
+            # Check if file should be processed
+            if file_path.suffix in file_extensions or file_path.name in special_files:
+                paths.append(file_path)
+                stage.advance()
 
-            # Load and chunk the file
+    with report.stage("metadata", total=len(paths), unit="files") as stage:
+        extra_infos = []
+        for file_path in paths:
+            extra_infos.append(metadata_extractor(str(file_path)))
+            stage.advance()
+
+    # Load and chunk the files
+    nodes = []
+    with report.stage("parse", total=len(paths), unit="files") as stage:
+        for file_path, extra_info in zip(paths, extra_infos, strict=True):
+            start = time.perf_counter()
             try:
                 file_nodes = reader.load_data(file_path, extra_info=extra_info)
+                for node in file_nodes:
+                    exclude_path_prefixes(node)
                 nodes.extend(file_nodes)
             except Exception as e:
                 logger.warning(f"Failed to load {file_path}: {e}")
+                file_nodes = []
+            stage.advance(
+                file_type=file_path.suffix or file_path.name,
+                seconds=time.perf_counter() - start,
+                bytes=file_path.stat().st_size,
+                chunks=len(file_nodes),
+            )
 
     logger.info(f"Loaded and chunked {len(nodes)} TextNode chunks")
     return nodes
@@ -153,14 +183,20 @@ def build_index(
     min_chunk_size_config: int = MIN_CHUNK_SIZE_CONFIG,
     enable_extractors: bool = False,
     num_workers: int = 2,
+    hnsw: dict[str, Any] | None = None,
+    backend: str | None = None,
+    flat: dict[str, Any] | None = None,
+    dedup: dict[str, Any] | None = None,
+    boilerplate: dict[str, Any] | None = None,
+    report: BuildReport | None = None,
 ) -> BaseIndex:
-    """Create or update index from documents using Chroma vector store.
+    """Create or update index from documents using a persistent vector store.
 
     Uses LlamaIndex's IngestionPipeline with:
     - File-type-specific parsing (CodeSplitter, MarkdownNodeParser, SentenceSplitter)
     - Enhanced metadata (relative paths, categorization, depth)
     - Optional LLM-based metadata extractors (KeywordExtractor)
-    - Chroma vector store for persistent storage
+    - Chroma (HNSW) or flat (exact, memory-mapped) vector store
     - UPSERTS_AND_DELETE strategy for true upserts and automatic deletion
     - Configurable minimum chunk sizes with intelligent merging (no code lost)
     - Parallel processing with configurable workers
@@ -174,12 +210,21 @@ def build_index(
         min_chunk_size_config: Minimum characters for config chunks (default: 75)
         enable_extractors: Enable LLM-based metadata extraction (default: False)
         num_workers: Number of parallel workers for pipeline (default: 2)
+        hnsw: Optional Chroma HNSW configuration for the collection
+        backend: Vector store backend, ``chroma`` or ``flat`` (default: the
+            backend already in ``persist_dir``, else ``chroma``)
+        flat: Compression of a new flat store (dtype, dimensions, binary)
+        dedup: Near-duplicate handling (policy, threshold); default: off
+        boilerplate: Boilerplate detection (min_share) for excluding
+            repeated headers from embeddings; default: off
+        report: Build report to record the stages in (default: a new one);
+            written to ``persist_dir`` as ``build_report.json``
 
     Returns:
         VectorStoreIndex ready for querying
     """
     persist_path = Path(persist_dir)
-    pipeline_storage = persist_path / "pipeline"
+    report = report or BuildReport()
 
     # Load TextNodes with file-type-specific parsing and enhanced metadata
     nodes = load_documents(
@@ -188,23 +233,106 @@ def build_index(
         min_chunk_size_code=min_chunk_size_code,
         min_chunk_size_docs=min_chunk_size_docs,
         min_chunk_size_config=min_chunk_size_config,
+        report=report,
     )
+    nodes = drop_empty_nodes(nodes)
+    if boilerplate is not None:
+        with report.stage("boilerplate", total=len(nodes), unit="nodes") as stage:
+            mark_boilerplate(nodes, **boilerplate)
+            stage.advance(len(nodes))
+
+    # Initialize the vector store
+    vector_store, storage_context = create_vector_store(
+        persist_path=persist_path,
+        backend=backend,
+        hnsw=hnsw,
+        flat=flat,
+    )
+
+    processed_nodes = ingest_nodes(
+        nodes,
+        vector_store=vector_store,
+        storage_context=storage_context,
+        state_dir=persist_path,
+        enable_extractors=enable_extractors,
+        num_workers=num_workers,
+        dedup=dedup,
+        report=report,
+    )
+
+    # Create index from the vector store
+    logger.info("Creating vector store index")
+    index = VectorStoreIndex.from_vector_store(
+        vector_store=vector_store,
+        storage_context=storage_context,
+    )
+
+    logger.success(
+        f"Index created with {len(processed_nodes)} nodes in the vector store"
+    )
+    report.finish()
+    report.log_summary()
+    report.save(persist_path)
+
+    return index
+
 
-    # Filter out empty nodes
+def drop_empty_nodes(nodes: list[TextNode]) -> list[TextNode]:
+    """Filter out nodes without any non-whitespace text."""
     original_count = len(nodes)
     nodes = [node for node in nodes if node.text and node.text.strip()]
     if len(nodes) < original_count:
         logger.info(f"Filtered out {original_count - len(nodes)} empty nodes")
+    return nodes
 
-    # Initialize Chroma vector store
-    vector_store, storage_context = create_chroma_vector_store(
-        persist_path=persist_path,
-        collection_name="documents",
-    )
+
+def ingest_nodes(
+    nodes: list[TextNode],
+    vector_store: BasePydanticVectorStore,
+    storage_context: StorageContext,
+    state_dir: Path,
+    enable_extractors: bool = False,
+    num_workers: int = 2,
+    dedup: dict[str, Any] | None = None,
+    report: BuildReport | None = None,
+) -> list[BaseNode]:
+    """Run the ingestion pipeline for one collection and persist its state.
+
+    The pipeline cache and docstore are stored in ``state_dir`` so that later
+    runs only re-embed changed nodes and delete removed ones.
+
+    Args:
+        nodes: Parsed, non-empty TextNodes belonging to this collection
+        vector_store: Vector store the nodes are written to
+        storage_context: Storage context holding the collection's docstore
+        state_dir: Directory for ``pipeline/``, ``docstore.json`` and
+            ``index_stats.json``
+        enable_extractors: Enable LLM-based metadata extraction (default: False)
+        num_workers: Number of parallel workers for pipeline (default: 2)
+        dedup: Near-duplicate handling (policy, threshold) applied before
+            embedding; see :mod:`fragmenter.rag.dedup` (default: off)
+        report: Build report to record the dedup, embed, upsert and persist
+            stages in
+
+    Returns:
+        Nodes that were (re-)embedded in this run
+    """
+    pipeline_storage = state_dir / "pipeline"
+    report = report or BuildReport()
+
+    # Dropped duplicates are never embedded or stored
+    dedup = dedup or {"policy": "off"}
+    if dedup.get("policy") == "off":
+        nodes, dedup_report = dedup_nodes(nodes, **dedup)
+    else:
+        with report.stage("dedup", total=len(nodes), unit="nodes") as stage:
+            count = len(nodes)
+            nodes, dedup_report = dedup_nodes(nodes, **dedup)
+            stage.advance(count)
 
     # Check if vector store is empty but docstore has entries
     # This indicates a mismatch (e.g., Chroma was deleted but docstore remains)
-    collection_count = vector_store._collection.count()
+    collection_count = vector_store.client.count()
     docstore_count = len(storage_context.docstore.docs)
 
     if collection_count == 0 and docstore_count > 0:
@@ -228,6 +356,7 @@ def build_index(
         metadata_extractors=metadata_extractors,
         docstore=storage_context.docstore,
         num_workers=num_workers,
+        strip_boilerplate=any(BOILERPLATE_KEY in node.metadata for node in nodes),
     )
 
     # Load existing pipeline state if available
@@ -238,10 +367,51 @@ def build_index(
         except Exception as e:
             logger.warning(f"Failed to load pipeline state: {e}. Starting fresh.")
 
-    # Run ingestion pipeline
+    # Run ingestion pipeline; the vector store writes happen inside run(),
+    # so they are timed separately and taken out of the embed stage
     logger.info(f"Running ingestion pipeline with {num_workers} workers...")
+    upsert_before = report.stages.get("upsert", {}).get("seconds", 0.0)
+    with (
+        report.stage("embed", total=len(nodes), unit="nodes") as stage,
+        report.timed_calls(vector_store, "add", "upsert"),
+        report.timed_calls(vector_store, "delete", "upsert"),
+    ):
+        processed_nodes = _run_pipeline(pipeline, nodes, num_workers, state_dir)
+        stage.advance(len(processed_nodes))
+    report.add("embed", seconds=upsert_before - report.stages["upsert"]["seconds"])
+
+    with report.stage("persist", unit="nodes") as stage:
+        # Write pending vectors (no-op for Chroma, which writes through)
+        vector_store.persist(str(state_dir))
+
+        # Persist pipeline state for future incremental updates
+        logger.info(f"Persisting pipeline state to: {pipeline_storage}")
+        pipeline.persist(str(pipeline_storage))
+
+        # Persist docstore separately (for compatibility with index loading)
+        docstore_path = state_dir / "docstore.json"
+        logger.info(f"Persisting docstore to: {docstore_path}")
+        storage_context.docstore.persist(persist_path=str(docstore_path))
+
+        # The nodes are the collection's full contents after UPSERTS_AND_DELETE
+        stats = collect_stats((node.text, node.metadata) for node in nodes)
+        if dedup_report["policy"] != "off":
+            stats["dedup"] = dedup_report
+        save_stats(state_dir, stats)
+        stage.advance(len(storage_context.docstore.docs))
+
+    return processed_nodes
+
+
+def _run_pipeline(
+    pipeline: IngestionPipeline,
+    nodes: list[TextNode],
+    num_workers: int,
+    state_dir: Path,
+) -> list[BaseNode]:
+    """Run the pipeline, retrying node by node to skip failing nodes."""
     try:
-        processed_nodes = pipeline.run(
+        processed_nodes: list[BaseNode] = pipeline.run(
             nodes=nodes,
             num_workers=num_workers,
             show_progress=True,
@@ -259,7 +429,7 @@ def build_index(
                 f"No new nodes created from {len(nodes)} nodes. "
                 "All nodes already exist in docstore (based on hash). "
                 "If migrating to new storage backend, delete the old "
-                f"{persist_path} directory and rebuild from scratch."
+                f"{state_dir} directory and rebuild from scratch."
             )
     except Exception as e:
         logger.error(f"Pipeline failed with error: {e}")
@@ -296,24 +466,4 @@ def build_index(
                 f"(some nodes may have been skipped due to errors)"
             )
 
-    # Persist pipeline state for future incremental updates
-    logger.info(f"Persisting pipeline state to: {pipeline_storage}")
-    pipeline.persist(str(pipeline_storage))
-
-    # Persist docstore separately (for compatibility with index loading)
-    docstore_path = persist_path / "docstore.json"
-    logger.info(f"Persisting docstore to: {docstore_path}")
-    storage_context.docstore.persist(persist_path=str(docstore_path))
-
-    # Create index from Chroma vector store
-    logger.info("Creating vector store index")
-    index = VectorStoreIndex.from_vector_store(
-        vector_store=vector_store,
-        storage_context=storage_context,
-    )
-
-    logger.success(
-        f"Index created with {len(processed_nodes)} nodes in Chroma vector store"
-    )
-
-    return index
+    return processed_nodes
@@ -0,0 +1,332 @@
+"""Per-stage timing of index builds (``build_report.json``).
+
+A rebuild passes through the stages below; :class:`BuildReport` records the
+wall time, item count and throughput of each, so a slow build shows where
+the time went instead of only how many chunks came out:
+
+    walk       Directory traversal (files found)
+    metadata   Metadata extraction and git detection (files)
+    parse      Reading and chunking, also per file type (files, bytes, chunks)
+    boilerplate, dedup
+               Optional chunk marking and near-duplicate detection (nodes)
+    embed      Ingestion pipeline transformations: extractors and embedding
+               (nodes embedded)
+    upsert     Vector store writes and deletes inside the pipeline (nodes)
+    persist    Vector store, pipeline cache, docstore and stats files
+               (docstore entries)
+
+Stages of sharded builds accumulate over the shards. ``build_index`` writes
+the report next to the index; :meth:`BuildReport.write_prometheus` renders
+it for the node_exporter textfile collector. With a Rich ``Progress``, every
+stage shows up as a task with live throughput and ETA.
+"""
+
+import json
+import os
+import time
+from collections.abc import Iterator
+from contextlib import contextmanager
+from datetime import UTC, datetime
+from functools import wraps
+from pathlib import Path
+from typing import Any
+
+from loguru import logger
+
+REPORT_FILE = "build_report.json"
+REPORT_VERSION = 1
+
+_METRIC_PREFIX = "fragmenter_build"
+# Report key -> Prometheus metric suffix and help text
+_METRICS = {
+    "seconds": ("seconds", "Wall time"),
+    "items": ("items", "Items processed"),
+    "per_s": ("items_per_second", "Items processed per second"),
+    "files": ("files", "Files processed"),
+    "files_per_s": ("files_per_second", "Files processed per second"),
+    "bytes": ("bytes", "Input bytes read"),
+    "mb_per_s": ("megabytes_per_second", "Input megabytes read per second"),
+    "chunks": ("chunks", "Chunks produced"),
+}
+
+
+class StageTimer:
+    """Counts the items of one running stage and advances its progress task."""
+
+    def __init__(self, report: "BuildReport", name: str, task: Any = None) -> None:
+        self.report = report
+        self.name = name
+        self.task = task
+
+    def advance(
+        self,
+        items: int = 1,
+        file_type: str | None = None,
+        seconds: float = 0.0,
+        **counts: int,
+    ) -> None:
+        """Count processed items, optionally also under a file type.
+
+        Args:
+            items: Number of items processed
+            file_type: File extension (or file name) to attribute them to
+            seconds: Time spent on them, for the per file type breakdown
+            **counts: Further totals, such as ``bytes`` or ``chunks``
+        """
+        self.report.add(self.name, items=items, **counts)
+        if file_type is not None:
+            self.report.add_file_type(
+                self.name, file_type, files=items, seconds=seconds, **counts
+            )
+        if self.task is not None:
+            self.report.progress.advance(self.task, items)
+
+
+class BuildReport:
+    """Wall time, item counts and throughput per index build stage.
+
+    Args:
+        progress: Optional Rich ``Progress`` to show the stages on
+    """
+
+    def __init__(self, progress: Any = None) -> None:
+        self.progress = progress
+        self.stages: dict[str, dict[str, Any]] = {}
+        self.started_at = datetime.now(UTC)
+        self._start = time.perf_counter()
+        self._tasks: dict[str, Any] = {}
+        self.seconds: float | None = None
+
+    def _record(self, name: str, unit: str = "items") -> dict[str, Any]:
+        return self.stages.setdefault(name, {"unit": unit, "seconds": 0.0, "items": 0})
+
+    def add(
+        self, name: str, seconds: float = 0.0, items: int = 0, **counts: float
+    ) -> None:
+        """Add time, items and further totals to a stage."""
+        record = self._record(name)
+        record["seconds"] += seconds
+        record["items"] += items
+        for key, value in counts.items():
+            record[key] = record.get(key, 0) + value
+
+    def add_file_type(self, name: str, file_type: str, **counts: float) -> None:
+        """Add totals (``files``, ``seconds``, ...) to a stage's file type."""
+        by_type = self._record(name).setdefault("file_types", {})
+        entry = by_type.setdefault(file_type, {})
+        for key, value in counts.items():
+            entry[key] = entry.get(key, 0) + value
+
+    @contextmanager
+    def stage(
+        self, name: str, total: int | None = None, unit: str = "items"
+    ) -> Iterator[StageTimer]:
+        """Time a stage; re-entering a stage adds to its totals.
+
+        Args:
+            name: Stage name
+            total: Expected number of items, for the progress ETA
+            unit: What the items are (``files``, ``nodes``, ...)
+        """
+        record = self._record(name, unit)
+        task = None
+        if self.progress is not None:
+            # A task's completed count always equals the stage's items
+            task = self._tasks.get(name)
+            if task is None:
+                task = self.progress.add_task(name, total=total, unit=unit)
+                self._tasks[name] = task
+            elif total is not None:
+                self.progress.update(task, total=record["items"] + total)
+        timer = StageTimer(self, name, task)
+        start = time.perf_counter()
+        try:
+            yield timer
+        finally:
+            self.add(name, seconds=time.perf_counter() - start)
+            if task is not None:
+                # Stages without a known total, or that ended early, show done
+                self.progress.update(
+                    task,
+                    total=record["items"],
+                    per_s=_rate(record["items"], record["seconds"]),
+                )
+
+    @contextmanager
+    def timed_calls(self, obj: Any, method: str, name: str) -> Iterator[None]:
+        """Book the time spent in ``obj.method`` under stage ``name``.
+
+        For calls made from code this module does not control, such as the
+        vector store writes inside ``IngestionPipeline.run``. The method is
+        wrapped on the instance only, and restored afterwards. A call counts
+        one item per element of a list first argument, else one.
+        """
+        original = getattr(obj, method)
+        self._record(name, "nodes")
+
+        @wraps(original)
+        def timed(*args: Any, **kwargs: Any) -> Any:
+            start = time.perf_counter()
+            try:
+                return original(*args, **kwargs)
+            finally:
+                first = args[0] if args else None
+                self.add(
+                    name,
+                    seconds=time.perf_counter() - start,
+                    items=len(first) if isinstance(first, list) else 1,
+                )
+
+        # Pydantic models (all vector stores) reject unknown attributes
+        object.__setattr__(obj, method, timed)
+        try:
+            yield
+        finally:
+            object.__delattr__(obj, method)
+
+    def finish(self) -> dict[str, Any]:
+        """Stop the build clock and return the report."""
+        self.seconds = time.perf_counter() - self._start
+        return self.to_dict()
+
+    def to_dict(self) -> dict[str, Any]:
+        """The report with rates: ``per_s`` per stage, files/s and MB/s per type."""
+        seconds = (
+            self.seconds
+            if self.seconds is not None
+            else time.perf_counter() - self._start
+        )
+        stages = {}
+        for name, record in self.stages.items():
+            stage = {
+                key: round(value, 3) if isinstance(value, float) else value
+                for key, value in record.items()
+                if key != "file_types"
+            }
+            stage["per_s"] = _rate(record["items"], record["seconds"])
+            if "file_types" in record:
+                stage["file_types"] = {
+                    file_type: _file_type_rates(entry)
+                    for file_type, entry in sorted(record["file_types"].items())
+                }
+            stages[name] = stage
+        return {
+            "version": REPORT_VERSION,
+            "started_at": self.started_at.isoformat(timespec="seconds"),
+            "seconds": round(seconds, 3),
+            "stages": stages,
+        }
+
+    def save(self, persist_dir: str | Path) -> Path:
+        """Write the report as ``build_report.json`` into ``persist_dir``."""
+        path = Path(persist_dir) / REPORT_FILE
+        path.parent.mkdir(parents=True, exist_ok=True)
+        path.write_text(json.dumps(self.to_dict(), indent=2))
+        logger.info(f"Build report written to {path}")
+        return path
+
+    def log_summary(self) -> None:
+        """Log each stage's time, share of the build and throughput."""
+        report = self.to_dict()
+        total = report["seconds"] or 1.0
+        for name, stage in sorted(
+            report["stages"].items(), key=lambda item: -item[1]["seconds"]
+        ):
+            logger.info(
+                f"Stage {name}: {stage['seconds']:.2f}s "
+                f"({stage['seconds'] / total:.0%}), {stage['items']:,} "
+                f"{stage['unit']} at {stage['per_s']:,.1f}/s"
+            )
+
+    def write_prometheus(self, path: str | Path) -> Path:
+        """Write the report in the Prometheus text exposition format.
+
+        The file is replaced atomically, as the node_exporter textfile
+        collector may read it at any time.
+        """
+        report = self.to_dict()
+        lines: list[str] = []
+
+        def metric(name: str, help_text: str, samples: list[tuple[str, Any]]) -> None:
+            full_name = f"{_METRIC_PREFIX}_{name}"
+            lines.append(f"# HELP {full_name} {help_text}")
+            lines.append(f"# TYPE {full_name} gauge")
+            lines.extend(f"{full_name}{labels} {value}" for labels, value in samples)
+
+        metric(
+            "duration_seconds",
+            "Wall time of the last index build.",
+            [("", report["seconds"])],
+        )
+        metric(
+            "last_run_timestamp_seconds",
+            "Start of the last index build (Unix time).",
+            [("", int(self.started_at.timestamp()))],
+        )
+        stage_keys = sorted(
+            {
+                key
+                for stage in report["stages"].values()
+                for key, value in stage.items()
+                if isinstance(value, int | float)
+            }
+        )
+        for key in stage_keys:
+            suffix, help_text = _METRICS.get(key, (key, key))
+            metric(
+                f"stage_{suffix}",
+                f"{help_text} per index build stage.",
+                [
+                    (_labels(stage=name), stage[key])
+                    for name, stage in report["stages"].items()
+                    if key in stage
+                ],
+            )
+        type_samples: dict[str, list[tuple[str, Any]]] = {}
+        for name, stage in report["stages"].items():
+            for file_type, entry in stage.get("file_types", {}).items():
+                for key, value in entry.items():
+                    type_samples.setdefault(key, []).append(
+                        (_labels(stage=name, file_type=file_type), value)
+                    )
+        for key, samples in sorted(type_samples.items()):
+            suffix, help_text = _METRICS.get(key, (key, key))
+            metric(
+                f"file_type_{suffix}",
+                f"{help_text} per index build stage and file type.",
+                samples,
+            )
+
+        path = Path(path)
+        path.parent.mkdir(parents=True, exist_ok=True)
+        tmp = path.with_name(f".{path.name}.tmp")
+        tmp.write_text("\n".join(lines) + "\n")
+        os.replace(tmp, path)
+        logger.info(f"Build metrics written to {path}")
+        return path
+
+
+def _rate(items: float, seconds: float) -> float:
+    return round(items / seconds, 1) if seconds > 0 else 0.0
+
+
+def _file_type_rates(entry: dict[str, Any]) -> dict[str, Any]:
+    seconds = entry.get("seconds", 0.0)
+    rates = {
+        key: round(value, 3) if isinstance(value, float) else value
+        for key, value in entry.items()
+    }
+    rates["files_per_s"] = _rate(entry.get("files", 0), seconds)
+    if "bytes" in entry:
+        rates["mb_per_s"] = (
+            round(entry["bytes"] / 1e6 / seconds, 3) if seconds > 0 else 0.0
+        )
+    return rates
+
+
+def _labels(**labels: str) -> str:
+    return "{" + ",".join(f'{k}="{_escape(v)}"' for k, v in labels.items()) + "}"
+
+
+def _escape(value: str) -> str:
+    return value.replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
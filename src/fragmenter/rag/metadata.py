@@ -7,6 +7,7 @@ including repository detection, path normalization, and file categorization.
 from pathlib import Path
 
 from llama_index.core import Document
+from llama_index.core.schema import BaseNode
 from loguru import logger
 
 # File type categorization constants
@@ -36,6 +37,10 @@ CODE_EXTENSIONS = {
 }
 DOC_EXTENSIONS = {".md", ".rst", ".txt", ".pdf"}
 
+# Each leading part of a file's directory is stored in its own field, one per
+# depth ("dir_0" is the root), so path-prefix filters are equality tests
+PATH_PREFIX_FIELD = "dir_"
+
 
 def find_git_root(file_path: Path, stop_at: Path | None = None) -> Path | None:
     """Find the git repository root for a given file.
@@ -66,6 +71,29 @@ def find_git_root(file_path: Path, stop_at: Path | None = None) -> Path | None:
     return None
 
 
+def path_prefix_metadata(relative_directory: str) -> dict[str, str]:
+    """Prefix fields of a directory relative to the project root.
+
+    ``src/rag`` gives ``{"dir_0": ".", "dir_1": "src", "dir_2": "src/rag"}``;
+    files at the root only have ``dir_0``.
+    """
+    parts = Path(relative_directory).parts if relative_directory != "." else ()
+    return {
+        f"{PATH_PREFIX_FIELD}{depth}": "/".join(parts[:depth]) or "."
+        for depth in range(len(parts) + 1)
+    }
+
+
+def exclude_path_prefixes(node: BaseNode) -> None:
+    """Keep a node's prefix fields out of its embedded and LLM text."""
+    keys = [key for key in node.metadata if key.startswith(PATH_PREFIX_FIELD)]
+    for excluded in (
+        node.excluded_embed_metadata_keys,
+        node.excluded_llm_metadata_keys,
+    ):
+        excluded.extend(key for key in keys if key not in excluded)
+
+
 def create_metadata_extractor(project_root: Path):
     """Create a metadata extractor function for SimpleDirectoryReader.
 
@@ -134,6 +162,7 @@ def create_metadata_extractor(project_root: Path):
             "file_name": file_name,
             "relative_path": str(relative_path),
             "relative_directory": str(relative_path.parent),
+            **path_prefix_metadata(str(relative_path.parent)),
             "depth": depth,
             "file_type": suffix,
             "is_code": is_code,
@@ -0,0 +1,273 @@
+"""Ingestion throughput benchmark per parser type.
+
+Each workload is a synthetic input shaped like the files that stress one
+parser: a few large C++ sources (tree-sitter ``CodeSplitter``), many small
+YAML files (per-file overhead), long Markdown pages (``MarkdownNodeParser``
+plus re-splitting of large sections) and multi-page PDFs (``PDFReader``).
+
+For every workload, :func:`benchmark_parsers` times
+:meth:`~fragmenter.rag.parsers.TypedDocumentReader.load_data` over the
+files (parsing and chunking only) and
+:func:`~fragmenter.rag.ingestion.load_documents` over the directory (adding
+the directory walk and metadata extraction). A separate pass under
+``tracemalloc`` measures the peak Python memory of ``load_documents``, so
+the timings are not slowed by allocation tracing.
+"""
+
+import random
+import time
+import tracemalloc
+from collections.abc import Callable
+from pathlib import Path
+from typing import Any
+
+from loguru import logger
+
+from fragmenter.rag.ingestion import load_documents
+from fragmenter.rag.metadata import create_metadata_extractor
+from fragmenter.rag.parsers import TypedDocumentReader
+
+WORDS = (
+    "vehicle telemetry controller state sensor mission route heartbeat "
+    "message server client packet frame position velocity estimate filter "
+    "update timeout retry parameter command status battery motor camera"
+).split()
+
+
+def _sentence(rng: random.Random, words: int = 12) -> str:
+    return " ".join(rng.choice(WORDS) for _ in range(words)).capitalize() + "."
+
+
+def _cpp_source(rng: random.Random, functions: int) -> str:
+    parts = ["#include <cmath>\n#include <vector>\n\nnamespace bench {\n"]
+    for i in range(functions):
+        name = f"{rng.choice(WORDS)}_{rng.choice(WORDS)}_{i}"
+        parts.append(
+            f"""
+// {_sentence(rng)}
+class {name.title().replace("_", "")} {{
+public:
+    double update(const std::vector<double>& samples, double dt) {{
+        double sum = 0.0;
+        for (size_t k = 0; k < samples.size(); ++k) {{
+            sum += samples[k] * std::exp(-dt * static_cast<double>(k));
+        }}
+        state_ = 0.9 * state_ + 0.1 * sum;
+        return state_;
+    }}
+
+private:
+    double state_ = 0.0;
+}};
+"""
+        )
+    parts.append("\n}  // namespace bench\n")
+    return "".join(parts)
+
+
+def _yaml_config(rng: random.Random) -> str:
+    lines = [f"name: {rng.choice(WORDS)}_{rng.randrange(1000)}", "parameters:"]
+    for _ in range(rng.randint(4, 10)):
+        lines.append(f"  {rng.choice(WORDS)}: {rng.randrange(1, 500)}")
+    lines.append(f"description: {_sentence(rng, 8)}")
+    return "\n".join(lines) + "\n"
+
+
+def _markdown_page(rng: random.Random, sections: int) -> str:
+    parts = [f"# {rng.choice(WORDS).title()} guide\n"]
+    for i in range(sections):
+        parts.append(f"\n## {i + 1}. {rng.choice(WORDS).title()}\n\n")
+        for _ in range(rng.randint(2, 6)):
+            parts.append(" ".join(_sentence(rng) for _ in range(6)) + "\n\n")
+        if i % 4 == 0:
+            parts.append(f"```bash\nfragmenter query -q '{_sentence(rng, 5)}'\n```\n")
+    return "".join(parts)
+
+
+def _pdf_escape(text: str) -> str:
+    return text.replace("\\", "\\\\").replace("(", "\\(").replace(")", "\\)")
+
+
+def write_pdf(path: Path, pages: list[list[str]]) -> None:
+    """Write a minimal text PDF (Helvetica) with one list of lines per page."""
+    objects = [
+        b"<< /Type /Catalog /Pages 2 0 R >>",
+        b"",  # Page tree, filled in once the page objects are numbered
+        b"<< /Type /Font /Subtype /Type1 /BaseFont /Helvetica >>",
+    ]
+    kids = []
+    for lines in pages:
+        text = " T* ".join(f"({_pdf_escape(line)}) Tj" for line in lines)
+        stream = f"BT /F1 10 Tf 12 TL 72 740 Td {text} ET".encode("latin-1")
+        objects.append(
+            b"<< /Length %d >>\nstream\n%s\nendstream" % (len(stream), stream)
+        )
+        contents = len(objects)
+        objects.append(
+            b"<< /Type /Page /Parent 2 0 R /MediaBox [0 0 612 792] "
+            b"/Resources << /Font << /F1 3 0 R >> >> /Contents %d 0 R >>" % contents
+        )
+        kids.append(f"{len(objects)} 0 R")
+    page_tree = f"<< /Type /Pages /Kids [{' '.join(kids)}] /Count {len(kids)} >>"
+    objects[1] = page_tree.encode("latin-1")
+
+    out = bytearray(b"%PDF-1.4\n")
+    offsets = []
+    for number, body in enumerate(objects, start=1):
+        offsets.append(len(out))
+        out += b"%d 0 obj\n%s\nendobj\n" % (number, body)
+    xref = len(out)
+    out += b"xref\n0 %d\n0000000000 65535 f \n" % (len(objects) + 1)
+    out += b"".join(b"%010d 00000 n \n" % offset for offset in offsets)
+    out += b"trailer\n<< /Size %d /Root 1 0 R >>\nstartxref\n%d\n%%%%EOF\n" % (
+        len(objects) + 1,
+        xref,
+    )
+    path.write_bytes(bytes(out))
+
+
+def _pdf_pages(rng: random.Random, pages: int) -> list[list[str]]:
+    return [[_sentence(rng, 10) for _ in range(55)] for _ in range(pages)]
+
+
+# name -> (file suffix, files at scale 1, writer(path, rng) whose result is unused)
+WORKLOADS: dict[str, tuple[str, int, Callable[[Path, random.Random], object]]] = {
+    "cpp": (
+        ".cpp",
+        20,
+        lambda path, rng: path.write_text(_cpp_source(rng, functions=250)),
+    ),
+    "yaml": (".yaml", 2000, lambda path, rng: path.write_text(_yaml_config(rng))),
+    "markdown": (
+        ".md",
+        20,
+        lambda path, rng: path.write_text(_markdown_page(rng, sections=60)),
+    ),
+    "pdf": (".pdf", 10, lambda path, rng: write_pdf(path, _pdf_pages(rng, 30))),
+}
+
+
+def generate_workload(
+    root: Path, parser: str, scale: float = 1.0, seed: int = 0
+) -> list[Path]:
+    """Write the synthetic input files of one parser workload.
+
+    Args:
+        root: Directory for the files (created)
+        parser: Workload name, one of :data:`WORKLOADS`
+        scale: Multiplier for the number of files (at least one file)
+        seed: Seed for the file contents
+
+    Returns:
+        The written files
+    """
+    if parser not in WORKLOADS:
+        raise ValueError(
+            f"Unknown parser workload '{parser}' (choose from {', '.join(WORKLOADS)})"
+        )
+    suffix, count, write = WORKLOADS[parser]
+    rng = random.Random(seed)
+    root.mkdir(parents=True, exist_ok=True)
+    paths = []
+    for i in range(max(1, round(count * scale))):
+        path = root / f"{parser}_{i:05d}{suffix}"
+        write(path, rng)
+        paths.append(path)
+    return paths
+
+
+def benchmark_parser(root: Path, paths: list[Path]) -> dict[str, Any]:
+    """Measure one workload: reader throughput, load_documents and memory."""
+    extractor = create_metadata_extractor(root)
+    extra_infos = [extractor(str(path)) for path in paths]
+    reader = TypedDocumentReader()
+
+    start = time.perf_counter()
+    chunks = sum(
+        len(reader.load_data(path, extra_info=extra_info))
+        for path, extra_info in zip(paths, extra_infos, strict=True)
+    )
+    reader_s = time.perf_counter() - start
+
+    start = time.perf_counter()
+    load_documents(root)
+    documents_s = time.perf_counter() - start
+
+    tracemalloc.start()
+    try:
+        load_documents(root)
+        _, peak = tracemalloc.get_traced_memory()
+    finally:
+        tracemalloc.stop()
+
+    mb = sum(path.stat().st_size for path in paths) / 1e6
+    return {
+        "files": len(paths),
+        "mb": round(mb, 3),
+        "chunks": chunks,
+        "reader_s": round(reader_s, 3),
+        "files_per_s": round(len(paths) / reader_s, 1),
+        "mb_per_s": round(mb / reader_s, 3),
+        "chunks_per_s": round(chunks / reader_s, 1),
+        "load_documents_s": round(documents_s, 3),
+        "load_documents_files_per_s": round(len(paths) / documents_s, 1),
+        "peak_mb": round(peak / 1e6, 1),
+    }
+
+
+def benchmark_parsers(
+    work_dir: Path,
+    parsers: list[str] | None = None,
+    scale: float = 1.0,
+    seed: int = 0,
+) -> list[dict[str, Any]]:
+    """Generate and measure the workload of each parser.
+
+    Args:
+        work_dir: Directory for the generated inputs
+        parsers: Workloads to run (default: all of :data:`WORKLOADS`)
+        scale: Multiplier for the number of files per workload
+        seed: Seed for the file contents
+
+    Returns:
+        One result per parser with ``parser``, ``files``, ``mb``, ``chunks``,
+        ``files_per_s``, ``mb_per_s``, ``chunks_per_s`` (reader only),
+        ``load_documents_files_per_s`` and ``peak_mb``
+    """
+    results = []
+    for parser in parsers or list(WORKLOADS):
+        root = Path(work_dir) / parser
+        paths = generate_workload(root, parser, scale=scale, seed=seed)
+        result = {"parser": parser, **benchmark_parser(root, paths)}
+        logger.info(f"Parser benchmark: {result}")
+        results.append(result)
+    return results
+
+
+def compare_to_baseline(
+    results: list[dict[str, Any]],
+    baseline: list[dict[str, Any]],
+    tolerance: float = 0.2,
+) -> list[str]:
+    """Regressions against earlier results of the same workloads.
+
+    A parser regresses when its reader throughput (MB/s) falls, or its peak
+    memory grows, by more than ``tolerance`` relative to the baseline.
+    """
+    previous = {result["parser"]: result for result in baseline}
+    regressions = []
+    for result in results:
+        before = previous.get(result["parser"])
+        if before is None:
+            continue
+        if result["mb_per_s"] < before["mb_per_s"] * (1 - tolerance):
+            regressions.append(
+                f"{result['parser']}: {result['mb_per_s']:.3f} MB/s "
+                f"(baseline {before['mb_per_s']:.3f})"
+            )
+        if result["peak_mb"] > before["peak_mb"] * (1 + tolerance):
+            regressions.append(
+                f"{result['parser']}: peak {result['peak_mb']:.1f} MB "
+                f"(baseline {before['peak_mb']:.1f})"
+            )
+    return regressions
@@ -103,6 +103,8 @@ class TypedDocumentReader(BaseReader):
             try:
                 # PDFReader returns Document objects directly
                 pdf_docs = self.pdf_reader.load_data(file, extra_info=extra_info)
+                # The whole-file size check below needs the extracted text
+                content = "\n".join(doc.text for doc in pdf_docs)
                 # Apply text splitter to PDF content
                 nodes = self.text_splitter.get_nodes_from_documents(pdf_docs)
             except Exception as e:
@@ -8,24 +8,29 @@ from llama_index.core import Settings
 from llama_index.core.extractors import BaseExtractor
 from llama_index.core.ingestion import DocstoreStrategy, IngestionPipeline
 from llama_index.core.storage.docstore import SimpleDocumentStore
-from llama_index.vector_stores.chroma import ChromaVectorStore
+from llama_index.core.vector_stores.types import BasePydanticVectorStore
 from loguru import logger
 
+from fragmenter.rag.boilerplate import BoilerplateStrippedEmbedding
+
 
 def create_ingestion_pipeline(
-    vector_store: ChromaVectorStore,
+    vector_store: BasePydanticVectorStore,
     metadata_extractors: list[BaseExtractor] | None = None,
     docstore: SimpleDocumentStore | None = None,
     num_workers: int = 2,
+    strip_boilerplate: bool = False,
 ) -> IngestionPipeline:
-    """Create an ingestion pipeline with Chroma vector store.
+    """Create an ingestion pipeline writing to a vector store.
 
     Args:
-        vector_store: Chroma vector store for persistent storage
+        vector_store: Vector store for persistent storage (Chroma or flat)
         metadata_extractors: Optional list of metadata extractors
             (KeywordExtractor, etc.)
         docstore: Optional docstore for hash-based change detection
         num_workers: Number of parallel workers (default: 2)
+        strip_boilerplate: Embed chunk text without the spans marked by
+            :func:`fragmenter.rag.boilerplate.mark_boilerplate`
 
     Returns:
         Configured IngestionPipeline ready to process documents
@@ -39,8 +44,16 @@ def create_ingestion_pipeline(
 
     # Add embedding model last (so metadata can influence embeddings)
     if Settings.embed_model is not None:
-        transformations.append(Settings.embed_model)  # type: ignore[arg-type]
-        logger.info(f"Added embedding model: {type(Settings.embed_model).__name__}")
+        if strip_boilerplate:
+            transformations.append(
+                BoilerplateStrippedEmbedding(embed_model=Settings.embed_model)
+            )
+        else:
+            transformations.append(Settings.embed_model)  # type: ignore[arg-type]
+        logger.info(
+            f"Added embedding model: {type(Settings.embed_model).__name__}"
+            + (" (without boilerplate)" if strip_boilerplate else "")
+        )
 
     # Create docstore if not provided
     if docstore is None:
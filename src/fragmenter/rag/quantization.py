@@ -0,0 +1,204 @@
+"""Storage-time compression of embeddings for the flat vector store.
+
+Three independent techniques, combined per index:
+
+- **Dimension truncation** keeps the first ``d`` components and
+  re-normalizes. This is only meaningful for Matryoshka-trained models
+  (e.g. OpenAI ``text-embedding-3-*``, ``nomic-embed-text``), whose leading
+  dimensions carry most of the signal.
+- **Scalar quantization** stores ``float16`` or ``int8`` instead of
+  ``float32``. ``int8`` uses one symmetric scale per dimension; the scale is
+  folded into the query so scoring needs no dequantization pass.
+- **Binary prefilter** keeps one sign bit per dimension. Queries rank all
+  rows by Hamming distance and rescore only the best candidates with the
+  (quantized) full vectors.
+
+:func:`compression_report` measures recall@k of each combination against
+exact full-precision search, alongside the bytes needed per vector.
+"""
+
+import itertools
+import time
+from collections.abc import Sequence
+from typing import Any
+
+import numpy as np
+
+STORAGE_DTYPES = ("float32", "float16", "int8")
+DTYPE_BYTES = {"float32": 4, "float16": 2, "int8": 1}
+
+# Candidates rescored per requested result when the binary prefilter is on
+BINARY_RESCORE_FACTOR = 10
+
+DEFAULT_REPORT_DIMENSIONS = [None, 1024, 512, 256]
+
+# Popcount of every byte value, for Hamming distances on packed bits
+_POPCOUNT = np.array([bin(i).count("1") for i in range(256)], dtype=np.uint8)
+
+
+def normalize(vectors: np.ndarray) -> np.ndarray:
+    """Scale vectors (rows, or a single vector) to unit length."""
+    norms = np.linalg.norm(vectors, axis=-1, keepdims=True)
+    return vectors / np.maximum(norms, 1e-12)
+
+
+def truncate(vectors: np.ndarray, dimensions: int | None) -> np.ndarray:
+    """Keep the first ``dimensions`` components and re-normalize."""
+    if dimensions is not None and dimensions < vectors.shape[-1]:
+        vectors = vectors[..., :dimensions]
+    return normalize(np.asarray(vectors, dtype=np.float32))
+
+
+def quantize_int8(vectors: np.ndarray) -> tuple[np.ndarray, np.ndarray]:
+    """Symmetric per-dimension int8 quantization.
+
+    Returns:
+        Tuple of (int8 codes, float32 scale per dimension), such that
+        ``codes * scales`` approximates ``vectors``
+    """
+    scales = np.abs(vectors).max(axis=0) / 127.0
+    scales = np.where(scales > 0, scales, 1.0).astype(np.float32)
+    codes = np.clip(np.rint(vectors / scales), -127, 127).astype(np.int8)
+    return codes, scales
+
+
+def dequantize_int8(codes: np.ndarray, scales: np.ndarray) -> np.ndarray:
+    """Inverse of :func:`quantize_int8`."""
+    return codes.astype(np.float32) * scales
+
+
+def encode(vectors: np.ndarray, dtype: str) -> dict[str, np.ndarray]:
+    """Encode unit-normalized float32 vectors in a storage dtype.
+
+    Returns:
+        ``{"vectors": ...}`` plus ``"scales"`` for int8
+    """
+    if dtype not in STORAGE_DTYPES:
+        raise ValueError(
+            f"Unknown storage dtype '{dtype}', expected one of: "
+            f"{', '.join(STORAGE_DTYPES)}"
+        )
+    if dtype == "int8":
+        codes, scales = quantize_int8(vectors)
+        return {"vectors": codes, "scales": scales}
+    return {"vectors": vectors.astype(dtype)}
+
+
+def pack_bits(vectors: np.ndarray) -> np.ndarray:
+    """One sign bit per dimension, packed into bytes along the last axis."""
+    return np.packbits(vectors > 0, axis=-1)
+
+
+def hamming_distances(bits: np.ndarray, query_bits: np.ndarray) -> np.ndarray:
+    """Hamming distance between each packed row and a packed query."""
+    return _POPCOUNT[np.bitwise_xor(bits, query_bits)].sum(axis=1, dtype=np.int32)
+
+
+def bytes_per_vector(dimensions: int, dtype: str, binary: bool = False) -> int:
+    """Storage size of one vector, including the binary sketch if enabled."""
+    size = dimensions * DTYPE_BYTES[dtype]
+    if binary:
+        size += (dimensions + 7) // 8
+    return size
+
+
+def _top_k(scores: np.ndarray, k: int) -> np.ndarray:
+    """Indices of the k largest scores per row, unordered."""
+    return np.argpartition(-scores, k - 1, axis=-1)[..., :k]
+
+
+def compression_report(
+    embeddings: np.ndarray,
+    dimensions: Sequence[int | None] | None = None,
+    dtypes: list[str] | None = None,
+    top_k: int = 10,
+    num_queries: int = 200,
+    seed: int = 0,
+) -> list[dict[str, Any]]:
+    """Measure recall@k and size of compressed variants of an index.
+
+    A sample of the stored vectors is held out as queries and the remaining
+    vectors are searched, so no query finds itself. The reference is exact
+    cosine search over the full-precision, full-dimension vectors; every
+    variant is searched with its own (truncated, quantized) query.
+
+    Args:
+        embeddings: Stored embeddings, one row per vector
+        dimensions: Truncation sizes to try (None = full dimension)
+        dtypes: Storage dtypes to try
+        top_k: k for recall@k
+        num_queries: Number of stored vectors held out as queries (at most
+            half of the index)
+        seed: Seed for query sampling
+
+    Returns:
+        One result per variant with ``dimensions``, ``dtype``, ``binary``,
+        ``bytes_per_vector``, ``size_mb``, ``compression``, ``recall`` and
+        ``query_ms`` (mean per query, brute force)
+    """
+    full = normalize(np.asarray(embeddings, dtype=np.float32))
+    if len(full) == 0:
+        raise ValueError("No embeddings to evaluate")
+    full_dim = full.shape[1]
+    dims = sorted(
+        {d if d and d < full_dim else full_dim for d in dimensions or [None]},
+        reverse=True,
+    )
+    dtypes = dtypes or list(STORAGE_DTYPES)
+
+    if len(full) < 2:
+        raise ValueError("Too few embeddings to evaluate")
+
+    # Queries are held out of the searched vectors, or each would find itself
+    rng = np.random.default_rng(seed)
+    is_query = np.zeros(len(full), dtype=bool)
+    is_query[
+        rng.choice(len(full), size=min(num_queries, len(full) // 2), replace=False)
+    ] = True
+    searched = full[~is_query]
+    k = min(top_k, len(searched))
+    truth = _top_k(full[is_query] @ searched.T, k)
+    baseline = bytes_per_vector(full_dim, "float32")
+
+    results = []
+    for dim, dtype, binary in itertools.product(dims, dtypes, (False, True)):
+        stored = truncate(searched, dim)
+        held_out = truncate(full[is_query], dim)
+        queries = held_out
+        encoded = encode(stored, dtype)
+        matrix = encoded["vectors"].astype(np.float32)
+        if "scales" in encoded:
+            queries = queries * encoded["scales"]
+        bits = pack_bits(stored) if binary else None
+
+        start = time.perf_counter()
+        if binary:
+            candidates = min(len(stored), k * BINARY_RESCORE_FACTOR)
+            found = []
+            for query, query_bits in zip(queries, pack_bits(held_out), strict=True):
+                shortlist = _top_k(-hamming_distances(bits, query_bits), candidates)
+                scores = matrix[shortlist] @ query
+                found.append(shortlist[_top_k(scores, k)])
+            found = np.asarray(found)
+        else:
+            found = _top_k(queries @ matrix.T, k)
+        elapsed = time.perf_counter() - start
+
+        hits = [
+            len(set(expected).intersection(got))
+            for expected, got in zip(truth, found, strict=True)
+        ]
+        size = bytes_per_vector(dim, dtype, binary)
+        results.append(
+            {
+                "dimensions": dim,
+                "dtype": dtype,
+                "binary": binary,
+                "bytes_per_vector": size,
+                "size_mb": round(size * len(full) / 1e6, 2),
+                "compression": round(baseline / size, 1),
+                "recall": round(float(np.mean(hits)) / k, 4),
+                "query_ms": round(elapsed / len(queries) * 1000, 3),
+            }
+        )
+    return results
@@ -0,0 +1,107 @@
+"""Paged scans over the stored records of an index.
+
+``collection.get()`` without a limit materializes a whole Chroma collection
+(text, metadata and, if requested, embeddings as nested Python lists) in
+one response. :func:`iter_collection` reads fixed-size pages instead and
+converts each page to NumPy arrays, so full scans (``inspect-index
+--full``, index analysis, HNSW tuning, snapshot export) hold at most one
+page of raw records at a time.
+
+Works on Chroma collections and on
+:class:`~fragmenter.rag.flat_store.FlatVectorStore`, which offers the same
+``get(include=..., limit=..., offset=...)``.
+"""
+
+from collections.abc import Iterator
+from pathlib import Path
+from typing import Any
+
+import chromadb
+import numpy as np
+
+from fragmenter.rag.flat_store import FLAT_STORE_DIR, FlatVectorStore
+from fragmenter.rag.sharding import is_sharded, load_registry
+from fragmenter.rag.vector_stores import detect_vector_store
+
+# Records per get() call; bounds the memory of a scan
+SCAN_PAGE_SIZE = 1000
+
+
+def open_collections(storage_dir: str | Path) -> dict[str, Any]:
+    """Open the collections of an index without loading it.
+
+    Returns:
+        Collection per shard key (``""`` for an unsharded index); a flat
+        index yields its FlatVectorStore
+
+    Raises:
+        ValueError: If the directory holds no index
+    """
+    storage_dir = Path(storage_dir)
+    backend = detect_vector_store(storage_dir)
+    if backend == "flat":
+        return {"": FlatVectorStore(persist_dir=storage_dir / FLAT_STORE_DIR)}
+    if backend is None:
+        raise ValueError(f"No index found in {storage_dir}")
+
+    client = chromadb.PersistentClient(path=str(storage_dir / "chroma_db"))
+    if is_sharded(storage_dir):
+        return {
+            key: client.get_collection(entry["collection"])
+            for key, entry in load_registry(storage_dir).items()
+        }
+    return {"": client.get_collection("documents")}
+
+
+def iter_collection(
+    collection: Any,
+    documents: bool = True,
+    metadatas: bool = True,
+    embeddings: bool = False,
+    page_size: int = SCAN_PAGE_SIZE,
+) -> Iterator[dict[str, Any]]:
+    """Yield the records of a collection in pages.
+
+    Args:
+        collection: Chroma collection or FlatVectorStore
+        documents: Include ``documents`` (texts) and ``lengths``
+        metadatas: Include ``metadatas``
+        embeddings: Include ``embeddings``
+        page_size: Records per page
+
+    Yields:
+        Dict with ``ids`` and the requested keys; ``lengths`` is an int64
+        array of text lengths and ``embeddings`` a float32 matrix
+    """
+    include = [
+        key
+        for key, wanted in (
+            ("documents", documents),
+            ("metadatas", metadatas),
+            ("embeddings", embeddings),
+        )
+        if wanted
+    ]
+    offset = 0
+    while True:
+        page = collection.get(include=include, limit=page_size, offset=offset)
+        ids = page["ids"]
+        if not ids:
+            return
+
+        result: dict[str, Any] = {"ids": ids}
+        if documents:
+            texts = [text or "" for text in page["documents"] or [""] * len(ids)]
+            result["documents"] = texts
+            result["lengths"] = np.fromiter(map(len, texts), np.int64, len(texts))
+        if metadatas:
+            result["metadatas"] = [
+                m or {} for m in page["metadatas"] or [{}] * len(ids)
+            ]
+        if embeddings:
+            result["embeddings"] = np.asarray(page["embeddings"], dtype=np.float32)
+        yield result
+
+        if len(ids) < page_size:
+            return
+        offset += page_size
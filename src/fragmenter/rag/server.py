@@ -0,0 +1,311 @@
+"""Long-lived HTTP server that keeps a RAG index warm between queries.
+
+Loading an index is dominated by one-off costs: importing LlamaIndex,
+configuring the LLM/embedding providers, opening the Chroma client and
+reading the docstore. This module pays those costs once and then serves
+retrieval and query requests over plain HTTP using only the standard library.
+
+Endpoints:
+    GET  /health    Liveness probe with basic server information
+    POST /retrieve  {"query": str, "top_k": int} -> ranked source nodes
+    POST /query     {"query": str, "stream": bool, "code_only": bool,
+                     "language": str} -> synthesized response
+
+Both POST endpoints accept an optional ``"where"`` list of ``key=value``
+clauses, as understood by :func:`fragmenter.rag.filters.build_where`.
+
+Streaming responses are sent as newline-delimited JSON (``application/x-ndjson``)
+using chunked transfer encoding: one ``{"type": "token"}`` event per generated
+token followed by a final ``{"type": "done"}`` event carrying the sources.
+If the query fails mid-stream, an ``{"type": "error"}`` event ends the body
+instead and the connection is closed.
+
+Requests are handled concurrently on a thread per connection. The LLM and
+embedding clients live in the LlamaIndex global ``Settings`` for the lifetime
+of the process, so provider HTTP connections are pooled and reused across
+requests instead of being re-established per query.
+"""
+
+import json
+import time
+from http import HTTPStatus
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Any, cast
+
+from llama_index.core.base.response.schema import StreamingResponse
+from llama_index.core.indices.base import BaseIndex
+from loguru import logger
+
+from fragmenter.rag.filters import build_where, get_collections, where_kwargs
+from fragmenter.rag.inference import (
+    DEFAULT_TOP_K,
+    extract_code_blocks,
+    retrieve,
+    serialize_source_node,
+)
+
+DEFAULT_HOST = "127.0.0.1"
+DEFAULT_PORT = 8000
+
+# Upper bound for request bodies; queries are text, not uploads
+MAX_BODY_BYTES = 1024 * 1024
+
+
+class RAGServer(ThreadingHTTPServer):
+    """Threaded HTTP server holding a loaded index."""
+
+    daemon_threads = True
+
+    def __init__(
+        self,
+        index: BaseIndex,
+        host: str = DEFAULT_HOST,
+        port: int = DEFAULT_PORT,
+        default_top_k: int = DEFAULT_TOP_K,
+    ):
+        """Bind the server without starting the request loop.
+
+        Args:
+            index: Loaded index used to answer all requests
+            host: Interface to bind to (default: 127.0.0.1)
+            port: TCP port to bind to; 0 picks a free port (default: 8000)
+            default_top_k: Number of nodes retrieved when a request omits top_k
+        """
+        super().__init__((host, port), RAGRequestHandler)
+        self.index = index
+        self.default_top_k = default_top_k
+        self.started_at = time.time()
+
+
+class RAGRequestHandler(BaseHTTPRequestHandler):
+    """Request handler dispatching the JSON endpoints of :class:`RAGServer`."""
+
+    server: RAGServer
+    protocol_version = "HTTP/1.1"
+    # Set once streaming headers are sent; errors can then no longer be reported
+    # as a status. Reset per request, as keep-alive reuses the handler.
+    _streaming: bool
+
+    def log_message(self, format: str, *args: Any) -> None:
+        """Route access logs through loguru instead of stderr."""
+        logger.debug(f"{self.address_string()} - {format % args}")
+
+    # ------------------------------------------------------------------
+    # Response helpers
+    # ------------------------------------------------------------------
+
+    def _send_json(self, status: HTTPStatus, payload: dict[str, Any]) -> None:
+        body = json.dumps(payload, default=str).encode("utf-8")
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def _send_error(self, status: HTTPStatus, message: str) -> None:
+        self._send_json(status, {"error": message})
+
+    def _write_chunk(self, payload: dict[str, Any]) -> None:
+        data = (json.dumps(payload, default=str) + "\n").encode("utf-8")
+        self.wfile.write(f"{len(data):X}\r\n".encode("ascii") + data + b"\r\n")
+        self.wfile.flush()
+
+    def _read_top_k(self, payload: dict[str, Any]) -> int | None:
+        """The requested top_k, replying with 400 and returning None if invalid."""
+        value = payload.get("top_k")
+        if value is None:
+            return self.server.default_top_k
+        if isinstance(value, int) and not isinstance(value, bool) and value > 0:
+            return value
+        self._send_error(HTTPStatus.BAD_REQUEST, "'top_k' must be a positive integer")
+        return None
+
+    def _read_json(self) -> dict[str, Any] | None:
+        """Parse the request body, replying with 400 and returning None on error."""
+        length = int(self.headers.get("Content-Length") or 0)
+        if length > MAX_BODY_BYTES:
+            self._send_error(HTTPStatus.REQUEST_ENTITY_TOO_LARGE, "Body too large")
+            return None
+        try:
+            payload = json.loads(self.rfile.read(length) or b"{}")
+        except json.JSONDecodeError as e:
+            self._send_error(HTTPStatus.BAD_REQUEST, f"Invalid JSON: {e}")
+            return None
+        if not isinstance(payload, dict):
+            self._send_error(HTTPStatus.BAD_REQUEST, "Body must be a JSON object")
+            return None
+        query = payload.get("query")
+        if not isinstance(query, str) or not query.strip():
+            self._send_error(HTTPStatus.BAD_REQUEST, "Missing 'query' string")
+            return None
+        return payload
+
+    # ------------------------------------------------------------------
+    # Routing
+    # ------------------------------------------------------------------
+
+    def do_GET(self) -> None:
+        if self.path == "/health":
+            self._send_json(
+                HTTPStatus.OK,
+                {
+                    "status": "ok",
+                    "uptime_s": round(time.time() - self.server.started_at, 3),
+                    "default_top_k": self.server.default_top_k,
+                },
+            )
+        else:
+            self._send_error(HTTPStatus.NOT_FOUND, f"Unknown path: {self.path}")
+
+    def do_POST(self) -> None:
+        self._streaming = False
+        handlers = {"/retrieve": self._handle_retrieve, "/query": self._handle_query}
+        handler = handlers.get(self.path)
+        if handler is None:
+            self._send_error(HTTPStatus.NOT_FOUND, f"Unknown path: {self.path}")
+            return
+
+        payload = self._read_json()
+        if payload is None:
+            return
+        top_k = self._read_top_k(payload)
+        if top_k is None:
+            return
+
+        clauses = payload.get("where") or []
+        if isinstance(clauses, str):
+            clauses = [clauses]
+        try:
+            where = build_where(clauses, collections=get_collections(self.server.index))
+        except ValueError as e:
+            self._send_error(HTTPStatus.BAD_REQUEST, str(e))
+            return
+
+        try:
+            handler(payload, top_k, where)
+        except Exception as e:
+            logger.exception(f"Request to {self.path} failed: {e}")
+            if not self._streaming:
+                self._send_error(HTTPStatus.INTERNAL_SERVER_ERROR, str(e))
+                return
+            # The status is already sent: end the chunked body with an error
+            # event, and do not reuse a connection that may be mid-chunk
+            self.close_connection = True
+            try:
+                self._write_chunk({"type": "error", "error": str(e)})
+                self.wfile.write(b"0\r\n\r\n")
+                self.wfile.flush()
+            except OSError:
+                pass
+
+    # ------------------------------------------------------------------
+    # Endpoints
+    # ------------------------------------------------------------------
+
+    def _handle_retrieve(
+        self, payload: dict[str, Any], top_k: int, where: dict[str, Any] | None
+    ) -> None:
+        start = time.perf_counter()
+        nodes = retrieve(self.server.index, payload["query"], top_k=top_k, where=where)
+        self._send_json(
+            HTTPStatus.OK,
+            {"nodes": nodes, "elapsed_s": round(time.perf_counter() - start, 4)},
+        )
+
+    def _handle_query(
+        self, payload: dict[str, Any], top_k: int, where: dict[str, Any] | None
+    ) -> None:
+        query = payload["query"]
+        code_only = bool(payload.get("code_only", False))
+        language = payload.get("language")
+        start = time.perf_counter()
+
+        if payload.get("stream"):
+            self._stream_query(query, top_k, code_only, language, where, start)
+            return
+
+        query_engine = self.server.index.as_query_engine(
+            similarity_top_k=top_k, **where_kwargs(where)
+        )
+        response = query_engine.query(query)
+        response_text = str(response)
+        result: dict[str, Any] = {
+            "response": response_text,
+            "source_nodes": [
+                serialize_source_node(n, rank)
+                for rank, n in enumerate(response.source_nodes, start=1)
+            ],
+            "elapsed_s": round(time.perf_counter() - start, 4),
+        }
+        if code_only:
+            result["code_blocks"] = extract_code_blocks(response_text, language)
+        self._send_json(HTTPStatus.OK, result)
+
+    def _stream_query(
+        self,
+        query: str,
+        top_k: int,
+        code_only: bool,
+        language: str | None,
+        where: dict[str, Any] | None,
+        start: float,
+    ) -> None:
+        query_engine = self.server.index.as_query_engine(
+            similarity_top_k=top_k, streaming=True, **where_kwargs(where)
+        )
+        response = cast(StreamingResponse, query_engine.query(query))
+
+        self._streaming = True
+        self.send_response(HTTPStatus.OK)
+        self.send_header("Content-Type", "application/x-ndjson")
+        self.send_header("Transfer-Encoding", "chunked")
+        self.end_headers()
+
+        tokens: list[str] = []
+        first_token_s = None
+        for token in response.response_gen:
+            if first_token_s is None:
+                first_token_s = round(time.perf_counter() - start, 4)
+            tokens.append(token)
+            self._write_chunk({"type": "token", "text": token})
+
+        response_text = "".join(tokens)
+        done: dict[str, Any] = {
+            "type": "done",
+            "response": response_text,
+            "source_nodes": [
+                serialize_source_node(n, rank)
+                for rank, n in enumerate(response.source_nodes, start=1)
+            ],
+            "first_token_s": first_token_s,
+            "elapsed_s": round(time.perf_counter() - start, 4),
+        }
+        if code_only:
+            done["code_blocks"] = extract_code_blocks(response_text, language)
+        self._write_chunk(done)
+        self.wfile.write(b"0\r\n\r\n")
+        self.wfile.flush()
+
+
+def serve(
+    index: BaseIndex,
+    host: str = DEFAULT_HOST,
+    port: int = DEFAULT_PORT,
+    default_top_k: int = DEFAULT_TOP_K,
+) -> None:
+    """Serve the index over HTTP until interrupted.
+
+    Args:
+        index: Loaded index used to answer all requests
+        host: Interface to bind to (default: 127.0.0.1)
+        port: TCP port to bind to (default: 8000)
+        default_top_k: Number of nodes retrieved when a request omits top_k
+    """
+    server = RAGServer(index, host=host, port=port, default_top_k=default_top_k)
+    logger.success(f"Serving index on http://{host}:{server.server_port}")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        logger.info("Shutting down server")
+    finally:
+        server.server_close()
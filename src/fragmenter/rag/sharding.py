@@ -0,0 +1,379 @@
+"""Per-repository sharded collections with federated querying.
+
+In the sharded layout every git repository found under the data directory
+gets its own Chroma collection, and files outside any repository share one
+``unscoped`` collection. Each shard keeps its own docstore and pipeline cache,
+so rebuilding one repository never touches the others and every HNSW graph
+stays small.
+
+Layout inside the storage directory::
+
+    chroma_db/                  # One Chroma database, one collection per shard
+    shards.json                 # Registry: shard key -> collection name
+    shards/<collection>/        # Per-shard docstore.json and pipeline/ cache
+
+Queries fan out to all shards (or only the repositories named in a
+``repository`` filter) in parallel. The query is embedded once and every
+shard returns its own top-k; the merged list is cut back to top-k by score,
+which is exact because all shards use the same embedding model and distance.
+"""
+
+import asyncio
+import hashlib
+import json
+import re
+import shutil
+from concurrent.futures import ThreadPoolExecutor
+from datetime import UTC, datetime
+from pathlib import Path
+from typing import Any
+
+import chromadb
+from llama_index.core import Settings, VectorStoreIndex
+from llama_index.core.base.base_retriever import BaseRetriever
+from llama_index.core.constants import DEFAULT_SIMILARITY_TOP_K
+from llama_index.core.query_engine import RetrieverQueryEngine
+from llama_index.core.schema import NodeWithScore, QueryBundle, TextNode
+from llama_index.vector_stores.chroma import ChromaVectorStore
+from loguru import logger
+
+from fragmenter.rag.boilerplate import mark_boilerplate
+from fragmenter.rag.ingestion import drop_empty_nodes, ingest_nodes, load_documents
+from fragmenter.rag.instrumentation import BuildReport
+from fragmenter.rag.parsers import (
+    MIN_CHUNK_SIZE_CODE,
+    MIN_CHUNK_SIZE_CONFIG,
+    MIN_CHUNK_SIZE_DOCS,
+)
+from fragmenter.rag.vector_stores import (
+    create_chroma_vector_store,
+    get_or_create_collection,
+)
+
+SHARDS_FILE = "shards.json"
+SHARDS_DIR = "shards"
+# Shard key for files that do not belong to any git repository
+UNSCOPED_SHARD = "unscoped"
+
+# Upper bound on shards queried concurrently
+MAX_QUERY_WORKERS = 8
+
+
+def is_sharded(persist_dir: str | Path) -> bool:
+    """Return True if the storage directory uses the sharded layout."""
+    return (Path(persist_dir) / SHARDS_FILE).exists()
+
+
+def shard_key(node: TextNode) -> str:
+    """Return the shard a node belongs to (its repository name or ``unscoped``)."""
+    return node.metadata.get("repository") or UNSCOPED_SHARD
+
+
+def collection_name_for(key: str) -> str:
+    """Derive a valid, stable Chroma collection name for a shard key.
+
+    Repository names are slugified for readability and suffixed with a short
+    hash so that names differing only in special characters do not collide.
+    """
+    digest = hashlib.sha1(key.encode("utf-8")).hexdigest()[:8]
+    slug = re.sub(r"[^a-zA-Z0-9_-]+", "-", key).strip("-_")[:40]
+    return f"documents-{slug}-{digest}" if slug else f"documents-{digest}"
+
+
+def load_registry(persist_dir: str | Path) -> dict[str, dict[str, Any]]:
+    """Load the shard registry, mapping shard key to its entry."""
+    path = Path(persist_dir) / SHARDS_FILE
+    if not path.exists():
+        return {}
+    with open(path, encoding="utf-8") as f:
+        shards: dict[str, dict[str, Any]] = json.load(f).get("shards", {})
+    return shards
+
+
+def save_registry(persist_dir: str | Path, shards: dict[str, dict[str, Any]]) -> None:
+    """Persist the shard registry."""
+    path = Path(persist_dir) / SHARDS_FILE
+    path.parent.mkdir(parents=True, exist_ok=True)
+    with open(path, "w", encoding="utf-8") as f:
+        json.dump({"version": 1, "shards": shards}, f, indent=2, sort_keys=True)
+
+
+def group_by_shard(nodes: list[TextNode]) -> dict[str, list[TextNode]]:
+    """Group nodes by shard key."""
+    groups: dict[str, list[TextNode]] = {}
+    for node in nodes:
+        groups.setdefault(shard_key(node), []).append(node)
+    return groups
+
+
+def _find_repositories(input_dir: Path, names: set[str]) -> list[Path]:
+    """Find git repositories below input_dir whose directory name is in names."""
+    return sorted(
+        git_dir.parent
+        for git_dir in input_dir.rglob(".git")
+        if git_dir.parent.name in names
+    )
+
+
+def build_sharded_index(
+    input_dir: str | Path,
+    persist_dir: str | Path,
+    project_root: str | Path | None = None,
+    shards: list[str] | None = None,
+    min_chunk_size_code: int = MIN_CHUNK_SIZE_CODE,
+    min_chunk_size_docs: int = MIN_CHUNK_SIZE_DOCS,
+    min_chunk_size_config: int = MIN_CHUNK_SIZE_CONFIG,
+    enable_extractors: bool = False,
+    num_workers: int = 2,
+    hnsw: dict[str, Any] | None = None,
+    dedup: dict[str, Any] | None = None,
+    boilerplate: dict[str, Any] | None = None,
+    report: BuildReport | None = None,
+) -> "ShardedIndex":
+    """Create or update a sharded index with one collection per repository.
+
+    Args:
+        input_dir: Directory containing source documents
+        persist_dir: Directory to store the shards and Chroma database
+        project_root: Project root for relative paths (defaults to input_dir)
+        shards: Only rebuild these shards (repository names or ``unscoped``);
+            all other shards are left untouched. Default: rebuild all and drop
+            shards whose repository disappeared.
+        min_chunk_size_code: Minimum characters for code chunks (default: 250)
+        min_chunk_size_docs: Minimum characters for doc chunks (default: 150)
+        min_chunk_size_config: Minimum characters for config chunks (default: 75)
+        enable_extractors: Enable LLM-based metadata extraction (default: False)
+        num_workers: Number of parallel workers for pipeline (default: 2)
+        hnsw: Optional Chroma HNSW configuration for every shard collection
+        dedup: Near-duplicate handling (policy, threshold), applied within
+            each shard; default: off
+        boilerplate: Boilerplate detection (min_share) over all loaded
+            files, excluded from embeddings; default: off
+        report: Build report to record the stages in, summed over the shards
+            (default: a new one); written to ``persist_dir``
+
+    Returns:
+        ShardedIndex over all registered shards
+    """
+    input_dir = Path(input_dir).resolve()
+    persist_path = Path(persist_dir)
+    project_root = project_root or input_dir
+    selected = set(shards) if shards else None
+    report = report or BuildReport()
+
+    # A repository shard only needs its own directory to be parsed
+    if selected and UNSCOPED_SHARD not in selected:
+        directories = _find_repositories(input_dir, selected)
+    else:
+        directories = [input_dir]
+    nodes: list[TextNode] = []
+    for directory in directories:
+        nodes.extend(
+            load_documents(
+                directory,
+                project_root=project_root,
+                min_chunk_size_code=min_chunk_size_code,
+                min_chunk_size_docs=min_chunk_size_docs,
+                min_chunk_size_config=min_chunk_size_config,
+                report=report,
+            )
+        )
+    nodes = drop_empty_nodes(nodes)
+    if boilerplate is not None:
+        with report.stage("boilerplate", total=len(nodes), unit="nodes") as stage:
+            mark_boilerplate(nodes, **boilerplate)
+            stage.advance(len(nodes))
+    groups = group_by_shard(nodes)
+
+    if selected:
+        missing = selected - groups.keys()
+        if missing:
+            logger.warning(f"No documents found for shard(s): {sorted(missing)}")
+        groups = {key: group for key, group in groups.items() if key in selected}
+
+    registry = load_registry(persist_path)
+    for key, group in sorted(groups.items()):
+        name = collection_name_for(key)
+        state_dir = persist_path / SHARDS_DIR / name
+        logger.info(f"Shard '{key}': {len(group)} nodes -> collection '{name}'")
+
+        vector_store, storage_context = create_chroma_vector_store(
+            persist_path=persist_path,
+            collection_name=name,
+            docstore_path=state_dir / "docstore.json",
+            hnsw=hnsw,
+        )
+        ingest_nodes(
+            group,
+            vector_store=vector_store,
+            storage_context=storage_context,
+            state_dir=state_dir,
+            enable_extractors=enable_extractors,
+            num_workers=num_workers,
+            dedup=dedup,
+            report=report,
+        )
+        registry[key] = {
+            "collection": name,
+            "nodes": vector_store.client.count(),
+            "updated_at": datetime.now(UTC).isoformat(timespec="seconds"),
+        }
+        save_registry(persist_path, registry)
+
+    # A full rebuild also removes shards whose repository no longer exists
+    if selected is None:
+        for key in sorted(registry.keys() - groups.keys()):
+            drop_shard(persist_path, registry.pop(key)["collection"])
+            logger.info(f"Dropped stale shard '{key}'")
+        save_registry(persist_path, registry)
+
+    logger.success(f"Sharded index has {len(registry)} shard(s)")
+    report.finish()
+    report.log_summary()
+    report.save(persist_path)
+    return load_sharded_index(persist_path, hnsw=hnsw)
+
+
+def drop_shard(persist_dir: str | Path, collection_name: str) -> None:
+    """Delete a shard's collection and its pipeline state."""
+    persist_path = Path(persist_dir)
+    client = chromadb.PersistentClient(path=str(persist_path / "chroma_db"))
+    try:
+        client.delete_collection(collection_name)
+    except Exception as e:
+        logger.warning(f"Could not delete collection '{collection_name}': {e}")
+
+    shutil.rmtree(persist_path / SHARDS_DIR / collection_name, ignore_errors=True)
+
+
+def load_sharded_index(
+    persist_dir: str | Path, hnsw: dict[str, Any] | None = None
+) -> "ShardedIndex":
+    """Open every registered shard of a sharded storage directory."""
+    persist_path = Path(persist_dir)
+    client = chromadb.PersistentClient(path=str(persist_path / "chroma_db"))
+    vector_stores = {
+        key: ChromaVectorStore(
+            chroma_collection=get_or_create_collection(
+                client, entry["collection"], hnsw
+            )
+        )
+        for key, entry in sorted(load_registry(persist_path).items())
+    }
+    logger.info(f"Loaded {len(vector_stores)} shard(s) from {persist_path}")
+    return ShardedIndex(vector_stores)
+
+
+def shards_for_where(where: dict[str, Any] | None, keys: list[str]) -> list[str]:
+    """Select the shards that can match a Chroma ``where`` clause.
+
+    Only ``repository`` conditions at the top level (or inside a top-level
+    ``$and``) prune shards; anything else is evaluated inside each shard.
+    """
+    if not where:
+        return keys
+    conditions = where.get("$and", [where])
+    selected = set(keys)
+    for condition in conditions:
+        clause = condition.get("repository")
+        if not isinstance(clause, dict):
+            continue
+        if "$eq" in clause:
+            selected &= {clause["$eq"]}
+        elif "$in" in clause:
+            selected &= set(clause["$in"])
+    return [key for key in keys if key in selected]
+
+
+class FederatedRetriever(BaseRetriever):  # type: ignore[misc, unused-ignore]
+    """Retriever querying several shard retrievers in parallel.
+
+    The query embedding is computed once and shared by all shards; results
+    are merged by score and truncated to ``similarity_top_k``.
+    """
+
+    def __init__(
+        self,
+        retrievers: dict[str, BaseRetriever],
+        similarity_top_k: int,
+        max_workers: int = MAX_QUERY_WORKERS,
+    ):
+        """Initialize the federated retriever.
+
+        Args:
+            retrievers: Shard key to retriever over that shard's collection
+            similarity_top_k: Number of nodes returned after merging
+            max_workers: Maximum number of shards queried concurrently
+        """
+        super().__init__()
+        self._retrievers = retrievers
+        self._similarity_top_k = similarity_top_k
+        self._max_workers = max(1, min(max_workers, len(retrievers)))
+
+    def _retrieve(self, query_bundle: QueryBundle) -> list[NodeWithScore]:
+        if not self._retrievers:
+            return []
+
+        # Embed once instead of once per shard
+        if query_bundle.embedding is None and query_bundle.embedding_strs:
+            query_bundle.embedding = (
+                Settings.embed_model.get_agg_embedding_from_queries(
+                    query_bundle.embedding_strs
+                )
+            )
+
+        with ThreadPoolExecutor(max_workers=self._max_workers) as executor:
+            per_shard = list(
+                executor.map(
+                    lambda retriever: retriever.retrieve(query_bundle),
+                    self._retrievers.values(),
+                )
+            )
+
+        merged = [node for results in per_shard for node in results]
+        merged.sort(key=lambda node: node.score or 0.0, reverse=True)
+        return merged[: self._similarity_top_k]
+
+    async def _aretrieve(self, query_bundle: QueryBundle) -> list[NodeWithScore]:
+        return await asyncio.to_thread(self._retrieve, query_bundle)
+
+
+class ShardedIndex:
+    """Index facade over per-repository collections.
+
+    Implements the parts of the LlamaIndex index interface used by fragmenter
+    (``as_retriever`` and ``as_query_engine``) so it can be used wherever a
+    loaded ``VectorStoreIndex`` is expected.
+    """
+
+    def __init__(self, vector_stores: dict[str, ChromaVectorStore]):
+        """Initialize from shard key to vector store mapping."""
+        self.vector_stores = vector_stores
+        self._indexes = {
+            key: VectorStoreIndex.from_vector_store(vector_store=vs)
+            for key, vs in vector_stores.items()
+        }
+
+    @property
+    def collections(self) -> list[Any]:
+        """Chroma collections of all shards."""
+        return [vs.client for vs in self.vector_stores.values()]
+
+    def as_retriever(
+        self, similarity_top_k: int | None = None, **kwargs: Any
+    ) -> FederatedRetriever:
+        """Create a retriever fanning out to the relevant shards."""
+        top_k = similarity_top_k or DEFAULT_SIMILARITY_TOP_K
+        where = kwargs.get("vector_store_kwargs", {}).get("where")
+        keys = shards_for_where(where, list(self._indexes))
+        logger.debug(f"Querying {len(keys)} of {len(self._indexes)} shard(s)")
+        retrievers = {
+            key: self._indexes[key].as_retriever(similarity_top_k=top_k, **kwargs)
+            for key in keys
+        }
+        return FederatedRetriever(retrievers, similarity_top_k=top_k)
+
+    def as_query_engine(self, **kwargs: Any) -> RetrieverQueryEngine:
+        """Create a query engine using the federated retriever."""
+        retriever = self.as_retriever(**kwargs)
+        return RetrieverQueryEngine.from_args(retriever, llm=Settings.llm, **kwargs)
@@ -0,0 +1,467 @@
+"""Single-file index snapshots for distribution and fast cold start.
+
+A snapshot (``*.fragidx``) packs everything needed to serve an index into
+one file:
+
+    magic           ``FRAGIDX\\0``
+    header length   uint64, little endian
+    header          JSON: format version, embedding model fingerprint,
+                    compression settings, row count and the section table
+    sections        64-byte aligned, each with offset, length and CRC32
+
+Sections:
+
+    vectors         Encoded vectors (float32, float16 or int8), row-major
+    scales          Per-dimension scales (int8 only)
+    bits            Packed sign bits (binary prefilter only)
+    ids             zlib-compressed JSON of node ids and ref_doc_ids
+    records         zlib-compressed blocks of ``RECORD_BLOCK_SIZE`` JSONL
+                    records (text and node metadata)
+    record_index    Byte offset of every record block (int64)
+    docstore        zlib-compressed docstore JSON (change detection)
+
+The numeric sections are stored raw so that a snapshot can be served
+directly: :func:`open_snapshot` memory-maps the arrays into a read-only
+:class:`~fragmenter.rag.flat_store.FlatVectorStore`, and only the record
+blocks of returned rows are decompressed. :func:`import_index` unpacks a
+snapshot into a regular storage directory (flat or Chroma) with bulk writes
+and no re-embedding.
+
+Snapshots always use the flat store layout, whatever backend they were
+exported from; the pipeline cache is not included.
+"""
+
+import json
+import struct
+import zlib
+from datetime import UTC, datetime
+from pathlib import Path
+from typing import Any
+
+import chromadb
+import numpy as np
+from llama_index.core import Settings
+from loguru import logger
+
+from fragmenter.rag.flat_store import FLAT_STORE_DIR, FlatVectorStore
+from fragmenter.rag.quantization import encode, normalize, pack_bits, truncate
+from fragmenter.rag.sharding import SHARDS_DIR, is_sharded, load_registry
+from fragmenter.rag.tuning import COPY_BATCH_SIZE, fetch_collection
+from fragmenter.rag.vector_stores import (
+    create_chroma_vector_store,
+    detect_vector_store,
+)
+
+SNAPSHOT_MAGIC = b"FRAGIDX\x00"
+SNAPSHOT_VERSION = 1
+SNAPSHOT_SUFFIX = ".fragidx"
+
+# Records compressed together; a lookup decompresses one block
+RECORD_BLOCK_SIZE = 256
+
+# Alignment of every section, so memory-mapped arrays are aligned
+SECTION_ALIGN = 64
+
+# Decompressed record blocks kept per open snapshot
+_BLOCK_CACHE_SIZE = 64
+
+_HEADER_PREFIX = struct.Struct("<8sQ")
+
+
+def is_snapshot(path: str | Path) -> bool:
+    """Return True if ``path`` is a snapshot file."""
+    path = Path(path)
+    if not path.is_file():
+        return False
+    with open(path, "rb") as f:
+        return f.read(len(SNAPSHOT_MAGIC)) == SNAPSHOT_MAGIC
+
+
+def _compress_json(value: Any) -> bytes:
+    return zlib.compress(json.dumps(value, ensure_ascii=False).encode("utf-8"))
+
+
+class Snapshot:
+    """Reader for a snapshot file.
+
+    Args:
+        path: The ``.fragidx`` file
+
+    Raises:
+        ValueError: If the file is not a snapshot or has an unsupported version
+    """
+
+    def __init__(self, path: str | Path):
+        self.path = Path(path)
+        with open(self.path, "rb") as f:
+            prefix = f.read(_HEADER_PREFIX.size)
+            if len(prefix) < _HEADER_PREFIX.size:
+                raise ValueError(f"Not an index snapshot: {self.path}")
+            magic, header_length = _HEADER_PREFIX.unpack(prefix)
+            if magic != SNAPSHOT_MAGIC:
+                raise ValueError(f"Not an index snapshot: {self.path}")
+            self.header = json.loads(f.read(header_length))
+        if self.header.get("version") != SNAPSHOT_VERSION:
+            raise ValueError(
+                f"Unsupported snapshot version {self.header.get('version')} "
+                f"in {self.path}"
+            )
+        self._data_offset = _aligned(_HEADER_PREFIX.size + header_length)
+
+    @property
+    def sections(self) -> dict[str, dict[str, Any]]:
+        sections: dict[str, dict[str, Any]] = self.header["sections"]
+        return sections
+
+    @property
+    def embedding(self) -> dict[str, Any]:
+        """Fingerprint of the embedding model the vectors were made with."""
+        embedding: dict[str, Any] = self.header.get("embedding") or {}
+        return embedding
+
+    def array(self, name: str) -> np.ndarray | None:
+        """Memory-map a raw section, or None if the snapshot lacks it."""
+        section = self.sections.get(name)
+        if section is None:
+            return None
+        return np.memmap(
+            self.path,
+            dtype=section["dtype"],
+            mode="r",
+            offset=self._data_offset + section["offset"],
+            shape=tuple(section["shape"]),
+        )
+
+    def load_json(self, name: str) -> Any:
+        """Decode a compressed JSON section, or None if the snapshot lacks it."""
+        data = self.array(name)
+        if data is None:
+            return None
+        return json.loads(zlib.decompress(data.tobytes()))
+
+    def verify(self) -> None:
+        """Check the CRC32 of every section.
+
+        Raises:
+            ValueError: If a section is corrupt
+        """
+        for name, section in self.sections.items():
+            data = self.array(name)
+            checksum = zlib.crc32(memoryview(np.ascontiguousarray(data)).cast("B"))
+            if checksum != section["crc32"]:
+                raise ValueError(f"Snapshot section '{name}' is corrupt: {self.path}")
+
+    def records(self) -> "SnapshotRecords":
+        return SnapshotRecords(self)
+
+
+class SnapshotRecords:
+    """Row records stored in compressed blocks, for FlatVectorStore.attach."""
+
+    def __init__(self, snapshot: Snapshot) -> None:
+        data, index = snapshot.array("records"), snapshot.array("record_index")
+        if data is None or index is None:
+            raise ValueError(f"Snapshot has no records: {snapshot.path}")
+        self._data, self._index = data, index
+        self._block_size: int = snapshot.header["record_block_size"]
+        self._cache: dict[int, list[dict[str, Any]]] = {}
+
+    def _block(self, number: int) -> list[dict[str, Any]]:
+        if number not in self._cache:
+            if len(self._cache) >= _BLOCK_CACHE_SIZE:
+                self._cache.pop(next(iter(self._cache)))
+            start, end = int(self._index[number]), int(self._index[number + 1])
+            payload = zlib.decompress(self._data[start:end].tobytes())
+            self._cache[number] = [
+                json.loads(line) for line in payload.decode("utf-8").split("\n")
+            ]
+        return self._cache[number]
+
+    def read(self, positions: list[int]) -> list[dict[str, Any]]:
+        """Read the records of the given rows."""
+        return [
+            self._block(i // self._block_size)[i % self._block_size] for i in positions
+        ]
+
+    def metadatas(self) -> list[dict[str, Any]]:
+        """Metadata of every row, in row order."""
+        return [
+            row["metadata"]
+            for number in range(len(self._index) - 1)
+            for row in self._block(number)
+        ]
+
+
+def _aligned(offset: int) -> int:
+    return -(-offset // SECTION_ALIGN) * SECTION_ALIGN
+
+
+def write_snapshot(
+    output: Path, header: dict[str, Any], sections: dict[str, np.ndarray | bytes]
+) -> None:
+    """Write a snapshot file from its header fields and section payloads.
+
+    Arrays are stored raw (memory-mappable); bytes are stored as-is with
+    dtype ``uint8``. The file is written next to ``output`` and renamed into
+    place.
+    """
+    table, payloads, offset = {}, [], 0
+    for name, payload in sections.items():
+        if isinstance(payload, bytes):
+            payload = np.frombuffer(payload, dtype=np.uint8)
+        payload = np.ascontiguousarray(payload)
+        view = memoryview(payload).cast("B")
+        offset = _aligned(offset)
+        table[name] = {
+            "offset": offset,
+            "length": len(view),
+            "dtype": payload.dtype.str,
+            "shape": list(payload.shape),
+            "crc32": zlib.crc32(view),
+        }
+        payloads.append((offset, view))
+        offset += len(view)
+
+    header_bytes = json.dumps({**header, "sections": table}).encode("utf-8")
+    data_offset = _aligned(_HEADER_PREFIX.size + len(header_bytes))
+
+    output.parent.mkdir(parents=True, exist_ok=True)
+    staging = output.with_name(output.name + ".tmp")
+    with open(staging, "wb") as f:
+        f.write(_HEADER_PREFIX.pack(SNAPSHOT_MAGIC, len(header_bytes)))
+        f.write(header_bytes)
+        for section_offset, view in payloads:
+            f.seek(data_offset + section_offset)
+            f.write(view)
+    staging.replace(output)
+
+
+def _source_collections(
+    persist_dir: Path,
+) -> tuple[list[Any], list[Path], dict[str, Any]]:
+    """Collections, docstore files and compression settings of an index."""
+    if detect_vector_store(persist_dir) == "flat":
+        store = FlatVectorStore(persist_dir=persist_dir / FLAT_STORE_DIR)
+        compression = {
+            "dtype": store.dtype,
+            "dimensions": store.dimensions,
+            "binary": store.binary,
+        }
+        return [store], [persist_dir / "docstore.json"], compression
+
+    if not (persist_dir / "chroma_db").exists():
+        raise ValueError(f"No index found in {persist_dir}")
+    client = chromadb.PersistentClient(path=str(persist_dir / "chroma_db"))
+    compression = {"dtype": "float32", "dimensions": None, "binary": False}
+    if is_sharded(persist_dir):
+        names = [entry["collection"] for entry in load_registry(persist_dir).values()]
+        docstores = [
+            persist_dir / SHARDS_DIR / name / "docstore.json" for name in names
+        ]
+    else:
+        names = ["documents"]
+        docstores = [persist_dir / "docstore.json"]
+    return [client.get_collection(name) for name in names], docstores, compression
+
+
+def _merge_docstores(paths: list[Path]) -> dict[str, Any] | None:
+    """Merge SimpleDocumentStore files key by key (shards share no documents)."""
+    merged: dict[str, dict[str, Any]] = {}
+    for path in paths:
+        if path.exists():
+            for key, values in json.loads(path.read_text(encoding="utf-8")).items():
+                merged.setdefault(key, {}).update(values)
+    return merged or None
+
+
+def _record_blocks(rows: list[dict[str, Any]]) -> tuple[bytes, np.ndarray]:
+    """Compress records in blocks; returns the data and block offsets."""
+    blocks, offsets = [], [0]
+    for start in range(0, len(rows), RECORD_BLOCK_SIZE):
+        lines = "\n".join(
+            json.dumps(row, ensure_ascii=False)
+            for row in rows[start : start + RECORD_BLOCK_SIZE]
+        )
+        blocks.append(zlib.compress(lines.encode("utf-8")))
+        offsets.append(offsets[-1] + len(blocks[-1]))
+    return b"".join(blocks), np.asarray(offsets, dtype=np.int64)
+
+
+def export_index(
+    persist_dir: str | Path,
+    output: str | Path,
+    embedding: dict[str, Any] | None = None,
+    dtype: str | None = None,
+) -> dict[str, Any]:
+    """Export an index (Chroma, sharded or flat) to a snapshot file.
+
+    Args:
+        persist_dir: Index storage directory
+        output: Snapshot file to write
+        embedding: Fingerprint of the embedding model (provider, model,
+            dimensions), checked when the snapshot is loaded
+        dtype: Storage dtype of the vectors; defaults to the source's
+
+    Returns:
+        The snapshot header
+
+    Raises:
+        ValueError: If the index is empty or missing
+    """
+    persist_dir = Path(persist_dir)
+    collections, docstores, compression = _source_collections(persist_dir)
+    if dtype:
+        compression["dtype"] = dtype
+
+    data: dict[str, list[Any]] = {"ids": [], "documents": [], "metadatas": []}
+    embeddings = []
+    for collection in collections:
+        fetched = fetch_collection(collection, include_payload=True)
+        for key in data:
+            data[key].extend(fetched[key])
+        if len(fetched["embeddings"]):
+            embeddings.append(fetched["embeddings"])
+    if not embeddings:
+        raise ValueError(f"Index in {persist_dir} is empty")
+
+    vectors = truncate(normalize(np.concatenate(embeddings)), compression["dimensions"])
+    sections: dict[str, np.ndarray | bytes] = dict(
+        encode(vectors, compression["dtype"])
+    )
+    if compression["binary"]:
+        sections["bits"] = pack_bits(vectors)
+    sections["ids"] = _compress_json(
+        {
+            "ids": data["ids"],
+            "ref_doc_ids": [
+                (metadata or {}).get("document_id", "None")
+                for metadata in data["metadatas"]
+            ],
+        }
+    )
+    rows = [
+        {"text": text or "", "metadata": metadata or {}}
+        for text, metadata in zip(data["documents"], data["metadatas"], strict=True)
+    ]
+    sections["records"], sections["record_index"] = _record_blocks(rows)
+    docstore = _merge_docstores(docstores)
+    if docstore is not None:
+        sections["docstore"] = _compress_json(docstore)
+
+    header = {
+        "version": SNAPSHOT_VERSION,
+        "created_at": datetime.now(UTC).isoformat(timespec="seconds"),
+        "embedding": embedding or {},
+        "count": len(rows),
+        "dim": int(vectors.shape[1]),
+        **compression,
+        "record_block_size": RECORD_BLOCK_SIZE,
+    }
+    write_snapshot(Path(output), header, sections)
+    logger.success(f"Exported {len(rows)} vectors to snapshot: {output}")
+    return header
+
+
+def open_snapshot(path: str | Path) -> FlatVectorStore:
+    """Serve a snapshot read-only, memory-mapping its vectors in place."""
+    snapshot = Snapshot(path)
+    header = snapshot.header
+    store = FlatVectorStore(
+        persist_dir=snapshot.path,
+        dtype=header["dtype"],
+        dimensions=header["dimensions"],
+        binary=header["binary"],
+    )
+    vectors, sidecar = snapshot.array("vectors"), snapshot.load_json("ids")
+    if vectors is None or sidecar is None:
+        raise ValueError(f"Snapshot has no vectors: {snapshot.path}")
+    store.attach(
+        vectors=vectors,
+        ids=sidecar["ids"],
+        ref_doc_ids=sidecar["ref_doc_ids"],
+        records=snapshot.records(),
+        scales=snapshot.array("scales"),
+        bits=snapshot.array("bits"),
+        read_only=True,
+    )
+    check_embedding(snapshot.embedding)
+    return store
+
+
+def check_embedding(fingerprint: dict[str, Any]) -> bool:
+    """Warn if the configured embedding model differs from the snapshot's.
+
+    Returns:
+        True if the models match or either side is unknown
+    """
+    model = getattr(Settings._embed_model, "model_name", None)
+    expected = fingerprint.get("model")
+    # BaseEmbedding reports "unknown" when a model does not name itself
+    if model not in (None, "unknown") and expected and model != expected:
+        logger.warning(
+            f"Snapshot was embedded with '{expected}' but the configured "
+            f"embedding model is '{model}'; query results will be meaningless"
+        )
+        return False
+    return True
+
+
+def import_index(
+    snapshot_path: str | Path,
+    persist_dir: str | Path,
+    backend: str = "flat",
+    verify: bool = True,
+) -> int:
+    """Unpack a snapshot into a new storage directory without re-embedding.
+
+    Args:
+        snapshot_path: The ``.fragidx`` file
+        persist_dir: Empty (or missing) storage directory to create
+        backend: ``flat`` (copies the arrays) or ``chroma`` (bulk insert of
+            the decoded vectors)
+        verify: Check section checksums first
+
+    Returns:
+        Number of imported vectors
+
+    Raises:
+        ValueError: If the target holds files, the snapshot is corrupt, or
+            the backend cannot represent the snapshot
+    """
+    persist_dir = Path(persist_dir)
+    if persist_dir.exists() and any(persist_dir.iterdir()):
+        raise ValueError(f"Target directory is not empty: {persist_dir}")
+
+    snapshot = Snapshot(snapshot_path)
+    if verify:
+        snapshot.verify()
+    store = open_snapshot(snapshot.path)
+
+    if backend == "flat":
+        store.save_to(persist_dir / FLAT_STORE_DIR)
+    elif backend == "chroma":
+        if store.dimensions is not None:
+            raise ValueError(
+                "Snapshot vectors are truncated; Chroma would receive "
+                "full-size query embeddings. Import with the flat backend."
+            )
+        vector_store, _ = create_chroma_vector_store(persist_path=persist_dir)
+        collection = vector_store.client
+        for offset in range(0, store.count(), COPY_BATCH_SIZE):
+            batch = store.get(
+                include=["documents", "metadatas", "embeddings"],
+                limit=COPY_BATCH_SIZE,
+                offset=offset,
+            )
+            collection.add(**batch)
+    else:
+        raise ValueError(f"Unknown vector store '{backend}'")
+
+    docstore = snapshot.load_json("docstore")
+    if docstore is not None:
+        persist_dir.mkdir(parents=True, exist_ok=True)
+        (persist_dir / "docstore.json").write_text(
+            json.dumps(docstore), encoding="utf-8"
+        )
+    logger.success(f"Imported {store.count()} vectors into {persist_dir}")
+    return store.count()
@@ -0,0 +1,262 @@
+"""Index statistics manifest (``index_stats.json``).
+
+Inspecting an index used to read every document and metadata dict back out
+of the vector store. Instead, :func:`~fragmenter.rag.ingestion.ingest_nodes`
+aggregates the statistics from the nodes it already holds in memory and
+writes them next to the docstore, so ``inspect-index`` renders in constant
+time. Sharded indexes keep one manifest per shard; :func:`merge_stats`
+combines them, which is why every field is a count, sum, extreme or
+bounded sample rather than a per-chunk list. The same merge lets
+:func:`scan_stats` recompute a manifest from the vector store one page at
+a time.
+
+Layout (all counts are chunks unless noted):
+
+    chunks, total_chars      Totals
+    min_chunk, max_chunk     Length, file and preview of the extremes
+    length_histogram         Counts per ``LENGTH_BUCKETS`` bucket
+    code_chunks, doc_chunks  Content type counts
+    repositories             Repository -> count
+    file_types               File extension -> count
+    depths                   Directory depth -> count
+    directories              Top-level directory -> number of files
+    files                    Number of distinct files
+    sample_files             First ``SAMPLE_SIZE`` paths, sorted
+    metadata_keys            Union of metadata keys
+    small_chunks             Chunks under ``SMALL_CHUNK_CHARS``
+    small_chunk_samples      A few of them, with previews
+    boilerplate_chunks       Chunks with boilerplate excluded from embedding
+    boilerplate_chars        Characters excluded (see :mod:`fragmenter.rag.boilerplate`)
+    dedup                    Near-duplicate summary when dedup is enabled
+                             (see :mod:`fragmenter.rag.dedup`)
+"""
+
+import json
+from collections import Counter
+from collections.abc import Iterable
+from datetime import UTC, datetime
+from pathlib import Path
+from typing import Any
+
+import numpy as np
+from loguru import logger
+
+from fragmenter.rag.boilerplate import boilerplate_chars
+from fragmenter.rag.dedup import merge_reports
+
+STATS_FILE = "index_stats.json"
+STATS_VERSION = 2
+
+# Lower bounds (characters) of the chunk length histogram buckets
+LENGTH_BUCKETS = [0, 500, 1000, 1500, 2000, 3000, 5000]
+
+# Chunks shorter than this often indicate parsing issues or noise
+SMALL_CHUNK_CHARS = 50
+
+SAMPLE_SIZE = 10
+_PREVIEW_CHARS = 200
+
+# Keys vector stores add to node metadata; not part of the chunk's metadata
+_STORAGE_KEYS = {"_node_content", "_node_type", "doc_id", "document_id", "ref_doc_id"}
+
+
+def _file_path(metadata: dict[str, Any]) -> str | None:
+    return (
+        metadata.get("relative_path")
+        or metadata.get("file_path")
+        or metadata.get("file_name")
+    )
+
+
+def _top_level(file_path: str) -> str:
+    parent = Path(file_path).parent
+    return str(parent).split("/")[0] if parent != Path(".") else "."
+
+
+def _chunk_info(length: int, file_path: str | None, text: str) -> dict[str, Any]:
+    return {
+        "length": length,
+        "file": file_path or "Unknown",
+        "content": text[:_PREVIEW_CHARS],
+    }
+
+
+def _empty_stats() -> dict[str, Any]:
+    return {
+        "version": STATS_VERSION,
+        "chunks": 0,
+        "total_chars": 0,
+        "min_chunk": None,
+        "max_chunk": None,
+        "length_histogram": [0] * len(LENGTH_BUCKETS),
+        "code_chunks": 0,
+        "doc_chunks": 0,
+        "repositories": {},
+        "file_types": {},
+        "depths": {},
+        "small_chunks": 0,
+        "small_chunk_samples": [],
+        "boilerplate_chunks": 0,
+        "boilerplate_chars": 0,
+        "files": 0,
+        "directories": {},
+        "sample_files": [],
+        "metadata_keys": [],
+    }
+
+
+def _counts(metadatas: list[dict[str, Any]], key: str) -> dict[str, int]:
+    return dict(
+        Counter(
+            str(metadata[key])
+            for metadata in metadatas
+            if metadata.get(key) is not None and metadata.get(key) != ""
+        )
+    )
+
+
+def _set_files(stats: dict[str, Any], files: set[str]) -> dict[str, Any]:
+    """Fill the file-level fields, which need the distinct paths."""
+    stats["files"] = len(files)
+    stats["directories"] = dict(Counter(_top_level(path) for path in files))
+    stats["sample_files"] = sorted(files)[:SAMPLE_SIZE]
+    return stats
+
+
+def _batch_stats(
+    texts: list[str],
+    metadatas: list[dict[str, Any]],
+    lengths: np.ndarray | None = None,
+) -> dict[str, Any]:
+    """Statistics of a batch of records, without the file-level fields."""
+    stats = _empty_stats()
+    if lengths is None:
+        lengths = np.fromiter(map(len, texts), np.int64, len(texts))
+    if len(lengths) == 0:
+        return stats
+
+    def info(i: int) -> dict[str, Any]:
+        return _chunk_info(int(lengths[i]), _file_path(metadatas[i]), texts[i])
+
+    small = np.flatnonzero(lengths < SMALL_CHUNK_CHARS)
+    buckets = np.searchsorted(LENGTH_BUCKETS, lengths, side="right") - 1
+    keys = set().union(*metadatas) - _STORAGE_KEYS
+    excluded = [boilerplate_chars(m) for m in metadatas]
+    stats.update(
+        {
+            "chunks": len(lengths),
+            "total_chars": int(lengths.sum()),
+            "min_chunk": info(int(lengths.argmin())),
+            "max_chunk": info(int(lengths.argmax())),
+            "length_histogram": np.bincount(
+                buckets, minlength=len(LENGTH_BUCKETS)
+            ).tolist(),
+            "code_chunks": sum(bool(m.get("is_code")) for m in metadatas),
+            "doc_chunks": sum(bool(m.get("is_documentation")) for m in metadatas),
+            "repositories": _counts(metadatas, "repository"),
+            "file_types": _counts(metadatas, "file_type"),
+            "depths": _counts(metadatas, "depth"),
+            "small_chunks": len(small),
+            "small_chunk_samples": [info(int(i)) for i in small[:SAMPLE_SIZE]],
+            "boilerplate_chunks": sum(chars > 0 for chars in excluded),
+            "boilerplate_chars": sum(excluded),
+            "metadata_keys": sorted(keys),
+        }
+    )
+    return stats
+
+
+def _paths(metadatas: list[dict[str, Any]]) -> set[str]:
+    return {path for path in map(_file_path, metadatas) if path}
+
+
+def collect_stats(records: Iterable[tuple[str, dict[str, Any]]]) -> dict[str, Any]:
+    """Aggregate statistics over in-memory ``(text, metadata)`` pairs."""
+    texts, metadatas = [], []
+    for text, metadata in records:
+        texts.append(text or "")
+        metadatas.append(metadata or {})
+    return _set_files(_batch_stats(texts, metadatas), _paths(metadatas))
+
+
+def scan_stats(pages: Iterable[dict[str, Any]]) -> dict[str, Any]:
+    """Aggregate statistics over pages of stored records.
+
+    ``pages`` come from :func:`~fragmenter.rag.scan.iter_collection`. Only
+    the running totals and the set of distinct file paths are kept between
+    pages.
+    """
+    stats, files = _empty_stats(), set()
+    for page in pages:
+        part = _batch_stats(page["documents"], page["metadatas"], page["lengths"])
+        stats = merge_stats([stats, part])
+        files |= _paths(page["metadatas"])
+    return _set_files(stats, files)
+
+
+def merge_stats(parts: list[dict[str, Any]]) -> dict[str, Any]:
+    """Combine the manifests of disjoint collections (e.g. shards)."""
+    merged, updated, dedup = _empty_stats(), [], []
+    for part in parts:
+        for key in ("chunks", "total_chars", "code_chunks", "doc_chunks", "files"):
+            merged[key] += part[key]
+        for key in ("small_chunks", "boilerplate_chunks", "boilerplate_chars"):
+            merged[key] += part[key]
+        for key in ("repositories", "file_types", "depths", "directories"):
+            for value, count in part[key].items():
+                merged[key][value] = merged[key].get(value, 0) + count
+        merged["length_histogram"] = [
+            a + b
+            for a, b in zip(
+                merged["length_histogram"], part["length_histogram"], strict=True
+            )
+        ]
+        if part["min_chunk"] and (
+            merged["min_chunk"] is None
+            or part["min_chunk"]["length"] < merged["min_chunk"]["length"]
+        ):
+            merged["min_chunk"] = part["min_chunk"]
+        if part["max_chunk"] and (
+            merged["max_chunk"] is None
+            or part["max_chunk"]["length"] > merged["max_chunk"]["length"]
+        ):
+            merged["max_chunk"] = part["max_chunk"]
+        merged["small_chunk_samples"] = (
+            merged["small_chunk_samples"] + part["small_chunk_samples"]
+        )[:SAMPLE_SIZE]
+        samples = sorted(merged["sample_files"] + part["sample_files"])
+        merged["sample_files"] = samples[:SAMPLE_SIZE]
+        merged["metadata_keys"] = sorted(
+            set(merged["metadata_keys"]) | set(part["metadata_keys"])
+        )
+        if part.get("updated_at"):
+            updated.append(part["updated_at"])
+        if part.get("dedup"):
+            dedup.append(part["dedup"])
+    # The oldest manifest bounds how current the merged view is
+    if updated:
+        merged["updated_at"] = min(updated)
+    if dedup:
+        merged["dedup"] = merge_reports(dedup)
+    return merged
+
+
+def save_stats(state_dir: Path, stats: dict[str, Any]) -> Path:
+    """Write the manifest of one collection to ``state_dir``."""
+    path = state_dir / STATS_FILE
+    path.parent.mkdir(parents=True, exist_ok=True)
+    stats = {**stats, "updated_at": datetime.now(UTC).isoformat(timespec="seconds")}
+    path.write_text(json.dumps(stats, indent=2), encoding="utf-8")
+    logger.debug(f"Wrote index statistics to {path}")
+    return path
+
+
+def load_stats(state_dir: Path) -> dict[str, Any] | None:
+    """Read the manifest of one collection, or None if missing or outdated."""
+    path = state_dir / STATS_FILE
+    if not path.exists():
+        return None
+    stats: dict[str, Any] = json.loads(path.read_text(encoding="utf-8"))
+    if stats.get("version") != STATS_VERSION:
+        return None
+    return stats
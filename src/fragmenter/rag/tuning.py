@@ -0,0 +1,288 @@
+"""Measure and apply Chroma HNSW settings on a real collection.
+
+A sample of the stored vectors is held out as queries; the others are
+copied into temporary in-memory collections, one per (max_neighbors,
+ef_construction) pair, so no query finds itself as its nearest neighbor.
+Each ``ef_search`` value is evaluated on the same graph.
+Recall@k is measured against exact (brute-force) search with numpy, and
+latency is measured per query so p50/p99 reflect single-request serving.
+
+Applying a setting rebuilds the collection from its stored embeddings, so
+nothing is re-embedded and node ids (and thus the docstore and pipeline
+cache) stay valid.
+"""
+
+import itertools
+import time
+import uuid
+from typing import Any
+
+import chromadb
+import numpy as np
+from loguru import logger
+
+from fragmenter.rag.scan import iter_collection
+
+# Records copied per request when reading or writing whole collections
+COPY_BATCH_SIZE = 5000
+
+DEFAULT_M_GRID = [16, 32]
+DEFAULT_CONSTRUCTION_EF_GRID = [100, 200]
+DEFAULT_SEARCH_EF_GRID = [10, 25, 50, 100, 200]
+
+
+def fetch_collection(collection: Any, include_payload: bool = False) -> dict[str, Any]:
+    """Read all ids and embeddings (and optionally documents/metadata).
+
+    Args:
+        collection: Chroma collection
+        include_payload: Also fetch documents and metadatas
+
+    Returns:
+        Dict with ``ids``, ``embeddings`` (float32 array) and, if requested,
+        ``documents`` and ``metadatas``
+    """
+    pages = list(
+        iter_collection(
+            collection,
+            documents=include_payload,
+            metadatas=include_payload,
+            embeddings=True,
+            page_size=COPY_BATCH_SIZE,
+        )
+    )
+    result: dict[str, Any] = {
+        "ids": [i for page in pages for i in page["ids"]],
+        "embeddings": (
+            np.concatenate([page["embeddings"] for page in pages])
+            if pages
+            else np.zeros((0, 0), dtype=np.float32)
+        ),
+    }
+    if include_payload:
+        for key in ("documents", "metadatas"):
+            result[key] = [value for page in pages for value in page[key]]
+    return result
+
+
+def exact_top_k(
+    embeddings: np.ndarray, queries: np.ndarray, k: int, space: str = "l2"
+) -> np.ndarray:
+    """Return the indices of the exact top-k neighbors for each query.
+
+    Uses the same distance definitions as Chroma (squared L2, cosine
+    distance, inner product distance ``1 - dot``).
+    """
+    if space == "cosine":
+        embeddings = embeddings / np.maximum(
+            np.linalg.norm(embeddings, axis=1, keepdims=True), 1e-12
+        )
+        queries = queries / np.maximum(
+            np.linalg.norm(queries, axis=1, keepdims=True), 1e-12
+        )
+    scores = queries @ embeddings.T
+    if space == "l2":
+        # ||e||^2 - 2 q.e ranks identically to the squared distance
+        scores = 2 * scores - np.sum(embeddings**2, axis=1)[None, :]
+
+    k = min(k, embeddings.shape[0])
+    top = np.argpartition(-scores, k - 1, axis=1)[:, :k]
+    order = np.argsort(-np.take_along_axis(scores, top, axis=1), axis=1)
+    return np.take_along_axis(top, order, axis=1)
+
+
+def _percentile_ms(latencies: list[float], q: float) -> float:
+    return round(float(np.percentile(latencies, q)) * 1000, 3)
+
+
+def tune_collection(
+    collection: Any,
+    m_grid: list[int] | None = None,
+    construction_ef_grid: list[int] | None = None,
+    search_ef_grid: list[int] | None = None,
+    top_k: int = 10,
+    num_queries: int = 200,
+    seed: int = 0,
+) -> list[dict[str, Any]]:
+    """Evaluate a grid of HNSW settings on a copy of a collection.
+
+    Args:
+        collection: Chroma collection to tune (left unchanged)
+        m_grid: ``max_neighbors`` values to try
+        construction_ef_grid: ``ef_construction`` values to try
+        search_ef_grid: ``ef_search`` values to try
+        top_k: Number of neighbors used for recall@k
+        num_queries: Number of stored vectors held out as queries (at most
+            half of the collection)
+        seed: Seed for query sampling
+
+    Returns:
+        One result per setting with ``space``, ``max_neighbors``,
+        ``ef_construction``, ``ef_search``, ``recall``, ``p50_ms``,
+        ``p99_ms`` and ``build_s``
+    """
+    m_grid = m_grid or DEFAULT_M_GRID
+    construction_ef_grid = construction_ef_grid or DEFAULT_CONSTRUCTION_EF_GRID
+    search_ef_grid = search_ef_grid or DEFAULT_SEARCH_EF_GRID
+
+    space = ((collection.configuration or {}).get("hnsw") or {}).get("space", "l2")
+    data = fetch_collection(collection)
+    embeddings = data["embeddings"]
+    if len(embeddings) == 0:
+        raise ValueError(f"Collection '{collection.name}' is empty")
+
+    if len(embeddings) < 2:
+        raise ValueError(f"Collection '{collection.name}' is too small to tune")
+
+    # Queries are held out of the searched vectors, or each would find itself
+    rng = np.random.default_rng(seed)
+    is_query = np.zeros(len(embeddings), dtype=bool)
+    is_query[
+        rng.choice(
+            len(embeddings),
+            size=min(num_queries, len(embeddings) // 2),
+            replace=False,
+        )
+    ] = True
+    queries = embeddings[is_query]
+    ids = [i for i, held_out in zip(data["ids"], is_query, strict=True) if not held_out]
+    embeddings = embeddings[~is_query]
+    k = min(top_k, len(embeddings))
+    truth = exact_top_k(embeddings, queries, k, space=space)
+    truth_ids = [{ids[i] for i in row} for row in truth]
+    logger.info(
+        f"Tuning '{collection.name}': {len(embeddings)} vectors, "
+        f"{len(queries)} held-out queries, space={space}, k={k}"
+    )
+
+    client = chromadb.EphemeralClient()
+    results = []
+    for m, ef_construction in itertools.product(m_grid, construction_ef_grid):
+        name = f"tune-{uuid.uuid4().hex[:12]}"
+        start = time.perf_counter()
+        candidate = client.create_collection(
+            name,
+            configuration={
+                "hnsw": {
+                    "space": space,
+                    "max_neighbors": m,
+                    "ef_construction": ef_construction,
+                }
+            },
+        )
+        for i in range(0, len(embeddings), COPY_BATCH_SIZE):
+            candidate.add(
+                ids=ids[i : i + COPY_BATCH_SIZE],
+                embeddings=embeddings[i : i + COPY_BATCH_SIZE],
+            )
+        build_s = time.perf_counter() - start
+
+        try:
+            for ef_search in search_ef_grid:
+                candidate.modify(configuration={"hnsw": {"ef_search": ef_search}})
+                latencies, recalls = [], []
+                for query, expected in zip(queries, truth_ids, strict=True):
+                    start = time.perf_counter()
+                    found = candidate.query(
+                        query_embeddings=[query], n_results=k, include=[]
+                    )
+                    latencies.append(time.perf_counter() - start)
+                    recalls.append(len(expected.intersection(found["ids"][0])) / k)
+
+                result = {
+                    "space": space,
+                    "max_neighbors": m,
+                    "ef_construction": ef_construction,
+                    "ef_search": ef_search,
+                    "recall": round(float(np.mean(recalls)), 4),
+                    "p50_ms": _percentile_ms(latencies, 50),
+                    "p99_ms": _percentile_ms(latencies, 99),
+                    "build_s": round(build_s, 3),
+                }
+                logger.debug(f"HNSW result: {result}")
+                results.append(result)
+        finally:
+            client.delete_collection(name)
+
+    return results
+
+
+def choose_setting(
+    results: list[dict[str, Any]], target_recall: float = 0.95
+) -> dict[str, Any]:
+    """Pick the fastest setting reaching the target recall.
+
+    Falls back to the setting with the highest recall if none reaches it.
+    """
+    if not results:
+        raise ValueError("No tuning results to choose from")
+    eligible = [r for r in results if r["recall"] >= target_recall]
+    if eligible:
+        return min(eligible, key=lambda r: (r["p50_ms"], r["p99_ms"]))
+    logger.warning(f"No setting reached recall {target_recall}; using best recall")
+    return max(results, key=lambda r: (r["recall"], -r["p50_ms"]))
+
+
+def rebuild_collection(client: Any, name: str, hnsw: dict[str, Any]) -> Any:
+    """Rebuild a collection with new HNSW settings from its stored embeddings.
+
+    The vectors, documents and metadata are copied into a new collection,
+    which replaces the original only after all records were copied: the
+    original is renamed aside, the copy takes its name, and only then is the
+    original deleted. If the swap fails, the original gets its name back.
+
+    Args:
+        client: Chroma client owning the collection
+        name: Name of the collection to rebuild
+        hnsw: HNSW configuration; the current space is kept unless given
+
+    Returns:
+        The rebuilt collection (under the original name)
+    """
+    source = client.get_collection(name)
+    current = (source.configuration or {}).get("hnsw") or {}
+    config = {"space": current.get("space", "l2"), **hnsw}
+    # Legacy hnsw:* metadata would conflict with the new configuration
+    metadata = {
+        key: value
+        for key, value in (source.metadata or {}).items()
+        if not key.startswith("hnsw:")
+    }
+
+    tmp_name = f"{name}-rebuild"
+    old_name = f"{name}-previous"
+    for stale in (tmp_name, old_name):
+        try:
+            client.delete_collection(stale)
+        except Exception:
+            pass
+    target = client.create_collection(
+        tmp_name, configuration={"hnsw": config}, metadata=metadata or None
+    )
+
+    data = fetch_collection(source, include_payload=True)
+    for i in range(0, len(data["ids"]), COPY_BATCH_SIZE):
+        batch = slice(i, i + COPY_BATCH_SIZE)
+        target.add(
+            ids=data["ids"][batch],
+            embeddings=data["embeddings"][batch],
+            documents=data["documents"][batch],
+            metadatas=data["metadatas"][batch],
+        )
+
+    if target.count() != source.count():
+        client.delete_collection(tmp_name)
+        raise RuntimeError(
+            f"Copied {target.count()} of {source.count()} records; "
+            f"collection '{name}' left unchanged"
+        )
+
+    source.modify(name=old_name)
+    try:
+        target.modify(name=name)
+    except Exception:
+        source.modify(name=name)
+        raise
+    client.delete_collection(old_name)
+    logger.success(f"Rebuilt collection '{name}' with {config}")
+    return client.get_collection(name)
@@ -1,4 +1,18 @@
+import hashlib
+import re
+from functools import lru_cache
+from pathlib import Path
+
+import numpy as np
 from llama_index.core.embeddings import BaseEmbedding
+from pydantic import Field
+
+_TOKEN = re.compile(r"[a-z0-9]+")
+# Words too common to tell texts apart; left out of hashing embeddings
+_STOPWORDS = frozenset(
+    "a an and are as at be by for from how in is it of on or the to what when "
+    "where which with".split()
+)
 
 
 class MockEmbedding(BaseEmbedding):
@@ -15,3 +29,67 @@ class MockEmbedding(BaseEmbedding):
 
     async def _aget_text_embedding(self, text: str) -> list[float]:
         return []
+
+
+@lru_cache(maxsize=1 << 16)
+def _bucket(token: str, dim: int) -> tuple[int, float]:
+    """Stable (index, sign) of a token; Python's hash() is salted per process."""
+    value = int.from_bytes(hashlib.blake2b(token.encode(), digest_size=8).digest())
+    return value % dim, 1.0 if value >> 63 else -1.0
+
+
+class HashingEmbedding(BaseEmbedding):  # type: ignore[misc, unused-ignore]
+    """Deterministic offline embedding: feature-hashed bag of words.
+
+    Lowercased alphanumeric tokens (``snake_case`` splits into words),
+    except a few stopwords, are hashed into ``embed_dim`` signed buckets
+    and the counts L2-normalized, so texts sharing words get a high cosine
+    similarity. Needs no network or model download, which makes it suitable
+    for benchmarks and tests that need meaningful retrieval.
+    """
+
+    model_name: str = "hashing"
+    embed_dim: int = Field(default=384, gt=0)
+
+    def _embed(self, text: str) -> list[float]:
+        vector = np.zeros(self.embed_dim, dtype=np.float32)
+        for token in _TOKEN.findall(text.lower()):
+            if token in _STOPWORDS:
+                continue
+            index, sign = _bucket(token, self.embed_dim)
+            vector[index] += sign
+        norm = np.linalg.norm(vector)
+        if norm > 0:
+            vector /= norm
+        embedding: list[float] = vector.tolist()
+        return embedding
+
+    def _get_query_embedding(self, query: str) -> list[float]:
+        return self._embed(query)
+
+    def _get_text_embedding(self, text: str) -> list[float]:
+        return self._embed(text)
+
+    async def _aget_query_embedding(self, query: str) -> list[float]:
+        return self._embed(query)
+
+    async def _aget_text_embedding(self, text: str) -> list[float]:
+        return self._embed(text)
+
+
+def index_version(storage_dir: str | Path) -> str:
+    """Fingerprint of the stored files; changes whenever the index is written.
+
+    Works on storage directories and single-file snapshots.
+    """
+    storage_dir = Path(storage_dir)
+    paths = [storage_dir] if storage_dir.is_file() else sorted(storage_dir.rglob("*"))
+    digest = hashlib.sha1()
+    for path in paths:
+        if path.is_file():
+            stat = path.stat()
+            relative = (
+                path.relative_to(storage_dir) if path != storage_dir else path.name
+            )
+            digest.update(f"{relative}:{stat.st_size}:{stat.st_mtime_ns}\n".encode())
+    return digest.hexdigest()
@@ -1,10 +1,16 @@
 """Vector store initialization and configuration.
 
 This module provides utilities for creating and configuring vector stores
-for the RAG ingestion pipeline. Currently supports ChromaDB for persistent storage.
+for the RAG ingestion pipeline. Two backends are supported:
+
+- ``chroma``: ChromaDB with an HNSW index (``<persist_dir>/chroma_db``)
+- ``flat``: exact search over a memory-mapped NumPy matrix
+  (``<persist_dir>/flat_store``, see :mod:`fragmenter.rag.flat_store`),
+  which starts faster and is exact for small and medium indexes
 """
 
 from pathlib import Path
+from typing import Any
 
 import chromadb
 from llama_index.core import StorageContext
@@ -12,16 +18,79 @@ from llama_index.core.storage.docstore import SimpleDocumentStore
 from llama_index.vector_stores.chroma import ChromaVectorStore
 from loguru import logger
 
+from fragmenter.rag.flat_store import FLAT_STORE_DIR, FlatVectorStore, is_flat_store
+
+VECTOR_STORES = ("chroma", "flat")
+
+# HNSW parameters that are fixed once the graph is built
+HNSW_BUILD_PARAMS = ("space", "max_neighbors", "ef_construction")
+HNSW_SPACES = ("l2", "cosine", "ip")
+
+
+def get_or_create_collection(
+    client: Any, name: str, hnsw: dict[str, Any] | None = None
+) -> Any:
+    """Open a Chroma collection, creating it with the given HNSW settings.
+
+    For an existing collection only ``ef_search`` can be changed in place;
+    differing build parameters are reported, since applying them requires
+    rebuilding the graph (see ``fragmenter tune-index --apply``).
+
+    Args:
+        client: Chroma client
+        name: Collection name
+        hnsw: Chroma HNSW configuration (space, max_neighbors,
+            ef_construction, ef_search); missing keys use Chroma's defaults
+
+    Returns:
+        The Chroma collection
+    """
+    if not hnsw:
+        return client.get_or_create_collection(name=name)
+
+    if hnsw.get("space", "l2") not in HNSW_SPACES:
+        raise ValueError(
+            f"Unknown HNSW space '{hnsw['space']}', expected one of: "
+            f"{', '.join(HNSW_SPACES)}"
+        )
+
+    collection = client.get_or_create_collection(
+        name=name, configuration={"hnsw": hnsw}
+    )
+    current = (collection.configuration or {}).get("hnsw") or {}
+
+    ef_search = hnsw.get("ef_search")
+    if ef_search is not None and current.get("ef_search") != ef_search:
+        logger.info(f"Setting ef_search={ef_search} on collection '{name}'")
+        collection.modify(configuration={"hnsw": {"ef_search": ef_search}})
+
+    mismatched = [
+        f"{key}={current.get(key)} (requested {hnsw[key]})"
+        for key in HNSW_BUILD_PARAMS
+        if key in hnsw and current.get(key) != hnsw[key]
+    ]
+    if mismatched:
+        logger.warning(
+            f"Collection '{name}' was built with {', '.join(mismatched)}. "
+            "Rebuild it with `fragmenter tune-index --apply` to change these."
+        )
+    return collection
+
 
 def create_chroma_vector_store(
     persist_path: Path,
     collection_name: str = "documents",
+    docstore_path: Path | None = None,
+    hnsw: dict[str, Any] | None = None,
 ) -> tuple[ChromaVectorStore, StorageContext]:
     """Create a Chroma vector store with persistent storage.
 
     Args:
         persist_path: Directory to persist the Chroma database
         collection_name: Name of the Chroma collection (default: "documents")
+        docstore_path: Docstore file for change detection
+            (default: ``persist_path / "docstore.json"``)
+        hnsw: Optional HNSW configuration (see :func:`get_or_create_collection`)
 
     Returns:
         Tuple of (ChromaVectorStore, StorageContext)
@@ -35,14 +104,14 @@ def create_chroma_vector_store(
     chroma_client = chromadb.PersistentClient(path=str(chroma_db_path))
 
     # Get or create collection
-    chroma_collection = chroma_client.get_or_create_collection(name=collection_name)
+    chroma_collection = get_or_create_collection(chroma_client, collection_name, hnsw)
 
     # Create vector store
     vector_store = ChromaVectorStore(chroma_collection=chroma_collection)
 
     # Create storage context
     # Load existing docstore if available for hash-based change detection
-    docstore_path = persist_path / "docstore.json"
+    docstore_path = docstore_path or persist_path / "docstore.json"
     if docstore_path.exists():
         logger.info(f"Loading existing docstore from: {docstore_path}")
         docstore = SimpleDocumentStore.from_persist_path(str(docstore_path))
@@ -59,3 +128,96 @@ def create_chroma_vector_store(
     )
 
     return vector_store, storage_context
+
+
+def detect_vector_store(persist_path: str | Path) -> str | None:
+    """Return the backend of an existing storage directory, or None if new."""
+    persist_path = Path(persist_path)
+    if is_flat_store(persist_path):
+        return "flat"
+    if (persist_path / "chroma_db").exists():
+        return "chroma"
+    return None
+
+
+def create_flat_vector_store(
+    persist_path: Path,
+    docstore_path: Path | None = None,
+    flat: dict[str, Any] | None = None,
+) -> tuple[FlatVectorStore, StorageContext]:
+    """Create a flat (exact, memory-mapped) vector store.
+
+    Args:
+        persist_path: Storage directory; vectors go to ``flat_store/``
+        docstore_path: Docstore file for change detection
+            (default: ``persist_path / "docstore.json"``)
+        flat: Compression for a new store (``dtype``, ``dimensions``,
+            ``binary``; see :class:`~fragmenter.rag.flat_store.FlatVectorStore`)
+
+    Returns:
+        Tuple of (FlatVectorStore, StorageContext)
+    """
+    persist_path.mkdir(parents=True, exist_ok=True)
+    vector_store = FlatVectorStore(
+        persist_dir=persist_path / FLAT_STORE_DIR, **(flat or {})
+    )
+
+    docstore_path = docstore_path or persist_path / "docstore.json"
+    if docstore_path.exists():
+        logger.info(f"Loading existing docstore from: {docstore_path}")
+        docstore = SimpleDocumentStore.from_persist_path(str(docstore_path))
+    else:
+        docstore = SimpleDocumentStore()
+
+    storage_context = StorageContext.from_defaults(
+        vector_store=vector_store,
+        docstore=docstore,
+    )
+
+    logger.success(
+        f"Flat vector store loaded with {vector_store.count()} vectors "
+        f"({vector_store.dtype}, dimensions={vector_store.dimensions or 'all'}, "
+        f"binary={vector_store.binary})"
+    )
+    return vector_store, storage_context
+
+
+def create_vector_store(
+    persist_path: Path,
+    backend: str | None = None,
+    hnsw: dict[str, Any] | None = None,
+    flat: dict[str, Any] | None = None,
+) -> tuple[ChromaVectorStore | FlatVectorStore, StorageContext]:
+    """Create the vector store for a storage directory.
+
+    Args:
+        persist_path: Storage directory
+        backend: ``chroma`` or ``flat``; defaults to the backend already in
+            ``persist_path``, or ``chroma`` for a new directory
+        hnsw: HNSW configuration (Chroma only)
+        flat: Compression for a new flat store (see
+            :func:`create_flat_vector_store`)
+
+    Returns:
+        Tuple of (vector store, StorageContext)
+
+    Raises:
+        ValueError: If the backend is unknown or differs from the one the
+            directory was built with
+    """
+    existing = detect_vector_store(persist_path)
+    backend = backend or existing or "chroma"
+    if backend not in VECTOR_STORES:
+        raise ValueError(
+            f"Unknown vector store '{backend}', expected one of: "
+            f"{', '.join(VECTOR_STORES)}"
+        )
+    if existing and existing != backend:
+        raise ValueError(
+            f"{persist_path} holds a {existing} index; rebuild into an empty "
+            f"storage directory to switch to {backend}"
+        )
+
+    if backend == "flat":
+        return create_flat_vector_store(persist_path, flat=flat)
+    return create_chroma_vector_store(persist_path, hnsw=hnsw)
@@ -0,0 +1,466 @@
+"""Concurrent crawler behind ``fragmenter scrape``.
+
+Pages are fetched by one pooled ``httpx.AsyncClient`` (keep-alive
+connections, one User-Agent per crawl). Politeness is enforced per host
+instead of by a fixed sleep before every request: :class:`HostLimiter`
+caps the requests in flight to a host and spaces their starts by
+``1 / rate`` seconds (or the robots.txt ``Crawl-delay``), while
+``concurrency`` bounds the crawl as a whole.
+
+The crawl starts at the base URL and the pages listed in the site's
+sitemaps, then follows links breadth-first through a
+:class:`~fragmenter.scraping.frontier.Frontier`. Content and link
+extraction run in a process pool, so parsing one page does not hold up the
+downloads of the others.
+
+Re-scrapes of an output directory use its
+:class:`~fragmenter.scraping.state.CrawlState`: pages are requested
+conditionally and files are only rewritten when their content changed.
+"""
+
+import asyncio
+import os
+import time
+from collections.abc import AsyncIterator
+from concurrent.futures import BrokenExecutor, Executor, ProcessPoolExecutor
+from contextlib import asynccontextmanager
+from multiprocessing import get_context
+from pathlib import Path
+from typing import Any
+from urllib.parse import urljoin, urlparse
+from urllib.robotparser import RobotFileParser
+
+import httpx
+from fake_useragent import UserAgent
+from loguru import logger
+
+from fragmenter.scraping.frontier import (
+    DEFAULT_MAX_DEPTH,
+    Frontier,
+    normalize_url,
+    parse_sitemap,
+)
+from fragmenter.scraping.scraper import (
+    create_output_directory,
+    get_filepath,
+    parse_page,
+    render_content,
+)
+from fragmenter.scraping.state import STATE_FILE, CrawlState, content_hash
+
+DEFAULT_CONCURRENCY = 16
+DEFAULT_PER_HOST = 4
+DEFAULT_RATE = 2.0
+DEFAULT_TIMEOUT = 30.0
+# Sitemap files fetched at most, including those listed in sitemap indexes
+MAX_SITEMAPS = 50
+
+
+class HostLimiter:
+    """Per-host cap on concurrent requests and on the request rate.
+
+    Args:
+        concurrency: Requests in flight per host
+        rate: Request starts per second per host (0 for no limit)
+    """
+
+    def __init__(
+        self, concurrency: int = DEFAULT_PER_HOST, rate: float = DEFAULT_RATE
+    ) -> None:
+        self.concurrency = max(1, concurrency)
+        self.rate = rate
+        self._semaphores: dict[str, asyncio.Semaphore] = {}
+        self._rates: dict[str, float] = {}
+        self._next_start: dict[str, float] = {}
+
+    def set_rate(self, host: str, rate: float) -> None:
+        """Use another request rate for one host."""
+        self._rates[host] = rate
+
+    @asynccontextmanager
+    async def slot(self, host: str) -> AsyncIterator[None]:
+        """Wait for a free slot and the host's next start time."""
+        semaphore = self._semaphores.get(host)
+        if semaphore is None:
+            semaphore = self._semaphores[host] = asyncio.Semaphore(self.concurrency)
+        rate = self._rates.get(host, self.rate)
+        async with semaphore:
+            if rate > 0:
+                # Reserve the next start time before waiting, so waiters queue up
+                now = time.monotonic()
+                start = max(now, self._next_start.get(host, now))
+                self._next_start[host] = start + 1 / rate
+                if start > now:
+                    await asyncio.sleep(start - now)
+            yield
+
+
+class Crawler:
+    """Crawls a site under a base URL and saves the content of its pages.
+
+    Args:
+        output_dir: Directory for the saved pages
+        format: ``markdown`` (extracted with trafilatura) or ``html``
+        concurrency: Requests in flight over all hosts
+        per_host: Requests in flight per host
+        rate: Requests per second per host (0 for no limit)
+        workers: Processes for page parsing (default: CPU count, max 8;
+            0 parses in the event loop)
+        timeout: Request timeout in seconds
+        user_agent: User-Agent header (default: one random browser UA)
+        max_depth: Links followed from the base page and sitemap pages
+        max_pages: Pages fetched at most (None: no limit)
+        sitemaps: Seed the crawl with the site's sitemaps
+        robots: Obey robots.txt (``Disallow`` and ``Crawl-delay``)
+        state_file: Crawl state of earlier runs, updated by this one
+            (default: ``.crawl-state`` in ``output_dir``)
+        transport: Optional httpx transport, e.g. for tests
+    """
+
+    def __init__(
+        self,
+        output_dir: str | Path,
+        format: str = "markdown",
+        concurrency: int = DEFAULT_CONCURRENCY,
+        per_host: int = DEFAULT_PER_HOST,
+        rate: float = DEFAULT_RATE,
+        workers: int | None = None,
+        timeout: float = DEFAULT_TIMEOUT,
+        user_agent: str | None = None,
+        max_depth: int = DEFAULT_MAX_DEPTH,
+        max_pages: int | None = None,
+        sitemaps: bool = True,
+        robots: bool = True,
+        state_file: str | Path | None = None,
+        transport: httpx.AsyncBaseTransport | None = None,
+    ) -> None:
+        self.output_dir = Path(output_dir)
+        self.format = format
+        self.concurrency = max(1, concurrency)
+        self.limiter = HostLimiter(per_host, rate)
+        self.workers = min(8, os.cpu_count() or 1) if workers is None else workers
+        self.timeout = timeout
+        self.user_agent = user_agent or UserAgent().random
+        self.max_depth = max_depth
+        self.max_pages = max_pages
+        self.sitemaps = sitemaps
+        self.robots = robots
+        self.transport = transport
+        self.state = CrawlState.load(
+            state_file if state_file is not None else self.output_dir / STATE_FILE
+        )
+        self.stats = {
+            "fetched": 0,
+            "not_modified": 0,
+            "saved": 0,
+            "unchanged": 0,
+            "failed": 0,
+        }
+        self._client: httpx.AsyncClient | None = None
+        self._executor: Executor | None = None
+        self._slots: asyncio.Semaphore | None = None
+
+    def _create_client(self) -> httpx.AsyncClient:
+        return httpx.AsyncClient(
+            headers={"User-Agent": self.user_agent},
+            timeout=self.timeout,
+            follow_redirects=True,
+            limits=httpx.Limits(
+                max_connections=self.concurrency,
+                max_keepalive_connections=self.concurrency,
+            ),
+            transport=self.transport or httpx.AsyncHTTPTransport(retries=2),
+        )
+
+    async def _get(
+        self, url: str, headers: dict[str, str] | None = None
+    ) -> httpx.Response:
+        assert self._client is not None and self._slots is not None
+        # Take the host's slot first: waiting on a busy host holds no global slot
+        async with self.limiter.slot(urlparse(url).netloc), self._slots:
+            return await self._client.get(url, headers=headers)
+
+    async def fetch(
+        self, url: str, headers: dict[str, str] | None = None
+    ) -> httpx.Response | None:
+        """Download a page, or None (logged) if the request fails.
+
+        A conditional request (``headers``) may return ``304 Not Modified``.
+        """
+        try:
+            response = await self._get(url, headers)
+            if response.status_code == 304:
+                self.stats["not_modified"] += 1
+                return response
+            response.raise_for_status()
+        except httpx.HTTPError as e:
+            logger.warning(f"Failed to download {url}: {e}")
+            self.stats["failed"] += 1
+            return None
+        self.stats["fetched"] += 1
+        return response
+
+    async def _parse(
+        self, html: str, url: str, base_url: str
+    ) -> tuple[str | None, set[str]]:
+        if not self.workers:
+            return parse_page(html, url, base_url, self.format)
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(
+            self._executor, parse_page, html, url, base_url, self.format
+        )
+
+    async def load_robots(self, base_url: str) -> RobotFileParser | None:
+        """The host's robots.txt, or None if it has none."""
+        robots_url = urljoin(base_url, "/robots.txt")
+        try:
+            response = await self._get(robots_url)
+        except httpx.HTTPError as e:
+            logger.debug(f"No robots.txt ({e})")
+            return None
+        if response.status_code != 200:
+            return None
+        parser = RobotFileParser(robots_url)
+        parser.parse(response.text.splitlines())
+        delay = float(parser.crawl_delay(self.user_agent) or 0)
+        if delay:
+            host = urlparse(base_url).netloc
+            logger.info(f"robots.txt asks for {delay:g}s between requests to {host}")
+            rate = self.limiter.rate
+            self.limiter.set_rate(host, min(rate, 1 / delay) if rate else 1 / delay)
+        return parser
+
+    async def seed_from_sitemaps(
+        self, frontier: Frontier, base_url: str, robots: RobotFileParser | None
+    ) -> int:
+        """Queue the pages of the site's sitemaps; returns how many were new.
+
+        Sitemaps are taken from robots.txt, else ``sitemap.xml`` under the
+        base URL and at the host root. Sitemap indexes are followed.
+        """
+        listed = (robots.site_maps() if robots is not None else None) or [
+            urljoin(base_url, "sitemap.xml"),
+            urljoin(base_url, "/sitemap.xml"),
+        ]
+        queue = list(dict.fromkeys(listed))
+        seen = set(queue)
+        added = fetched = 0
+        while queue:
+            # Each round fetches the sitemaps listed by the previous one
+            queue = queue[: MAX_SITEMAPS - fetched]
+            fetched += len(queue)
+            responses = await asyncio.gather(
+                *(self._get(url) for url in queue), return_exceptions=True
+            )
+            nested = []
+            for sitemap_url, response in zip(queue, responses, strict=True):
+                if isinstance(response, httpx.HTTPError):
+                    logger.debug(
+                        f"Failed to download sitemap {sitemap_url}: {response}"
+                    )
+                    continue
+                if isinstance(response, BaseException):
+                    raise response
+                if response.status_code != 200:
+                    continue
+                pages, sitemaps = parse_sitemap(response.content)
+                # Listed pages are seeds, like the base page
+                added += sum(frontier.add(url, 0, priority) for url, priority in pages)
+                for url in sitemaps:
+                    if url not in seen:
+                        seen.add(url)
+                        nested.append(url)
+                logger.info(f"Sitemap {sitemap_url}: {len(pages)} pages")
+            queue = nested
+        return added
+
+    async def process(
+        self, url: str, depth: int, base_url: str, frontier: Frontier
+    ) -> None:
+        """Fetch, extract and save one page, and queue the pages it links to.
+
+        A page saved by an earlier run is re-requested conditionally. If the
+        server answers ``304 Not Modified``, its links come from the crawl
+        state. Otherwise the file is rewritten only if its content changed.
+
+        A page that cannot be processed (an invalid URL, a parser error, a
+        failed write) is logged and counted as failed without stopping the
+        crawl. Only a broken worker pool is raised.
+        """
+        try:
+            await self._process(url, depth, base_url, frontier)
+        except BrokenExecutor:
+            raise
+        except Exception as e:
+            logger.opt(exception=e).warning(f"Failed to process {url}: {e}")
+            self.stats["failed"] += 1
+
+    async def _process(
+        self, url: str, depth: int, base_url: str, frontier: Frontier
+    ) -> None:
+        filepath = get_filepath(url, self.output_dir, self.format)
+        entry = self.state.get(url)
+        headers = self.state.conditional_headers(url) if filepath.exists() else {}
+        response = await self.fetch(url, headers)
+        if response is None:
+            return
+        # Links are relative to where redirects ended, which must stay in scope
+        page_url = str(response.url)
+        if not normalize_url(page_url).startswith(frontier.prefix):
+            logger.info(f"Skipping {url}: redirected out of scope to {page_url}")
+            return
+
+        if response.status_code == 304:
+            logger.debug(f"Not modified: {url}")
+            self.stats["unchanged"] += 1
+            self.state.update(url)
+            links = entry.get("links", [])
+        else:
+            text, links = await self._parse(response.text, page_url, base_url)
+            digest = None
+            if text:
+                content = render_content(url, text, self.format)
+                digest = content_hash(content)
+                # Files from runs before the state existed are compared as is
+                previous = entry.get("content_hash")
+                if previous is None and filepath.exists():
+                    previous = content_hash(filepath.read_text(encoding="utf-8"))
+                if digest == previous and filepath.exists():
+                    self.stats["unchanged"] += 1
+                else:
+                    filepath.write_text(content, encoding="utf-8")
+                    self.stats["saved"] += 1
+                    logger.debug(f"Saved {url}")
+            self.state.update(
+                url,
+                etag=response.headers.get("ETag"),
+                last_modified=response.headers.get("Last-Modified"),
+                content_hash=digest,
+                links=sorted(links),
+            )
+        for link in links:
+            frontier.add(link, depth + 1)
+
+    async def crawl(self, base_url: str) -> dict[str, Any]:
+        """Crawl the pages under ``base_url``, closest to it first.
+
+        Returns:
+            Page counts: ``fetched`` (downloaded), ``not_modified`` (304
+            answers), ``saved`` (files written), ``unchanged`` (files
+            kept), ``failed`` and ``queued`` (pages left when ``max_pages``
+            was reached); and ``seconds``
+        """
+        create_output_directory(self.output_dir)
+        start = time.perf_counter()
+        self._slots = asyncio.Semaphore(self.concurrency)
+        # Spawned, not forked: the parent may already run threads
+        executor = (
+            ProcessPoolExecutor(self.workers, mp_context=get_context("spawn"))
+            if self.workers
+            else None
+        )
+        try:
+            async with self._create_client() as client:
+                self._client, self._executor = client, executor
+                robots = await self.load_robots(base_url) if self.robots else None
+                frontier = Frontier(
+                    base_url,
+                    max_depth=self.max_depth,
+                    max_pages=self.max_pages,
+                    allowed=(
+                        (lambda url: robots.can_fetch(self.user_agent, url))
+                        if robots is not None
+                        else None
+                    ),
+                )
+                if not frontier.add(base_url, 0, priority=1.0):
+                    logger.error(f"Base URL disallowed by robots.txt: {base_url}")
+                    return self._finish(start, frontier)
+                if self.sitemaps:
+                    added = await self.seed_from_sitemaps(frontier, base_url, robots)
+                    logger.info(f"Seeded {added} pages from sitemaps")
+
+                # Keep up to `concurrency` pages in progress, taking the
+                # frontier's best URL whenever one finishes
+                pending: set[asyncio.Task[None]] = set()
+                try:
+                    while True:
+                        while len(pending) < self.concurrency and (
+                            item := frontier.pop()
+                        ):
+                            url, depth = item
+                            pending.add(
+                                asyncio.create_task(
+                                    self.process(url, depth, base_url, frontier)
+                                )
+                            )
+                        if not pending:
+                            break
+                        done, pending = await asyncio.wait(
+                            pending, return_when=asyncio.FIRST_COMPLETED
+                        )
+                        for task in done:
+                            task.result()
+                finally:
+                    # Do not leave pages in progress behind a fatal error
+                    for task in pending:
+                        task.cancel()
+                    await asyncio.gather(*pending, return_exceptions=True)
+        finally:
+            self._client = self._executor = None
+            if executor is not None:
+                executor.shutdown(cancel_futures=True)
+            self.state.save()
+        return self._finish(start, frontier)
+
+    def _finish(self, start: float, frontier: Frontier) -> dict[str, Any]:
+        seconds = time.perf_counter() - start
+        logger.info(
+            f"Crawl done in {seconds:.1f}s: {self.stats['fetched']} fetched "
+            f"({self.stats['fetched'] / seconds if seconds else 0:.1f}/s), "
+            f"{self.stats['not_modified']} not modified, "
+            f"{self.stats['saved']} saved, {self.stats['unchanged']} unchanged, "
+            f"{self.stats['failed']} failed"
+        )
+        if len(frontier):
+            logger.warning(
+                f"Stopped at max_pages with {len(frontier)} pages still queued"
+            )
+        return {**self.stats, "queued": len(frontier), "seconds": round(seconds, 3)}
+
+
+def scrape_site(
+    base_url: str,
+    output_dir: str | Path,
+    format: str = "markdown",
+    concurrency: int = DEFAULT_CONCURRENCY,
+    per_host: int = DEFAULT_PER_HOST,
+    rate: float = DEFAULT_RATE,
+    workers: int | None = None,
+    max_depth: int = DEFAULT_MAX_DEPTH,
+    max_pages: int | None = None,
+    sitemaps: bool = True,
+    robots: bool = True,
+    state_file: str | Path | None = None,
+) -> dict[str, Any]:
+    """Crawl the pages under ``base_url`` into ``output_dir``.
+
+    See :class:`Crawler` for the arguments.
+
+    Returns:
+        The crawl's page counts and duration
+    """
+    crawler = Crawler(
+        output_dir,
+        format=format,
+        concurrency=concurrency,
+        per_host=per_host,
+        rate=rate,
+        workers=workers,
+        max_depth=max_depth,
+        max_pages=max_pages,
+        sitemaps=sitemaps,
+        robots=robots,
+        state_file=state_file,
+    )
+    return asyncio.run(crawler.crawl(base_url))
@@ -0,0 +1,139 @@
+"""Crawl frontier: which URLs to fetch next, and which never to fetch.
+
+:class:`Frontier` keeps the URLs waiting to be fetched in a priority queue
+ordered by link depth (pages close to the base URL first), then by sitemap
+``<priority>``, then by discovery order. URLs are normalized before the
+duplicate check, so ``/a#top`` and ``/a`` are fetched once. URLs outside
+the base-URL prefix, deeper than ``max_depth`` or disallowed by robots.txt
+are dropped, and no more than ``max_pages`` URLs are handed out.
+
+Sitemaps (``parse_sitemap``) seed the frontier with pages that would
+otherwise take many fetches to discover by following links.
+"""
+
+import gzip
+import heapq
+import itertools
+import xml.etree.ElementTree as ET
+from collections.abc import Callable
+from urllib.parse import parse_qsl, urlencode, urlsplit, urlunsplit
+
+from loguru import logger
+
+DEFAULT_MAX_DEPTH = 3
+DEFAULT_PRIORITY = 0.5
+
+_DEFAULT_PORTS = {"http": 80, "https": 443}
+
+
+def normalize_url(url: str) -> str:
+    """Canonical form of a URL for duplicate detection.
+
+    Lowercases the scheme and host, drops the default port, the fragment and
+    empty query parameters, sorts the query and gives empty paths a ``/``.
+    """
+    parts = urlsplit(url.strip())
+    scheme = parts.scheme.lower()
+    host = (parts.hostname or "").lower()
+    if parts.port and parts.port != _DEFAULT_PORTS.get(scheme):
+        host = f"{host}:{parts.port}"
+    query = urlencode(sorted(parse_qsl(parts.query)))
+    return urlunsplit((scheme, host, parts.path or "/", query, ""))
+
+
+class Frontier:
+    """Priority queue of URLs to crawl under a base URL.
+
+    Args:
+        base_url: Only URLs starting with this (normalized) prefix are crawled
+        max_depth: Links followed from the seed pages (depth 0)
+        max_pages: URLs handed out at most (None: no limit)
+        allowed: Optional check, e.g. robots.txt, a URL must pass
+    """
+
+    def __init__(
+        self,
+        base_url: str,
+        max_depth: int = DEFAULT_MAX_DEPTH,
+        max_pages: int | None = None,
+        allowed: Callable[[str], bool] | None = None,
+    ) -> None:
+        self.prefix = normalize_url(base_url)
+        self.max_depth = max_depth
+        self.max_pages = max_pages
+        self.allowed = allowed
+        self.popped = 0
+        self._seen: set[str] = set()
+        self._queue: list[tuple[int, float, int, str]] = []
+        self._order = itertools.count()
+
+    def __len__(self) -> int:
+        return len(self._queue)
+
+    def add(self, url: str, depth: int, priority: float = DEFAULT_PRIORITY) -> bool:
+        """Queue a URL found at ``depth``; False if it is dropped."""
+        url = normalize_url(url)
+        if (
+            depth > self.max_depth
+            or url in self._seen
+            or not url.startswith(self.prefix)
+        ):
+            return False
+        self._seen.add(url)
+        if self.allowed is not None and not self.allowed(url):
+            logger.debug(f"Disallowed by robots.txt: {url}")
+            return False
+        heapq.heappush(self._queue, (depth, -priority, next(self._order), url))
+        return True
+
+    def pop(self) -> tuple[str, int] | None:
+        """Next URL and its depth, or None when empty or at ``max_pages``."""
+        if not self._queue or (
+            self.max_pages is not None and self.popped >= self.max_pages
+        ):
+            return None
+        depth, _, _, url = heapq.heappop(self._queue)
+        self.popped += 1
+        return url, depth
+
+
+def parse_sitemap(content: bytes) -> tuple[list[tuple[str, float]], list[str]]:
+    """Pages and nested sitemaps listed in a sitemap or sitemap index.
+
+    Gzipped sitemaps are decompressed; namespaces are ignored.
+
+    Returns:
+        ``(url, priority)`` pairs of a ``<urlset>`` and the sitemap URLs of a
+        ``<sitemapindex>``; both empty if the content is not a sitemap
+    """
+    if content[:2] == b"\x1f\x8b":
+        content = gzip.decompress(content)
+    try:
+        root = ET.fromstring(content)
+    except ET.ParseError:
+        return [], []
+
+    def children(element: ET.Element, name: str) -> list[ET.Element]:
+        return [child for child in element if child.tag.rsplit("}", 1)[-1] == name]
+
+    def text(element: ET.Element, name: str) -> str | None:
+        found = children(element, name)
+        return found[0].text.strip() if found and found[0].text else None
+
+    pages, sitemaps = [], []
+    kind = root.tag.rsplit("}", 1)[-1]
+    if kind == "urlset":
+        for entry in children(root, "url"):
+            loc = text(entry, "loc")
+            if not loc:
+                continue
+            try:
+                priority = float(text(entry, "priority") or DEFAULT_PRIORITY)
+            except ValueError:
+                priority = DEFAULT_PRIORITY
+            pages.append((loc, priority))
+    elif kind == "sitemapindex":
+        sitemaps = [
+            loc for entry in children(root, "sitemap") if (loc := text(entry, "loc"))
+        ]
+    return pages, sitemaps
@@ -0,0 +1,94 @@
+"""Per-URL crawl state, kept between runs of ``fragmenter scrape``.
+
+For every page the state records the validators of the last response
+(``ETag`` and ``Last-Modified``), a hash of the saved file's content, when
+it was fetched and the in-scope links found on it. A re-scrape sends them
+back as a conditional GET: an unchanged page costs a ``304 Not Modified``
+without a body, and its stored links keep the crawl going past it. Files
+are only rewritten when their content changed, so their modification
+times stay put for incremental indexing.
+"""
+
+import hashlib
+import json
+import os
+from datetime import UTC, datetime
+from pathlib import Path
+from typing import Any
+
+from loguru import logger
+
+# No file extension, so rebuild-index does not index the state
+STATE_FILE = ".crawl-state"
+STATE_VERSION = 1
+
+
+def content_hash(content: str) -> str:
+    """SHA-256 of a saved file's content."""
+    return hashlib.sha256(content.encode("utf-8")).hexdigest()
+
+
+class CrawlState:
+    """Crawl state of the pages under one output directory.
+
+    Args:
+        path: State file (JSON)
+    """
+
+    def __init__(self, path: str | Path) -> None:
+        self.path = Path(path)
+        self.pages: dict[str, dict[str, Any]] = {}
+
+    @classmethod
+    def load(cls, path: str | Path) -> "CrawlState":
+        """Read the state file; a missing or unreadable file gives no state."""
+        state = cls(path)
+        if not state.path.exists():
+            return state
+        try:
+            data = json.loads(state.path.read_text(encoding="utf-8"))
+        except (OSError, json.JSONDecodeError) as e:
+            logger.warning(f"Ignoring unreadable crawl state {state.path}: {e}")
+            return state
+        if data.get("version") != STATE_VERSION:
+            logger.warning(f"Ignoring crawl state {state.path} of another version")
+            return state
+        state.pages = data.get("pages", {})
+        logger.info(f"Loaded crawl state of {len(state.pages)} pages")
+        return state
+
+    def get(self, url: str) -> dict[str, Any]:
+        """The recorded state of a URL (empty if never fetched)."""
+        return self.pages.get(url, {})
+
+    def conditional_headers(self, url: str) -> dict[str, str]:
+        """``If-None-Match``/``If-Modified-Since`` headers for a re-fetch."""
+        entry = self.get(url)
+        headers = {}
+        if entry.get("etag"):
+            headers["If-None-Match"] = entry["etag"]
+        if entry.get("last_modified"):
+            headers["If-Modified-Since"] = entry["last_modified"]
+        return headers
+
+    def update(self, url: str, **fields: Any) -> None:
+        """Record fields of a URL, stamping ``fetched_at`` with the time."""
+        entry = self.pages.setdefault(url, {})
+        entry.update(fields)
+        entry["fetched_at"] = datetime.now(UTC).isoformat(timespec="seconds")
+
+    def save(self) -> Path:
+        """Write the state file atomically."""
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        tmp = self.path.with_name(f"{self.path.name}.tmp")
+        tmp.write_text(
+            json.dumps(
+                {"version": STATE_VERSION, "pages": self.pages},
+                indent=1,
+                sort_keys=True,
+            ),
+            encoding="utf-8",
+        )
+        os.replace(tmp, self.path)
+        logger.debug(f"Crawl state written to {self.path}")
+        return self.path
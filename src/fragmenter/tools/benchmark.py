@@ -0,0 +1,168 @@
+"""Benchmark index builds and retrieval on synthetic corpora, offline."""
+
+import json
+import tempfile
+from pathlib import Path
+
+import typer
+from rich.console import Console
+from rich.table import Table
+
+from fragmenter.rag.benchmark import (
+    DEFAULT_NUM_QUERIES,
+    DEFAULT_TOP_K,
+    run_benchmark,
+)
+from fragmenter.utils.logging import setup_logging
+
+console = Console()
+
+app = typer.Typer(
+    help="Measure build throughput, recall@k and query latency offline.",
+    no_args_is_help=False,
+)
+
+
+@app.command()
+def main(
+    files: list[int] = typer.Option(
+        None,
+        "--files",
+        "-n",
+        help="Corpus sizes in files (repeatable, default: 1000)",
+    ),
+    work_dir: Path | None = typer.Option(
+        None,
+        "--work-dir",
+        "-w",
+        help="Keep corpora and indexes here (default: temporary directory)",
+        file_okay=False,
+        dir_okay=True,
+        resolve_path=True,
+    ),
+    top_k: int = typer.Option(
+        DEFAULT_TOP_K,
+        "--top-k",
+        "-k",
+        help="k used for recall@k",
+    ),
+    num_queries: int = typer.Option(
+        DEFAULT_NUM_QUERIES,
+        "--queries",
+        help="Number of timed queries per corpus",
+    ),
+    num_workers: int = typer.Option(
+        2,
+        "--workers",
+        help="Ingestion workers",
+    ),
+    backend: str = typer.Option(
+        "chroma",
+        "--backend",
+        help="Vector store backend: chroma or flat",
+    ),
+    seed: int = typer.Option(
+        0,
+        "--seed",
+        help="Seed for corpus generation and query sampling",
+    ),
+    min_recall: float | None = typer.Option(
+        None,
+        "--min-recall",
+        help="Fail when recall@k of any corpus is lower",
+    ),
+    max_p95_ms: float | None = typer.Option(
+        None,
+        "--max-p95-ms",
+        help="Fail when p95 query latency of any corpus is higher",
+    ),
+    output: Path | None = typer.Option(
+        None,
+        "--output",
+        "-o",
+        help="Write the results as JSON",
+        dir_okay=False,
+        resolve_path=True,
+    ),
+    logs_dir: Path | None = typer.Option(
+        None,
+        "--logs-dir",
+        "-l",
+        help="Directory for logs (optional).",
+        file_okay=False,
+        dir_okay=True,
+        resolve_path=True,
+    ),
+    debug: bool = typer.Option(
+        False,
+        "--debug",
+        help="Enable debug logging",
+    ),
+) -> None:
+    """Build synthetic corpora with a hashing embedder and time retrieval."""
+    log_level = "DEBUG" if debug else "INFO"
+    setup_logging(logs_dir=logs_dir, level=log_level)
+
+    sizes = files or [1000]
+    results = []
+    with tempfile.TemporaryDirectory(prefix="fragmenter-bench-") as tmp:
+        root = work_dir or Path(tmp)
+        for size in sizes:
+            console.print(f"[bold cyan]Benchmarking[/bold cyan] {size:,} files...")
+            try:
+                result = run_benchmark(
+                    size,
+                    root / f"files-{size}-{backend}",
+                    top_k=top_k,
+                    num_queries=num_queries,
+                    num_workers=num_workers,
+                    backend=backend,
+                    seed=seed,
+                )
+            except ValueError as e:
+                console.print(f"[red]Error:[/red] {e}", style="bold red")
+                raise typer.Exit(1)
+            results.append({**result, "backend": backend})
+
+    table = Table(title=f"Retrieval benchmark ({backend}, hashing embedder)")
+    for column in ("files", "chunks", "build s", "files/s", "chunks/s"):
+        table.add_column(column, justify="right")
+    for column in (f"recall@{top_k}", "MRR", "p50 ms", "p95 ms", "p99 ms"):
+        table.add_column(column, justify="right")
+    for result in results:
+        table.add_row(
+            f"{result['files']:,}",
+            f"{result['chunks']:,}",
+            f"{result['build_s']:.1f}",
+            f"{result['files_per_s']:.0f}",
+            f"{result['chunks_per_s']:.0f}",
+            f"{result['recall_at_k']:.3f}",
+            f"{result['mrr']:.3f}",
+            f"{result['p50_ms']:.2f}",
+            f"{result['p95_ms']:.2f}",
+            f"{result['p99_ms']:.2f}",
+        )
+    console.print(table)
+
+    if output:
+        output.parent.mkdir(parents=True, exist_ok=True)
+        output.write_text(json.dumps(results, indent=2))
+        console.print(f"[green]✓[/green] Results written to {output}")
+
+    failures = [
+        f"{r['files']:,} files: recall@{top_k} {r['recall_at_k']:.3f} < {min_recall}"
+        for r in results
+        if min_recall is not None and r["recall_at_k"] < min_recall
+    ] + [
+        f"{r['files']:,} files: p95 {r['p95_ms']:.2f} ms > {max_p95_ms} ms"
+        for r in results
+        if max_p95_ms is not None and r["p95_ms"] > max_p95_ms
+    ]
+    for failure in failures:
+        console.print(f"[red]Regression:[/red] {failure}", style="bold red")
+    if failures:
+        raise typer.Exit(1)
+
+
+if __name__ == "__main__":
+    app()
@@ -0,0 +1,144 @@
+"""Benchmark document loading and chunking throughput per parser type."""
+
+import json
+import tempfile
+from pathlib import Path
+
+import typer
+from rich.console import Console
+from rich.table import Table
+
+from fragmenter.rag.parser_benchmark import (
+    WORKLOADS,
+    benchmark_parsers,
+    compare_to_baseline,
+)
+from fragmenter.utils.logging import setup_logging
+
+console = Console()
+
+app = typer.Typer(
+    help="Measure files/s, MB/s, chunks/s and peak memory per parser.",
+    no_args_is_help=False,
+)
+
+
+@app.command()
+def main(
+    parsers: list[str] = typer.Option(
+        None,
+        "--parser",
+        "-p",
+        help=f"Workloads to run (repeatable, default: {' '.join(WORKLOADS)})",
+    ),
+    scale: float = typer.Option(
+        1.0,
+        "--scale",
+        help="Multiplier for the number of files per workload",
+    ),
+    work_dir: Path | None = typer.Option(
+        None,
+        "--work-dir",
+        "-w",
+        help="Keep the generated inputs here (default: temporary directory)",
+        file_okay=False,
+        dir_okay=True,
+        resolve_path=True,
+    ),
+    seed: int = typer.Option(
+        0,
+        "--seed",
+        help="Seed for the generated inputs",
+    ),
+    baseline: Path | None = typer.Option(
+        None,
+        "--baseline",
+        "-b",
+        help="Earlier --output JSON; fail on slower or larger-memory parsers",
+        exists=True,
+        dir_okay=False,
+        resolve_path=True,
+    ),
+    tolerance: float = typer.Option(
+        0.2,
+        "--tolerance",
+        help="Allowed relative MB/s drop or peak memory growth vs. --baseline",
+    ),
+    output: Path | None = typer.Option(
+        None,
+        "--output",
+        "-o",
+        help="Write the results as JSON",
+        dir_okay=False,
+        resolve_path=True,
+    ),
+    logs_dir: Path | None = typer.Option(
+        None,
+        "--logs-dir",
+        "-l",
+        help="Directory for logs (optional).",
+        file_okay=False,
+        dir_okay=True,
+        resolve_path=True,
+    ),
+    debug: bool = typer.Option(
+        False,
+        "--debug",
+        help="Enable debug logging",
+    ),
+) -> None:
+    """Generate per-parser workloads and time loading and chunking them."""
+    log_level = "DEBUG" if debug else "INFO"
+    setup_logging(logs_dir=logs_dir, level=log_level)
+
+    with tempfile.TemporaryDirectory(prefix="fragmenter-parsers-") as tmp:
+        try:
+            results = benchmark_parsers(
+                work_dir or Path(tmp), parsers=parsers, scale=scale, seed=seed
+            )
+        except ValueError as e:
+            console.print(f"[red]Error:[/red] {e}", style="bold red")
+            raise typer.Exit(1)
+
+    table = Table(title="Ingestion throughput per parser")
+    table.add_column("parser")
+    for column in ("files", "MB", "chunks", "files/s", "MB/s", "chunks/s"):
+        table.add_column(column, justify="right")
+    table.add_column("load_documents files/s", justify="right")
+    table.add_column("peak MB", justify="right")
+    for result in results:
+        table.add_row(
+            result["parser"],
+            f"{result['files']:,}",
+            f"{result['mb']:.2f}",
+            f"{result['chunks']:,}",
+            f"{result['files_per_s']:.1f}",
+            f"{result['mb_per_s']:.2f}",
+            f"{result['chunks_per_s']:.0f}",
+            f"{result['load_documents_files_per_s']:.1f}",
+            f"{result['peak_mb']:.1f}",
+        )
+    console.print(table)
+    console.print(
+        "[dim]files/s, MB/s and chunks/s: TypedDocumentReader.load_data only; "
+        "peak MB: Python allocations during load_documents[/dim]"
+    )
+
+    if output:
+        output.parent.mkdir(parents=True, exist_ok=True)
+        output.write_text(json.dumps(results, indent=2))
+        console.print(f"[green]✓[/green] Results written to {output}")
+
+    if baseline:
+        regressions = compare_to_baseline(
+            results, json.loads(baseline.read_text()), tolerance=tolerance
+        )
+        for regression in regressions:
+            console.print(f"[red]Regression:[/red] {regression}", style="bold red")
+        if regressions:
+            raise typer.Exit(1)
+        console.print(f"[green]✓[/green] Within {tolerance:.0%} of {baseline.name}")
+
+
+if __name__ == "__main__":
+    app()
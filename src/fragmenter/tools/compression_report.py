@@ -0,0 +1,171 @@
+"""Report recall and size of compressed variants of an index."""
+
+from pathlib import Path
+from typing import Any
+
+import numpy as np
+import typer
+from loguru import logger
+from rich.console import Console
+from rich.table import Table
+
+from fragmenter.rag.flat_store import FlatVectorStore
+from fragmenter.rag.quantization import (
+    DEFAULT_REPORT_DIMENSIONS,
+    STORAGE_DTYPES,
+    compression_report,
+)
+from fragmenter.rag.scan import open_collections
+from fragmenter.rag.tuning import fetch_collection
+from fragmenter.utils.logging import setup_logging
+
+console = Console()
+
+app = typer.Typer(
+    help="Measure recall@k vs. size for truncated and quantized embeddings.",
+    no_args_is_help=True,
+)
+
+
+def _load_embeddings(storage_dir: Path) -> np.ndarray:
+    """Read every stored embedding of an index (all shards)."""
+    collections = list(open_collections(storage_dir).values())
+    store = collections[0]
+    if isinstance(store, FlatVectorStore) and (
+        store.dtype != "float32" or store.dimensions or store.binary
+    ):
+        logger.warning(
+            f"Index is already compressed ({store.dtype}, "
+            f"dimensions={store.dimensions}); the report is relative to it"
+        )
+
+    parts = [fetch_collection(collection)["embeddings"] for collection in collections]
+    parts = [part for part in parts if len(part)]
+    return np.concatenate(parts) if parts else np.zeros((0, 0), dtype=np.float32)
+
+
+def _flags(result: dict[str, Any]) -> str:
+    flags = ["--vector-store flat", f"--flat-dtype {result['dtype']}"]
+    if result["dimensions"] != result["full_dimensions"]:
+        flags.append(f"--flat-dimensions {result['dimensions']}")
+    if result["binary"]:
+        flags.append("--flat-binary")
+    return " ".join(flags)
+
+
+@app.command()
+def main(
+    storage_dir: Path = typer.Option(
+        ...,
+        "--storage-dir",
+        "-s",
+        help="Index storage directory",
+        exists=True,
+        file_okay=False,
+        dir_okay=True,
+        resolve_path=True,
+    ),
+    dimensions: list[int] = typer.Option(
+        None,
+        "--dimensions",
+        help="Truncation sizes to try (default: full, 1024, 512, 256)",
+    ),
+    dtype: list[str] = typer.Option(
+        None,
+        "--dtype",
+        help=f"Storage dtypes to try (default: {', '.join(STORAGE_DTYPES)})",
+    ),
+    top_k: int = typer.Option(
+        10,
+        "--top-k",
+        "-k",
+        help="k used for recall@k",
+    ),
+    num_queries: int = typer.Option(
+        200,
+        "--queries",
+        help="Number of stored vectors held out as queries",
+    ),
+    target_recall: float = typer.Option(
+        0.95,
+        "--target-recall",
+        help="Recommend the smallest variant with at least this recall",
+    ),
+    logs_dir: Path | None = typer.Option(
+        None,
+        "--logs-dir",
+        "-l",
+        help="Directory for logs (optional).",
+        file_okay=False,
+        dir_okay=True,
+        resolve_path=True,
+    ),
+    debug: bool = typer.Option(
+        False,
+        "--debug",
+        help="Enable debug logging",
+    ),
+) -> None:
+    """Compare truncation, float16/int8 and binary prefilter on the real index.
+
+    Dimension truncation is only meaningful for Matryoshka-trained embedding
+    models such as OpenAI text-embedding-3-*.
+    """
+    log_level = "DEBUG" if debug else "INFO"
+    setup_logging(logs_dir=logs_dir, level=log_level)
+
+    try:
+        embeddings = _load_embeddings(storage_dir)
+        results = compression_report(
+            embeddings,
+            dimensions=dimensions or DEFAULT_REPORT_DIMENSIONS,
+            dtypes=dtype or None,
+            top_k=top_k,
+            num_queries=num_queries,
+        )
+    except ValueError as e:
+        console.print(f"[red]Error:[/red] {e}", style="bold red")
+        raise typer.Exit(1)
+
+    full_dimensions = embeddings.shape[1]
+    for result in results:
+        result["full_dimensions"] = full_dimensions
+    results.sort(key=lambda r: (r["bytes_per_vector"], -r["recall"]))
+    eligible = [r for r in results if r["recall"] >= target_recall]
+    best = eligible[0] if eligible else None
+
+    table = Table(
+        title=f"{len(embeddings)} vectors, {full_dimensions} dimensions "
+        f"(recall@{min(top_k, len(embeddings))} vs. exact float32)"
+    )
+    for column in ("dims", "dtype", "binary", "bytes/vec", "size MB", "ratio"):
+        table.add_column(column, justify="right")
+    table.add_column("recall", justify="right")
+    table.add_column("ms/query", justify="right")
+    for result in results:
+        table.add_row(
+            str(result["dimensions"]),
+            result["dtype"],
+            "yes" if result["binary"] else "no",
+            str(result["bytes_per_vector"]),
+            f"{result['size_mb']:.2f}",
+            f"{result['compression']:.1f}x",
+            f"{result['recall']:.3f}",
+            f"{result['query_ms']:.2f}",
+            style="bold green" if result is best else None,
+        )
+    console.print(table)
+
+    if best is None:
+        console.print(f"[yellow]No variant reached recall {target_recall}.[/yellow]")
+        return
+    console.print(
+        f"\n[bold]Smallest with recall ≥ {target_recall}:[/bold] "
+        f"{best['compression']:.1f}x smaller. Rebuild into an empty storage "
+        "directory with:\n  fragmenter rebuild-index -d DATA_DIR -s NEW_DIR "
+        f"{_flags(best)}"
+    )
+
+
+if __name__ == "__main__":
+    app()
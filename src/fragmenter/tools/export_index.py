@@ -0,0 +1,118 @@
+"""Export an index to a single-file snapshot."""
+
+from pathlib import Path
+
+import typer
+from dotenv import load_dotenv
+from loguru import logger
+from rich.console import Console
+
+from fragmenter.config import RAGSettings
+from fragmenter.rag.quantization import STORAGE_DTYPES
+from fragmenter.rag.snapshot import SNAPSHOT_SUFFIX, export_index
+from fragmenter.utils.logging import setup_logging
+
+console = Console()
+
+app = typer.Typer(
+    help="Pack an index into a single .fragidx snapshot file.",
+    no_args_is_help=True,
+)
+
+
+@app.command()
+def main(
+    storage_dir: Path = typer.Option(
+        ...,
+        "--storage-dir",
+        "-s",
+        help="Index storage directory",
+        exists=True,
+        file_okay=False,
+        dir_okay=True,
+        resolve_path=True,
+    ),
+    output: Path = typer.Option(
+        ...,
+        "--output",
+        "-o",
+        help=f"Snapshot file to write (*{SNAPSHOT_SUFFIX})",
+        dir_okay=False,
+        resolve_path=True,
+    ),
+    dtype: str = typer.Option(
+        None,
+        "--dtype",
+        help=f"Vector storage dtype ({', '.join(STORAGE_DTYPES)}; "
+        "default: same as the index)",
+    ),
+    embed_provider: str = typer.Option(
+        None,
+        "--embed-provider",
+        help="Embedding provider recorded in the snapshot (default: from .env)",
+    ),
+    embed_model: str = typer.Option(
+        None,
+        "--embed-model",
+        help="Embedding model recorded in the snapshot (default: from .env)",
+    ),
+    logs_dir: Path | None = typer.Option(
+        None,
+        "--logs-dir",
+        "-l",
+        help="Directory for logs (optional).",
+        file_okay=False,
+        dir_okay=True,
+        resolve_path=True,
+    ),
+    env_file: Path = typer.Option(
+        None,
+        "--env-file",
+        help="Path to .env file (default: search parent directories)",
+    ),
+    debug: bool = typer.Option(
+        False,
+        "--debug",
+        help="Enable debug logging",
+    ),
+) -> None:
+    """Write vectors, text, metadata and docstore of an index to one file.
+
+    The embedding model is recorded so that loading the snapshot with a
+    different model is flagged.
+    """
+    if env_file and env_file.exists():
+        load_dotenv(env_file)
+    else:
+        load_dotenv()
+
+    log_level = "DEBUG" if debug else "INFO"
+    setup_logging(logs_dir=logs_dir, level=log_level)
+
+    settings = RAGSettings().apply_overrides(
+        EMBED_PROVIDER=embed_provider,
+        EMBED_MODEL=embed_model,
+    )
+    try:
+        header = export_index(
+            storage_dir,
+            output,
+            embedding={
+                "provider": settings.EMBED_PROVIDER,
+                "model": settings.EMBED_MODEL,
+            },
+            dtype=dtype,
+        )
+    except ValueError as e:
+        logger.error(str(e))
+        raise typer.Exit(1)
+
+    size_mb = output.stat().st_size / 1e6
+    console.print(
+        f"[green]✓[/green] {header['count']} vectors ({header['dim']} dims, "
+        f"{header['dtype']}) → {output} ({size_mb:.1f} MB)"
+    )
+
+
+if __name__ == "__main__":
+    app()
@@ -0,0 +1,98 @@
+"""Unpack a single-file snapshot into a storage directory."""
+
+from pathlib import Path
+
+import typer
+from dotenv import load_dotenv
+from loguru import logger
+from rich.console import Console
+
+from fragmenter.config import RAGSettings
+from fragmenter.rag.snapshot import Snapshot, import_index
+from fragmenter.utils.logging import setup_logging
+
+console = Console()
+
+app = typer.Typer(
+    help="Create a storage directory from a .fragidx snapshot file.",
+    no_args_is_help=True,
+)
+
+
+@app.command()
+def main(
+    snapshot: Path = typer.Argument(
+        ...,
+        help="Snapshot file (*.fragidx)",
+        exists=True,
+        file_okay=True,
+        dir_okay=False,
+        resolve_path=True,
+    ),
+    storage_dir: Path = typer.Option(
+        ...,
+        "--storage-dir",
+        "-s",
+        help="New (empty) index storage directory",
+        file_okay=False,
+        dir_okay=True,
+        resolve_path=True,
+    ),
+    vector_store: str = typer.Option(
+        "flat",
+        "--vector-store",
+        help="Backend to import into: flat or chroma",
+    ),
+    verify: bool = typer.Option(
+        True,
+        "--verify/--no-verify",
+        help="Check section checksums before importing",
+    ),
+    logs_dir: Path | None = typer.Option(
+        None,
+        "--logs-dir",
+        "-l",
+        help="Directory for logs (optional).",
+        file_okay=False,
+        dir_okay=True,
+        resolve_path=True,
+    ),
+    env_file: Path = typer.Option(
+        None,
+        "--env-file",
+        help="Path to .env file (default: search parent directories)",
+    ),
+    debug: bool = typer.Option(
+        False,
+        "--debug",
+        help="Enable debug logging",
+    ),
+) -> None:
+    """Bulk-load a snapshot into a flat or Chroma index, without re-embedding."""
+    if env_file and env_file.exists():
+        load_dotenv(env_file)
+    else:
+        load_dotenv()
+
+    log_level = "DEBUG" if debug else "INFO"
+    setup_logging(logs_dir=logs_dir, level=log_level)
+
+    try:
+        embedding = Snapshot(snapshot).embedding
+        count = import_index(snapshot, storage_dir, backend=vector_store, verify=verify)
+    except ValueError as e:
+        logger.error(str(e))
+        raise typer.Exit(1)
+
+    settings = RAGSettings()
+    if embedding.get("model") and embedding["model"] != settings.EMBED_MODEL:
+        logger.warning(
+            f"Snapshot was embedded with {embedding.get('provider')}/"
+            f"{embedding['model']}, but EMBED_MODEL is {settings.EMBED_MODEL}; "
+            "query it with the snapshot's model"
+        )
+    console.print(f"[green]✓[/green] Imported {count} vectors into {storage_dir}")
+
+
+if __name__ == "__main__":
+    app()
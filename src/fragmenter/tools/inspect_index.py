@@ -1,16 +1,27 @@
 import sys
 from pathlib import Path
+from typing import Any
 
 import typer
 from llama_index.core import Settings, VectorStoreIndex
 from loguru import logger
-from rich.console import Console
+from rich.console import Console, Group
 from rich.panel import Panel
 from rich.table import Table
 from rich.text import Text
 
+from fragmenter.rag.boilerplate import CHARS_PER_TOKEN
+from fragmenter.rag.scan import iter_collection, open_collections
+from fragmenter.rag.sharding import SHARDS_DIR, is_sharded, load_registry
+from fragmenter.rag.stats import (
+    LENGTH_BUCKETS,
+    load_stats,
+    merge_stats,
+    save_stats,
+    scan_stats,
+)
 from fragmenter.rag.utils import MockEmbedding
-from fragmenter.rag.vector_stores import create_chroma_vector_store
+from fragmenter.rag.vector_stores import create_vector_store
 from fragmenter.utils.logging import setup_logging
 
 console = Console()
@@ -18,6 +29,100 @@ console = Console()
 app = typer.Typer(help="Inspect the contents and statistics of a RAG index.")
 
 
+def _state_dirs(storage_dir: Path) -> dict[str, Path]:
+    """Directory holding the stats manifest of every collection, by shard."""
+    if is_sharded(storage_dir):
+        return {
+            key: storage_dir / SHARDS_DIR / entry["collection"]
+            for key, entry in load_registry(storage_dir).items()
+        }
+    return {"": storage_dir}
+
+
+def load_index_stats(storage_dir: Path) -> dict[str, Any] | None:
+    """Merged stats manifests of an index, or None if any is missing."""
+    parts = []
+    for state_dir in _state_dirs(storage_dir).values():
+        part = load_stats(state_dir)
+        if part is None:
+            return None
+        parts.append(part)
+    return merge_stats(parts) if parts else None
+
+
+def recompute_index_stats(storage_dir: Path) -> dict[str, Any]:
+    """Scan every collection, refresh the manifests and return the merged stats.
+
+    Raises:
+        typer.Exit: If the index cannot be loaded or is empty
+    """
+    state_dirs = _state_dirs(storage_dir)
+    try:
+        if is_sharded(storage_dir):
+            collections = open_collections(storage_dir)
+            collection_count = sum(c.count() for c in collections.values())
+            logger.info(
+                f"Sharded index: {collection_count} vectors "
+                f"in {len(collections)} collections"
+            )
+            if collection_count == 0:
+                console.print(
+                    "\n[red]Error: Index is empty. "
+                    "Please build the index first.[/red]\n"
+                )
+                raise typer.Exit(code=1)
+        else:
+            # Load the vector store (Chroma or flat)
+            vector_store, storage_context = create_vector_store(
+                persist_path=storage_dir
+            )
+
+            # Check vector store status
+            collection_count = vector_store.client.count()
+            docstore_count = len(storage_context.docstore.docs)
+
+            logger.info(f"Vector store contains {collection_count} vectors")
+            logger.info(f"Docstore contains {docstore_count} documents")
+
+            if collection_count == 0 and docstore_count == 0:
+                console.print(
+                    "\n[red]Error: Index is empty. "
+                    "Please build the index first.[/red]\n"
+                )
+                raise typer.Exit(code=1)
+
+            if collection_count == 0 and docstore_count > 0:
+                console.print(
+                    "\n[yellow]Warning: Vector store is empty but docstore "
+                    "has entries. Index may be corrupted.[/yellow]\n"
+                )
+
+            # Reconstruct index from vector store (not used, but validates the setup)
+            VectorStoreIndex.from_vector_store(
+                vector_store=vector_store, storage_context=storage_context
+            )
+            collections = {"": vector_store.client}
+    except typer.Exit:
+        raise
+    except Exception as e:
+        logger.error(f"Error loading index: {e}")
+        raise typer.Exit(code=1)
+
+    logger.info("Index loaded successfully")
+    logger.info("Analyzing index contents...\n")
+
+    parts = []
+    for key, collection in collections.items():
+        stats = scan_stats(iter_collection(collection))
+        # Dropped duplicates are not in the store; keep the build's summary
+        previous = load_stats(state_dirs[key])
+        if previous and previous.get("dedup"):
+            stats["dedup"] = previous["dedup"]
+        save_stats(state_dirs[key], stats)
+        parts.append(stats)
+    return merge_stats(parts)
+
+
 @app.command()
 def main(
     storage_dir: Path = typer.Option(
@@ -30,6 +135,11 @@ def main(
         dir_okay=True,
         resolve_path=True,
     ),
+    full: bool = typer.Option(
+        False,
+        "--full",
+        help="Recompute the statistics from the stored chunks",
+    ),
     logs_dir: Path | None = typer.Option(
         None,
         "--logs-dir",
@@ -47,12 +157,19 @@ def main(
 ) -> None:
     """Inspect the RAG index and display statistics.
 
+    Renders the statistics manifest that ``rebuild-index`` maintains
+    (``index_stats.json``). With ``--full``, or for indexes built before the
+    manifest existed, the chunks are read back from the vector store and the
+    manifest is refreshed.
+
     Shows:
     - Number of documents/nodes
     - Chunk statistics (length distribution)
-    - Node types
+    - Content types, repositories and directory depths
     - Source directories
     - Example file paths
+    - Near-duplicate savings (if built with ``--dedup``)
+    - Boilerplate excluded from embeddings (``--strip-boilerplate``)
     """
     # Setup logging with appropriate level
     log_level = "DEBUG" if debug else "INFO"
@@ -61,179 +178,38 @@ def main(
     else:
         setup_logging(level=log_level)
 
-    # Configure settings to avoid OpenAI requirement
-    # Suppress the MockLLM message by temporarily redirecting stdout
-    old_stdout = sys.stdout
-    sys.stdout = open("/dev/null", "w")
-    Settings.embed_model = MockEmbedding(embed_batch_size=10)
-    Settings.llm = None
-    sys.stdout.close()
-    sys.stdout = old_stdout
-
-    logger.info(f"Loading index from {storage_dir}...")
-    try:
-        # Load Chroma vector store
-        vector_store, storage_context = create_chroma_vector_store(
-            persist_path=storage_dir,
-            collection_name="documents",
-        )
-
-        # Check vector store status
-        collection_count = vector_store._collection.count()
-        docstore_count = len(storage_context.docstore.docs)
-
-        logger.info(f"Vector store contains {collection_count} vectors")
-        logger.info(f"Docstore contains {docstore_count} documents")
-
-        if collection_count == 0 and docstore_count == 0:
+    stats = None if full else load_index_stats(storage_dir)
+    if stats is not None:
+        logger.info(f"Using statistics manifest from {storage_dir}")
+        if stats["chunks"] == 0:
             console.print(
                 "\n[red]Error: Index is empty. Please build the index first.[/red]\n"
             )
             raise typer.Exit(code=1)
+    else:
+        if not full:
+            logger.info("No statistics manifest found, scanning the index")
 
-        if collection_count == 0 and docstore_count > 0:
-            console.print(
-                "\n[yellow]Warning: Vector store is empty but docstore has entries. "
-                "Index may be corrupted.[/yellow]\n"
-            )
-
-        # Reconstruct index from vector store (not used, but validates the setup)
-        VectorStoreIndex.from_vector_store(
-            vector_store=vector_store, storage_context=storage_context
-        )
-    except Exception as e:
-        logger.error(f"Error loading index: {e}")
-        raise typer.Exit(code=1)
-
-    logger.info("Index loaded successfully")
-    logger.info("Analyzing index contents...\n")
+        # Configure settings to avoid OpenAI requirement
+        # Suppress the MockLLM message by temporarily redirecting stdout
+        old_stdout = sys.stdout
+        sys.stdout = open("/dev/null", "w")
+        Settings.embed_model = MockEmbedding(embed_batch_size=10)
+        Settings.llm = None
+        sys.stdout.close()
+        sys.stdout = old_stdout
 
-    # Get data from Chroma collection directly (ChromaDB stores the actual content)
-    chroma_collection = vector_store._collection
-    chroma_data = chroma_collection.get(include=["metadatas", "documents"])
-
-    # Use Chroma data as primary source since it has the actual stored content
-    docs = {}
-    if chroma_data and chroma_data["ids"]:
-        for i, doc_id in enumerate(chroma_data["ids"]):
-            # Get the text content
-            text_content = (
-                chroma_data["documents"][i] if chroma_data["documents"] else ""
-            )
-            metadata = chroma_data["metadatas"][i] if chroma_data["metadatas"] else {}
-
-            # Create a simple object to hold document data
-            class SimpleDoc:
-                def __init__(self, doc_id, text, metadata):
-                    self.id_ = doc_id
-                    self.text = text
-                    self.metadata = metadata
-
-                def get_content(self):
-                    return self.text
-
-            docs[doc_id] = SimpleDoc(doc_id, text_content, metadata)
-
-    # Collect statistics
-    file_paths = set()
-    chunk_lengths = []
-    node_types = {}
-    metadata_keys = set()
-    repositories = set()
-    file_types = set()
-
-    # Track min/max chunks
-    min_chunk = {"length": float("inf"), "file": None, "content": None}
-    max_chunk = {"length": 0, "file": None, "content": None}
-
-    # New statistics
-    code_chunks = 0
-    doc_chunks = 0
-    repo_stats = {}  # repo -> chunk count
-    depth_distribution = {}  # depth -> count
-    empty_chunks = []  # Track problematically small chunks
-
-    for doc_id, doc in docs.items():
-        # Initialize file_path to avoid unbound variable issues
-        file_path = None
-
-        # doc is likely a BaseNode or Document
-        if hasattr(doc, "metadata"):
-            # Collect all metadata keys to understand what's available
-            metadata_keys.update(doc.metadata.keys())
-
-            # Try multiple possible keys for file path
-            file_path = (
-                doc.metadata.get("relative_path")
-                or doc.metadata.get("file_path")
-                or doc.metadata.get("file_name")
-            )
-            if file_path:
-                file_paths.add(file_path)
-
-            # Collect repository info
-            repo = doc.metadata.get("repository")
-            if repo:
-                repositories.add(repo)
-
-            # Collect file types
-            file_type = doc.metadata.get("file_type")
-            if file_type:
-                file_types.add(file_type)
-
-            # Track content type distribution
-            if doc.metadata.get("is_code"):
-                code_chunks += 1
-            if doc.metadata.get("is_documentation"):
-                doc_chunks += 1
-
-            # Track repository statistics
-            if repo:
-                repo_stats[repo] = repo_stats.get(repo, 0) + 1
-
-            # Track depth distribution
-            depth = doc.metadata.get("depth")
-            if depth is not None:
-                depth_distribution[depth] = depth_distribution.get(depth, 0) + 1
-
-        # Analyze content length and track min/max
-        content = None
-        if hasattr(doc, "get_content"):
-            content = doc.get_content()
-            length = len(content)
-        elif hasattr(doc, "text"):
-            content = getattr(doc, "text")
-            length = len(content)
-        else:
-            continue
-
-        chunk_lengths.append(length)
-
-        # Track very small chunks (potential quality issues)
-        if length < 50:  # Less than 50 characters is suspiciously small
-            empty_chunks.append(
-                {
-                    "file": file_path or "Unknown",
-                    "length": length,
-                    "content": content[:100] if content else "",
-                }
-            )
+        logger.info(f"Loading index from {storage_dir}...")
+        stats = recompute_index_stats(storage_dir)
 
-        # Update min chunk
-        if length < min_chunk["length"]:
-            min_chunk["length"] = length
-            min_chunk["file"] = file_path or "Unknown"
-            min_chunk["content"] = content[:200] if content else ""
+    render_stats(stats)
 
-        # Update max chunk
-        if length > max_chunk["length"]:
-            max_chunk["length"] = length
-            max_chunk["file"] = file_path or "Unknown"
-            max_chunk["content"] = content[:200] if content else ""
 
-        # Analyze node type if available (class name)
-        type_name = type(doc).__name__
-        node_types[type_name] = node_types.get(type_name, 0) + 1
+def render_stats(stats: dict[str, Any]) -> None:
+    """Print the inspection report for a stats manifest."""
+    total_chunks = stats["chunks"]
+    min_chunk = stats["min_chunk"]
+    max_chunk = stats["max_chunk"]
 
     # Display report using Rich
     console.print()
@@ -249,30 +225,27 @@ def main(
     overview = Table.grid(padding=(0, 2))
     overview.add_column(style="bold")
     overview.add_column()
-    overview.add_row("Total Chunks:", f"[green]{len(docs):,}[/green]")
-    overview.add_row("Unique Files:", f"[green]{len(file_paths):,}[/green]")
-    if repositories:
-        repos_str = ", ".join(sorted(repositories))
+    overview.add_row("Total Chunks:", f"[green]{total_chunks:,}[/green]")
+    overview.add_row("Unique Files:", f"[green]{stats['files']:,}[/green]")
+    if stats["repositories"]:
+        repos_str = ", ".join(sorted(stats["repositories"]))
         overview.add_row("Repositories:", f"[yellow]{repos_str}[/yellow]")
-
-    # Add node type info to overview (all are Document in current implementation)
-    if len(node_types) == 1:
-        type_name = list(node_types.keys())[0]
-        overview.add_row("Node Type:", f"[dim]{type_name}[/dim]")
+    if stats.get("updated_at"):
+        overview.add_row("Stats Updated:", f"[dim]{stats['updated_at']}[/dim]")
 
     console.print(Panel(overview, title="📊 Overview", border_style="blue"))
 
     # Chunk statistics
-    if chunk_lengths:
-        avg_len = sum(chunk_lengths) / len(chunk_lengths)
+    if total_chunks:
+        avg_len = stats["total_chars"] / total_chunks
 
         stats_table = Table.grid(padding=(0, 2))
         stats_table.add_column(style="bold")
         stats_table.add_column(justify="right", style="green")
-        stats_table.add_row("Count:", f"{len(chunk_lengths):,}")
+        stats_table.add_row("Count:", f"{total_chunks:,}")
         stats_table.add_row("Average Length:", f"{avg_len:,.0f}")
-        stats_table.add_row("Min Length:", f"[red]{min(chunk_lengths):,}[/red]")
-        stats_table.add_row("Max Length:", f"[yellow]{max(chunk_lengths):,}[/yellow]")
+        stats_table.add_row("Min Length:", f"[red]{min_chunk['length']:,}[/red]")
+        stats_table.add_row("Max Length:", f"[yellow]{max_chunk['length']:,}[/yellow]")
 
         console.print(
             Panel(
@@ -321,15 +294,14 @@ def main(
         hist_table.add_column(justify="right", style="green", width=8)
         hist_table.add_column()
 
-        buckets = [0, 500, 1000, 1500, 2000, 3000, 5000]
-        for i in range(len(buckets)):
+        buckets = LENGTH_BUCKETS
+        for i, count in enumerate(stats["length_histogram"]):
             lower = buckets[i]
             upper = buckets[i + 1] if i + 1 < len(buckets) else float("inf")
-            count = sum(1 for length in chunk_lengths if lower <= length < upper)
             label = (
                 f"{lower:>5}-{upper:<5}" if upper != float("inf") else f"{lower:>5}+"
             )
-            bar_width = int((count / len(chunk_lengths)) * 40)
+            bar_width = int((count / total_chunks) * 40)
             bar = "█" * bar_width
             hist_table.add_row(label, f"{count:,}", bar)
 
@@ -338,13 +310,14 @@ def main(
         )
 
     # Content type distribution
+    code_chunks, doc_chunks = stats["code_chunks"], stats["doc_chunks"]
     if code_chunks or doc_chunks:
         content_table = Table.grid(padding=(0, 2))
         content_table.add_column(style="bold")
         content_table.add_column(justify="right", style="green")
         content_table.add_column(style="dim")
 
-        total = len(chunk_lengths)
+        total = total_chunks
         content_table.add_row(
             "Code Chunks:", f"{code_chunks:,}", f"({code_chunks / total * 100:.1f}%)"
         )
@@ -368,6 +341,7 @@ def main(
         )
 
     # Repository breakdown
+    repo_stats = stats["repositories"]
     if repo_stats:
         repo_table = Table.grid(padding=(0, 2))
         repo_table.add_column(style="bold cyan")
@@ -383,6 +357,7 @@ def main(
         )
 
     # Depth distribution
+    depth_distribution = {int(depth): n for depth, n in stats["depths"].items()}
     if depth_distribution:
         depth_table = Table.grid(padding=(0, 2))
         depth_table.add_column(style="bold")
@@ -405,9 +380,10 @@ def main(
         )
 
     # Quality warnings
-    if empty_chunks:
+    empty_chunks = stats["small_chunk_samples"]
+    if stats["small_chunks"]:
         warning_text = (
-            f"[yellow]⚠️  Found {len(empty_chunks)} chunks"
+            f"[yellow]⚠️  Found {stats['small_chunks']} chunks"
             " with < 50 characters[/yellow]\n\n"
         )
         warning_text += "[dim]These may indicate parsing issues or noise:\n"
@@ -416,14 +392,50 @@ def main(
             warning_text += (
                 f'  • {chunk["file"]} ({chunk["length"]} chars): "{preview}..."\n'
             )
-        if len(empty_chunks) > 5:
-            warning_text += f"  ... and {len(empty_chunks) - 5} more[/dim]"
+        if stats["small_chunks"] > 5:
+            warning_text += f"  ... and {stats['small_chunks'] - 5} more[/dim]"
 
         console.print(
             Panel(warning_text, title="⚠️  Quality Warnings", border_style="yellow")
         )
 
+    # Boilerplate excluded from embeddings
+    if stats["boilerplate_chunks"]:
+        excluded = stats["boilerplate_chars"]
+        boilerplate_table = Table.grid(padding=(0, 2))
+        boilerplate_table.add_column(style="bold")
+        boilerplate_table.add_column(justify="right", style="green")
+        boilerplate_table.add_column(style="dim")
+        boilerplate_table.add_row(
+            "Chunks with Boilerplate:",
+            f"{stats['boilerplate_chunks']:,}",
+            f"({stats['boilerplate_chunks'] / total_chunks * 100:.1f}%)",
+        )
+        boilerplate_table.add_row(
+            "Characters Not Embedded:",
+            f"{excluded:,}",
+            f"({excluded / stats['total_chars'] * 100:.1f}% of text)",
+        )
+        boilerplate_table.add_row(
+            "Tokens Saved (est.):",
+            f"[yellow]~{excluded // CHARS_PER_TOKEN:,}[/yellow]",
+            "per full re-embedding",
+        )
+        console.print(
+            Panel(
+                boilerplate_table,
+                title="✂️  Boilerplate Excluded from Embeddings",
+                border_style="blue",
+            )
+        )
+
+    # Near-duplicates
+    dedup = stats.get("dedup")
+    if dedup:
+        render_dedup(dedup)
+
     # File types
+    file_types = stats["file_types"]
     if file_types:
         file_types_text = ", ".join(sorted(file_types))
         console.print(
@@ -431,6 +443,7 @@ def main(
         )
 
     # Metadata keys
+    metadata_keys = stats["metadata_keys"]
     if metadata_keys:
         metadata_text = ", ".join(sorted(metadata_keys))
         console.print(
@@ -438,16 +451,7 @@ def main(
         )
 
     # Sample directories (show top-level only for brevity)
-    dirs = set()
-    for fp in file_paths:
-        parent = Path(fp).parent
-        # Get top-level directory
-        if parent != Path("."):
-            top_level = str(parent).split("/")[0]
-            dirs.add(top_level)
-        else:
-            dirs.add(".")
-
+    dirs = stats["directories"]
     if dirs:
         # Create a table with columns for directories
         dir_table = Table.grid(padding=(0, 2))
@@ -471,8 +475,8 @@ def main(
         )
 
     # Sample file paths
-    if file_paths:
-        sample_paths = "\n".join(sorted(file_paths)[:10])
+    if stats["sample_files"]:
+        sample_paths = "\n".join(stats["sample_files"])
         console.print(
             Panel(
                 sample_paths,
@@ -484,5 +488,50 @@ def main(
     console.print()
 
 
+def render_dedup(dedup: dict[str, Any]) -> None:
+    """Print the near-duplicate summary of a stats manifest."""
+    scanned = dedup["chunks"]
+    duplicates = dedup["duplicates"]
+    share = duplicates / scanned * 100 if scanned else 0.0
+
+    dedup_table = Table.grid(padding=(0, 2))
+    dedup_table.add_column(style="bold")
+    dedup_table.add_column(justify="right", style="green")
+    dedup_table.add_column(style="dim")
+    dedup_table.add_row(
+        "Policy:", dedup["policy"], f"(threshold {dedup['threshold']:.2f})"
+    )
+    dedup_table.add_row("Chunks Scanned:", f"{scanned:,}", "")
+    dedup_table.add_row(
+        "Near-Duplicates:", f"{duplicates:,}", f"({share:.1f}% of chunks)"
+    )
+    dedup_table.add_row("Clusters:", f"{dedup['clusters']:,}", "")
+    if dedup["removed"]:
+        dedup_table.add_row(
+            "Not Embedded:",
+            f"[yellow]{dedup['removed']:,}[/yellow]",
+            f"({dedup['duplicate_chars']:,} characters saved)",
+        )
+    else:
+        dedup_table.add_row(
+            "Potential Savings:",
+            f"[yellow]{duplicates:,}[/yellow]",
+            f"({dedup['duplicate_chars']:,} characters; use --dedup skip)",
+        )
+
+    samples = "\n".join(
+        f"  • {sample['file']} ≈ {sample['canonical']}"
+        for sample in dedup["samples"][:5]
+    )
+    content = Group(dedup_table, Text(f"\nExamples:\n{samples}", style="dim"))
+    console.print(
+        Panel(
+            content if samples else dedup_table,
+            title="🧬 Near-Duplicate Chunks",
+            border_style="blue",
+        )
+    )
+
+
 if __name__ == "__main__":
     app()
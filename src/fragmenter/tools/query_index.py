@@ -1,15 +1,32 @@
 """Query a RAG index with questions and save responses to files."""
 
+import asyncio
+import json
+from contextlib import nullcontext
 from pathlib import Path
+from typing import Any
 
 import typer
 from dotenv import load_dotenv
+from llama_index.core.indices.base import BaseIndex
 from rich.console import Console
 from rich.panel import Panel
+from rich.progress import BarColumn, MofNCompleteColumn, Progress, TimeElapsedColumn
+from rich.table import Table
 from rich.text import Text
 
 from fragmenter.config import RAGSettings
-from fragmenter.rag.inference import load_index, query_and_save, query_index
+from fragmenter.rag.filters import build_where, get_collections
+from fragmenter.rag.inference import (
+    QueryTimings,
+    abatch_query,
+    load_batch_queries,
+    load_index,
+    query_and_save,
+    query_index,
+    stream_and_save,
+    stream_query,
+)
 from fragmenter.utils.logging import setup_logging
 
 app = typer.Typer(
@@ -36,14 +53,27 @@ def main(
         exists=True,
         dir_okay=False,
     ),
+    batch: Path = typer.Option(
+        None,
+        "--batch",
+        help='JSONL file with one {"query": ...} object per line '
+        "(requires --output for the results JSONL)",
+        exists=True,
+        dir_okay=False,
+    ),
+    concurrency: int = typer.Option(
+        4,
+        "--concurrency",
+        help="Maximum number of concurrent queries in --batch mode",
+    ),
     # Paths
     storage_dir: Path = typer.Option(
         ...,
         "--storage-dir",
         "-s",
-        help="Index storage directory",
+        help="Index storage directory or .fragidx snapshot",
         exists=True,
-        file_okay=False,
+        file_okay=True,
         dir_okay=True,
     ),
     # Output
@@ -59,11 +89,29 @@ def main(
         "-d",
         help="Output directory for saved files",
     ),
+    where: list[str] = typer.Option(
+        None,
+        "--where",
+        "-w",
+        help="Metadata filter key=value, repeatable "
+        "(repository, file_type, path, kind=code|docs)",
+    ),
     code_only: bool = typer.Option(
         False,
         "--code-only",
         help="Extract and save only code blocks from response",
     ),
+    stream: bool = typer.Option(
+        False,
+        "--stream",
+        help="Print (and save) tokens as they are generated (not with --batch)",
+    ),
+    timings: bool = typer.Option(
+        False,
+        "--timings",
+        help="Report the time per query stage, time to first token and "
+        "retrieved context size",
+    ),
     language: str = typer.Option(
         None,
         "--language",
@@ -107,18 +155,23 @@ def main(
         "--embed-model",
         help="Embedding model name",
     ),
+    search_ef: int = typer.Option(
+        None,
+        "--search-ef",
+        help="HNSW ef_search for queries (higher: better recall, slower)",
+    ),
     # Other
     ollama_base_url: str = typer.Option(
         None,
         "--ollama-url",
         help="Ollama base URL (default: http://localhost:11434)",
     ),
-    logs_dir: Path = typer.Option(
+    logs_dir: Path | None = typer.Option(
         None,
         "--logs-dir",
         help="Logs directory",
     ),
-    env_file: Path = typer.Option(
+    env_file: Path | None = typer.Option(
         None,
         "--env-file",
         help="Path to .env file (default: search parent directories)",
@@ -142,9 +195,37 @@ def main(
     setup_logging(logs_dir=logs_dir, level=log_level)
 
     # Validate input
-    if not query and not file:
+    if batch:
+        if stream:
+            console.print(
+                "[red]Error:[/red] --stream cannot be combined with --batch "
+                "(batch answers go to --output)",
+                style="bold red",
+            )
+            raise typer.Exit(1)
+        if query or file:
+            console.print(
+                "[red]Error:[/red] Cannot combine --batch with --query or --file",
+                style="bold red",
+            )
+            raise typer.Exit(1)
+        if not output:
+            console.print(
+                "[red]Error:[/red] --batch requires --output for the results file",
+                style="bold red",
+            )
+            raise typer.Exit(1)
+        if timings:
+            console.print(
+                "[red]Error:[/red] --timings is not supported with --batch "
+                "(results already include elapsed_s)",
+                style="bold red",
+            )
+            raise typer.Exit(1)
+    elif not query and not file:
         console.print(
-            "[red]Error:[/red] Must provide either --query or --file", style="bold red"
+            "[red]Error:[/red] Must provide either --query, --file or --batch",
+            style="bold red",
         )
         raise typer.Exit(1)
     if query and file:
@@ -158,38 +239,57 @@ def main(
         query = file.read_text(encoding="utf-8").strip()
         console.print(f"[dim]Read query from {file}[/dim]")
 
+    query_timings = QueryTimings() if timings else None
+
     # Create settings instance with CLI overrides
-    settings = RAGSettings()
-
-    # Override from CLI args if provided
-    if llm_provider is not None:
-        settings.LLM_PROVIDER = llm_provider
-    if llm_model is not None:
-        settings.LLM_MODEL = llm_model
-    if llm_temperature is not None:
-        settings.LLM_TEMPERATURE = llm_temperature
-    if llm_max_tokens is not None:
-        settings.LLM_MAX_TOKENS = llm_max_tokens
-    if llm_timeout is not None:
-        settings.LLM_TIMEOUT = llm_timeout
-    if ollama_base_url is not None:
-        settings.OLLAMA_BASE_URL = ollama_base_url
-    if embed_provider is not None:
-        settings.EMBED_PROVIDER = embed_provider
-    if embed_model is not None:
-        settings.EMBED_MODEL = embed_model
+    settings = RAGSettings().apply_overrides(
+        LLM_PROVIDER=llm_provider,
+        LLM_MODEL=llm_model,
+        LLM_TEMPERATURE=llm_temperature,
+        LLM_MAX_TOKENS=llm_max_tokens,
+        LLM_TIMEOUT=llm_timeout,
+        OLLAMA_BASE_URL=ollama_base_url,
+        EMBED_PROVIDER=embed_provider,
+        EMBED_MODEL=embed_model,
+        HNSW_SEARCH_EF=search_ef,
+    )
 
     # Configure LLM and embeddings
     console.print("\n[bold cyan]Configuring RAG System[/bold cyan]")
     console.print(f"LLM: {settings.LLM_PROVIDER}/{settings.LLM_MODEL}")
     console.print(f"Embeddings: {settings.EMBED_PROVIDER}/{settings.EMBED_MODEL}")
 
-    settings.configure_llm_settings()
+    with query_timings.stage("settings") if query_timings else nullcontext():
+        settings.configure_llm_settings()
 
     # Load index
     console.print("\n[bold cyan]Loading Index[/bold cyan]")
     console.print(f"Storage: {storage_dir}")
-    index = load_index(str(storage_dir))
+    with query_timings.stage("load_index") if query_timings else nullcontext():
+        index = load_index(str(storage_dir), hnsw=settings.hnsw_config())
+
+    try:
+        where_clause = build_where(where or [], collections=get_collections(index))
+    except ValueError as e:
+        console.print(f"[red]Error:[/red] {e}", style="bold red")
+        raise typer.Exit(1)
+    if where_clause:
+        console.print(f"Filter: {where_clause}")
+
+    if batch:
+        if not output.is_absolute():
+            output = output_dir / output
+        try:
+            queries = load_batch_queries(batch)
+        except ValueError as e:
+            console.print(f"[red]Error:[/red] {e}", style="bold red")
+            raise typer.Exit(1)
+        asyncio.run(
+            run_batch(
+                index, queries, output, concurrency, code_only, language, where_clause
+            )
+        )
+        return
 
     # Display query (truncated if too long)
     console.print("\n[bold cyan]Query[/bold cyan]")
@@ -201,14 +301,31 @@ def main(
     console.print(Panel(Text(query_preview, no_wrap=False), border_style="cyan"))
 
     # Query the index
-    if output:
+    if stream:
+        stream_response(
+            index,
+            query,
+            output,
+            output_dir,
+            code_only,
+            language,
+            where_clause,
+            timings=query_timings,
+        )
+    elif output:
         # Resolve output path
         if not output.is_absolute():
             output = output_dir / output
 
         with console.status("[bold green]Generating response...", spinner="dots"):
             response_text = query_and_save(
-                index, query, output, code_only=code_only, language=language
+                index,
+                query,
+                output,
+                code_only=code_only,
+                language=language,
+                where=where_clause,
+                timings=query_timings,
             )
 
         console.print(f"\n[green]✓[/green] Response saved to: {output}")
@@ -219,16 +336,134 @@ def main(
         console.print(Panel(preview, border_style="green"))
     else:
         with console.status("[bold green]Generating response...", spinner="dots"):
-            response = query_index(index, query)
+            response = query_index(
+                index, query, where=where_clause, timings=query_timings
+            )
         response_text = str(response)
 
         console.print("\n[bold cyan]Response[/bold cyan]")
 
         # Try to detect and syntax highlight code
-        if "```" in response_text:
-            console.print(response_text)
-        else:
-            console.print(Panel(response_text, border_style="green"))
+        with query_timings.stage("output") if query_timings else nullcontext():
+            if "```" in response_text:
+                console.print(response_text)
+            else:
+                console.print(Panel(response_text, border_style="green"))
+
+    if query_timings:
+        print_timings(query_timings)
+
+
+def print_timings(timings: QueryTimings) -> None:
+    """Print the time per query stage, time to first token and context size."""
+    report = timings.to_dict()
+    total = report["seconds"] or 1.0
+    table = Table(title="Query timings")
+    table.add_column("Stage")
+    table.add_column("Seconds", justify="right")
+    table.add_column("Share", justify="right")
+    for name, seconds in report["stages"].items():
+        table.add_row(name, f"{seconds:.3f}", f"{seconds / total:.0%}")
+    # Console output between the stages, logging and the like
+    other = max(0.0, report["seconds"] - sum(report["stages"].values()))
+    table.add_row("other", f"{other:.3f}", f"{other / total:.0%}", style="dim")
+    table.add_row("total", f"{report['seconds']:.3f}", "100%", style="bold")
+
+    console.print()
+    console.print(table)
+    ttft = report["ttft_s"]
+    console.print(
+        f"Time to first token: {f'{ttft:.3f}s' if ttft is not None else 'n/a'}"
+        f" (after synthesis started), retrieved context: "
+        f"{report['context_tokens']} tokens"
+    )
+    timings.log_summary()
+
+
+def stream_response(
+    index: BaseIndex,
+    query: str,
+    output: Path | None,
+    output_dir: Path,
+    code_only: bool,
+    language: str | None,
+    where: dict[str, Any] | None = None,
+    timings: QueryTimings | None = None,
+) -> None:
+    """Print tokens as they arrive and, with --output, write them to the file."""
+
+    def print_token(token: str) -> None:
+        console.out(token, end="", highlight=False)
+
+    console.print("\n[bold cyan]Response[/bold cyan]")
+    if output:
+        if not output.is_absolute():
+            output = output_dir / output
+        stream_and_save(
+            index,
+            query,
+            output,
+            code_only=code_only,
+            language=language,
+            on_token=print_token,
+            where=where,
+            timings=timings,
+        )
+        console.print(f"\n\n[green]✓[/green] Response saved to: {output}")
+    else:
+        with console.status("[bold green]Retrieving context...", spinner="dots"):
+            response = stream_query(index, query, where=where, timings=timings)
+        for token in response.response_gen:
+            with timings.stage("output") if timings else nullcontext():
+                print_token(token)
+        console.print()
+
+
+async def run_batch(
+    index: BaseIndex,
+    queries: list[dict[str, Any]],
+    output: Path,
+    concurrency: int,
+    code_only: bool,
+    language: str | None,
+    where: dict[str, Any] | None = None,
+) -> None:
+    """Run a batch of queries and append each result to a JSONL file."""
+    console.print(
+        f"\n[bold cyan]Batch[/bold cyan]\n{len(queries)} queries, "
+        f"concurrency={concurrency}"
+    )
+    output.parent.mkdir(parents=True, exist_ok=True)
+    failed = 0
+
+    with (
+        open(output, "w", encoding="utf-8") as f,
+        Progress(
+            "[progress.description]{task.description}",
+            BarColumn(),
+            MofNCompleteColumn(),
+            TimeElapsedColumn(),
+            console=console,
+        ) as progress,
+    ):
+        task = progress.add_task("Querying", total=len(queries))
+        async for result in abatch_query(
+            index,
+            queries,
+            concurrency=concurrency,
+            code_only=code_only,
+            language=language,
+            where=where,
+        ):
+            # Write results as they complete so partial runs are still usable
+            f.write(json.dumps(result, ensure_ascii=False) + "\n")
+            f.flush()
+            failed += result["error"] is not None
+            progress.advance(task)
+
+    console.print(f"\n[green]✓[/green] Results saved to: {output}")
+    if failed:
+        console.print(f"[yellow]{failed} of {len(queries)} queries failed[/yellow]")
 
 
 if __name__ == "__main__":
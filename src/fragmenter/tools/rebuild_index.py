@@ -1,14 +1,41 @@
+from contextlib import nullcontext
 from pathlib import Path
 
 import typer
 from dotenv import load_dotenv
 from loguru import logger
+from rich.console import Console
+from rich.progress import (
+    BarColumn,
+    MofNCompleteColumn,
+    Progress,
+    ProgressColumn,
+    Task,
+    TimeElapsedColumn,
+    TimeRemainingColumn,
+)
+from rich.text import Text
 
 from fragmenter.config import RAGSettings
+from fragmenter.rag.dedup import DEDUP_POLICIES
 from fragmenter.rag.ingestion import build_index
+from fragmenter.rag.instrumentation import BuildReport
+from fragmenter.rag.sharding import build_sharded_index, is_sharded
 from fragmenter.utils.logging import setup_logging
 
 app = typer.Typer(help="Rebuild or update the RAG index with incremental changes.")
+console = Console()
+
+
+class ThroughputColumn(ProgressColumn):
+    """Items per second of a build stage, in the stage's unit."""
+
+    def render(self, task: Task) -> Text:
+        unit = task.fields.get("unit", "items")
+        speed = task.fields.get("per_s") if task.finished else task.speed
+        if speed is None:
+            return Text(f"? {unit}/s", style="progress.data.speed")
+        return Text(f"{speed:,.1f} {unit}/s", style="progress.data.speed")
 
 
 @app.command()
@@ -79,6 +106,97 @@ def main(
         "--num-workers",
         help="Number of parallel workers for ingestion pipeline.",
     ),
+    sharded: bool = typer.Option(
+        False,
+        "--sharded",
+        help="Store one collection per repository (detected automatically "
+        "once a storage directory is sharded).",
+    ),
+    shard: list[str] = typer.Option(
+        None,
+        "--shard",
+        help="Only rebuild this shard (repository name or 'unscoped'); "
+        "repeatable. Implies --sharded.",
+    ),
+    dedup: str = typer.Option(
+        None,
+        "--dedup",
+        help="Near-duplicate chunks: off, report (log only), skip (store one "
+        "copy) or alias (store one copy listing the others' paths).",
+    ),
+    dedup_threshold: float = typer.Option(
+        None,
+        "--dedup-threshold",
+        help="Similarity (0-1) from which chunks count as near-duplicates "
+        "(default: 0.9).",
+    ),
+    strip_boilerplate: bool = typer.Option(
+        None,
+        "--strip-boilerplate/--no-strip-boilerplate",
+        help="Exclude license headers and other blocks repeated across files "
+        "from embeddings (stored text is unchanged).",
+    ),
+    boilerplate_min_share: float = typer.Option(
+        None,
+        "--boilerplate-min-share",
+        help="Share of files (0-1) a block must appear in to count as "
+        "boilerplate (default: 0.05).",
+    ),
+    vector_store: str = typer.Option(
+        None,
+        "--vector-store",
+        help="Vector store for a new index: chroma (HNSW) or flat (exact, "
+        "memory-mapped). Default: keep the existing backend, else chroma.",
+    ),
+    flat_dtype: str = typer.Option(
+        None,
+        "--flat-dtype",
+        help="Vector dtype for a new flat store: float32, float16 or int8.",
+    ),
+    flat_dimensions: int = typer.Option(
+        None,
+        "--flat-dimensions",
+        help="Keep only the leading N embedding dimensions in a new flat "
+        "store (Matryoshka models only).",
+    ),
+    flat_binary: bool = typer.Option(
+        None,
+        "--flat-binary/--no-flat-binary",
+        help="Shortlist by binary sketch and rescore (new flat stores).",
+    ),
+    hnsw_space: str = typer.Option(
+        None,
+        "--hnsw-space",
+        help="HNSW distance for new collections: l2, cosine or ip.",
+    ),
+    hnsw_m: int = typer.Option(
+        None,
+        "--hnsw-m",
+        help="HNSW max neighbors per node for new collections (Chroma: 16).",
+    ),
+    hnsw_construction_ef: int = typer.Option(
+        None,
+        "--hnsw-construction-ef",
+        help="HNSW ef_construction for new collections (Chroma: 100).",
+    ),
+    hnsw_search_ef: int = typer.Option(
+        None,
+        "--hnsw-search-ef",
+        help="HNSW ef_search (Chroma: 100); also updates existing collections.",
+    ),
+    metrics_file: Path | None = typer.Option(
+        None,
+        "--metrics-file",
+        help="Also write the per-stage build timings as a Prometheus textfile "
+        "(e.g. for the node_exporter textfile collector).",
+        dir_okay=False,
+        resolve_path=True,
+    ),
+    progress: bool = typer.Option(
+        True,
+        "--progress/--no-progress",
+        help="Show live per-stage progress with throughput and ETA.",
+    ),
 ) -> None:
     """Build or update the RAG index with automatic change detection.
 
@@ -86,8 +204,12 @@ def main(
     - Hash-based change detection (only processes changed files)
     - Automatic deletion handling (removes stale documents)
     - File-type-specific parsing (Markdown, Code, Text, PDF)
-    - Chroma persistent vector store with UPSERTS_AND_DELETE support
+    - Chroma or flat persistent vector store with UPSERTS_AND_DELETE support
     - Optional metadata extraction (keywords)
+    - Optional near-duplicate detection (MinHash/LSH) before embedding
+    - Optional exclusion of repeated license headers from embeddings
+    - Optional per-repository sharding with single-shard rebuilds
+    - Per-stage timings in build_report.json (optionally a Prometheus textfile)
     """
     # Load environment variables
     if env_file and env_file.exists():
@@ -104,7 +226,20 @@ def main(
         setup_logging(level=log_level)
 
     # Configure embeddings from environment
-    settings = RAGSettings()
+    settings = RAGSettings().apply_overrides(
+        DEDUP_POLICY=dedup,
+        DEDUP_THRESHOLD=dedup_threshold,
+        BOILERPLATE_STRIP=strip_boilerplate,
+        BOILERPLATE_MIN_SHARE=boilerplate_min_share,
+        VECTOR_STORE=vector_store,
+        FLAT_STORE_DTYPE=flat_dtype,
+        FLAT_STORE_DIMENSIONS=flat_dimensions,
+        FLAT_STORE_BINARY=flat_binary,
+        HNSW_SPACE=hnsw_space,
+        HNSW_M=hnsw_m,
+        HNSW_CONSTRUCTION_EF=hnsw_construction_ef,
+        HNSW_SEARCH_EF=hnsw_search_ef,
+    )
     logger.info(
         f"Configuring embeddings: {settings.EMBED_PROVIDER}/{settings.EMBED_MODEL}"
     )
@@ -120,23 +255,85 @@ def main(
         f"num_workers={num_workers}"
     )
 
+    if settings.DEDUP_POLICY not in DEDUP_POLICIES:
+        logger.error(
+            f"Unknown dedup policy '{settings.DEDUP_POLICY}', "
+            f"expected one of: {', '.join(DEDUP_POLICIES)}"
+        )
+        raise typer.Exit(code=1)
+    if settings.DEDUP_POLICY != "off":
+        logger.info(
+            f"Near-duplicate chunks: {settings.DEDUP_POLICY} "
+            f"(threshold {settings.DEDUP_THRESHOLD})"
+        )
+
+    sharded = sharded or bool(shard) or is_sharded(storage_dir)
+    if sharded and settings.VECTOR_STORE == "flat":
+        logger.error("Sharded indexes use Chroma; --vector-store flat is not supported")
+        raise typer.Exit(code=1)
+    if sharded:
+        scope = ", ".join(shard) if shard else "all shards"
+        logger.info(f"Sharded layout: one collection per repository ({scope})")
+
+    display = (
+        Progress(
+            "[progress.description]{task.description:<11}",
+            BarColumn(),
+            MofNCompleteColumn(),
+            ThroughputColumn(),
+            TimeElapsedColumn(),
+            TimeRemainingColumn(),
+            console=console,
+        )
+        if progress
+        else None
+    )
+
     # Use data_dir as project root for relative path calculations
     try:
-        build_index(
-            input_dir=data_dir,
-            persist_dir=storage_dir,
-            project_root=data_dir,
-            min_chunk_size_code=min_chunk_size_code,
-            min_chunk_size_docs=min_chunk_size_docs,
-            min_chunk_size_config=min_chunk_size_config,
-            enable_extractors=enable_extractors,
-            num_workers=num_workers,
-        )
+        with display or nullcontext():
+            report = BuildReport(progress=display)
+            if sharded:
+                build_sharded_index(
+                    input_dir=data_dir,
+                    persist_dir=storage_dir,
+                    project_root=data_dir,
+                    shards=shard,
+                    min_chunk_size_code=min_chunk_size_code,
+                    min_chunk_size_docs=min_chunk_size_docs,
+                    min_chunk_size_config=min_chunk_size_config,
+                    enable_extractors=enable_extractors,
+                    num_workers=num_workers,
+                    hnsw=settings.hnsw_config(),
+                    dedup=settings.dedup_config(),
+                    boilerplate=settings.boilerplate_config(),
+                    report=report,
+                )
+            else:
+                build_index(
+                    input_dir=data_dir,
+                    persist_dir=storage_dir,
+                    project_root=data_dir,
+                    backend=settings.VECTOR_STORE,
+                    flat=settings.flat_config(),
+                    min_chunk_size_code=min_chunk_size_code,
+                    min_chunk_size_docs=min_chunk_size_docs,
+                    min_chunk_size_config=min_chunk_size_config,
+                    enable_extractors=enable_extractors,
+                    num_workers=num_workers,
+                    hnsw=settings.hnsw_config(),
+                    dedup=settings.dedup_config(),
+                    boilerplate=settings.boilerplate_config(),
+                    report=report,
+                )
         logger.success("Index build/update completed successfully!")
     except Exception as e:
         logger.error(f"Failed to build index: {e}")
         raise typer.Exit(code=1)
 
+    if metrics_file:
+        report.write_prometheus(metrics_file)
+
 
 if __name__ == "__main__":
     app()
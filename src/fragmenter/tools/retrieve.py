@@ -0,0 +1,153 @@
+"""Retrieve ranked chunks from a RAG index without LLM synthesis."""
+
+import json
+from pathlib import Path
+
+import typer
+from dotenv import load_dotenv
+from loguru import logger
+
+from fragmenter.config import RAGSettings
+from fragmenter.rag.filters import build_where, get_collections
+from fragmenter.rag.inference import DEFAULT_TOP_K, load_index, retrieve
+from fragmenter.utils.logging import setup_logging
+
+app = typer.Typer(
+    help="Retrieve ranked chunks from a RAG index as JSON",
+    no_args_is_help=True,
+)
+
+
+@app.command()
+def main(
+    # Query input
+    query: str = typer.Option(
+        None,
+        "--query",
+        "-q",
+        help="Query to search for (use this OR --file, not both)",
+    ),
+    file: Path = typer.Option(
+        None,
+        "--file",
+        "-f",
+        help="File containing the query",
+        exists=True,
+        dir_okay=False,
+    ),
+    # Paths
+    storage_dir: Path = typer.Option(
+        ...,
+        "--storage-dir",
+        "-s",
+        help="Index storage directory or .fragidx snapshot",
+        exists=True,
+        file_okay=True,
+        dir_okay=True,
+    ),
+    top_k: int = typer.Option(
+        DEFAULT_TOP_K,
+        "--top-k",
+        "-k",
+        help="Number of chunks to return",
+    ),
+    where: list[str] = typer.Option(
+        None,
+        "--where",
+        "-w",
+        help="Metadata filter key=value, repeatable "
+        "(repository, file_type, path, kind=code|docs)",
+    ),
+    output: Path = typer.Option(
+        None,
+        "--output",
+        "-o",
+        help="Write JSON to this file instead of stdout",
+    ),
+    # Embedding configuration
+    embed_provider: str = typer.Option(
+        None,
+        "--embed-provider",
+        help="Embedding provider: openai, huggingface, ollama",
+    ),
+    embed_model: str = typer.Option(
+        None,
+        "--embed-model",
+        help="Embedding model name",
+    ),
+    search_ef: int = typer.Option(
+        None,
+        "--search-ef",
+        help="HNSW ef_search for queries (higher: better recall, slower)",
+    ),
+    ollama_base_url: str = typer.Option(
+        None,
+        "--ollama-url",
+        help="Ollama base URL (default: http://localhost:11434)",
+    ),
+    # Other
+    logs_dir: Path | None = typer.Option(
+        None,
+        "--logs-dir",
+        help="Logs directory",
+    ),
+    env_file: Path | None = typer.Option(
+        None,
+        "--env-file",
+        help="Path to .env file (default: search parent directories)",
+    ),
+    debug: bool = typer.Option(
+        False,
+        "--debug",
+        help="Enable debug logging",
+    ),
+) -> None:
+    """Retrieve the top-k chunks for a query and print them as JSON."""
+    # Load environment variables
+    if env_file and env_file.exists():
+        load_dotenv(env_file)
+    else:
+        load_dotenv()
+
+    # Setup logging with appropriate level (console logs go to stderr)
+    log_level = "DEBUG" if debug else "INFO"
+    setup_logging(logs_dir=logs_dir, level=log_level)
+
+    # Validate input
+    if bool(query) == bool(file):
+        logger.error("Provide exactly one of --query or --file")
+        raise typer.Exit(1)
+    if file:
+        query = file.read_text(encoding="utf-8").strip()
+
+    # Only the embedding model is needed; no LLM is configured or called
+    settings = RAGSettings().apply_overrides(
+        EMBED_PROVIDER=embed_provider,
+        EMBED_MODEL=embed_model,
+        OLLAMA_BASE_URL=ollama_base_url,
+        HNSW_SEARCH_EF=search_ef,
+    )
+    logger.info(f"Embeddings: {settings.EMBED_PROVIDER}/{settings.EMBED_MODEL}")
+    settings.configure_embed_settings()
+
+    index = load_index(str(storage_dir), hnsw=settings.hnsw_config())
+    try:
+        where_clause = build_where(where or [], collections=get_collections(index))
+    except ValueError as e:
+        logger.error(str(e))
+        raise typer.Exit(1)
+
+    nodes = retrieve(index, query, top_k=top_k, where=where_clause)
+    result = {"query": query, "top_k": top_k, "where": where_clause, "nodes": nodes}
+
+    payload = json.dumps(result, indent=2, ensure_ascii=False, default=str)
+    if output:
+        output.parent.mkdir(parents=True, exist_ok=True)
+        output.write_text(payload + "\n", encoding="utf-8")
+        logger.success(f"Saved {len(nodes)} chunks to: {output}")
+    else:
+        print(payload)
+
+
+if __name__ == "__main__":
+    app()
@@ -5,7 +5,13 @@ from pathlib import Path
 import typer
 from loguru import logger
 
-from fragmenter.scraping.scraper import scrape_site
+from fragmenter.scraping.crawler import (
+    DEFAULT_CONCURRENCY,
+    DEFAULT_PER_HOST,
+    DEFAULT_RATE,
+    scrape_site,
+)
+from fragmenter.scraping.frontier import DEFAULT_MAX_DEPTH
 from fragmenter.utils.logging import setup_logging
 
 app = typer.Typer(
@@ -29,7 +35,55 @@ def main(
         "-f",
         help="Output format: markdown or html",
     ),
-    logs_dir: Path = typer.Option(
+    concurrency: int = typer.Option(
+        DEFAULT_CONCURRENCY,
+        "--concurrency",
+        "-c",
+        help="Maximum requests in flight over all hosts",
+    ),
+    per_host: int = typer.Option(
+        DEFAULT_PER_HOST,
+        "--per-host",
+        help="Maximum requests in flight per host",
+    ),
+    rate: float = typer.Option(
+        DEFAULT_RATE,
+        "--rate",
+        help="Maximum requests per second per host (0: no limit)",
+    ),
+    workers: int = typer.Option(
+        None,
+        "--workers",
+        help="Processes for page parsing (default: CPU count, max 8)",
+    ),
+    max_depth: int = typer.Option(
+        DEFAULT_MAX_DEPTH,
+        "--max-depth",
+        help="Links to follow from the base page and sitemap pages "
+        "(0: those pages only)",
+    ),
+    max_pages: int = typer.Option(
+        None,
+        "--max-pages",
+        help="Stop after fetching this many pages (default: no limit)",
+    ),
+    sitemaps: bool = typer.Option(
+        True,
+        "--sitemaps/--no-sitemaps",
+        help="Seed the crawl with the pages listed in the site's sitemaps",
+    ),
+    robots: bool = typer.Option(
+        True,
+        "--robots/--no-robots",
+        help="Obey robots.txt Disallow rules and Crawl-delay",
+    ),
+    state_file: Path | None = typer.Option(
+        None,
+        "--state-file",
+        help="Crawl state for incremental re-scrapes "
+        "(default: .crawl-state in the output directory)",
+    ),
+    logs_dir: Path | None = typer.Option(
         None,
         "--logs-dir",
         "-l",
@@ -57,7 +111,20 @@ def main(
     logger.info(f"Scraping {url} to {output_dir} (format: {format})")
 
     try:
-        scrape_site(url, output_dir, format=format)
+        scrape_site(
+            url,
+            output_dir,
+            format=format,
+            concurrency=concurrency,
+            per_host=per_host,
+            rate=rate,
+            workers=workers,
+            max_depth=max_depth,
+            max_pages=max_pages,
+            sitemaps=sitemaps,
+            robots=robots,
+            state_file=state_file,
+        )
         logger.success(f"Scraping completed! Content saved to {output_dir}")
     except Exception as e:
         logger.error(f"Scraping failed: {e}")
@@ -0,0 +1,148 @@
+"""Serve a RAG index over HTTP, keeping it loaded between queries."""
+
+from pathlib import Path
+
+import typer
+from dotenv import load_dotenv
+from loguru import logger
+
+from fragmenter.config import RAGSettings
+from fragmenter.rag.inference import DEFAULT_TOP_K, load_index
+from fragmenter.rag.server import DEFAULT_HOST, DEFAULT_PORT, serve
+from fragmenter.utils.logging import setup_logging
+
+app = typer.Typer(
+    help="Serve a RAG index over HTTP",
+    no_args_is_help=True,
+)
+
+
+@app.command()
+def main(
+    storage_dir: Path = typer.Option(
+        ...,
+        "--storage-dir",
+        "-s",
+        help="Index storage directory or .fragidx snapshot",
+        exists=True,
+        file_okay=True,
+        dir_okay=True,
+    ),
+    host: str = typer.Option(
+        DEFAULT_HOST,
+        "--host",
+        help="Interface to bind to",
+    ),
+    port: int = typer.Option(
+        DEFAULT_PORT,
+        "--port",
+        "-p",
+        help="Port to listen on",
+    ),
+    top_k: int = typer.Option(
+        DEFAULT_TOP_K,
+        "--top-k",
+        help="Default number of chunks to retrieve per request",
+    ),
+    # LLM configuration (overrides env vars)
+    llm_provider: str = typer.Option(
+        None,
+        "--llm-provider",
+        help="LLM provider: openai, ollama, anthropic, huggingface",
+    ),
+    llm_model: str = typer.Option(
+        None,
+        "--llm-model",
+        help="LLM model name",
+    ),
+    llm_temperature: float = typer.Option(
+        None,
+        "--temperature",
+        help="LLM temperature (0.0-1.0)",
+    ),
+    llm_max_tokens: int = typer.Option(
+        None,
+        "--max-tokens",
+        help="Maximum response tokens",
+    ),
+    llm_timeout: float = typer.Option(
+        None,
+        "--timeout",
+        help="LLM request timeout in seconds (default: 600)",
+    ),
+    # Embedding configuration
+    embed_provider: str = typer.Option(
+        None,
+        "--embed-provider",
+        help="Embedding provider: openai, huggingface, ollama",
+    ),
+    embed_model: str = typer.Option(
+        None,
+        "--embed-model",
+        help="Embedding model name",
+    ),
+    search_ef: int = typer.Option(
+        None,
+        "--search-ef",
+        help="HNSW ef_search for queries (higher: better recall, slower)",
+    ),
+    # Other
+    ollama_base_url: str = typer.Option(
+        None,
+        "--ollama-url",
+        help="Ollama base URL (default: http://localhost:11434)",
+    ),
+    logs_dir: Path | None = typer.Option(
+        None,
+        "--logs-dir",
+        help="Logs directory",
+    ),
+    env_file: Path | None = typer.Option(
+        None,
+        "--env-file",
+        help="Path to .env file (default: search parent directories)",
+    ),
+    debug: bool = typer.Option(
+        False,
+        "--debug",
+        help="Enable debug logging",
+    ),
+) -> None:
+    """Load the index once and answer retrieval and query requests over HTTP."""
+    # Load environment variables
+    if env_file and env_file.exists():
+        load_dotenv(env_file)
+        logger.info(f"Loaded environment from {env_file}")
+    else:
+        load_dotenv()
+
+    # Setup logging with appropriate level
+    log_level = "DEBUG" if debug else "INFO"
+    setup_logging(logs_dir=logs_dir, level=log_level)
+
+    settings = RAGSettings().apply_overrides(
+        LLM_PROVIDER=llm_provider,
+        LLM_MODEL=llm_model,
+        LLM_TEMPERATURE=llm_temperature,
+        LLM_MAX_TOKENS=llm_max_tokens,
+        LLM_TIMEOUT=llm_timeout,
+        OLLAMA_BASE_URL=ollama_base_url,
+        EMBED_PROVIDER=embed_provider,
+        EMBED_MODEL=embed_model,
+        HNSW_SEARCH_EF=search_ef,
+    )
+    logger.info(f"LLM: {settings.LLM_PROVIDER}/{settings.LLM_MODEL}")
+    logger.info(f"Embeddings: {settings.EMBED_PROVIDER}/{settings.EMBED_MODEL}")
+    settings.configure_llm_settings()
+
+    index = load_index(str(storage_dir), hnsw=settings.hnsw_config())
+
+    try:
+        serve(index, host=host, port=port, default_top_k=top_k)
+    except OSError as e:
+        logger.error(f"Failed to start server on {host}:{port}: {e}")
+        raise typer.Exit(code=1)
+
+
+if __name__ == "__main__":
+    app()
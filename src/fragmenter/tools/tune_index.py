@@ -0,0 +1,213 @@
+"""Tune the HNSW parameters of an index collection."""
+
+from pathlib import Path
+
+import chromadb
+import typer
+from loguru import logger
+from rich.console import Console
+from rich.table import Table
+
+from fragmenter.rag.sharding import is_sharded, load_registry
+from fragmenter.rag.tuning import (
+    DEFAULT_CONSTRUCTION_EF_GRID,
+    DEFAULT_M_GRID,
+    DEFAULT_SEARCH_EF_GRID,
+    choose_setting,
+    rebuild_collection,
+    tune_collection,
+)
+from fragmenter.rag.vector_stores import HNSW_BUILD_PARAMS, detect_vector_store
+from fragmenter.utils.logging import setup_logging
+
+console = Console()
+
+app = typer.Typer(
+    help="Measure recall and latency of HNSW settings and apply the best one.",
+    no_args_is_help=True,
+)
+
+
+@app.command()
+def main(
+    storage_dir: Path = typer.Option(
+        ...,
+        "--storage-dir",
+        "-s",
+        help="Index storage directory",
+        exists=True,
+        file_okay=False,
+        dir_okay=True,
+        resolve_path=True,
+    ),
+    shard: str = typer.Option(
+        None,
+        "--shard",
+        help="Shard to tune (repository name or 'unscoped'; sharded indexes)",
+    ),
+    m: list[int] = typer.Option(
+        None,
+        "--m",
+        help=f"max_neighbors values to try (default: {DEFAULT_M_GRID})",
+    ),
+    construction_ef: list[int] = typer.Option(
+        None,
+        "--construction-ef",
+        help=f"ef_construction values to try (default: {DEFAULT_CONSTRUCTION_EF_GRID})",
+    ),
+    search_ef: list[int] = typer.Option(
+        None,
+        "--search-ef",
+        help=f"ef_search values to try (default: {DEFAULT_SEARCH_EF_GRID})",
+    ),
+    top_k: int = typer.Option(
+        10,
+        "--top-k",
+        "-k",
+        help="k used for recall@k and the timed queries",
+    ),
+    num_queries: int = typer.Option(
+        200,
+        "--queries",
+        help="Number of stored vectors used as queries",
+    ),
+    target_recall: float = typer.Option(
+        0.95,
+        "--target-recall",
+        help="Pick the fastest setting with at least this recall",
+    ),
+    apply: bool = typer.Option(
+        False,
+        "--apply",
+        help="Rebuild the collection with the chosen setting (no re-embedding)",
+    ),
+    logs_dir: Path | None = typer.Option(
+        None,
+        "--logs-dir",
+        "-l",
+        help="Directory for logs (optional).",
+        file_okay=False,
+        dir_okay=True,
+        resolve_path=True,
+    ),
+    debug: bool = typer.Option(
+        False,
+        "--debug",
+        help="Enable debug logging",
+    ),
+) -> None:
+    """Grid-search HNSW settings against exact search on the real collection."""
+    log_level = "DEBUG" if debug else "INFO"
+    setup_logging(logs_dir=logs_dir, level=log_level)
+
+    if detect_vector_store(storage_dir) == "flat":
+        console.print(
+            "[yellow]Flat vector stores use exact search; there is nothing to "
+            "tune.[/yellow]"
+        )
+        return
+
+    # Resolve the collection to tune
+    if is_sharded(storage_dir):
+        registry = load_registry(storage_dir)
+        if shard not in registry:
+            available = ", ".join(sorted(registry)) or "none"
+            console.print(
+                "[red]Error:[/red] Sharded index, pass --shard "
+                f"(available: {available})",
+                style="bold red",
+            )
+            raise typer.Exit(1)
+        collection_name = registry[shard]["collection"]
+    else:
+        collection_name = "documents"
+
+    client = chromadb.PersistentClient(path=str(storage_dir / "chroma_db"))
+    try:
+        collection = client.get_collection(collection_name)
+    except Exception as e:
+        logger.error(f"Cannot open collection '{collection_name}': {e}")
+        raise typer.Exit(1)
+
+    current = (collection.configuration or {}).get("hnsw") or {}
+    console.print(
+        f"\n[bold cyan]Collection[/bold cyan] {collection_name} "
+        f"({collection.count()} vectors)"
+    )
+    console.print(
+        f"Current: space={current.get('space')}, "
+        f"M={current.get('max_neighbors')}, "
+        f"construction_ef={current.get('ef_construction')}, "
+        f"search_ef={current.get('ef_search')}"
+    )
+
+    try:
+        results = tune_collection(
+            collection,
+            m_grid=m,
+            construction_ef_grid=construction_ef,
+            search_ef_grid=search_ef,
+            top_k=top_k,
+            num_queries=num_queries,
+        )
+    except ValueError as e:
+        console.print(f"[red]Error:[/red] {e}", style="bold red")
+        raise typer.Exit(1)
+    best = choose_setting(results, target_recall=target_recall)
+
+    table = Table(title=f"HNSW grid (recall@{top_k} vs exact search)")
+    for column in ("M", "construction_ef", "search_ef"):
+        table.add_column(column, justify="right")
+    table.add_column("recall", justify="right")
+    table.add_column("p50 ms", justify="right")
+    table.add_column("p99 ms", justify="right")
+    table.add_column("build s", justify="right")
+    for result in results:
+        table.add_row(
+            str(result["max_neighbors"]),
+            str(result["ef_construction"]),
+            str(result["ef_search"]),
+            f"{result['recall']:.3f}",
+            f"{result['p50_ms']:.2f}",
+            f"{result['p99_ms']:.2f}",
+            f"{result['build_s']:.2f}",
+            style="bold green" if result is best else None,
+        )
+    console.print(table)
+
+    chosen = {
+        "max_neighbors": best["max_neighbors"],
+        "ef_construction": best["ef_construction"],
+        "ef_search": best["ef_search"],
+    }
+    console.print(
+        f"\n[bold]Chosen:[/bold] M={chosen['max_neighbors']}, "
+        f"construction_ef={chosen['ef_construction']}, "
+        f"search_ef={chosen['ef_search']} (recall {best['recall']:.3f}, "
+        f"p50 {best['p50_ms']:.2f} ms)"
+    )
+
+    if not apply:
+        console.print("[dim]Run again with --apply to rebuild the collection.[/dim]")
+        return
+
+    if all(current.get(key) == value for key, value in chosen.items()):
+        console.print("[green]✓[/green] Collection already uses this setting")
+        return
+
+    # ef_search is a query-time parameter and needs no rebuild
+    if all(current.get(key) == chosen[key] for key in HNSW_BUILD_PARAMS[1:]):
+        collection.modify(configuration={"hnsw": {"ef_search": chosen["ef_search"]}})
+        console.print(f"[green]✓[/green] Set search_ef={chosen['ef_search']}")
+        return
+
+    try:
+        rebuild_collection(client, collection_name, chosen)
+    except RuntimeError as e:
+        logger.error(str(e))
+        raise typer.Exit(1)
+    console.print(f"[green]✓[/green] Rebuilt '{collection_name}' without re-embedding")
+
+
+if __name__ == "__main__":
+    app()
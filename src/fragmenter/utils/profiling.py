@@ -0,0 +1,249 @@
+"""Profiling of CLI runs (``fragmenter --profile <command>``).
+
+Two profilers are available:
+
+- ``sample`` (default): a background thread records the stack of every
+  thread at a fixed interval. The overhead does not grow with the number of
+  calls, and time spent in C extensions (tokenizers, Chroma, NumPy) is
+  charged to the Python function that called them. The stacks are written
+  in the folded format read by flamegraph.pl, inferno and speedscope.
+- ``cprofile``: the deterministic :mod:`cProfile` profiler. It gives exact
+  call counts, but only for the main thread and at a cost per call. The
+  ``.prof`` file opens in snakeviz, or converts with flameprof or gprof2dot.
+
+Both write a summary of the hottest functions. With ``memory=True``, a
+:mod:`tracemalloc` snapshot adds the peak and the largest allocation sites.
+"""
+
+import cProfile
+import io
+import pstats
+import sys
+import sysconfig
+import threading
+import time
+import tracemalloc
+from collections import Counter
+from datetime import datetime
+from pathlib import Path
+from types import FrameType
+from typing import Any
+
+from loguru import logger
+
+PROFILERS = ("sample", "cprofile")
+DEFAULT_INTERVAL = 0.005
+DEFAULT_TOP = 30
+
+_STDLIB = str(Path(sysconfig.get_paths()["stdlib"])) + "/"
+
+
+def _short_path(filename: str) -> str:
+    if filename.startswith(_STDLIB):
+        return filename[len(_STDLIB) :]
+    for marker in ("site-packages/", "src/"):
+        if marker in filename:
+            return filename.rsplit(marker, 1)[1]
+    return filename
+
+
+def _frame_label(frame: FrameType) -> str:
+    code = frame.f_code
+    return f"{code.co_qualname} ({_short_path(code.co_filename)}:{code.co_firstlineno})"
+
+
+class SamplingProfiler:
+    """Periodically records the Python stacks of all other threads.
+
+    Args:
+        interval: Seconds between samples
+    """
+
+    def __init__(self, interval: float = DEFAULT_INTERVAL) -> None:
+        self.interval = interval
+        self.stacks: Counter[tuple[str, ...]] = Counter()
+        self.samples = 0
+        self._stopped = threading.Event()
+        self._thread: threading.Thread | None = None
+
+    def start(self) -> None:
+        self._thread = threading.Thread(
+            target=self._run, name="fragmenter-profiler", daemon=True
+        )
+        self._thread.start()
+
+    def stop(self) -> None:
+        self._stopped.set()
+        if self._thread is not None:
+            self._thread.join()
+
+    def _run(self) -> None:
+        own = threading.get_ident()
+        while not self._stopped.wait(self.interval):
+            names = {thread.ident: thread.name for thread in threading.enumerate()}
+            for ident, frame in sys._current_frames().items():
+                if ident == own:
+                    continue
+                stack = []
+                current: FrameType | None = frame
+                while current is not None:
+                    stack.append(_frame_label(current))
+                    current = current.f_back
+                stack.append(f"thread:{names.get(ident, ident)}")
+                self.stacks[tuple(reversed(stack))] += 1
+            self.samples += 1
+
+    def folded(self) -> list[str]:
+        """One ``root;...;leaf count`` line per distinct stack."""
+        return [
+            f"{';'.join(stack)} {count}" for stack, count in sorted(self.stacks.items())
+        ]
+
+    def top(self, n: int = DEFAULT_TOP) -> list[dict[str, Any]]:
+        """The ``n`` functions with the most samples on top of the stack.
+
+        Returns:
+            Dicts with ``function``, ``own`` (samples as the running frame)
+            and ``total`` (samples anywhere on the stack)
+        """
+        own: Counter[str] = Counter()
+        total: Counter[str] = Counter()
+        for stack, count in self.stacks.items():
+            own[stack[-1]] += count
+            for function in set(stack[1:]):
+                total[function] += count
+        return [
+            {"function": function, "own": count, "total": total[function]}
+            for function, count in own.most_common(n)
+        ]
+
+
+class Profile:
+    """A profiling session around one CLI command.
+
+    Args:
+        profiler: ``sample`` or ``cprofile``
+        memory: Also trace memory allocations with tracemalloc
+        interval: Seconds between samples of the sampling profiler
+    """
+
+    def __init__(
+        self,
+        profiler: str = "sample",
+        memory: bool = False,
+        interval: float = DEFAULT_INTERVAL,
+    ) -> None:
+        if profiler not in PROFILERS:
+            raise ValueError(
+                f"Unknown profiler '{profiler}', expected one of: "
+                f"{', '.join(PROFILERS)}"
+            )
+        self.profiler = profiler
+        self.memory = memory
+        self._sampler = SamplingProfiler(interval) if profiler == "sample" else None
+        self._cprofile = cProfile.Profile() if profiler == "cprofile" else None
+        self._snapshot: tracemalloc.Snapshot | None = None
+        self._peak = 0
+        self._start = 0.0
+        self.seconds = 0.0
+
+    def start(self) -> None:
+        if self.memory:
+            tracemalloc.start()
+        self._start = time.perf_counter()
+        if self._sampler is not None:
+            self._sampler.start()
+        elif self._cprofile is not None:
+            self._cprofile.enable()
+
+    def stop(self) -> None:
+        if self._sampler is not None:
+            self._sampler.stop()
+        elif self._cprofile is not None:
+            self._cprofile.disable()
+        self.seconds = time.perf_counter() - self._start
+        if self.memory:
+            # Leave out the profiler's own stack labels
+            self._snapshot = tracemalloc.take_snapshot().filter_traces(
+                [tracemalloc.Filter(False, __file__)]
+            )
+            self._peak = tracemalloc.get_traced_memory()[1]
+            tracemalloc.stop()
+
+    def write(
+        self, output_dir: str | Path, name: str, top: int = DEFAULT_TOP
+    ) -> list[Path]:
+        """Write the profile, a top-``top`` summary and the memory snapshot.
+
+        Files are named ``profile-<name>-<timestamp>`` with the suffixes
+        ``.folded`` (sampling) or ``.prof`` (cProfile), ``.txt`` (summary) and
+        ``.tracemalloc`` (memory).
+
+        Returns:
+            The written files
+        """
+        output_dir = Path(output_dir)
+        output_dir.mkdir(parents=True, exist_ok=True)
+        stem = output_dir / f"profile-{name}-{datetime.now():%Y%m%d-%H%M%S}"
+        written = []
+
+        summary = [f"fragmenter {name}: {self.seconds:.2f}s ({self.profiler})", ""]
+        if self._sampler is not None:
+            path = stem.with_suffix(".folded")
+            path.write_text("\n".join(self._sampler.folded()) + "\n")
+            written.append(path)
+            summary += self._sample_summary(self._sampler, top)
+        elif self._cprofile is not None:
+            path = stem.with_suffix(".prof")
+            self._cprofile.dump_stats(path)
+            written.append(path)
+            summary += self._cprofile_summary(self._cprofile, top)
+
+        if self._snapshot is not None:
+            path = stem.with_suffix(".tracemalloc")
+            self._snapshot.dump(str(path))
+            written.append(path)
+            summary += self._memory_summary(self._snapshot, top)
+
+        path = stem.with_suffix(".txt")
+        path.write_text("\n".join(summary) + "\n")
+        written.append(path)
+        for path in written:
+            logger.info(f"Profile written to {path}")
+        return written
+
+    @staticmethod
+    def _sample_summary(sampler: SamplingProfiler, top: int) -> list[str]:
+        stacks = sum(sampler.stacks.values()) or 1
+        lines = [
+            f"{sampler.samples} samples every {sampler.interval * 1000:g} ms, "
+            f"{stacks} thread stacks",
+            "",
+            f"Top {top} functions by own samples (share of thread stacks):",
+            f"{'own':>7} {'total':>7}  function",
+        ]
+        lines += [
+            f"{entry['own'] / stacks:>7.1%} {entry['total'] / stacks:>7.1%}  "
+            f"{entry['function']}"
+            for entry in sampler.top(top)
+        ]
+        return lines
+
+    @staticmethod
+    def _cprofile_summary(profile: cProfile.Profile, top: int) -> list[str]:
+        lines = []
+        for key, label in (("cumulative", "cumulative"), ("tottime", "own")):
+            stream = io.StringIO()
+            stats = pstats.Stats(profile, stream=stream)
+            stats.strip_dirs().sort_stats(key).print_stats(top)
+            lines += [f"Top {top} functions by {label} time:", stream.getvalue()]
+        return lines
+
+    def _memory_summary(self, snapshot: tracemalloc.Snapshot, top: int) -> list[str]:
+        statistics = snapshot.statistics("lineno")[:top]
+        return [
+            "",
+            f"Peak traced memory: {self._peak / 1e6:.1f} MB",
+            f"Top {top} allocation sites still held at exit:",
+            *(f"  {stat}" for stat in statistics),
+        ]
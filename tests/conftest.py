@@ -4,7 +4,8 @@ import tempfile
 from pathlib import Path
 
 import pytest
-from llama_index.core import Document
+from llama_index.core import Document, Settings
+from llama_index.core.embeddings import MockEmbedding
 
 
 @pytest.fixture
@@ -14,6 +15,16 @@ def temp_dir():
         yield Path(tmpdir)
 
 
+@pytest.fixture
+def mock_settings():
+    """Deterministic 8-dimensional embeddings and no LLM, restored afterwards."""
+    previous = Settings._embed_model, Settings._llm
+    Settings.embed_model = MockEmbedding(embed_dim=8)
+    Settings.llm = None
+    yield
+    Settings._embed_model, Settings._llm = previous
+
+
 @pytest.fixture
 def sample_documents():
     """Sample documents for testing."""
@@ -0,0 +1,79 @@
+"""Tests for benchmark.py module and the hashing embedding."""
+
+import numpy as np
+import pytest
+from llama_index.core import Settings
+
+from fragmenter.rag.benchmark import generate_corpus, run_benchmark
+from fragmenter.rag.utils import HashingEmbedding
+
+
+class TestHashingEmbedding:
+    """Tests for HashingEmbedding class."""
+
+    def test_deterministic_unit_vectors(self):
+        """Test equal texts embed equally, as unit vectors of embed_dim."""
+        first = HashingEmbedding(embed_dim=64).get_text_embedding("update_state(dt)")
+        second = HashingEmbedding(embed_dim=64).get_text_embedding("update_state(dt)")
+
+        assert first == second
+        assert len(first) == 64
+        assert np.linalg.norm(first) == pytest.approx(1.0)
+
+    def test_shared_words_are_similar(self):
+        """Test texts sharing words score higher than unrelated ones."""
+        model = HashingEmbedding()
+        query = np.array(model.get_query_embedding("How to publish telemetry?"))
+        related = np.array(model.get_text_embedding("def publish_telemetry(state):"))
+        unrelated = np.array(model.get_text_embedding("Mission route planner"))
+
+        assert query @ related > 0.5
+        assert query @ unrelated == pytest.approx(0.0, abs=0.2)
+
+    def test_empty_text(self):
+        """Test text without words embeds as the zero vector."""
+        assert HashingEmbedding(embed_dim=8).get_text_embedding("  ") == [0.0] * 8
+
+
+class TestCorpus:
+    """Tests for generate_corpus function."""
+
+    def test_reproducible_with_unique_answers(self, tmp_path):
+        """Test a seed reproduces the corpus and every query has one answer."""
+        queries = generate_corpus(tmp_path / "a", 50, seed=3)
+        again = generate_corpus(tmp_path / "b", 50, seed=3)
+
+        assert queries == again
+        paths = [q["relative_path"] for q in queries]
+        assert len(set(paths)) == 50
+        assert len({q["query"] for q in queries}) == 50
+        assert {p.split("/")[0] for p in paths} == {"src", "docs"}
+        assert all((tmp_path / "a" / path).is_file() for path in paths)
+
+
+class TestRunBenchmark:
+    """Tests for run_benchmark function."""
+
+    def test_exact_search_finds_every_answer(self, tmp_path):
+        """Test the flat backend retrieves each query's file and settings return."""
+        previous = Settings._embed_model
+
+        result = run_benchmark(
+            60, tmp_path / "bench", num_queries=20, num_workers=1, backend="flat"
+        )
+
+        assert Settings._embed_model is previous
+        assert result["files"] == 60
+        assert result["chunks"] >= 60
+        assert result["queries"] == 20
+        assert result["recall_at_k"] == 1.0
+        assert result["mrr"] > 0.9
+        assert 0 < result["p50_ms"] <= result["p95_ms"] <= result["p99_ms"]
+        assert result["files_per_s"] > 0
+
+    def test_refuses_used_work_dir(self, tmp_path):
+        """Test an existing index is never benchmarked as a fresh build."""
+        (tmp_path / "store").mkdir()
+
+        with pytest.raises(ValueError, match="not empty"):
+            run_benchmark(10, tmp_path)
@@ -0,0 +1,163 @@
+"""Tests for boilerplate.py module."""
+
+import pytest
+from llama_index.core import Settings
+from llama_index.core.embeddings import MockEmbedding
+from llama_index.core.schema import MetadataMode, TextNode
+
+from fragmenter.rag.boilerplate import (
+    BOILERPLATE_KEY,
+    BoilerplateStrippedEmbedding,
+    boilerplate_spans,
+    detect_boilerplate,
+    embed_text,
+    mark_boilerplate,
+)
+from fragmenter.rag.ingestion import build_index
+from fragmenter.rag.scan import open_collections
+from fragmenter.tools.inspect_index import load_index_stats, recompute_index_stats
+
+HEADER = (
+    "# Copyright (c) 2024 RISE Research Institutes of Sweden\n"
+    "#\n"
+    "# Licensed under the Apache License, Version 2.0 (the License);\n"
+    "# you may not use this file except in compliance with the License.\n"
+    "\n"
+    "# See the License for the specific language governing permissions.\n"
+)
+
+
+def _body(i):
+    return f"def step_{i}(state):\n    return integrate(state, dt={i} * 0.01)\n"
+
+
+def _nodes(count=8, header=HEADER):
+    return [
+        TextNode(text=header + "\n" + _body(i), metadata={"relative_path": f"m{i}.py"})
+        for i in range(count)
+    ]
+
+
+EMBEDDED: list[str] = []
+
+
+class RecordingEmbedding(MockEmbedding):
+    """MockEmbedding that remembers the texts it embedded in EMBEDDED."""
+
+    def _get_text_embeddings(self, texts):
+        EMBEDDED.extend(texts)
+        return super()._get_text_embeddings(texts)
+
+
+class TestDetection:
+    """Tests for detect_boilerplate and boilerplate_spans functions."""
+
+    def test_header_is_one_span(self):
+        """Test a repeated header is found and covered, blank lines included."""
+        nodes = _nodes()
+        windows = detect_boilerplate(nodes)
+
+        spans = boilerplate_spans(nodes[0].text, windows)
+
+        assert spans == [(0, len(HEADER))]
+
+    def test_needs_enough_files(self):
+        """Test a block shared by fewer than MIN_FILES files is kept."""
+        assert detect_boilerplate(_nodes(count=4)) == set()
+
+    def test_min_share(self):
+        """Test blocks below the required share of files are kept."""
+        nodes = _nodes(count=6) + _nodes(count=30, header="")
+        for i, node in enumerate(nodes[6:]):
+            node.metadata["relative_path"] = f"other{i}.py"
+
+        assert detect_boilerplate(nodes, min_share=0.1)
+        assert not detect_boilerplate(nodes, min_share=0.2)
+
+    def test_unique_code_is_kept(self):
+        """Test file-specific code is never marked."""
+        nodes = _nodes()
+        windows = detect_boilerplate(nodes)
+
+        spans = boilerplate_spans(nodes[3].text, windows)
+
+        assert "step_3" not in nodes[3].text[spans[-1][0] : spans[-1][1]]
+
+
+class TestMarking:
+    """Tests for mark_boilerplate and embed_text functions."""
+
+    def test_embed_text_excludes_boilerplate(self):
+        """Test the embedded text drops the header but the stored text keeps it."""
+        nodes = _nodes()
+
+        report = mark_boilerplate(nodes)
+
+        assert report["chunks"] == 8
+        assert report["chars"] == 8 * len(HEADER)
+        assert report["tokens"] == report["chars"] // 4
+        node = nodes[0]
+        assert node.text.startswith("# Copyright")
+        assert "Copyright" not in embed_text(node)
+        assert "step_0" in embed_text(node)
+        assert "relative_path: m0.py" in embed_text(node)
+        assert BOILERPLATE_KEY not in node.get_content(metadata_mode=MetadataMode.LLM)
+
+    def test_unmarked_nodes_embed_as_before(self):
+        """Test nodes without boilerplate embed their regular content."""
+        node = _nodes(count=1)[0]
+
+        assert embed_text(node) == node.get_content(metadata_mode=MetadataMode.EMBED)
+
+    def test_transformation_embeds_stripped_text(self):
+        """Test the pipeline transformation embeds the stripped text."""
+        nodes = _nodes()
+        mark_boilerplate(nodes)
+        EMBEDDED.clear()
+
+        BoilerplateStrippedEmbedding(embed_model=RecordingEmbedding(embed_dim=8))(nodes)
+
+        assert EMBEDDED == [embed_text(node) for node in nodes]
+        assert all(len(node.embedding) == 8 for node in nodes)
+
+    def test_remarking_clears_stale_spans(self):
+        """Test marking again drops spans that no longer apply."""
+        nodes = _nodes()
+        mark_boilerplate(nodes)
+
+        mark_boilerplate(nodes[:2])
+
+        assert BOILERPLATE_KEY not in nodes[0].metadata
+
+
+class TestBoilerplateIngestion:
+    """Tests for boilerplate stripping during build_index."""
+
+    @pytest.fixture
+    def recording_settings(self):
+        """Recording embeddings and no LLM."""
+        previous = Settings._embed_model, Settings._llm
+        Settings.embed_model = RecordingEmbedding(embed_dim=8)
+        Settings.llm = None
+        EMBEDDED.clear()
+        yield EMBEDDED
+        Settings._embed_model, Settings._llm = previous
+
+    def test_build_embeds_without_header(self, git_repo, tmp_path, recording_settings):
+        """Test headers are stored but not embedded, and inspect reports savings."""
+        for i in range(6):
+            (git_repo / "src" / f"module_{i}.py").write_text(HEADER + "\n" + _body(i))
+        storage = tmp_path / "store"
+
+        build_index(git_repo, storage, num_workers=1, boilerplate={"min_share": 0.05})
+
+        embedded = [text for text in recording_settings if "step_" in text]
+        assert len(embedded) == 6
+        assert not any("Licensed under" in text for text in embedded)
+        stored = open_collections(storage)[""].get(include=["documents"])
+        assert sum("Licensed under" in text for text in stored["documents"]) == 6
+
+        stats = load_index_stats(storage)
+        assert stats["boilerplate_chunks"] == 6
+        assert stats["boilerplate_chars"] == 6 * len(HEADER)
+        assert recompute_index_stats(storage)["boilerplate_chars"] == 6 * len(HEADER)
@@ -0,0 +1,316 @@
+"""Tests for crawler.py module."""
+
+import asyncio
+import os
+import time
+from concurrent.futures.process import BrokenProcessPool
+
+import httpx
+import pytest
+
+from fragmenter.scraping.crawler import Crawler, HostLimiter
+from fragmenter.scraping.state import STATE_FILE, CrawlState, content_hash
+
+BASE = "https://docs.example.com/guide/"
+
+PAGES = {
+    BASE: (
+        '<a href="intro">Intro</a> <a href="setup#install">Setup</a> '
+        '<a href="missing">Missing</a> <a href="https://other.example.com/">Off</a>'
+    ),
+    BASE + "intro": '<p>Intro page</p><a href="deep/page">Deeper</a>',
+    BASE + "setup": "<p>Setup page</p>",
+    BASE + "deep/page": '<p>Deep page</p><a href="../private/x">Private</a>',
+    BASE + "private/x": "<p>Disallowed</p>",
+    BASE + "orphan": "<p>Only in the sitemap</p>",
+}
+
+ROBOTS = "User-agent: *\nDisallow: /guide/private/\n"
+
+SITEMAP = f"""<?xml version="1.0" encoding="UTF-8"?>
+<urlset xmlns="http://www.sitemaps.org/schemas/sitemap/0.9">
+  <url><loc>{BASE}orphan</loc><priority>0.9</priority></url>
+  <url><loc>https://docs.example.com/blog/</loc></url>
+</urlset>"""
+
+
+def site(
+    requests: list[str],
+    delay: float = 0.0,
+    extra: dict[str, str] | None = None,
+    etags: bool = False,
+    redirects: dict[str, str] | None = None,
+) -> httpx.MockTransport:
+    """A transport serving PAGES and ``extra``, recording the requested URLs.
+
+    With ``etags``, responses carry an ETag and matching conditional
+    requests get a 304. URLs in ``redirects`` answer with a 301.
+    """
+    files = {**PAGES, **(extra or {})}
+
+    async def handler(request: httpx.Request) -> httpx.Response:
+        requests.append(str(request.url))
+        await asyncio.sleep(delay)
+        if str(request.url) in (redirects or {}):
+            return httpx.Response(
+                301, headers={"Location": redirects[str(request.url)]}
+            )
+        body = files.get(str(request.url))
+        if body is None:
+            return httpx.Response(404)
+        if not etags:
+            return httpx.Response(200, html=body)
+        etag = f'"{content_hash(body)[:16]}"'
+        if request.headers.get("If-None-Match") == etag:
+            return httpx.Response(304)
+        return httpx.Response(200, html=body, headers={"ETag": etag})
+
+    return httpx.MockTransport(handler)
+
+
+def crawler_for(temp_dir, transport, **kwargs) -> Crawler:
+    """Crawler saving HTML without rate limit or parsing processes."""
+    options = {"format": "html", "rate": 0, "workers": 0, "user_agent": "test"}
+    return Crawler(temp_dir, transport=transport, **{**options, **kwargs})
+
+
+class TestHostLimiter:
+    """Tests for HostLimiter class."""
+
+    def test_concurrency_per_host(self):
+        """Test a host never has more requests in flight than allowed."""
+        limiter = HostLimiter(concurrency=2, rate=0)
+        running = {"a": 0, "b": 0}
+        peak = {"a": 0, "b": 0}
+
+        async def request(host: str) -> None:
+            async with limiter.slot(host):
+                running[host] += 1
+                peak[host] = max(peak[host], running[host])
+                await asyncio.sleep(0.01)
+                running[host] -= 1
+
+        async def run() -> None:
+            await asyncio.gather(*(request(host) for host in "ab" * 5))
+
+        asyncio.run(run())
+
+        assert peak == {"a": 2, "b": 2}
+
+    def test_rate_spaces_request_starts(self):
+        """Test request starts to one host are at least 1/rate apart."""
+        limiter = HostLimiter(concurrency=10, rate=1000)
+        limiter.set_rate("a", 50)
+        starts = []
+
+        async def request() -> None:
+            async with limiter.slot("a"):
+                starts.append(time.monotonic())
+
+        async def run() -> None:
+            await asyncio.gather(*(request() for _ in range(5)))
+
+        asyncio.run(run())
+
+        gaps = [later - earlier for earlier, later in zip(starts, starts[1:])]
+        assert min(gaps) >= 0.015
+
+
+class TestCrawler:
+    """Tests for Crawler class."""
+
+    def test_crawl_follows_links_in_scope(self, temp_dir):
+        """Test pages are found recursively, but not outside the base URL."""
+        requests = []
+        crawler = crawler_for(temp_dir, site(requests), sitemaps=False, robots=False)
+
+        stats = asyncio.run(crawler.crawl(BASE))
+
+        assert (temp_dir / "guide_deep_page.html").read_text().startswith("<p>Deep")
+        assert (temp_dir / "guide_private_x.html").exists()
+        assert "https://other.example.com/" not in requests
+        assert requests.count(BASE) == 1
+        assert stats["fetched"] == 5
+        assert stats["failed"] == 1
+
+    def test_robots_and_sitemap(self, temp_dir):
+        """Test disallowed pages are not fetched and sitemap pages are."""
+        requests = []
+        transport = site(
+            requests,
+            extra={
+                "https://docs.example.com/robots.txt": ROBOTS,
+                BASE + "sitemap.xml": SITEMAP,
+            },
+        )
+        crawler = crawler_for(temp_dir, transport)
+
+        asyncio.run(crawler.crawl(BASE))
+
+        assert (temp_dir / "guide_orphan.html").exists()
+        assert BASE + "private/x" not in requests
+        assert "https://docs.example.com/blog/" not in requests
+
+    def test_depth_and_page_limits(self, temp_dir):
+        """Test max_depth stops link following and max_pages the crawl."""
+        requests = []
+        crawler = crawler_for(
+            temp_dir, site(requests), max_depth=1, sitemaps=False, robots=False
+        )
+        asyncio.run(crawler.crawl(BASE))
+        assert BASE + "deep/page" not in requests
+
+        crawler = crawler_for(
+            temp_dir / "limited",
+            site(requests),
+            max_pages=2,
+            sitemaps=False,
+            robots=False,
+        )
+        stats = asyncio.run(crawler.crawl(BASE))
+        assert stats["fetched"] + stats["failed"] == 2
+        assert stats["queued"] > 0
+
+    def test_rescrape_with_conditional_requests(self, temp_dir):
+        """Test 304 pages are kept and their stored links still followed."""
+        requests = []
+        options = {"sitemaps": False, "robots": False}
+        asyncio.run(
+            crawler_for(temp_dir, site(requests, etags=True), **options).crawl(BASE)
+        )
+        intro = temp_dir / "guide_intro.html"
+        os.utime(intro, (0, 0))
+        state = CrawlState.load(temp_dir / STATE_FILE)
+        assert state.get(BASE + "intro")["etag"]
+        assert BASE + "deep/page" in state.get(BASE + "intro")["links"]
+
+        requests.clear()
+        stats = asyncio.run(
+            crawler_for(temp_dir, site(requests, etags=True), **options).crawl(BASE)
+        )
+
+        assert BASE + "deep/page" in requests
+        assert stats["not_modified"] == 5
+        assert stats["saved"] == 0
+        assert intro.stat().st_mtime == 0
+
+    def test_rewrites_only_changed_content(self, temp_dir):
+        """Test without validators, only files whose content changed are written."""
+        options = {"sitemaps": False, "robots": False}
+        asyncio.run(crawler_for(temp_dir, site([]), **options).crawl(BASE))
+        for path in temp_dir.glob("*.html"):
+            os.utime(path, (0, 0))
+
+        changed = site([], extra={BASE + "setup": "<p>Setup, revised</p>"})
+        stats = asyncio.run(crawler_for(temp_dir, changed, **options).crawl(BASE))
+
+        assert stats["saved"] == 1
+        assert stats["unchanged"] == 4
+        assert (temp_dir / "guide_setup.html").read_text() == "<p>Setup, revised</p>"
+        assert (temp_dir / "guide_intro.html").stat().st_mtime == 0
+
+    def test_files_without_state_are_compared(self, temp_dir):
+        """Test files saved before the crawl state existed are not rewritten."""
+        (temp_dir / "guide_intro.html").write_text(PAGES[BASE + "intro"])
+        os.utime(temp_dir / "guide_intro.html", (0, 0))
+
+        crawler = crawler_for(temp_dir, site([]), sitemaps=False, robots=False)
+        stats = asyncio.run(crawler.crawl(BASE))
+
+        assert stats["unchanged"] == 1
+        assert (temp_dir / "guide_intro.html").stat().st_mtime == 0
+
+    def test_pages_are_fetched_concurrently(self, temp_dir):
+        """Test slow responses overlap instead of adding up."""
+        requests = []
+        crawler = crawler_for(
+            temp_dir,
+            site(requests, delay=0.2),
+            max_depth=1,
+            sitemaps=False,
+            robots=False,
+        )
+
+        start = time.perf_counter()
+        asyncio.run(crawler.crawl(BASE))
+
+        # Index page, then the three linked pages at once
+        assert len(requests) == 4
+        assert time.perf_counter() - start < 0.7
+
+    def test_parsing_in_worker_processes(self, temp_dir):
+        """Test pages parsed in the process pool are saved and followed."""
+        requests = []
+        crawler = crawler_for(
+            temp_dir, site(requests), sitemaps=False, robots=False, workers=1
+        )
+
+        stats = asyncio.run(crawler.crawl(BASE))
+
+        assert (temp_dir / "guide_deep_page.html").exists()
+        assert stats["saved"] == 5
+
+    def test_failed_page_does_not_stop_crawl(self, temp_dir):
+        """Test a page that cannot be written is counted as failed, not fatal."""
+        (temp_dir / "guide_intro.html").mkdir()
+
+        crawler = crawler_for(temp_dir, site([]), sitemaps=False, robots=False)
+        stats = asyncio.run(crawler.crawl(BASE))
+
+        assert (temp_dir / "guide_setup.html").exists()
+        assert stats["failed"] == 2
+
+    def test_links_resolve_against_redirect_target(self, temp_dir):
+        """Test redirected pages are parsed at their final URL and kept in scope."""
+        requests = []
+        transport = site(
+            requests,
+            extra={
+                BASE: '<a href="old/">Moved</a> <a href="away">Away</a>',
+                BASE + "new/": '<a href="page">Page</a>',
+                BASE + "new/page": "<p>New page</p>",
+            },
+            redirects={
+                BASE + "old/": BASE + "new/",
+                BASE + "away": "https://other.example.com/away",
+            },
+        )
+        crawler = crawler_for(temp_dir, transport, sitemaps=False, robots=False)
+
+        asyncio.run(crawler.crawl(BASE))
+
+        assert BASE + "new/page" in requests
+        assert BASE + "old/page" not in requests
+        assert not (temp_dir / "guide_away.html").exists()
+
+    def test_fatal_error_cancels_pages_in_progress(self, temp_dir):
+        """Test a broken worker pool ends the crawl without leaving tasks behind."""
+
+        class BrokenPool(Crawler):
+            async def _parse(self, html, url, base_url):
+                if url == BASE + "setup":
+                    raise BrokenProcessPool("worker died")
+                if url == BASE + "intro":
+                    await asyncio.sleep(1)
+                return await super()._parse(html, url, base_url)
+
+        requests = []
+        crawler = BrokenPool(
+            temp_dir,
+            transport=site(requests),
+            format="html",
+            rate=0,
+            workers=0,
+            user_agent="test",
+            sitemaps=False,
+            robots=False,
+        )
+
+        async def run() -> set[asyncio.Task]:
+            with pytest.raises(BrokenProcessPool):
+                await crawler.crawl(BASE)
+            return asyncio.all_tasks() - {asyncio.current_task()}
+
+        assert asyncio.run(run()) == set()
+        assert not (temp_dir / "guide_intro.html").exists()
+        assert (temp_dir / STATE_FILE).exists()
@@ -0,0 +1,142 @@
+"""Tests for dedup.py module."""
+
+import pytest
+from llama_index.core.schema import TextNode
+
+from fragmenter.rag.dedup import (
+    ALIASES_KEY,
+    dedup_nodes,
+    lsh_bands,
+    merge_reports,
+    minhash_signatures,
+)
+from fragmenter.rag.ingestion import build_index
+from fragmenter.rag.scan import iter_collection, open_collections
+from fragmenter.tools.inspect_index import load_index_stats, recompute_index_stats
+
+CODE = "\n".join(
+    f"def handler_{i}(message):\n    value = decode(message, field={i})\n"
+    f"    return publish(topic_{i}, value)"
+    for i in range(30)
+)
+
+
+def _node(text, path):
+    return TextNode(text=text, metadata={"relative_path": path})
+
+
+class TestMinHash:
+    """Tests for minhash_signatures and lsh_bands functions."""
+
+    def test_similarity_estimate(self):
+        """Test signature agreement tracks shingle overlap."""
+        edited = CODE.replace("handler_29", "renamed_29")
+        other = CODE.upper()
+
+        signatures = minhash_signatures([CODE, CODE, edited, other])
+
+        assert (signatures[0] == signatures[1]).all()
+        assert 0.8 < (signatures[0] == signatures[2]).mean() < 1.0
+        assert (signatures[0] == signatures[3]).mean() < 0.1
+
+    def test_bands_stay_below_threshold(self):
+        """Test the LSH threshold of the chosen bands does not exceed the target."""
+        for threshold in (0.5, 0.8, 0.9):
+            bands, rows = lsh_bands(threshold)
+
+            assert bands * rows == 128
+            assert (1 / bands) ** (1 / rows) <= threshold
+
+
+class TestDedupNodes:
+    """Tests for dedup_nodes function."""
+
+    @pytest.fixture
+    def nodes(self):
+        """A vendored copy, a lightly edited fork and an unrelated chunk."""
+        return [
+            _node(CODE, "vendor/lib/codec.py"),
+            _node(CODE, "src/codec.py"),
+            _node(CODE.replace("handler_29", "renamed_29"), "fork/codec.py"),
+            _node("Build instructions for the project " * 5, "README.md"),
+        ]
+
+    def test_report_keeps_every_chunk(self, nodes):
+        """Test the report policy counts duplicates but stores everything."""
+        kept, report = dedup_nodes(nodes, policy="report")
+
+        assert kept == nodes
+        assert (report["duplicates"], report["clusters"]) == (2, 1)
+        assert report["removed"] == 0
+        assert report["duplicate_chars"] == len(nodes[1].text) + len(nodes[2].text)
+
+    def test_skip_keeps_canonical(self, nodes):
+        """Test only the first copy by path is stored."""
+        kept, report = dedup_nodes(nodes, policy="skip")
+
+        assert [n.metadata["relative_path"] for n in kept] == [
+            "fork/codec.py",
+            "README.md",
+        ]
+        assert report["removed"] == 2
+        assert ALIASES_KEY not in kept[0].metadata
+
+    def test_alias_references_copies(self, nodes):
+        """Test the canonical chunk lists the dropped copies outside the embedding."""
+        kept, _ = dedup_nodes(nodes, policy="alias")
+
+        canonical = kept[0]
+        assert canonical.metadata[ALIASES_KEY] == "src/codec.py, vendor/lib/codec.py"
+        assert ALIASES_KEY in canonical.excluded_embed_metadata_keys
+        assert "src/codec.py" not in canonical.get_content(metadata_mode="embed")
+
+    def test_threshold(self, nodes):
+        """Test a stricter threshold only merges exact copies."""
+        _, report = dedup_nodes(nodes, policy="report", threshold=1.0)
+
+        assert report["duplicates"] == 1
+
+    def test_unknown_policy(self, nodes):
+        """Test unsupported policies are rejected."""
+        with pytest.raises(ValueError, match="Unknown dedup policy"):
+            dedup_nodes(nodes, policy="merge")
+
+    def test_merge_reports(self, nodes):
+        """Test per-shard summaries add up."""
+        _, first = dedup_nodes(nodes, policy="skip")
+        _, second = dedup_nodes(nodes[:2], policy="report")
+
+        merged = merge_reports([first, second])
+
+        assert merged["policy"] == "mixed"
+        assert (merged["chunks"], merged["duplicates"]) == (6, 3)
+        assert merged["removed"] == 2
+
+
+class TestDedupIngestion:
+    """Tests for dedup during build_index."""
+
+    def test_duplicates_are_not_stored(self, git_repo, tmp_path, mock_settings):
+        """Test skipped copies never reach the store and the manifest keeps savings."""
+        for name in ("codec.py", "vendored_codec.py"):
+            (git_repo / "src" / name).write_text(CODE)
+        plain, deduped = tmp_path / "plain", tmp_path / "deduped"
+
+        build_index(git_repo, plain, num_workers=1)
+        build_index(
+            git_repo, deduped, num_workers=1, dedup={"policy": "skip", "threshold": 0.9}
+        )
+
+        stored = open_collections(plain)[""].count()
+        texts = [
+            text
+            for page in iter_collection(open_collections(deduped)[""])
+            for text in page["documents"]
+        ]
+        assert len(texts) < stored
+        assert len(texts) == len(set(texts))
+
+        dedup = load_index_stats(deduped)["dedup"]
+        assert dedup["removed"] == stored - len(texts)
+        assert "dedup" not in load_index_stats(plain)
+        assert recompute_index_stats(deduped)["dedup"] == dedup
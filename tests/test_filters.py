@@ -0,0 +1,131 @@
+"""Tests for filters.py module."""
+
+import uuid
+
+import chromadb
+import pytest
+
+from fragmenter.rag.filters import build_where, parse_where, where_kwargs
+from fragmenter.rag.metadata import path_prefix_metadata
+
+
+@pytest.fixture
+def collection():
+    """In-memory Chroma collection with metadata for a few directories."""
+    client = chromadb.EphemeralClient()
+    coll = client.create_collection(f"test-{uuid.uuid4().hex}")
+    directories = ["src", "src/rag", "src/rag/x", "srcs", "docs"]
+    coll.add(
+        ids=[f"n{i}" for i in range(len(directories))],
+        embeddings=[[float(i), 1.0] for i in range(len(directories))],
+        metadatas=[
+            {
+                "relative_directory": d,
+                **path_prefix_metadata(d),
+                "repository": "a" if i % 2 else "b",
+            }
+            for i, d in enumerate(directories)
+        ],
+    )
+    return coll
+
+
+class TestParseWhere:
+    """Tests for parse_where function."""
+
+    def test_normalizes_values(self):
+        """Test file types get a leading dot and paths lose slashes."""
+        parsed = parse_where(["file_type=PY,.md", "path=./src/rag/", "kind=code"])
+
+        assert parsed == {
+            "file_type": [".py", ".md"],
+            "path": ["src/rag"],
+            "kind": ["code"],
+        }
+
+    def test_repeated_keys_accumulate(self):
+        """Test repeating a key is equivalent to comma-separated values."""
+        assert parse_where(["repository=a", "repository=b"]) == {
+            "repository": ["a", "b"]
+        }
+
+    @pytest.mark.parametrize("clause", ["repository", "repository=", "lang=cpp"])
+    def test_invalid_clause(self, clause):
+        """Test malformed clauses and unknown keys are rejected."""
+        with pytest.raises(ValueError):
+            parse_where([clause])
+
+    def test_invalid_kind(self):
+        """Test only code and docs are accepted as kinds."""
+        with pytest.raises(ValueError, match="kind"):
+            parse_where(["kind=tests"])
+
+
+class TestBuildWhere:
+    """Tests for build_where function."""
+
+    def test_no_clauses(self):
+        """Test that no clauses means no filter."""
+        assert build_where([]) is None
+        assert where_kwargs(None) == {}
+
+    def test_single_clause(self):
+        """Test a single value becomes an $eq clause."""
+        assert build_where(["repository=a"]) == {"repository": {"$eq": "a"}}
+
+    def test_combined_clauses(self):
+        """Test keys are AND-ed and values are OR-ed."""
+        where = build_where(["repository=a,b", "kind=code,docs"])
+
+        assert where == {
+            "$and": [
+                {"repository": {"$in": ["a", "b"]}},
+                {
+                    "$or": [
+                        {"is_code": {"$eq": True}},
+                        {"is_documentation": {"$eq": True}},
+                    ]
+                },
+            ]
+        }
+
+    def test_path_prefix_compares_prefix_field(self, collection):
+        """Test a path prefix is an equality test on the field of its depth."""
+        assert build_where(["path=src/"], collections=[collection]) == {
+            "dir_1": {"$eq": "src"}
+        }
+        assert build_where(["path=src,docs,src/rag"]) == {
+            "$or": [
+                {"dir_1": {"$in": ["src", "docs"]}},
+                {"dir_2": {"$eq": "src/rag"}},
+            ]
+        }
+
+    def test_path_prefix_respects_other_filters(self, collection):
+        """Test a prefix matching only files excluded by other clauses is reported."""
+        with pytest.raises(ValueError, match="No indexed directories"):
+            build_where(["repository=a", "path=src/rag/x"], collections=[collection])
+
+    def test_index_without_prefix_fields(self):
+        """Test indexes built before the prefix fields existed ask for a rebuild."""
+        coll = chromadb.EphemeralClient().create_collection(f"t-{uuid.uuid4().hex}")
+        coll.add(ids=["n"], embeddings=[[0.0]], metadatas=[{"relative_directory": "a"}])
+
+        with pytest.raises(ValueError, match="rebuild"):
+            build_where(["path=a"], collections=[coll])
+
+    def test_path_prefix_without_match(self, collection):
+        """Test that an unmatched prefix is reported instead of returning nothing."""
+        with pytest.raises(ValueError, match="No indexed directories"):
+            build_where(["path=tests"], collections=[collection])
+
+    def test_where_is_applied_in_chroma(self, collection):
+        """Test the generated clause is accepted by Chroma's query."""
+        where = build_where(["repository=b", "path=src"], collections=[collection])
+
+        result = collection.query(
+            query_embeddings=[[0.0, 1.0]], n_results=5, where=where
+        )
+
+        directories = [m["relative_directory"] for m in result["metadatas"][0]]
+        assert sorted(directories) == ["src", "src/rag/x"]
@@ -0,0 +1,314 @@
+"""Tests for flat_store.py module."""
+
+import numpy as np
+import pytest
+from llama_index.core.schema import NodeRelationship, RelatedNodeInfo, TextNode
+from llama_index.core.vector_stores.types import (
+    MetadataFilter,
+    MetadataFilters,
+    VectorStoreQuery,
+)
+
+from fragmenter.rag.filters import build_where
+from fragmenter.rag.flat_store import (
+    FLAT_STORE_DIR,
+    FlatVectorStore,
+    is_flat_store,
+    matches_where,
+)
+from fragmenter.rag.inference import load_index, retrieve
+from fragmenter.rag.ingestion import build_index
+from fragmenter.rag.metadata import path_prefix_metadata
+from fragmenter.rag.vector_stores import create_vector_store
+
+
+def _nodes(count=50, dim=16, seed=0):
+    rng = np.random.default_rng(seed)
+    nodes = []
+    for i in range(count):
+        node = TextNode(
+            id_=f"node-{i}",
+            text=f"chunk {i}",
+            embedding=rng.normal(size=dim).tolist(),
+            metadata={
+                "repository": "alpha" if i % 2 else "beta",
+                "relative_directory": f"src/pkg{i % 3}",
+                **path_prefix_metadata(f"src/pkg{i % 3}"),
+                "is_code": i % 5 != 0,
+            },
+        )
+        node.relationships[NodeRelationship.SOURCE] = RelatedNodeInfo(
+            node_id=f"doc-{i // 10}"
+        )
+        nodes.append(node)
+    return nodes
+
+
+def _exact(nodes, query, k):
+    matrix = np.asarray([n.embedding for n in nodes])
+    matrix /= np.linalg.norm(matrix, axis=1, keepdims=True)
+    order = np.argsort(-(matrix @ (query / np.linalg.norm(query))))[:k]
+    return [nodes[i].node_id for i in order]
+
+
+@pytest.fixture
+def store(temp_dir):
+    """A persisted flat store holding 50 random nodes."""
+    store = FlatVectorStore(persist_dir=temp_dir / FLAT_STORE_DIR)
+    store.add(_nodes())
+    store.persist()
+    return store
+
+
+class TestMatchesWhere:
+    """Tests for matches_where function."""
+
+    METADATA = {"repository": "alpha", "is_code": True, "depth": 2}
+
+    @pytest.mark.parametrize(
+        "where, expected",
+        [
+            ({"repository": {"$eq": "alpha"}}, True),
+            ({"repository": "beta"}, False),
+            ({"repository": {"$in": ["beta", "alpha"]}}, True),
+            ({"depth": {"$gte": 3}}, False),
+            ({"$and": [{"is_code": {"$eq": True}}, {"depth": {"$lt": 3}}]}, True),
+            ({"$or": [{"repository": "beta"}, {"missing": {"$eq": 1}}]}, False),
+        ],
+    )
+    def test_operators(self, where, expected):
+        """Test the Chroma operators used by the --where filters."""
+        assert matches_where(self.METADATA, where) is expected
+
+    def test_unknown_operator(self):
+        """Test unsupported operators raise instead of matching everything."""
+        with pytest.raises(ValueError, match="Unsupported"):
+            matches_where(self.METADATA, {"repository": {"$like": "a%"}})
+
+
+class TestFlatVectorStore:
+    """Tests for FlatVectorStore class."""
+
+    def test_query_is_exact(self, store):
+        """Test top-k matches brute-force cosine similarity, in order."""
+        query = np.random.default_rng(1).normal(size=16)
+
+        result = store.query(
+            VectorStoreQuery(query_embedding=query.tolist(), similarity_top_k=5)
+        )
+
+        assert result.ids == _exact(_nodes(), query, 5)
+        assert result.similarities == sorted(result.similarities, reverse=True)
+        assert result.nodes[0].get_content() == f"chunk {result.ids[0][5:]}"
+
+    def test_reload_is_memory_mapped(self, store, temp_dir):
+        """Test a reopened store maps the matrix instead of loading it."""
+        reopened = FlatVectorStore(persist_dir=temp_dir / FLAT_STORE_DIR)
+
+        assert isinstance(reopened._vectors, np.memmap)
+        assert reopened.count() == 50
+        assert is_flat_store(temp_dir)
+
+    def test_float16(self, temp_dir):
+        """Test float16 storage halves the matrix and keeps the ranking."""
+        nodes = _nodes()
+        store = FlatVectorStore(persist_dir=temp_dir / FLAT_STORE_DIR, dtype="float16")
+        store.add(nodes)
+        store.persist()
+        query = np.random.default_rng(2).normal(size=16)
+
+        reopened = FlatVectorStore(persist_dir=temp_dir / FLAT_STORE_DIR)
+        result = reopened.query(
+            VectorStoreQuery(query_embedding=query.tolist(), similarity_top_k=3)
+        )
+
+        assert reopened.dtype == "float16"
+        assert reopened._vectors.dtype == np.float16
+        assert result.ids == _exact(nodes, query, 3)
+
+    def test_int8_truncated_binary(self, temp_dir):
+        """Test a compressed store truncates queries and ranks like exact search."""
+        nodes = _nodes(count=200, dim=32)
+        store = FlatVectorStore(
+            persist_dir=temp_dir / FLAT_STORE_DIR,
+            dtype="int8",
+            dimensions=16,
+            binary=True,
+        )
+        store.add(nodes)
+        store.persist()
+        truncated = [
+            TextNode(id_=n.node_id, text=n.text, embedding=n.embedding[:16])
+            for n in nodes
+        ]
+        query = np.random.default_rng(3).normal(size=32)
+
+        reopened = FlatVectorStore(persist_dir=temp_dir / FLAT_STORE_DIR)
+        result = reopened.query(
+            VectorStoreQuery(query_embedding=query.tolist(), similarity_top_k=5)
+        )
+
+        assert (reopened.dtype, reopened.dimensions, reopened.binary) == (
+            "int8",
+            16,
+            True,
+        )
+        assert reopened._vectors.shape == (200, 16)
+        assert (temp_dir / FLAT_STORE_DIR / "bits.npy").exists()
+        assert len(set(result.ids) & set(_exact(truncated, query[:16], 5))) >= 4
+
+    def test_binary_prefilter_respects_where(self, temp_dir):
+        """Test the Hamming shortlist only keeps rows passing the filter."""
+        store = FlatVectorStore(persist_dir=temp_dir / FLAT_STORE_DIR, binary=True)
+        store.add(_nodes())
+        store.persist()
+        reopened = FlatVectorStore(persist_dir=temp_dir / FLAT_STORE_DIR)
+
+        result = reopened.query(
+            VectorStoreQuery(query_embedding=[1.0] * 16, similarity_top_k=3),
+            where={"repository": {"$eq": "beta"}},
+        )
+
+        assert len(result.ids) == 3
+        assert {n.metadata["repository"] for n in result.nodes} == {"beta"}
+
+    def test_where_filter(self, store):
+        """Test a Chroma where clause restricts candidates before top-k."""
+        query = VectorStoreQuery(query_embedding=[1.0] * 16, similarity_top_k=50)
+
+        result = store.query(query, where={"repository": {"$eq": "alpha"}})
+
+        assert len(result.ids) == 25
+        assert {n.metadata["repository"] for n in result.nodes} == {"alpha"}
+
+    def test_metadata_filters(self, store):
+        """Test LlamaIndex MetadataFilters are applied."""
+        filters = MetadataFilters(
+            filters=[MetadataFilter(key="relative_directory", value="src/pkg0")]
+        )
+        query = VectorStoreQuery(
+            query_embedding=[1.0] * 16, similarity_top_k=50, filters=filters
+        )
+
+        result = store.query(query)
+
+        assert len(result.ids) == 17
+        assert {n.metadata["relative_directory"] for n in result.nodes} == {"src/pkg0"}
+
+    def test_delete_and_upsert(self, store, temp_dir):
+        """Test deleting a document and re-adding a node are persisted."""
+        store.delete("doc-0")
+        replacement = _nodes(count=11)[10]
+        replacement.text = "replaced"
+        store.add([replacement])
+        store.persist()
+
+        reopened = FlatVectorStore(persist_dir=temp_dir / FLAT_STORE_DIR)
+        data = reopened.get(ids=["node-0", "node-10"])
+
+        assert reopened.count() == 40
+        assert data["ids"] == ["node-10"]
+        assert data["documents"] == ["replaced"]
+
+    def test_deletes_are_tombstoned_until_persist(self, store, temp_dir):
+        """Test deleted rows disappear at once and are compacted by persist."""
+        for doc in range(4):
+            store.delete(f"doc-{doc}")
+        store.delete_nodes(node_ids=["node-41"])
+        query = VectorStoreQuery(query_embedding=[1.0] * 16, similarity_top_k=50)
+
+        assert store.count() == 9
+        assert len(store.query(query).ids) == 9
+        assert store.get(ids=["node-0", "node-45"])["ids"] == ["node-45"]
+        assert len(store.get_nodes()) == 9
+
+        store.persist()
+        reopened = FlatVectorStore(persist_dir=temp_dir / FLAT_STORE_DIR)
+        assert reopened._vectors.shape == (9, 16)
+        assert set(reopened.get()["ids"]) == {f"node-{i}" for i in range(40, 50)} - {
+            "node-41"
+        }
+
+    def test_added_rows_are_searched_before_persist(self, store):
+        """Test added and upserted rows are queried without rewriting the matrix."""
+        nodes = _nodes(count=60, seed=4)[45:]
+        stored = store._vectors
+
+        store.add(nodes)
+        result = store.query(
+            VectorStoreQuery(query_embedding=nodes[-1].embedding, similarity_top_k=1)
+        )
+
+        assert store._vectors is stored
+        assert store.count() == 60
+        assert result.ids == ["node-59"]
+        upserted = store.get(ids=["node-45"], include=["embeddings"])
+        assert upserted["ids"] == ["node-45"]
+        assert np.allclose(
+            upserted["embeddings"][0],
+            nodes[0].embedding / np.linalg.norm(nodes[0].embedding),
+        )
+
+    def test_int8_codes_survive_incremental_adds(self, temp_dir):
+        """Test persisting an add keeps the stored int8 codes and scales."""
+        nodes = _nodes(count=100)
+        store = FlatVectorStore(persist_dir=temp_dir / FLAT_STORE_DIR, dtype="int8")
+        store.add(nodes[:90])
+        store.persist()
+        codes = np.array(store._vectors)
+        scales = np.array(store._scales)
+
+        # Copies of stored vectors fit in the stored range: no scale grows
+        copies = [
+            TextNode(id_=n.node_id, text=n.text, embedding=nodes[i].embedding)
+            for i, n in enumerate(nodes[90:])
+        ]
+        store.delete("doc-0")
+        store.add(copies)
+        store.persist()
+
+        reopened = FlatVectorStore(persist_dir=temp_dir / FLAT_STORE_DIR)
+        assert np.array_equal(reopened._scales, scales)
+        assert np.array_equal(reopened._vectors[:80], codes[10:])
+        assert reopened.count() == 90
+
+    def test_chroma_style_get_pages(self, store):
+        """Test get() pages and filters like a Chroma collection."""
+        first = store.get(include=["metadatas"], limit=30, offset=0)
+        second = store.get(include=["metadatas"], limit=30, offset=30)
+
+        assert len(first["metadatas"]) == 30
+        assert len(second["metadatas"]) == 20
+        assert build_where(["path=src/pkg1"], collections=[store]) == {
+            "dir_2": {"$eq": "src/pkg1"}
+        }
+        with pytest.raises(ValueError, match="No indexed directories"):
+            build_where(["path=src/pkg3"], collections=[store])
+
+    def test_dimension_mismatch(self, store):
+        """Test queries with the wrong dimension are rejected."""
+        with pytest.raises(ValueError, match="dimension"):
+            store.query(VectorStoreQuery(query_embedding=[1.0] * 8))
+
+
+class TestFlatIndex:
+    """Tests for building and loading an index on the flat backend."""
+
+    def test_build_and_retrieve(self, git_repo, temp_dir, mock_settings):
+        """Test build_index writes a flat store that load_index detects."""
+        (git_repo / "src" / "main.py").write_text("def main():\n    pass\n\n" * 20)
+        storage = temp_dir / "store"
+
+        build_index(git_repo, storage, backend="flat", num_workers=1)
+        nodes = retrieve(load_index(str(storage)), "main", top_k=2)
+
+        assert is_flat_store(storage)
+        assert not (storage / "chroma_db").exists()
+        assert len(nodes) == 2
+
+    def test_backend_mismatch(self, temp_dir):
+        """Test switching backends in place is refused."""
+        create_vector_store(temp_dir, backend="chroma")
+
+        with pytest.raises(ValueError, match="holds a chroma index"):
+            create_vector_store(temp_dir, backend="flat")
@@ -0,0 +1,89 @@
+"""Tests for frontier.py module."""
+
+import gzip
+
+from fragmenter.scraping.frontier import Frontier, normalize_url, parse_sitemap
+
+
+class TestNormalizeUrl:
+    """Tests for normalize_url function."""
+
+    def test_equivalent_urls(self):
+        """Test spellings of the same URL normalize alike."""
+        assert (
+            normalize_url("HTTPS://Docs.Example.com:443/a?b=2&a=1#top")
+            == normalize_url("https://docs.example.com/a?a=1&b=2")
+            == "https://docs.example.com/a?a=1&b=2"
+        )
+        assert normalize_url("http://example.com") == "http://example.com/"
+        assert normalize_url("http://example.com:8080/") == "http://example.com:8080/"
+
+
+class TestFrontier:
+    """Tests for Frontier class."""
+
+    def test_priority_order(self):
+        """Test shallow pages come first, then by sitemap priority, then FIFO."""
+        frontier = Frontier("https://example.com/docs/")
+        frontier.add("https://example.com/docs/deep", 2)
+        frontier.add("https://example.com/docs/a", 1)
+        frontier.add("https://example.com/docs/b", 1, priority=0.9)
+        frontier.add("https://example.com/docs/", 0)
+
+        order = [frontier.pop()[0] for _ in range(len(frontier))]
+
+        assert order == [
+            "https://example.com/docs/",
+            "https://example.com/docs/b",
+            "https://example.com/docs/a",
+            "https://example.com/docs/deep",
+        ]
+
+    def test_drops_duplicates_out_of_scope_and_too_deep(self):
+        """Test only new, in-prefix, allowed URLs within max_depth are queued."""
+        frontier = Frontier(
+            "https://example.com/docs/",
+            max_depth=1,
+            allowed=lambda url: "private" not in url,
+        )
+
+        assert frontier.add("https://example.com/docs/a#x", 1)
+        assert not frontier.add("https://EXAMPLE.com/docs/a", 1)
+        assert not frontier.add("https://example.com/blog/", 1)
+        assert not frontier.add("https://example.com/docs/b", 2)
+        assert not frontier.add("https://example.com/docs/private", 1)
+        assert len(frontier) == 1
+
+    def test_max_pages(self):
+        """Test no more than max_pages URLs are handed out."""
+        frontier = Frontier("https://example.com/", max_pages=1)
+        frontier.add("https://example.com/a", 1)
+        frontier.add("https://example.com/b", 1)
+
+        assert frontier.pop() == ("https://example.com/a", 1)
+        assert frontier.pop() is None
+        assert len(frontier) == 1
+
+
+class TestParseSitemap:
+    """Tests for parse_sitemap function."""
+
+    def test_urlset_and_index(self):
+        """Test pages with priorities, nested sitemaps and gzip are read."""
+        urlset = (
+            b'<urlset xmlns="http://www.sitemaps.org/schemas/sitemap/0.9">'
+            b"<url><loc> https://example.com/a </loc><priority>0.8</priority></url>"
+            b"<url><loc>https://example.com/b</loc><priority>high</priority></url>"
+            b"</urlset>"
+        )
+        index = (
+            b"<sitemapindex><sitemap><loc>https://example.com/s1.xml</loc></sitemap>"
+            b"</sitemapindex>"
+        )
+
+        assert parse_sitemap(gzip.compress(urlset)) == (
+            [("https://example.com/a", 0.8), ("https://example.com/b", 0.5)],
+            [],
+        )
+        assert parse_sitemap(index) == ([], ["https://example.com/s1.xml"])
+        assert parse_sitemap(b"<html>not a sitemap") == ([], [])
@@ -0,0 +1,153 @@
+"""Tests for index_analysis.py module."""
+
+import chromadb
+import numpy as np
+import pandas as pd
+import pytest
+
+from fragmenter.evaluation.index_analysis import (
+    embedding_coordinates,
+    fetch_embeddings,
+    load_index_frame,
+    pca_reduce,
+    reduce_embeddings,
+    stratified_sample,
+)
+
+
+@pytest.fixture
+def index_dir(temp_dir):
+    """A Chroma index with 300 chunks: many Python, few Markdown files."""
+    client = chromadb.PersistentClient(path=str(temp_dir / "chroma_db"))
+    collection = client.get_or_create_collection("documents")
+    file_types = [".py"] * 280 + [".md"] * 20
+    collection.add(
+        ids=[f"id-{i}" for i in range(300)],
+        embeddings=np.random.default_rng(0).normal(size=(300, 16)).tolist(),
+        documents=["x" * (i + 1) for i in range(300)],
+        metadatas=[
+            {
+                "relative_path": f"docs/f{i}{file_type}",
+                "file_type": file_type,
+                "repository": "alpha" if i % 2 else "beta",
+            }
+            for i, file_type in enumerate(file_types)
+        ],
+    )
+    return temp_dir
+
+
+class TestStratifiedSample:
+    """Tests for stratified_sample function."""
+
+    def test_small_frame_is_kept(self):
+        """Test frames within the budget are not sampled."""
+        frame = pd.DataFrame({"file_type": [".py"] * 5, "repository": ["a"] * 5})
+
+        assert stratified_sample(frame, max_points=10).tolist() == [0, 1, 2, 3, 4]
+
+    def test_groups_keep_their_share(self):
+        """Test each group is sampled in proportion and rare groups survive."""
+        frame = pd.DataFrame(
+            {
+                "file_type": [".py"] * 900 + [".md"] * 99 + [".rst"],
+                "repository": ["a"] * 1000,
+            }
+        )
+
+        positions = stratified_sample(frame, max_points=100)
+        counts = frame.iloc[positions]["file_type"].value_counts()
+
+        assert counts[".py"] == 90
+        assert counts[".md"] == 10
+        assert counts[".rst"] == 1
+        assert len(set(positions)) == len(positions)
+
+    def test_seeded(self):
+        """Test the same seed draws the same sample."""
+        frame = pd.DataFrame({"file_type": [".py"] * 500, "repository": ["a"] * 500})
+
+        first = stratified_sample(frame, max_points=50, seed=1)
+
+        assert (first == stratified_sample(frame, max_points=50, seed=1)).all()
+        assert not (first == stratified_sample(frame, max_points=50, seed=2)).all()
+
+
+class TestReduction:
+    """Tests for pca_reduce and reduce_embeddings functions."""
+
+    def test_pca_keeps_dominant_direction(self):
+        """Test the first component carries the variance of a stretched cloud."""
+        rng = np.random.default_rng(0)
+        matrix = rng.normal(size=(200, 10))
+        matrix[:, 3] *= 20
+
+        reduced = pca_reduce(matrix, 4)
+
+        assert reduced.shape == (200, 4)
+        variances = reduced.var(axis=0)
+        assert variances[0] == pytest.approx(matrix[:, 3].var(), rel=0.05)
+        assert (np.diff(variances) <= 1e-9).all()
+
+    def test_pca_reducer(self):
+        """Test the pca reducer yields 2-D coordinates without umap."""
+        matrix = np.random.default_rng(0).normal(size=(30, 16))
+
+        assert reduce_embeddings(matrix, reducer="pca").shape == (30, 2)
+
+    def test_unknown_reducer(self):
+        """Test unsupported reducers are rejected."""
+        with pytest.raises(ValueError, match="Unknown reducer"):
+            reduce_embeddings(np.zeros((3, 3)), reducer="tsne")
+
+
+class TestEmbeddingCoordinates:
+    """Tests for reading and caching the embedding plot coordinates."""
+
+    def test_frame_and_sampled_embeddings(self, index_dir):
+        """Test only the sampled rows' embeddings are fetched, in row order."""
+        frame = load_index_frame(index_dir)
+        stored = open_collection_embeddings(index_dir)
+
+        sample = frame.iloc[[5, 250, 17]]
+        embeddings = fetch_embeddings(index_dir, sample)
+
+        assert len(frame) == 300
+        assert embeddings.shape == (3, 16)
+        for row, node_id in zip(embeddings, sample["id"], strict=True):
+            np.testing.assert_allclose(row, stored[node_id], rtol=1e-6)
+
+    def test_cache_hit_and_invalidation(self, index_dir, temp_dir):
+        """Test cached coordinates are reused until the index changes."""
+        cache_dir = temp_dir / "cache"
+        frame = load_index_frame(index_dir)
+
+        first = embedding_coordinates(
+            index_dir, frame, cache_dir=cache_dir, max_points=100, reducer="pca"
+        )
+        cached = embedding_coordinates(
+            index_dir, frame, cache_dir=cache_dir, max_points=100, reducer="pca"
+        )
+
+        assert len(first) == 100
+        assert set(first["file_type"]) == {".py", ".md"}
+        assert first["id"].tolist() == cached["id"].tolist()
+        np.testing.assert_allclose(first[["x", "y"]], cached[["x", "y"]])
+
+        client = chromadb.PersistentClient(path=str(index_dir / "chroma_db"))
+        client.get_collection("documents").delete(ids=first["id"].tolist()[:50])
+        frame = load_index_frame(index_dir)
+
+        rebuilt = embedding_coordinates(
+            index_dir, frame, cache_dir=cache_dir, max_points=100, reducer="pca"
+        )
+
+        assert set(rebuilt["id"]) <= set(frame["id"])
+        assert len(list(cache_dir.glob("coords-*.npz"))) == 1
+
+
+def open_collection_embeddings(index_dir):
+    """Map node id to stored embedding."""
+    client = chromadb.PersistentClient(path=str(index_dir / "chroma_db"))
+    data = client.get_collection("documents").get(include=["embeddings"])
+    return dict(zip(data["ids"], data["embeddings"], strict=True))
@@ -0,0 +1,322 @@
+"""Tests for inference.py module."""
+
+import asyncio
+import json
+from types import SimpleNamespace
+from unittest.mock import AsyncMock, MagicMock
+
+import pytest
+from llama_index.core import VectorStoreIndex
+from llama_index.core.schema import NodeWithScore, TextNode
+from typer.testing import CliRunner
+
+from fragmenter.cli import app
+from fragmenter.rag.inference import (
+    QueryTimings,
+    StreamingCodeExtractor,
+    abatch_query,
+    extract_code_blocks,
+    load_batch_queries,
+    query_and_save,
+    query_index,
+    retrieve,
+    serialize_source_node,
+    stream_and_save,
+)
+
+MARKDOWN = (
+    "Here is code:\n```python\ndef f():\n    return 1\n```\n"
+    "and more ``inline`` text\n```cpp\nint x = 0;\n```\nDone."
+)
+
+
+class TestRetrieve:
+    """Tests for retrieve and serialize_source_node functions."""
+
+    def test_serialize_source_node(self):
+        """Test that all documented fields are present."""
+        node = TextNode(
+            text="int main() {}",
+            metadata={"file_type": ".cpp"},
+            start_char_idx=10,
+            end_char_idx=23,
+        )
+
+        result = serialize_source_node(NodeWithScore(node=node, score=0.9), rank=1)
+
+        assert result == {
+            "rank": 1,
+            "node_id": node.node_id,
+            "score": 0.9,
+            "text": "int main() {}",
+            "metadata": {"file_type": ".cpp"},
+            "start_char_idx": 10,
+            "end_char_idx": 23,
+        }
+
+    def test_retrieve_ranks_without_llm(self):
+        """Test that retrieve passes top_k and never builds a query engine."""
+        index = MagicMock()
+        index.as_retriever.return_value.retrieve.return_value = [
+            NodeWithScore(node=TextNode(text="a"), score=0.8),
+            NodeWithScore(node=TextNode(text="b"), score=0.4),
+        ]
+
+        results = retrieve(index, "query", top_k=2)
+
+        index.as_retriever.assert_called_once_with(similarity_top_k=2)
+        index.as_query_engine.assert_not_called()
+        assert [(r["rank"], r["text"]) for r in results] == [(1, "a"), (2, "b")]
+
+
+class TestExtractCodeBlocks:
+    """Tests for extract_code_blocks function."""
+
+    def test_extract_all_blocks(self):
+        """Test extracting blocks regardless of language."""
+        text = "a\n```python\nx = 1\n```\nb\n```\ny\n```\n"
+
+        assert extract_code_blocks(text) == ["x = 1\n", "y\n"]
+
+    def test_language_filter(self):
+        """Test that only blocks for the requested language are returned."""
+        text = "```cpp\nint a;\n```\n```python\nb = 2\n```\n"
+
+        assert extract_code_blocks(text, language="python") == ["b = 2\n"]
+
+
+class TestStreamingCodeExtractor:
+    """Tests for StreamingCodeExtractor class."""
+
+    @staticmethod
+    def _run(text, size, language=None):
+        extractor = StreamingCodeExtractor(language=language)
+        pieces = [text[i : i + size] for i in range(0, len(text), size)]
+        out = "".join(extractor.feed(piece) for piece in pieces)
+        return out + extractor.close(), extractor.blocks_found
+
+    @pytest.mark.parametrize("size", [1, 2, 3, 7, 1000])
+    def test_matches_batch_extraction(self, size):
+        """Test that any chunking yields the same code as extract_code_blocks."""
+        code, found = self._run(MARKDOWN, size)
+
+        assert code == "\n\n".join(extract_code_blocks(MARKDOWN))
+        assert found == 2
+
+    @pytest.mark.parametrize("size", [1, 4])
+    def test_language_filter(self, size):
+        """Test that blocks in other languages are skipped."""
+        code, found = self._run(MARKDOWN, size, language="cpp")
+
+        assert code == "int x = 0;\n"
+        assert found == 1
+
+    def test_unterminated_block_is_kept(self):
+        """Test that a block cut off by the end of the stream is flushed."""
+        code, found = self._run("```python\nx = 1\ny =", 3)
+
+        assert code == "x = 1\ny ="
+        assert found == 1
+
+
+class TestStreamAndSave:
+    """Tests for stream_and_save function."""
+
+    @staticmethod
+    def _index(tokens):
+        index = MagicMock()
+        index.as_query_engine.return_value.query.return_value = SimpleNamespace(
+            response_gen=iter(tokens), source_nodes=[]
+        )
+        return index
+
+    def test_streams_tokens_to_file_and_callback(self, temp_dir):
+        """Test that every token reaches the callback and the file."""
+        seen = []
+        output = temp_dir / "out" / "answer.md"
+
+        text = stream_and_save(
+            self._index(["Hello", " world"]), "q", output, on_token=seen.append
+        )
+
+        assert seen == ["Hello", " world"]
+        assert text == output.read_text() == "Hello world"
+
+    def test_code_only_falls_back_to_full_response(self, temp_dir):
+        """Test that the full response is saved when no code block exists."""
+        output = temp_dir / "answer.py"
+
+        stream_and_save(self._index(["no ", "code"]), "q", output, code_only=True)
+
+        assert output.read_text() == "no code"
+
+    def test_code_only_writes_code(self, temp_dir):
+        """Test that only code is written with code_only."""
+        output = temp_dir / "answer.py"
+        tokens = [MARKDOWN[i : i + 5] for i in range(0, len(MARKDOWN), 5)]
+
+        stream_and_save(self._index(tokens), "q", output, code_only=True)
+
+        assert output.read_text() == "\n\n".join(extract_code_blocks(MARKDOWN))
+
+
+class TestQueryTimings:
+    """Tests for QueryTimings class and the timed query path."""
+
+    @pytest.fixture
+    def index(self, mock_settings):
+        """In-memory index with deterministic embeddings and the mock LLM."""
+        return VectorStoreIndex(
+            [TextNode(text=f"chunk {i} about sensor fusion") for i in range(4)]
+        )
+
+    def test_stages_in_query_order(self):
+        """Test stages are reported in pipeline order and accumulate."""
+        timings = QueryTimings()
+        timings.add("synthesis", 0.5)
+        with timings.stage("settings"):
+            pass
+        timings.add("synthesis", 0.25)
+
+        report = timings.to_dict()
+
+        assert list(report["stages"]) == ["settings", "synthesis"]
+        assert report["stages"]["synthesis"] == 0.75
+        assert report["ttft_s"] is None
+
+    def test_same_answer_with_timings(self, index):
+        """Test the timed path answers like the query engine and times it."""
+        timings = QueryTimings()
+
+        timed = query_index(index, "sensor fusion", timings=timings)
+        plain = query_index(index, "sensor fusion")
+
+        assert str(timed) == str(plain)
+        assert len(timed.source_nodes) == len(plain.source_nodes)
+        report = timings.to_dict()
+        assert list(report["stages"]) == ["embed", "search", "postprocess", "synthesis"]
+        assert 0 <= report["ttft_s"] <= report["stages"]["synthesis"]
+        assert report["context_tokens"] > 0
+
+    def test_stream_and_save_times_output(self, index, temp_dir):
+        """Test streaming records synthesis and output once exhausted."""
+        timings = QueryTimings()
+        output = temp_dir / "answer.md"
+
+        text = stream_and_save(index, "sensor fusion", output, timings=timings)
+
+        assert text == output.read_text()
+        assert {"synthesis", "output"} <= set(timings.stages)
+        assert timings.ttft_s is not None
+
+    def test_query_and_save_times_output(self, index, temp_dir):
+        """Test the file write is booked as output."""
+        timings = QueryTimings()
+
+        query_and_save(index, "sensor fusion", temp_dir / "a.md", timings=timings)
+
+        assert list(timings.to_dict()["stages"])[-1] == "output"
+
+
+class TestLoadBatchQueries:
+    """Tests for load_batch_queries function."""
+
+    def test_ids_default_to_line_numbers(self, temp_dir):
+        """Test that missing ids are filled in and blank lines skipped."""
+        batch_file = temp_dir / "batch.jsonl"
+        batch_file.write_text(
+            json.dumps({"query": "first"})
+            + "\n\n"
+            + json.dumps({"id": "x", "query": "second", "tag": "t"})
+            + "\n"
+        )
+
+        queries = load_batch_queries(batch_file)
+
+        assert queries == [
+            {"query": "first", "id": 1},
+            {"id": "x", "query": "second", "tag": "t"},
+        ]
+
+    def test_missing_query_raises(self, temp_dir):
+        """Test that a record without a query is rejected with its line number."""
+        batch_file = temp_dir / "batch.jsonl"
+        batch_file.write_text(json.dumps({"prompt": "nope"}) + "\n")
+
+        with pytest.raises(ValueError, match=":1:"):
+            load_batch_queries(batch_file)
+
+    def test_stream_is_rejected(self, temp_dir):
+        """Test --stream with --batch is an error, not silently ignored."""
+        batch_file = temp_dir / "batch.jsonl"
+        batch_file.write_text(json.dumps({"query": "q"}) + "\n")
+
+        result = CliRunner().invoke(
+            app,
+            [
+                "query",
+                "--storage-dir",
+                str(temp_dir),
+                "--batch",
+                str(batch_file),
+                "--output",
+                str(temp_dir / "out.jsonl"),
+                "--stream",
+                "--logs-dir",
+                str(temp_dir / "logs"),
+            ],
+        )
+
+        assert result.exit_code == 1
+        assert "cannot be combined with --batch" in result.output
+
+
+class TestAbatchQuery:
+    """Tests for abatch_query function."""
+
+    @staticmethod
+    def _collect(index, queries, **kwargs):
+        async def run():
+            return [r async for r in abatch_query(index, queries, **kwargs)]
+
+        return asyncio.run(run())
+
+    def test_bounded_concurrency(self):
+        """Test that no more than `concurrency` queries run at once."""
+        in_flight = 0
+        peak = 0
+
+        async def aquery(text):
+            nonlocal in_flight, peak
+            in_flight += 1
+            peak = max(peak, in_flight)
+            await asyncio.sleep(0.01)
+            in_flight -= 1
+            return f"answer to {text}"
+
+        index = MagicMock()
+        index.as_query_engine.return_value.aquery = aquery
+        queries = [{"id": i, "query": f"q{i}"} for i in range(10)]
+
+        results = self._collect(index, queries, concurrency=3)
+
+        assert peak <= 3
+        assert sorted(r["id"] for r in results) == list(range(10))
+        assert all(r["error"] is None and r["elapsed_s"] >= 0 for r in results)
+
+    def test_errors_and_code_extraction(self):
+        """Test that failures are reported per query and code is extracted."""
+        engine = MagicMock()
+        engine.aquery = AsyncMock(
+            side_effect=["```cpp\nint x;\n```", RuntimeError("boom")]
+        )
+        index = MagicMock()
+        index.as_query_engine.return_value = engine
+        queries = [{"id": 1, "query": "a"}, {"id": 2, "query": "b"}]
+
+        results = self._collect(index, queries, concurrency=1, code_only=True)
+        by_id = {r["id"]: r for r in results}
+
+        assert by_id[1]["code_blocks"] == ["int x;\n"]
+        assert by_id[2]["error"] == "boom"
+        assert by_id[2]["code_blocks"] == []
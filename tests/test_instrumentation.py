@@ -0,0 +1,126 @@
+"""Tests for instrumentation.py module."""
+
+import io
+import json
+
+from rich.console import Console
+from rich.progress import Progress
+
+from fragmenter.rag.ingestion import build_index
+from fragmenter.rag.instrumentation import REPORT_FILE, BuildReport
+
+
+class TestBuildReport:
+    """Tests for BuildReport class."""
+
+    def test_stage_records_time_and_items(self):
+        """Test re-entering a stage adds to its time, items and counts."""
+        report = BuildReport()
+
+        for _ in range(2):
+            with report.stage("parse", unit="files") as stage:
+                stage.advance(file_type=".py", seconds=0.5, bytes=2_000_000, chunks=3)
+                stage.advance(file_type=".md", seconds=0.25, bytes=1000, chunks=1)
+        result = report.finish()
+
+        parse = result["stages"]["parse"]
+        assert parse["unit"] == "files"
+        assert parse["items"] == 4
+        assert parse["bytes"] == 4_002_000
+        assert parse["chunks"] == 8
+        assert parse["seconds"] <= result["seconds"]
+        assert result["stages"]["parse"]["file_types"][".py"] == {
+            "files": 2,
+            "seconds": 1.0,
+            "bytes": 4_000_000,
+            "chunks": 6,
+            "files_per_s": 2.0,
+            "mb_per_s": 4.0,
+        }
+
+    def test_timed_calls(self):
+        """Test calls are booked under the stage and the method is restored."""
+
+        class Store:
+            def add(self, nodes):
+                return [str(node) for node in nodes]
+
+            def delete(self, ref_doc_id):
+                return None
+
+        store = Store()
+        report = BuildReport()
+
+        with (
+            report.timed_calls(store, "add", "upsert"),
+            report.timed_calls(store, "delete", "upsert"),
+        ):
+            assert store.add([1, 2, 3]) == ["1", "2", "3"]
+            store.delete("doc")
+
+        assert report.stages["upsert"]["items"] == 4
+        assert report.stages["upsert"]["seconds"] > 0
+        assert "add" not in vars(store)
+        assert store.add([4]) == ["4"]
+        assert report.stages["upsert"]["items"] == 4
+
+    def test_progress_tasks(self):
+        """Test every stage gets one task, finished with its item count."""
+        progress = Progress(console=Console(file=io.StringIO()))
+        report = BuildReport(progress=progress)
+
+        with report.stage("walk", unit="files") as stage:
+            stage.advance(3)
+        for _ in range(2):
+            with report.stage("embed", total=5, unit="nodes") as stage:
+                stage.advance(4)
+
+        walk, embed = progress.tasks
+        assert (walk.description, walk.completed, walk.total) == ("walk", 3, 3)
+        assert (embed.completed, embed.total) == (8, 8)
+        assert embed.fields["unit"] == "nodes"
+        assert embed.finished
+
+    def test_write_prometheus(self, tmp_path):
+        """Test the textfile holds one gauge per key with escaped labels."""
+        report = BuildReport()
+        with report.stage("parse", unit="files") as stage:
+            stage.advance(file_type='we"ird', seconds=0.1, bytes=10)
+        report.finish()
+
+        path = report.write_prometheus(tmp_path / "metrics" / "build.prom")
+        text = path.read_text()
+
+        assert "# TYPE fragmenter_build_duration_seconds gauge" in text
+        assert 'fragmenter_build_stage_items{stage="parse"} 1\n' in text
+        assert "fragmenter_build_stage_items_per_second{" in text
+        assert (
+            'fragmenter_build_file_type_bytes{stage="parse",file_type="we\\"ird"} 10'
+            in text
+        )
+        assert list(path.parent.iterdir()) == [path]
+
+
+class TestBuildIndexReport:
+    """Tests for the report written by build_index."""
+
+    def test_stages_of_a_build(self, git_repo, tmp_path, mock_settings):
+        """Test a build reports every stage and the parsed file types."""
+        (git_repo / "src" / "main.py").write_text("def main():\n    pass\n\n" * 20)
+        storage = tmp_path / "store"
+
+        build_index(git_repo, storage, num_workers=1)
+        stages = json.loads((storage / REPORT_FILE).read_text())["stages"]
+
+        assert list(stages) == [
+            "walk",
+            "metadata",
+            "parse",
+            "embed",
+            "upsert",
+            "persist",
+        ]
+        assert stages["walk"]["items"] == 2
+        assert set(stages["parse"]["file_types"]) == {".md", ".py"}
+        assert stages["embed"]["items"] == stages["upsert"]["items"] > 0
+        assert stages["embed"]["seconds"] >= 0
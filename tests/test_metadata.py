@@ -1,8 +1,14 @@
 """Tests for metadata.py module."""
 
 from llama_index.core import Document
+from llama_index.core.schema import MetadataMode
 
-from fragmenter.rag.metadata import create_metadata_extractor, find_git_root
+from fragmenter.rag.metadata import (
+    create_metadata_extractor,
+    exclude_path_prefixes,
+    find_git_root,
+    path_prefix_metadata,
+)
 
 
 class TestFindGitRoot:
@@ -103,3 +109,30 @@ class TestCreateMetadataExtractor:
 
         # Should return document unchanged
         assert result == doc
+
+
+class TestPathPrefixMetadata:
+    """Tests for the directory prefix fields used by path filters."""
+
+    def test_one_field_per_depth(self):
+        """Test every leading part of the directory gets its own field."""
+        assert path_prefix_metadata("src/rag/x") == {
+            "dir_0": ".",
+            "dir_1": "src",
+            "dir_2": "src/rag",
+            "dir_3": "src/rag/x",
+        }
+        assert path_prefix_metadata(".") == {"dir_0": "."}
+
+    def test_fields_are_not_embedded(self):
+        """Test the prefix fields stay out of the embedded and LLM text."""
+        doc = Document(
+            text="x",
+            metadata={"relative_directory": "src", **path_prefix_metadata("src")},
+        )
+
+        exclude_path_prefixes(doc)
+
+        assert "dir_1" not in doc.get_metadata_str(MetadataMode.EMBED)
+        assert "dir_1" not in doc.get_metadata_str(MetadataMode.LLM)
+        assert "relative_directory" in doc.get_metadata_str(MetadataMode.EMBED)
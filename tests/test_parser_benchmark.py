@@ -0,0 +1,61 @@
+"""Tests for parser_benchmark.py module."""
+
+import pytest
+
+from fragmenter.rag.parser_benchmark import (
+    WORKLOADS,
+    benchmark_parsers,
+    compare_to_baseline,
+    generate_workload,
+)
+
+
+class TestWorkloads:
+    """Tests for generate_workload function."""
+
+    def test_every_workload_chunks(self, tmp_path):
+        """Test each generated input parses into chunks."""
+        results = benchmark_parsers(tmp_path, scale=0.001)
+
+        assert [r["parser"] for r in results] == list(WORKLOADS)
+        for result in results:
+            assert result["files"] >= 1
+            assert result["chunks"] > 0, result["parser"]
+            assert result["mb_per_s"] > 0
+            assert result["peak_mb"] > 0
+
+    def test_scale_and_seed(self, tmp_path):
+        """Test scale sets the file count and a seed reproduces the contents."""
+        first = generate_workload(tmp_path / "a", "yaml", scale=0.005, seed=1)
+        second = generate_workload(tmp_path / "b", "yaml", scale=0.005, seed=1)
+
+        assert len(first) == 10
+        assert [p.read_text() for p in first] == [p.read_text() for p in second]
+
+    def test_unknown_workload(self, tmp_path):
+        """Test unsupported parsers are rejected."""
+        with pytest.raises(ValueError, match="Unknown parser workload"):
+            generate_workload(tmp_path, "rust")
+
+
+class TestBaseline:
+    """Tests for compare_to_baseline function."""
+
+    def test_regressions(self):
+        """Test slower or larger-memory parsers beyond the tolerance are flagged."""
+        baseline = [
+            {"parser": "cpp", "mb_per_s": 2.0, "peak_mb": 10.0},
+            {"parser": "pdf", "mb_per_s": 0.2, "peak_mb": 1.0},
+        ]
+        results = [
+            {"parser": "cpp", "mb_per_s": 1.5, "peak_mb": 11.0},
+            {"parser": "pdf", "mb_per_s": 0.19, "peak_mb": 1.5},
+            {"parser": "yaml", "mb_per_s": 0.1, "peak_mb": 1.0},
+        ]
+
+        regressions = compare_to_baseline(results, baseline, tolerance=0.2)
+
+        assert regressions == [
+            "cpp: 1.500 MB/s (baseline 2.000)",
+            "pdf: peak 1.5 MB (baseline 1.0)",
+        ]
@@ -1,5 +1,6 @@
 """Tests for parsers.py module."""
 
+from fragmenter.rag.parser_benchmark import write_pdf
 from fragmenter.rag.parsers import (
     MIN_CHUNK_SIZE_CODE,
     MIN_CHUNK_SIZE_CONFIG,
@@ -64,6 +65,18 @@ class TestTypedDocumentReader:
         for doc in docs:
             assert doc.metadata["is_documentation"] is True
 
+    def test_load_data_pdf(self, temp_dir):
+        """Test PDF pages are chunked rather than skipped as empty."""
+        pdf_file = temp_dir / "manual.pdf"
+        write_pdf(pdf_file, [["Telemetry is published every 100 ms."] * 20] * 3)
+
+        docs = TypedDocumentReader().load_data(
+            pdf_file, extra_info={"is_documentation": True}
+        )
+
+        assert len(docs) > 0
+        assert "Telemetry is published" in docs[0].get_content()
+
     def test_chunk_merging_logic(self, temp_dir):
         """Test that small chunks are merged into larger ones."""
         # Create a file with many small lines
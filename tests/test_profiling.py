@@ -0,0 +1,115 @@
+"""Tests for profiling.py module and the global --profile option."""
+
+import pstats
+import time
+import tracemalloc
+
+import pytest
+from typer.testing import CliRunner
+
+from fragmenter.cli import app
+from fragmenter.utils.profiling import Profile, SamplingProfiler
+
+
+def busy_loop(seconds: float) -> int:
+    """Burn CPU in Python code for a while."""
+    end = time.perf_counter() + seconds
+    count = 0
+    while time.perf_counter() < end:
+        count += 1
+    return count
+
+
+class TestSamplingProfiler:
+    """Tests for SamplingProfiler class."""
+
+    def test_samples_running_function(self):
+        """Test the busy function dominates the main thread's samples."""
+        profiler = SamplingProfiler(interval=0.001)
+
+        profiler.start()
+        busy_loop(0.2)
+        profiler.stop()
+
+        assert profiler.samples > 10
+        main = {
+            stack: count
+            for stack, count in profiler.stacks.items()
+            if stack[0] == "thread:MainThread"
+        }
+        busy = [stack for stack in main if stack[-1].startswith("busy_loop (")]
+        assert sum(main[stack] for stack in busy) > sum(main.values()) / 2
+        top = {entry["function"]: entry for entry in profiler.top(100)}
+        assert top[busy[0][-1]]["total"] >= top[busy[0][-1]]["own"] > 0
+        line = next(line for line in profiler.folded() if "busy_loop" in line)
+        stack, count = line.rsplit(" ", 1)
+        assert stack.startswith("thread:MainThread;")
+        assert int(count) > 0
+
+
+class TestProfile:
+    """Tests for Profile class."""
+
+    def test_unknown_profiler(self):
+        """Test an unknown profiler name is rejected."""
+        with pytest.raises(ValueError, match="Unknown profiler"):
+            Profile(profiler="perf")
+
+    def test_cprofile_with_memory(self, tmp_path):
+        """Test cProfile stats, the summary and the memory snapshot are written."""
+        session = Profile(profiler="cprofile", memory=True)
+
+        session.start()
+        busy_loop(0.01)
+        kept = [bytearray(1000) for _ in range(100)]
+        session.stop()
+        paths = session.write(tmp_path / "logs", "test", top=5)
+
+        assert [path.suffix for path in paths] == [".prof", ".tracemalloc", ".txt"]
+        assert not tracemalloc.is_tracing()
+        stats = pstats.Stats(str(paths[0]))
+        assert any(func[2] == "busy_loop" for func in stats.stats)
+        assert tracemalloc.Snapshot.load(str(paths[1])).traces
+        summary = paths[2].read_text()
+        assert "busy_loop" in summary
+        assert "Peak traced memory" in summary
+        assert "test_profiling.py" in summary
+        assert len(kept) == 100
+
+
+class TestProfileOption:
+    """Tests for the global --profile option."""
+
+    def test_writes_to_command_logs_dir(self, tmp_path):
+        """Test the profile lands in the subcommand's --logs-dir."""
+        (tmp_path / "data").mkdir()
+        (tmp_path / "data" / "main.py").write_text("print('hello')\n")
+        logs_dir = tmp_path / "logs"
+
+        result = CliRunner().invoke(
+            app,
+            [
+                "--profile",
+                "collect-extensions",
+                str(tmp_path / "data"),
+                "--logs-dir",
+                str(logs_dir),
+            ],
+        )
+
+        assert result.exit_code == 0, result.output
+        suffixes = sorted(path.suffix for path in logs_dir.glob("profile-*"))
+        assert suffixes == [".folded", ".txt"]
+        assert all(
+            path.name.startswith("profile-collect-extensions-")
+            for path in logs_dir.glob("profile-*")
+        )
+
+    def test_unknown_profiler(self):
+        """Test a wrong --profiler fails before the command runs."""
+        result = CliRunner().invoke(
+            app, ["--profile", "--profiler", "perf", "collect-extensions", "."]
+        )
+
+        assert result.exit_code == 2
+        assert "Unknown profiler" in result.output
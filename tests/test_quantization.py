@@ -0,0 +1,112 @@
+"""Tests for quantization.py module."""
+
+import numpy as np
+import pytest
+
+from fragmenter.rag.quantization import (
+    bytes_per_vector,
+    compression_report,
+    dequantize_int8,
+    encode,
+    hamming_distances,
+    pack_bits,
+    quantize_int8,
+    truncate,
+)
+
+
+@pytest.fixture
+def vectors():
+    """Unit vectors with a few dominant directions, like real embeddings."""
+    rng = np.random.default_rng(0)
+    centers = rng.normal(size=(8, 64))
+    data = centers[rng.integers(0, 8, 400)] + 0.3 * rng.normal(size=(400, 64))
+    return truncate(data, None)
+
+
+class TestTruncate:
+    """Tests for truncate function."""
+
+    def test_keeps_leading_dimensions_normalized(self, vectors):
+        """Test the first dimensions are kept and rows are unit length."""
+        result = truncate(vectors, 16)
+
+        assert result.shape == (400, 16)
+        np.testing.assert_allclose(np.linalg.norm(result, axis=1), 1.0, rtol=1e-5)
+        assert np.all(np.sign(result) == np.sign(vectors[:, :16]))
+
+    def test_larger_than_dimension_is_noop(self, vectors):
+        """Test truncating to more dimensions than available keeps all."""
+        assert truncate(vectors, 1000).shape == vectors.shape
+
+
+class TestQuantizeInt8:
+    """Tests for quantize_int8 and encode functions."""
+
+    def test_round_trip_error_is_small(self, vectors):
+        """Test dequantized vectors are within half a step of the originals."""
+        codes, scales = quantize_int8(vectors)
+
+        assert codes.dtype == np.int8
+        error = np.abs(dequantize_int8(codes, scales) - vectors)
+        assert np.all(error <= scales / 2 + 1e-6)
+
+    def test_encode_dtypes(self, vectors):
+        """Test encode returns the storage dtype and int8 scales."""
+        assert encode(vectors, "float16")["vectors"].dtype == np.float16
+        assert set(encode(vectors, "int8")) == {"vectors", "scales"}
+        with pytest.raises(ValueError, match="storage dtype"):
+            encode(vectors, "int4")
+
+
+class TestBinary:
+    """Tests for pack_bits and hamming_distances functions."""
+
+    def test_hamming_matches_unpacked_count(self, vectors):
+        """Test distances equal the number of differing sign bits."""
+        bits = pack_bits(vectors)
+        expected = ((vectors > 0) != (vectors[0] > 0)).sum(axis=1)
+
+        assert bits.shape == (400, 8)
+        np.testing.assert_array_equal(hamming_distances(bits, bits[0]), expected)
+
+    def test_bytes_per_vector(self):
+        """Test sizes include the binary sketch."""
+        assert bytes_per_vector(1536, "float32") == 6144
+        assert bytes_per_vector(512, "int8", binary=True) == 576
+
+
+class TestCompressionReport:
+    """Tests for compression_report function."""
+
+    def test_full_precision_is_exact(self, vectors):
+        """Test the uncompressed variant has recall 1 and sizes are reported."""
+        results = compression_report(
+            vectors, dimensions=[None, 32], dtypes=["float32", "int8"], top_k=5
+        )
+        by_key = {(r["dimensions"], r["dtype"], r["binary"]): r for r in results}
+
+        assert len(results) == 8
+        assert by_key[(64, "float32", False)]["recall"] == 1.0
+        assert by_key[(64, "int8", False)]["recall"] > 0.9
+        assert by_key[(32, "int8", False)]["compression"] == 8.0
+
+    def test_queries_are_held_out(self):
+        """Test queries are not searched, so no variant finds the query itself."""
+        vectors = np.random.default_rng(0).normal(size=(400, 64))
+
+        results = compression_report(
+            vectors, dimensions=[None], dtypes=["float32"], top_k=1
+        )
+        by_binary = {r["binary"]: r["recall"] for r in results}
+
+        # A query left in the index would top its own Hamming shortlist
+        assert by_binary[False] == 1.0
+        assert by_binary[True] < 0.9
+        with pytest.raises(ValueError, match="Too few"):
+            compression_report(vectors[:1])
+
+    def test_empty(self):
+        """Test an empty index is rejected."""
+        with pytest.raises(ValueError, match="No embeddings"):
+            compression_report(np.zeros((0, 8)))
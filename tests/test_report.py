@@ -0,0 +1,73 @@
+"""Tests for report.py module."""
+
+import pandas as pd
+import pytest
+
+from fragmenter.evaluation.report import compare_experiments, load_experiments
+
+SCORES = {
+    "faithfulness": [1.0, 0.5],
+    "answer_relevancy": [0.8, 0.6],
+    "context_recall": [1.0, 1.0],
+    "context_precision": [1.0, 0.0],
+    "response": ["a", "b"],
+    "retrieved_contexts": ["[]", "[]"],
+}
+
+
+@pytest.fixture
+def experiments(tmp_path):
+    """A run with cost columns, an older run without them and an empty file."""
+    pd.DataFrame(
+        {
+            **SCORES,
+            "retrieval_s": [0.1, 0.3],
+            "synthesis_s": [1.0, 2.0],
+            "ttft_s": [0.4, 0.6],
+            "prompt_tokens": [1000, 3000],
+            "completion_tokens": [100, 300],
+            "context_bytes": [2048, 6144],
+        }
+    ).to_csv(tmp_path / "fast_run.csv", index=False)
+    pd.DataFrame({**SCORES, "faithfulness": [1.0, 1.0]}).to_csv(
+        tmp_path / "old_run.csv", index=False
+    )
+    (tmp_path / "crashed_run.csv").write_text("")
+    return tmp_path
+
+
+class TestCompareExperiments:
+    """Tests for load_experiments and compare_experiments functions."""
+
+    def test_one_row_per_experiment(self, experiments):
+        """Test runs are summarized side by side, best quality first."""
+        report = compare_experiments(load_experiments(experiments))
+
+        assert list(report.index) == ["old_run", "fast_run"]
+        fast = report.loc["fast_run"]
+        assert fast["rows"] == 2
+        assert fast["quality"] == pytest.approx((0.75 + 0.7 + 1.0 + 0.5) / 4)
+        assert fast["latency_p50_s"] == pytest.approx(1.7)
+        assert fast["ttft_p50_s"] == pytest.approx(0.5)
+        assert fast["prompt_tokens"] == 2000
+        assert fast["context_kb"] == 4
+
+    def test_old_runs_have_no_costs(self, experiments):
+        """Test runs without cost columns are kept with empty costs."""
+        report = compare_experiments(load_experiments(experiments))
+
+        assert report.loc["old_run", "faithfulness"] == 1.0
+        assert pd.isna(report.loc["old_run", "latency_p50_s"])
+
+    def test_cost_per_query(self, experiments):
+        """Test token prices turn into a cost per query."""
+        report = compare_experiments(
+            load_experiments(experiments), prompt_price=1.0, completion_price=10.0
+        )
+
+        assert report.loc["fast_run", "cost_per_query"] == pytest.approx(0.004)
+
+    def test_no_experiments(self, tmp_path):
+        """Test an empty directory is reported."""
+        with pytest.raises(FileNotFoundError, match="No experiment results"):
+            load_experiments(tmp_path)
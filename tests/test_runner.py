@@ -0,0 +1,174 @@
+"""Tests for runner.py module."""
+
+import asyncio
+
+import pytest
+from llama_index.core import Settings, VectorStoreIndex
+from llama_index.core.base.response.schema import Response
+from llama_index.core.embeddings import MockEmbedding
+from llama_index.core.llms import MockLLM
+from llama_index.core.schema import NodeWithScore, TextNode
+
+from fragmenter.evaluation.runner import EvaluationRunner
+from fragmenter.rag.utils import index_version
+
+
+class FakeQueryEngine:
+    """Async query engine recording calls and peak concurrency."""
+
+    def __init__(self):
+        self.queries = []
+        self.active = 0
+        self.peak = 0
+
+    async def aretrieve(self, query_bundle):
+        query = query_bundle.query_str
+        self.queries.append(query)
+        self.active += 1
+        self.peak = max(self.peak, self.active)
+        await asyncio.sleep(0.01)
+        self.active -= 1
+        return [NodeWithScore(node=TextNode(text=f"context of {query}"))]
+
+    async def asynthesize(self, query_bundle, nodes):
+        return Response(response=f"answer to {query_bundle.query_str}")
+
+
+class FakeIndex:
+    """Index whose query engine is a FakeQueryEngine."""
+
+    def __init__(self):
+        self.engine = FakeQueryEngine()
+        self.engine_kwargs = None
+
+    def as_query_engine(self, **kwargs):
+        self.engine_kwargs = kwargs
+        return self.engine
+
+
+class TestResponseCache:
+    """Tests for EvaluationRunner.rag_response caching."""
+
+    def test_second_run_makes_no_rag_calls(self, tmp_path, mock_settings):
+        """Test a fresh runner on the same index answers from the cache."""
+        first_index = FakeIndex()
+        first = EvaluationRunner(first_index, cache_dir=tmp_path, index_version="v1")
+        answer = asyncio.run(first.rag_response("What is a node?"))
+
+        second_index = FakeIndex()
+        second = EvaluationRunner(second_index, cache_dir=tmp_path, index_version="v1")
+        cached = asyncio.run(second.rag_response("What is a node?"))
+
+        assert second_index.engine.queries == []
+        assert second.counts["cache_hits"] == 1
+        assert cached["cached"] and not answer["cached"]
+        assert cached["retrieved_contexts"] == ["context of What is a node?"]
+        assert cached["response"] == answer["response"] == "answer to What is a node?"
+
+    def test_index_version_invalidates(self, tmp_path, mock_settings):
+        """Test a new index version misses the cache."""
+        runner = EvaluationRunner(FakeIndex(), cache_dir=tmp_path, index_version="v1")
+        asyncio.run(runner.rag_response("q"))
+
+        index = FakeIndex()
+        runner = EvaluationRunner(index, cache_dir=tmp_path, index_version="v2")
+        asyncio.run(runner.rag_response("q"))
+
+        assert index.engine.queries == ["q"]
+
+    def test_settings_invalidate(self, tmp_path, mock_settings):
+        """Test other retrieval filters or embedding models miss the cache."""
+        runner = EvaluationRunner(FakeIndex(), cache_dir=tmp_path, index_version="v1")
+        asyncio.run(runner.rag_response("q"))
+
+        filtered = FakeIndex()
+        where = {"language": "python"}
+        runner = EvaluationRunner(
+            filtered, cache_dir=tmp_path, index_version="v1", where=where
+        )
+        asyncio.run(runner.rag_response("q"))
+        Settings.embed_model = MockEmbedding(embed_dim=8, model_name="other")
+        other_model = FakeIndex()
+        runner = EvaluationRunner(other_model, cache_dir=tmp_path, index_version="v1")
+        asyncio.run(runner.rag_response("q"))
+
+        assert filtered.engine_kwargs
+        assert filtered.engine.queries == ["q"]
+        assert other_model.engine.queries == ["q"]
+
+    def test_cache_requires_index_version(self, tmp_path):
+        """Test caching without an index version is rejected."""
+        with pytest.raises(ValueError, match="index version"):
+            EvaluationRunner(FakeIndex(), cache_dir=tmp_path)
+
+    def test_index_version_tracks_writes(self, tmp_path):
+        """Test the index version changes when stored files change."""
+        (tmp_path / "chroma.sqlite3").write_bytes(b"a")
+        before = index_version(tmp_path)
+
+        (tmp_path / "chroma.sqlite3").write_bytes(b"ab")
+
+        assert index_version(tmp_path) != before
+        assert index_version(tmp_path) == index_version(str(tmp_path))
+
+
+class TestQueryMetrics:
+    """Tests for the latency and token accounting of RAG responses."""
+
+    def test_real_query_engine(self, mock_settings):
+        """Test a streamed answer records latency, tokens and context size."""
+        Settings.llm = MockLLM(max_tokens=6)
+        texts = ["Vehicles publish telemetry.", "The server sends heartbeats."]
+        index = VectorStoreIndex([TextNode(text=text) for text in texts])
+        runner = EvaluationRunner(index)
+
+        result = asyncio.run(runner.rag_response("How do vehicles talk?"))
+
+        assert result["response"].split() == ["text"] * 6
+        assert sorted(result["retrieved_contexts"]) == sorted(texts)
+        assert result["context_bytes"] == sum(len(text) for text in texts)
+        # Counted once, although MockLLM reports through two wrapping methods
+        assert 0 < result["completion_tokens"] <= 6
+        assert result["prompt_tokens"] > result["completion_tokens"]
+        assert 0 < result["ttft_s"] <= result["retrieval_s"] + result["synthesis_s"]
+
+    def test_cached_entry_keeps_metrics(self, tmp_path, mock_settings):
+        """Test cache hits report the metrics of the original query."""
+        runner = EvaluationRunner(FakeIndex(), cache_dir=tmp_path, index_version="v1")
+        answer = asyncio.run(runner.rag_response("q"))
+        cached = asyncio.run(runner.rag_response("q"))
+
+        assert cached["retrieval_s"] == answer["retrieval_s"] > 0
+        assert cached["ttft_s"] is None
+        assert cached["context_bytes"] == len("context of q")
+
+
+class TestConcurrency:
+    """Tests for the shared concurrency limit."""
+
+    def test_queries_and_metrics_share_limit(self, mock_settings):
+        """Test RAG queries and metric calls never exceed max_concurrency."""
+        index = FakeIndex()
+        runner = EvaluationRunner(index, max_concurrency=2)
+        active = {"now": 0, "peak": 0}
+
+        async def metric():
+            active["now"] += 1
+            active["peak"] = max(active["peak"], active["now"] + index.engine.active)
+            await asyncio.sleep(0.01)
+            active["now"] -= 1
+            return 1.0
+
+        async def row(i):
+            await runner.rag_response(f"q{i}")
+            return await asyncio.gather(*(runner.limited(metric()) for _ in range(4)))
+
+        async def run():
+            return await asyncio.gather(*(row(i) for i in range(6)))
+
+        scores = asyncio.run(run())
+
+        assert len(scores) == 6
+        assert index.engine.peak <= 2
+        assert active["peak"] <= 2
+        assert runner.counts == {"rag_calls": 6, "cache_hits": 0, "metric_calls": 24}
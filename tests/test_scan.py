@@ -0,0 +1,80 @@
+"""Tests for scan.py module."""
+
+import chromadb
+import numpy as np
+import pytest
+
+from fragmenter.rag.flat_store import FLAT_STORE_DIR, FlatVectorStore
+from fragmenter.rag.scan import iter_collection, open_collections
+from fragmenter.rag.stats import collect_stats, scan_stats
+
+
+@pytest.fixture
+def collection(temp_dir):
+    """A Chroma collection with 25 records of varying length."""
+    client = chromadb.PersistentClient(path=str(temp_dir / "chroma_db"))
+    collection = client.get_or_create_collection("documents")
+    collection.add(
+        ids=[f"id-{i}" for i in range(25)],
+        embeddings=np.random.default_rng(0).normal(size=(25, 4)).tolist(),
+        documents=["x" * (i * 40) or "-" for i in range(25)],
+        metadatas=[
+            {"relative_path": f"src/f{i % 7}.py", "repository": "alpha"}
+            for i in range(25)
+        ],
+    )
+    return collection
+
+
+class TestIterCollection:
+    """Tests for iter_collection function."""
+
+    def test_pages_are_bounded(self, collection):
+        """Test every record is yielded once, in pages of at most page_size."""
+        pages = list(iter_collection(collection, embeddings=True, page_size=10))
+
+        assert [len(page["ids"]) for page in pages] == [10, 10, 5]
+        assert len({i for page in pages for i in page["ids"]}) == 25
+        assert pages[0]["embeddings"].dtype == np.float32
+        assert pages[0]["embeddings"].shape == (10, 4)
+        assert pages[0]["lengths"].dtype == np.int64
+
+    def test_payload_is_optional(self, collection):
+        """Test documents and metadata are only fetched when requested."""
+        page = next(iter_collection(collection, documents=False, metadatas=False))
+
+        assert set(page) == {"ids"}
+
+    def test_scan_stats_matches_in_memory(self, collection):
+        """Test page-wise statistics equal a single pass over all records."""
+        data = collection.get(include=["documents", "metadatas"])
+        records = list(zip(data["documents"], data["metadatas"], strict=True))
+
+        scanned = scan_stats(iter_collection(collection, page_size=4))
+
+        assert scanned == collect_stats(records)
+        assert scanned["files"] == 7
+
+
+class TestOpenCollections:
+    """Tests for open_collections function."""
+
+    def test_chroma(self, collection, temp_dir):
+        """Test an unsharded Chroma index opens its documents collection."""
+        assert open_collections(temp_dir)[""].count() == 25
+
+    def test_flat(self, temp_dir):
+        """Test a flat index opens its store, which pages like Chroma."""
+        FlatVectorStore(persist_dir=temp_dir / FLAT_STORE_DIR).save_to(
+            temp_dir / FLAT_STORE_DIR
+        )
+
+        store = open_collections(temp_dir)[""]
+
+        assert isinstance(store, FlatVectorStore)
+        assert list(iter_collection(store)) == []
+
+    def test_missing(self, temp_dir):
+        """Test a directory without an index is rejected."""
+        with pytest.raises(ValueError, match="No index"):
+            open_collections(temp_dir)
@@ -0,0 +1,192 @@
+"""Tests for server.py module."""
+
+import http.client
+import json
+import threading
+import urllib.error
+import urllib.request
+from types import SimpleNamespace
+from unittest.mock import MagicMock
+
+import pytest
+from llama_index.core.schema import NodeWithScore, TextNode
+
+from fragmenter.rag.server import RAGServer
+
+
+def _source_nodes():
+    return [
+        NodeWithScore(
+            node=TextNode(text="int main() {}", metadata={"file_type": ".cpp"}),
+            score=0.9,
+        ),
+        NodeWithScore(node=TextNode(text="# Docs"), score=0.5),
+    ]
+
+
+@pytest.fixture
+def fake_index():
+    """Duck-typed index returning canned retrieval and query results."""
+    index = MagicMock()
+    index.as_retriever.return_value.retrieve.return_value = _source_nodes()
+
+    def as_query_engine(streaming=False, **kwargs):
+        engine = MagicMock()
+        text = "Answer:\n```cpp\nint x;\n```\n"
+        if streaming:
+            engine.query.return_value = SimpleNamespace(
+                response_gen=iter(["Answer:\n", "```cpp\nint x;\n```\n"]),
+                source_nodes=_source_nodes(),
+            )
+        else:
+            response = MagicMock()
+            response.__str__.return_value = text
+            response.source_nodes = _source_nodes()
+            engine.query.return_value = response
+        return engine
+
+    index.as_query_engine.side_effect = as_query_engine
+    return index
+
+
+@pytest.fixture
+def server(fake_index):
+    """Run a RAGServer on a free port for the duration of a test."""
+    srv = RAGServer(fake_index, port=0, default_top_k=3)
+    thread = threading.Thread(target=srv.serve_forever, daemon=True)
+    thread.start()
+    yield srv
+    srv.shutdown()
+    srv.server_close()
+
+
+def _url(srv, path):
+    host, port = srv.server_address[:2]
+    return f"http://{host}:{port}{path}"
+
+
+def _post(srv, path, payload):
+    request = urllib.request.Request(
+        _url(srv, path),
+        data=json.dumps(payload).encode(),
+        headers={"Content-Type": "application/json"},
+    )
+    return urllib.request.urlopen(request, timeout=5)
+
+
+class TestRAGServer:
+    """Tests for the HTTP endpoints of RAGServer."""
+
+    def test_health(self, server):
+        """Test the health endpoint."""
+        with urllib.request.urlopen(_url(server, "/health"), timeout=5) as resp:
+            body = json.load(resp)
+
+        assert body["status"] == "ok"
+        assert body["default_top_k"] == 3
+
+    def test_retrieve_uses_default_top_k(self, server, fake_index):
+        """Test retrieval returns ranked nodes with the default top_k."""
+        with _post(server, "/retrieve", {"query": "main"}) as resp:
+            body = json.load(resp)
+
+        fake_index.as_retriever.assert_called_with(similarity_top_k=3)
+        assert [n["rank"] for n in body["nodes"]] == [1, 2]
+
+    def test_query_json(self, server):
+        """Test non-streaming query with code extraction."""
+        payload = {"query": "q", "code_only": True, "language": "cpp"}
+        with _post(server, "/query", payload) as resp:
+            body = json.load(resp)
+
+        assert body["response"].startswith("Answer:")
+        assert body["code_blocks"] == ["int x;\n"]
+        assert len(body["source_nodes"]) == 2
+
+    def test_query_stream(self, server):
+        """Test streaming query emits token events followed by a done event."""
+        with _post(server, "/query", {"query": "q", "stream": True}) as resp:
+            assert resp.headers["Content-Type"] == "application/x-ndjson"
+            events = [json.loads(line) for line in resp.read().splitlines()]
+
+        assert [e["type"] for e in events] == ["token", "token", "done"]
+        assert events[-1]["response"] == "Answer:\n```cpp\nint x;\n```\n"
+
+    def test_missing_query_is_bad_request(self, server):
+        """Test that a body without a query is rejected."""
+        with pytest.raises(urllib.error.HTTPError) as exc_info:
+            _post(server, "/query", {"stream": True})
+
+        assert exc_info.value.code == 400
+
+    def test_retrieve_with_where(self, server, fake_index):
+        """Test that where clauses are pushed down to the vector store."""
+        payload = {"query": "main", "where": ["repository=a"]}
+        with _post(server, "/retrieve", payload) as resp:
+            json.load(resp)
+
+        fake_index.as_retriever.assert_called_with(
+            similarity_top_k=3,
+            vector_store_kwargs={"where": {"repository": {"$eq": "a"}}},
+        )
+
+    def test_invalid_where_is_bad_request(self, server):
+        """Test that unknown filter keys are rejected."""
+        with pytest.raises(urllib.error.HTTPError) as exc_info:
+            _post(server, "/retrieve", {"query": "q", "where": ["lang=cpp"]})
+
+        assert exc_info.value.code == 400
+
+    @pytest.mark.parametrize("top_k", ["5", 0, 2.5, True])
+    def test_invalid_top_k_is_bad_request(self, server, top_k):
+        """Test that a top_k other than a positive integer is rejected."""
+        payload = {"query": "q", "top_k": top_k}
+        with pytest.raises(urllib.error.HTTPError) as exc_info:
+            _post(server, "/retrieve", payload)
+
+        assert exc_info.value.code == 400
+
+    def test_stream_failure_ends_body(self, server, fake_index):
+        """Test an error mid-stream ends the chunked body and the connection."""
+
+        def failing_tokens():
+            yield "Answer:"
+            raise RuntimeError("LLM went away")
+
+        engine = MagicMock()
+        engine.query.return_value = SimpleNamespace(
+            response_gen=failing_tokens(), source_nodes=[]
+        )
+        fake_index.as_query_engine.side_effect = None
+        fake_index.as_query_engine.return_value = engine
+
+        with _post(server, "/query", {"query": "q", "stream": True}) as resp:
+            events = [json.loads(line) for line in resp.read().splitlines()]
+
+        assert [e["type"] for e in events] == ["token", "error"]
+        assert events[-1]["error"] == "LLM went away"
+
+    def test_keep_alive_reports_errors_after_stream(self, server, fake_index):
+        """Test a failure after a streamed response on the same connection is a 500."""
+        host, port = server.server_address[:2]
+        connection = http.client.HTTPConnection(host, port, timeout=5)
+        headers = {"Content-Type": "application/json"}
+
+        connection.request(
+            "POST", "/query", json.dumps({"query": "q", "stream": True}), headers
+        )
+        connection.getresponse().read()
+        fake_index.as_retriever.side_effect = RuntimeError("store closed")
+        connection.request("POST", "/retrieve", json.dumps({"query": "q"}), headers)
+        response = connection.getresponse()
+
+        assert response.status == 500
+        assert json.load(response)["error"] == "store closed"
+        connection.close()
+
+    def test_unknown_path(self, server):
+        """Test that unknown endpoints return 404."""
+        with pytest.raises(urllib.error.HTTPError) as exc_info:
+            _post(server, "/nope", {"query": "q"})
+
+        assert exc_info.value.code == 404
@@ -0,0 +1,152 @@
+"""Tests for sharding.py module."""
+
+import json
+import re
+
+import pytest
+
+from fragmenter.rag.inference import load_index, retrieve
+from fragmenter.rag.instrumentation import REPORT_FILE
+from fragmenter.rag.sharding import (
+    UNSCOPED_SHARD,
+    ShardedIndex,
+    build_sharded_index,
+    collection_name_for,
+    is_sharded,
+    load_registry,
+    shards_for_where,
+)
+
+
+@pytest.fixture
+def multi_repo(temp_dir):
+    """Create a data directory with two repositories and a loose document."""
+    data_dir = temp_dir / "data"
+    for name in ("alpha", "beta"):
+        repo = data_dir / name
+        (repo / ".git").mkdir(parents=True)
+        (repo / "src").mkdir()
+        (repo / "src" / "main.py").write_text(
+            f"def {name}():\n    return '{name}'\n\n" * 10
+        )
+    (data_dir / "notes.md").write_text("# Notes\n\nShared notes.\n\n" * 10)
+    return data_dir
+
+
+class TestCollectionNames:
+    """Tests for collection_name_for function."""
+
+    @pytest.mark.parametrize("key", ["repo", "my repo!", "ünïcode", "a" * 100, "--"])
+    def test_valid_chroma_name(self, key):
+        """Test names only use Chroma-safe characters and are stable."""
+        name = collection_name_for(key)
+
+        assert re.fullmatch(r"[a-zA-Z0-9][a-zA-Z0-9_-]{1,61}[a-zA-Z0-9]", name)
+        assert name == collection_name_for(key)
+
+    def test_similar_keys_do_not_collide(self):
+        """Test keys that slugify identically get different names."""
+        assert collection_name_for("my repo") != collection_name_for("my-repo")
+
+
+class TestShardsForWhere:
+    """Tests for shards_for_where function."""
+
+    KEYS = ["alpha", "beta", UNSCOPED_SHARD]
+
+    def test_no_filter_queries_all(self):
+        """Test that all shards are queried without a filter."""
+        assert shards_for_where(None, self.KEYS) == self.KEYS
+
+    def test_repository_eq(self):
+        """Test a single repository selects one shard."""
+        where = {"repository": {"$eq": "beta"}}
+        assert shards_for_where(where, self.KEYS) == ["beta"]
+
+    def test_repository_in_within_and(self):
+        """Test repository clauses inside $and prune shards."""
+        where = {
+            "$and": [
+                {"repository": {"$in": ["alpha", "gamma"]}},
+                {"is_code": {"$eq": True}},
+            ]
+        }
+        assert shards_for_where(where, self.KEYS) == ["alpha"]
+
+    def test_other_filters_do_not_prune(self):
+        """Test non-repository filters are left to each shard."""
+        where = {"file_type": {"$eq": ".py"}}
+        assert shards_for_where(where, self.KEYS) == self.KEYS
+
+
+class TestBuildShardedIndex:
+    """Tests for building and querying a sharded index."""
+
+    def test_one_shard_per_repository(self, multi_repo, temp_dir, mock_settings):
+        """Test repositories and loose files end up in separate shards."""
+        storage = temp_dir / "store"
+
+        index = build_sharded_index(multi_repo, storage, num_workers=1)
+
+        assert is_sharded(storage)
+        registry = load_registry(storage)
+        assert set(registry) == {"alpha", "beta", UNSCOPED_SHARD}
+        assert all(entry["nodes"] > 0 for entry in registry.values())
+        assert isinstance(index, ShardedIndex)
+
+    def test_build_report_sums_shards(self, multi_repo, temp_dir, mock_settings):
+        """Test the build report counts the embedded nodes of all shards."""
+        storage = temp_dir / "store"
+
+        build_sharded_index(multi_repo, storage, num_workers=1)
+        stages = json.loads((storage / REPORT_FILE).read_text())["stages"]
+
+        nodes = sum(entry["nodes"] for entry in load_registry(storage).values())
+        assert stages["embed"]["items"] == stages["upsert"]["items"] == nodes
+        assert stages["parse"]["items"] == 3
+
+    def test_single_shard_rebuild(self, multi_repo, temp_dir, mock_settings):
+        """Test rebuilding one shard leaves the others untouched."""
+        storage = temp_dir / "store"
+        build_sharded_index(multi_repo, storage, num_workers=1)
+        before = load_registry(storage)
+
+        (multi_repo / "alpha" / "src" / "extra.py").write_text(
+            "def extra():\n    return 1\n\n" * 10
+        )
+        build_sharded_index(multi_repo, storage, shards=["alpha"], num_workers=1)
+        after = load_registry(storage)
+
+        assert after["alpha"]["nodes"] > before["alpha"]["nodes"]
+        assert after["beta"] == before["beta"]
+        assert after[UNSCOPED_SHARD] == before[UNSCOPED_SHARD]
+
+    def test_full_rebuild_drops_removed_repository(
+        self, multi_repo, temp_dir, mock_settings
+    ):
+        """Test a repository removed from the data dir loses its shard."""
+        storage = temp_dir / "store"
+        build_sharded_index(multi_repo, storage, num_workers=1)
+
+        for path in sorted((multi_repo / "beta").rglob("*"), reverse=True):
+            path.unlink() if path.is_file() else path.rmdir()
+        (multi_repo / "beta").rmdir()
+        build_sharded_index(multi_repo, storage, num_workers=1)
+
+        assert set(load_registry(storage)) == {"alpha", UNSCOPED_SHARD}
+
+    def test_federated_retrieve(self, multi_repo, temp_dir, mock_settings):
+        """Test load_index detects shards and merges results across them."""
+        storage = temp_dir / "store"
+        build_sharded_index(multi_repo, storage, num_workers=1)
+        index = load_index(str(storage))
+
+        merged = retrieve(index, "function", top_k=3)
+        scoped = retrieve(
+            index, "function", top_k=10, where={"repository": {"$eq": "beta"}}
+        )
+
+        assert len(merged) == 3
+        assert [n["rank"] for n in merged] == [1, 2, 3]
+        assert scoped
+        assert {n["metadata"]["repository"] for n in scoped} == {"beta"}
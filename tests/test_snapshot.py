@@ -0,0 +1,146 @@
+"""Tests for snapshot.py module."""
+
+import json
+
+import numpy as np
+import pytest
+from llama_index.core.schema import NodeRelationship, RelatedNodeInfo, TextNode
+
+from fragmenter.rag.flat_store import FLAT_STORE_DIR, FlatVectorStore, is_flat_store
+from fragmenter.rag.inference import load_index, retrieve
+from fragmenter.rag.ingestion import build_index
+from fragmenter.rag.snapshot import (
+    Snapshot,
+    export_index,
+    import_index,
+    is_snapshot,
+    open_snapshot,
+)
+from fragmenter.rag.vector_stores import detect_vector_store
+
+
+@pytest.fixture
+def indexed_repo(git_repo):
+    """A git repository with some code and documentation."""
+    (git_repo / "src" / "main.py").write_text("def main():\n    pass\n\n" * 20)
+    (git_repo / "README.md").write_text("# Project\n\nSome documentation.\n" * 10)
+    return git_repo
+
+
+def _flat_index(persist_dir, count=50, dim=16):
+    rng = np.random.default_rng(0)
+    nodes = []
+    for i in range(count):
+        node = TextNode(
+            id_=f"node-{i}", text=f"chunk {i}", embedding=rng.normal(size=dim).tolist()
+        )
+        node.relationships[NodeRelationship.SOURCE] = RelatedNodeInfo(
+            node_id=f"doc-{i // 10}"
+        )
+        nodes.append(node)
+    store = FlatVectorStore(persist_dir=persist_dir / FLAT_STORE_DIR)
+    store.add(nodes)
+    store.persist()
+
+
+def _retrieved_ids(persist_dir):
+    nodes = retrieve(load_index(str(persist_dir)), "main", top_k=3)
+    return sorted(n["node_id"] for n in nodes)
+
+
+class TestExportImport:
+    """Tests for exporting an index and serving or importing the snapshot."""
+
+    @pytest.mark.parametrize("backend", ["chroma", "flat"])
+    def test_round_trip(self, indexed_repo, temp_dir, mock_settings, backend):
+        """Test served and imported snapshots return the same chunks as the index."""
+        storage = temp_dir / "store"
+        build_index(indexed_repo, storage, backend=backend, num_workers=1)
+        snapshot = temp_dir / "index.fragidx"
+
+        header = export_index(storage, snapshot, embedding={"model": "mock"})
+        import_index(snapshot, temp_dir / "imported")
+
+        assert is_snapshot(snapshot)
+        assert header["count"] == load_index(str(storage)).vector_store.client.count()
+        assert _retrieved_ids(snapshot) == _retrieved_ids(storage)
+        assert _retrieved_ids(temp_dir / "imported") == _retrieved_ids(storage)
+        assert (temp_dir / "imported" / "docstore.json").exists()
+
+    def test_import_into_chroma(self, indexed_repo, temp_dir, mock_settings):
+        """Test a snapshot can be bulk-loaded into a Chroma collection."""
+        storage = temp_dir / "store"
+        build_index(indexed_repo, storage, num_workers=1)
+        snapshot = temp_dir / "index.fragidx"
+        export_index(storage, snapshot)
+
+        count = import_index(snapshot, temp_dir / "imported", backend="chroma")
+
+        assert detect_vector_store(temp_dir / "imported") == "chroma"
+        assert count > 0
+        assert _retrieved_ids(temp_dir / "imported") == _retrieved_ids(storage)
+
+    def test_compressed_export(self, temp_dir):
+        """Test a float16 export keeps the sections memory-mapped and aligned."""
+        _flat_index(temp_dir / "store", count=300)
+        snapshot = temp_dir / "index.fragidx"
+
+        export_index(temp_dir / "store", snapshot, dtype="float16")
+        served = open_snapshot(snapshot)
+
+        assert isinstance(served._vectors, np.memmap)
+        assert served._vectors.dtype == np.float16
+        assert served.get(ids=["node-299"])["documents"] == ["chunk 299"]
+        assert all(
+            section["offset"] % 64 == 0
+            for section in Snapshot(snapshot).sections.values()
+        )
+
+
+class TestSnapshotSafety:
+    """Tests for integrity checks and read-only serving."""
+
+    @pytest.fixture
+    def snapshot(self, temp_dir):
+        """A snapshot of a flat index holding 50 random nodes."""
+        _flat_index(temp_dir / "store")
+        path = temp_dir / "index.fragidx"
+        export_index(temp_dir / "store", path)
+        return path
+
+    def test_corruption_is_detected(self, snapshot, temp_dir):
+        """Test a flipped byte in a section fails verification and import."""
+        reader = Snapshot(snapshot)
+        position = reader._data_offset + reader.sections["vectors"]["offset"]
+        data = bytearray(snapshot.read_bytes())
+        data[position] ^= 0xFF
+        snapshot.write_bytes(bytes(data))
+
+        with pytest.raises(ValueError, match="corrupt"):
+            import_index(snapshot, temp_dir / "imported")
+        assert not is_flat_store(temp_dir / "imported")
+
+    def test_served_snapshot_is_read_only(self, snapshot):
+        """Test a memory-mapped snapshot rejects modifications."""
+        served = open_snapshot(snapshot)
+
+        with pytest.raises(ValueError, match="read-only"):
+            served.delete("doc-0")
+
+    def test_import_refuses_non_empty_target(self, snapshot, temp_dir):
+        """Test importing never overwrites an existing directory."""
+        target = temp_dir / "existing"
+        target.mkdir()
+        (target / "notes.txt").write_text("keep me")
+
+        with pytest.raises(ValueError, match="not empty"):
+            import_index(snapshot, target)
+
+    def test_not_a_snapshot(self, temp_dir):
+        """Test other files are rejected with a clear error."""
+        path = temp_dir / "index.json"
+        path.write_text(json.dumps({}))
+
+        assert not is_snapshot(path)
+        with pytest.raises(ValueError, match="Not an index snapshot"):
+            Snapshot(path)
@@ -0,0 +1,41 @@
+"""Tests for state.py module."""
+
+import json
+
+from fragmenter.scraping.state import STATE_VERSION, CrawlState
+
+
+class TestCrawlState:
+    """Tests for CrawlState class."""
+
+    def test_round_trip_and_conditional_headers(self, temp_dir):
+        """Test saved validators come back as conditional request headers."""
+        state = CrawlState(temp_dir / "state")
+        state.update(
+            "https://example.com/a",
+            etag='"abc"',
+            last_modified="Wed, 21 Oct 2026 07:28:00 GMT",
+            links=["https://example.com/b"],
+        )
+        state.save()
+
+        loaded = CrawlState.load(temp_dir / "state")
+
+        assert loaded.get("https://example.com/a")["fetched_at"]
+        assert loaded.conditional_headers("https://example.com/a") == {
+            "If-None-Match": '"abc"',
+            "If-Modified-Since": "Wed, 21 Oct 2026 07:28:00 GMT",
+        }
+        assert loaded.conditional_headers("https://example.com/new") == {}
+        assert [path.name for path in temp_dir.iterdir()] == ["state"]
+
+    def test_unusable_files_give_empty_state(self, temp_dir):
+        """Test corrupt files and other versions are ignored."""
+        (temp_dir / "corrupt").write_text("{not json")
+        (temp_dir / "old").write_text(
+            json.dumps({"version": STATE_VERSION + 1, "pages": {"u": {}}})
+        )
+
+        assert CrawlState.load(temp_dir / "corrupt").pages == {}
+        assert CrawlState.load(temp_dir / "old").pages == {}
+        assert CrawlState.load(temp_dir / "missing").pages == {}
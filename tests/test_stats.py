@@ -0,0 +1,84 @@
+"""Tests for stats.py module."""
+
+import pytest
+
+from fragmenter.rag.ingestion import build_index
+from fragmenter.rag.stats import (
+    STATS_FILE,
+    collect_stats,
+    load_stats,
+    merge_stats,
+    save_stats,
+)
+from fragmenter.tools.inspect_index import load_index_stats, recompute_index_stats
+
+
+def _record(text, path, repository="alpha", **metadata):
+    return text, {
+        "relative_path": path,
+        "repository": repository,
+        "file_type": path.rsplit(".", 1)[-1],
+        "depth": path.count("/"),
+        **metadata,
+    }
+
+
+RECORDS = [
+    _record("x" * 600, "src/a.py", is_code=True),
+    _record("y" * 20, "src/a.py", is_code=True),
+    _record("z" * 1200, "docs/guide.md", is_documentation=True),
+    _record("w" * 5000, "README.md", repository="beta", is_documentation=True),
+]
+
+
+class TestCollectStats:
+    """Tests for collect_stats and merge_stats functions."""
+
+    def test_counts_and_histogram(self):
+        """Test totals, extremes, histogram and distributions."""
+        stats = collect_stats(RECORDS)
+
+        assert stats["chunks"] == 4
+        assert stats["files"] == 3
+        assert stats["total_chars"] == 6820
+        assert stats["length_histogram"] == [1, 1, 1, 0, 0, 0, 1]
+        assert stats["min_chunk"]["length"] == 20
+        assert stats["max_chunk"]["file"] == "README.md"
+        assert (stats["code_chunks"], stats["doc_chunks"]) == (2, 2)
+        assert stats["repositories"] == {"alpha": 3, "beta": 1}
+        assert stats["depths"] == {"1": 3, "0": 1}
+        assert stats["directories"] == {"src": 1, "docs": 1, ".": 1}
+        assert stats["small_chunks"] == 1
+
+    def test_merge_equals_single_pass(self):
+        """Test merging per-shard manifests matches one pass over all records."""
+        merged = merge_stats([collect_stats(RECORDS[:3]), collect_stats(RECORDS[3:])])
+
+        assert merged == collect_stats(RECORDS)
+
+    def test_outdated_manifest_is_ignored(self, temp_dir):
+        """Test a manifest with another format version is treated as missing."""
+        save_stats(temp_dir, {**collect_stats(RECORDS), "version": 0})
+
+        assert load_stats(temp_dir) is None
+
+
+class TestIndexStats:
+    """Tests for the manifest written by build_index and read by inspect-index."""
+
+    @pytest.mark.parametrize("backend", ["chroma", "flat"])
+    def test_build_writes_manifest(self, git_repo, temp_dir, mock_settings, backend):
+        """Test the manifest written at build time matches a full scan."""
+        (git_repo / "src" / "main.py").write_text("def main():\n    pass\n\n" * 20)
+        storage = temp_dir / "store"
+        build_index(git_repo, storage, backend=backend, num_workers=1)
+
+        built = load_index_stats(storage)
+        (storage / STATS_FILE).unlink()
+        scanned = recompute_index_stats(storage)
+
+        assert built["chunks"] > 0
+        for stats in (built, scanned):
+            stats.pop("updated_at", None)
+        assert built == scanned
+        assert (storage / STATS_FILE).exists()
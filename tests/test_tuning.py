@@ -0,0 +1,185 @@
+"""Tests for tuning.py module."""
+
+import uuid
+
+import chromadb
+import numpy as np
+import pytest
+
+from fragmenter.rag.tuning import (
+    choose_setting,
+    exact_top_k,
+    rebuild_collection,
+    tune_collection,
+)
+from fragmenter.rag.vector_stores import get_or_create_collection
+
+
+@pytest.fixture
+def client(temp_dir):
+    """Persistent Chroma client in a temporary directory."""
+    return chromadb.PersistentClient(path=str(temp_dir / "chroma_db"))
+
+
+@pytest.fixture
+def vectors():
+    """Random vectors standing in for stored embeddings."""
+    return np.random.default_rng(42).normal(size=(300, 16)).astype(np.float32)
+
+
+def _fill(collection, vectors):
+    collection.add(
+        ids=[f"n{i}" for i in range(len(vectors))],
+        embeddings=vectors,
+        documents=[f"doc {i}" for i in range(len(vectors))],
+        metadatas=[{"i": i} for i in range(len(vectors))],
+    )
+    return collection
+
+
+class TestExactTopK:
+    """Tests for exact_top_k function."""
+
+    @pytest.mark.parametrize("space", ["l2", "cosine", "ip"])
+    def test_matches_brute_force(self, vectors, space):
+        """Test rankings match a direct distance computation."""
+        queries = vectors[:5]
+        if space == "l2":
+            dist = ((queries[:, None, :] - vectors[None, :, :]) ** 2).sum(-1)
+        elif space == "cosine":
+            normed = vectors / np.linalg.norm(vectors, axis=1, keepdims=True)
+            dist = 1 - normed[:5] @ normed.T
+        else:
+            dist = 1 - queries @ vectors.T
+
+        result = exact_top_k(vectors, queries, k=7, space=space)
+
+        np.testing.assert_array_equal(result, np.argsort(dist, axis=1)[:, :7])
+
+    def test_k_larger_than_collection(self, vectors):
+        """Test k is capped at the number of vectors."""
+        assert exact_top_k(vectors[:3], vectors[:1], k=10).shape == (1, 3)
+
+
+class TestTuneCollection:
+    """Tests for tune_collection and choose_setting functions."""
+
+    def test_grid_results(self, client, vectors):
+        """Test every grid point is measured and high ef_search gives recall."""
+        collection = _fill(client.create_collection("docs"), vectors)
+
+        results = tune_collection(
+            collection,
+            m_grid=[8, 16],
+            construction_ef_grid=[100],
+            search_ef_grid=[10, 200],
+            top_k=5,
+            num_queries=20,
+        )
+
+        assert len(results) == 4
+        assert all(r["space"] == "l2" for r in results)
+        assert max(r["recall"] for r in results if r["ef_search"] == 200) >= 0.95
+        # The tuned collection itself is untouched
+        assert collection.configuration["hnsw"]["max_neighbors"] == 16
+
+    def test_empty_collection(self, client):
+        """Test tuning an empty collection is rejected."""
+        with pytest.raises(ValueError, match="empty"):
+            tune_collection(client.create_collection("empty"))
+
+    def test_queries_are_held_out(self, client, vectors):
+        """Test queries are held out, so a query never ties with itself in the truth."""
+        # Every vector twice: a held-out query's only exact match is its twin.
+        # Seed 0 holds out no pair completely, which would leave a query
+        # tied between a neighbor and that neighbor's twin. A query left in
+        # the searched set ties with its twin instead and halves the recall.
+        collection = _fill(client.create_collection("docs"), np.repeat(vectors, 2, 0))
+
+        results = tune_collection(
+            collection,
+            m_grid=[16],
+            construction_ef_grid=[100],
+            search_ef_grid=[200],
+            top_k=1,
+            num_queries=25,
+            seed=0,
+        )
+
+        assert results[0]["recall"] >= 0.95
+        with pytest.raises(ValueError, match="too small"):
+            tune_collection(_fill(client.create_collection("one"), vectors[:1]))
+
+    def test_choose_fastest_meeting_target(self):
+        """Test the fastest setting above the recall target is chosen."""
+        results = [
+            {"recall": 0.99, "p50_ms": 2.0, "p99_ms": 3.0},
+            {"recall": 0.96, "p50_ms": 1.0, "p99_ms": 2.0},
+            {"recall": 0.80, "p50_ms": 0.5, "p99_ms": 1.0},
+        ]
+
+        assert choose_setting(results, target_recall=0.95) is results[1]
+        assert choose_setting(results, target_recall=0.999) is results[0]
+
+
+class TestRebuildCollection:
+    """Tests for rebuild_collection function."""
+
+    def test_rebuild_keeps_records(self, client, vectors):
+        """Test the rebuilt collection keeps ids, vectors, documents, metadata."""
+        _fill(client.create_collection("docs"), vectors)
+        hnsw = {"max_neighbors": 32, "ef_construction": 150, "ef_search": 60}
+
+        rebuilt = rebuild_collection(client, "docs", hnsw)
+
+        assert [c.name for c in client.list_collections()] == ["docs"]
+        config = rebuilt.configuration["hnsw"]
+        assert (config["max_neighbors"], config["ef_search"]) == (32, 60)
+        record = rebuilt.get(ids=["n7"], include=["embeddings", "documents"])
+        assert record["documents"] == ["doc 7"]
+        np.testing.assert_allclose(record["embeddings"][0], vectors[7])
+        assert rebuilt.count() == len(vectors)
+
+    def test_failed_swap_keeps_original(self, client, vectors, monkeypatch):
+        """Test the original survives under its name if the copy cannot take it."""
+        _fill(client.create_collection("docs"), vectors)
+        modify = chromadb.Collection.modify
+
+        def failing_modify(self, name=None, **kwargs):
+            if self.name == "docs-rebuild" and name == "docs":
+                raise RuntimeError("rename failed")
+            return modify(self, name=name, **kwargs)
+
+        monkeypatch.setattr(chromadb.Collection, "modify", failing_modify)
+
+        with pytest.raises(RuntimeError, match="rename failed"):
+            rebuild_collection(client, "docs", {"max_neighbors": 32})
+
+        assert client.get_collection("docs").count() == len(vectors)
+
+
+class TestGetOrCreateCollection:
+    """Tests for HNSW handling in get_or_create_collection."""
+
+    def test_new_collection_uses_settings(self, client):
+        """Test a new collection is created with the given settings."""
+        name = f"c-{uuid.uuid4().hex[:8]}"
+        hnsw = {"space": "cosine", "max_neighbors": 24}
+
+        collection = get_or_create_collection(client, name, hnsw)
+
+        assert collection.configuration["hnsw"]["space"] == "cosine"
+        assert collection.configuration["hnsw"]["max_neighbors"] == 24
+
+    def test_existing_collection_updates_search_ef(self, client):
+        """Test ef_search is changed in place on an existing collection."""
+        client.create_collection("docs")
+
+        get_or_create_collection(client, "docs", {"ef_search": 42})
+
+        assert client.get_collection("docs").configuration["hnsw"]["ef_search"] == 42
+
+    def test_invalid_space(self, client):
+        """Test unknown distance functions are rejected."""
+        with pytest.raises(ValueError, match="space"):
+            get_or_create_collection(client, "docs", {"space": "manhattan"})